@@ -16,6 +16,7 @@ from .base import (
     AdapterResponse,
     AdapterError,
 )
+from app.services.session_store import Session, SessionStore
 
 logger = structlog.get_logger()
 
@@ -402,28 +403,51 @@ class VoiceSession:
     - Call progress
     - Menu navigation
     - Conversation history
+    
+    State lives in a session-store ``Session`` so a call survives instance
+    restarts (``load``/``save``) and its history is trimmed to the store's
+    token budget.
     """
     
-    def __init__(self, call_sid: str, salon_id: str):
+    def __init__(self, call_sid: str, salon_id: str, session: Optional[Session] = None):
         self.call_sid = call_sid
         self.salon_id = salon_id
-        self.state = "greeting"
-        self.history: List[Dict[str, str]] = []
-        self.menu_stack: List[str] = []
-        self.start_time = datetime.utcnow()
+        self._session = session or Session(session_id=self.session_key(call_sid))
+        saved = self._session.state
+        self.state = saved.get("state", "greeting")
+        self.menu_stack: List[str] = list(saved.get("menu_stack", []))
+        self.start_time = (
+            datetime.fromisoformat(saved["start_time"]) if "start_time" in saved else datetime.utcnow()
+        )
+    
+    @staticmethod
+    def session_key(call_sid: str) -> str:
+        """Store key; matches the adapter's conversation_id."""
+        return f"voice_{call_sid}"
+    
+    @property
+    def history(self) -> List[Dict[str, str]]:
+        return self._session.history()
+    
+    @classmethod
+    async def load(cls, store: SessionStore, call_sid: str, salon_id: str) -> "VoiceSession":
+        """Resume a call from the session store (or start a new one)."""
+        return cls(call_sid, salon_id, await store.get(cls.session_key(call_sid)))
+    
+    async def save(self, store: SessionStore) -> None:
+        """Persist call state and history."""
+        self._session.state = {
+            "salon_id": self.salon_id,
+            "state": self.state,
+            "menu_stack": self.menu_stack,
+            "start_time": self.start_time.isoformat(),
+        }
+        await store.save(self._session)
     
     def add_interaction(self, user_input: str, response: str) -> None:
         """Add an interaction to history."""
-        self.history.append({
-            "role": "user",
-            "content": user_input,
-            "timestamp": datetime.utcnow().isoformat()
-        })
-        self.history.append({
-            "role": "assistant",
-            "content": response,
-            "timestamp": datetime.utcnow().isoformat()
-        })
+        self._session.append("user", user_input)
+        self._session.append("assistant", response)
     
     def get_context(self) -> Dict[str, Any]:
         """Get session context."""
@@ -431,6 +455,6 @@ class VoiceSession:
             "call_sid": self.call_sid,
             "salon_id": self.salon_id,
             "state": self.state,
-            "history": self.history[-10:],  # Last 10 interactions
+            "history": self._session.history(limit=10),  # Last 10 messages
             "duration_seconds": (datetime.utcnow() - self.start_time).total_seconds()
         }
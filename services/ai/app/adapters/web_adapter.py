@@ -3,10 +3,12 @@
 Handles requests from the frontend PWAs (Owner, Manager, Staff, Client).
 Normalizes HTTP requests to the common AdapterRequest format.
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 import structlog
 from datetime import datetime
 
+from app.services.streaming import StreamEvent, chunk_event, done_event, replay_chunks
+
 from .base import (
     BaseAdapter,
     ChannelType,
@@ -273,23 +275,33 @@ class StreamingWebAdapter(WebAdapter):
             response: Response to stream
             chunk_callback: Async callback for each chunk
         """
-        # Stream the message in chunks
-        message = response.message
-        chunk_size = 20  # Characters per chunk
-        
-        for i in range(0, len(message), chunk_size):
-            chunk = message[i:i + chunk_size]
-            await chunk_callback({
-                "type": "chunk",
-                "content": chunk,
-                "done": i + chunk_size >= len(message)
-            })
+        # Replay a complete response in chunks
+        for chunk in replay_chunks(response.message):
+            await chunk_callback(chunk_event(chunk))
         
         # Send final metadata
-        await chunk_callback({
-            "type": "done",
-            "metadata": {
-                "agent": response.agent_used,
-                "cached": response.cached
-            }
-        })
+        await chunk_callback(done_event(
+            agent=response.agent_used,
+            cached=response.cached
+        ))
+    
+    async def relay_stream(
+        self,
+        events: AsyncIterator[StreamEvent],
+        chunk_callback: callable
+    ) -> str:
+        """Forward live stream events (e.g. ``agent.generate_stream``).
+        
+        Args:
+            events: Stream events from an agent or the pipeline
+            chunk_callback: Async callback for each event
+            
+        Returns:
+            The full response text
+        """
+        parts = []
+        async for event in events:
+            if event["type"] == "chunk":
+                parts.append(event["content"])
+            await chunk_callback(event)
+        return "".join(parts)
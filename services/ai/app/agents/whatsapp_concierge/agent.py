@@ -5,9 +5,10 @@ Supports booking, service inquiries, and customer support.
 """
 import os
 from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 import structlog
 
+from app.services.session_store import Session, SessionStore, get_session_store
 from ..base import BaseAgent, AgentConfig, AgentResponse
 from .tools import WHATSAPP_CONCIERGE_TOOLS
 
@@ -31,7 +32,11 @@ class ConversationContext:
 class WhatsAppConciergeAgent(BaseAgent):
     """WhatsApp Concierge Agent for customer interactions"""
     
-    def __init__(self, config: Optional[AgentConfig] = None):
+    def __init__(
+        self,
+        config: Optional[AgentConfig] = None,
+        session_store: Optional[SessionStore] = None,
+    ):
         if config is None:
             config = AgentConfig(
                 name="whatsapp_concierge",
@@ -43,7 +48,13 @@ class WhatsAppConciergeAgent(BaseAgent):
                 tools=WHATSAPP_CONCIERGE_TOOLS
             )
         super().__init__(config)
-        self.conversations: Dict[str, ConversationContext] = {}
+        # Conversations persist in the shared session store, not in memory
+        self._session_store = session_store
+    
+    async def _get_session_store(self) -> SessionStore:
+        if self._session_store is None:
+            self._session_store = await get_session_store()
+        return self._session_store
     
     def _get_system_prompt(self) -> str:
         """Get the system prompt for the agent"""
@@ -88,19 +99,23 @@ class WhatsAppConciergeAgent(BaseAgent):
 
 Always use tools to get real-time information. Never make up service prices or availability."""
     
+    @staticmethod
+    def session_key(salon_id: str, customer_phone: str) -> str:
+        return f"whatsapp:{salon_id}:{customer_phone}"
+    
     def get_or_create_context(
         self,
+        session: Session,
         salon_id: str,
         customer_phone: str
     ) -> ConversationContext:
-        """Get or create conversation context"""
-        key = f"{salon_id}:{customer_phone}"
-        if key not in self.conversations:
-            self.conversations[key] = ConversationContext(
-                salon_id=salon_id,
-                customer_phone=customer_phone
-            )
-        return self.conversations[key]
+        """Restore conversation context from a stored session"""
+        if session.state:
+            return ConversationContext(**session.state)
+        return ConversationContext(
+            salon_id=salon_id,
+            customer_phone=customer_phone
+        )
     
     
     async def process_message(
@@ -112,35 +127,43 @@ Always use tools to get real-time information. Never make up service prices or a
     ) -> AgentResponse:
         """Process an incoming WhatsApp message"""
         try:
-            # Get or create conversation context
-            ctx = self.get_or_create_context(salon_id, customer_phone)
-            ctx.language = language
-            
-            # Get customer info if not already loaded
-            if not ctx.customer_id:
-                customer_result = await self._get_customer(salon_id, customer_phone)
-                if customer_result.get("success"):
-                    customer = customer_result.get("customer")
-                    if customer:
-                        ctx.customer_id = customer.get("id")
-                        ctx.customer_name = customer.get("name")
-                        ctx.is_new_customer = False
-                    else:
-                        ctx.is_new_customer = True
-            
-            
-            # Process the message with the LLM
-            response = await self.generate_response(
-                message=message,
-                context={
-                    "salon_id": salon_id,
-                    "customer_phone": customer_phone,
-                    "customer_name": ctx.customer_name,
-                    "is_new_customer": ctx.is_new_customer,
-                    "conversation_state": ctx.conversation_state,
-                    "language": language
-                }
-            )
+            store = await self._get_session_store()
+            # Messages from one customer are handled one at a time
+            async with store.turn(self.session_key(salon_id, customer_phone)) as session:
+                # Get or create conversation context
+                ctx = self.get_or_create_context(session, salon_id, customer_phone)
+                ctx.language = language
+                
+                # Get customer info if not already loaded
+                if not ctx.customer_id:
+                    customer_result = await self._get_customer(salon_id, customer_phone)
+                    if customer_result.get("success"):
+                        customer = customer_result.get("customer")
+                        if customer:
+                            ctx.customer_id = customer.get("id")
+                            ctx.customer_name = customer.get("name")
+                            ctx.is_new_customer = False
+                        else:
+                            ctx.is_new_customer = True
+                
+                
+                # Process the message with the LLM
+                response = await self.generate_response(
+                    message=message,
+                    context={
+                        "salon_id": salon_id,
+                        "customer_phone": customer_phone,
+                        "customer_name": ctx.customer_name,
+                        "is_new_customer": ctx.is_new_customer,
+                        "conversation_state": ctx.conversation_state,
+                        "language": language
+                    }
+                )
+                
+                session.state = asdict(ctx)
+                session.append("user", message)
+                if response.success:
+                    session.append("assistant", response.message)
             
             return response
             
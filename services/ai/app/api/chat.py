@@ -1,6 +1,7 @@
 """Chat API endpoints for AI Service"""
 from fastapi import APIRouter, HTTPException, Depends, Header
-from typing import Optional, Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import Optional, Dict, Any, AsyncIterator
 import uuid
 import structlog
 
@@ -8,15 +9,15 @@ from app.schemas.requests import ChatRequest, BookingSuggestionRequest, StylistR
 from app.schemas.responses import ChatResponse, AIResponse
 from app.services.agents import get_agent, BookingAgent
 from app.services.cache_service import get_cache_service
+from app.services.openrouter_client import ChatMessage
+from app.services.session_store import get_session_store
+from app.services.streaming import StreamTimer, error_event, get_stream_metrics, sse_event
+from app.pipeline import get_processor
 
 logger = structlog.get_logger()
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 
-# Session storage (in production, use Redis)
-sessions: Dict[str, list] = {}
-
-
 async def get_salon_context(salon_id: str) -> Dict[str, Any]:
     """Fetch salon context from API service"""
     # In production, fetch from API service
@@ -34,9 +35,7 @@ async def chat(request: ChatRequest):
     try:
         # Get or create session
         session_id = request.session_id or str(uuid.uuid4())
-        
-        # Get session history
-        history = sessions.get(session_id, [])
+        store = await get_session_store()
         
         # Get salon context
         context = await get_salon_context(request.salon_id)
@@ -46,20 +45,20 @@ async def chat(request: ChatRequest):
         # Get appropriate agent
         agent = get_agent(request.agent_type)
         
-        # Generate response
-        from app.services.openrouter_client import ChatMessage
-        
-        response = await agent.generate(
-            prompt=request.message,
-            context=context,
-            history=[ChatMessage(**msg) for msg in history] if history else None,
-        )
-        
-        # Update session history
-        history.append({"role": "user", "content": request.message})
-        if response.success:
-            history.append({"role": "assistant", "content": response.message})
-        sessions[session_id] = history[-10:]  # Keep last 10 messages
+        # Turns on the same session run one at a time
+        async with store.turn(session_id) as session:
+            history = session.history()
+            
+            response = await agent.generate(
+                prompt=request.message,
+                context=context,
+                history=[ChatMessage(**msg) for msg in history] if history else None,
+            )
+            
+            # History is trimmed to the session token budget on save
+            session.append("user", request.message)
+            if response.success:
+                session.append("assistant", response.message)
         
         return ChatResponse(
             response=response.message,
@@ -73,6 +72,78 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """Stream a chat response as Server-Sent Events.
+    
+    The agent runs through the pipeline (rate limit, guardrail, cache,
+    model router) and tokens are forwarded as they arrive. The first event
+    carries the session id; the last is ``done`` (with ``ttft_ms``) or
+    ``error``. The reply joins the session history once the stream ends.
+    """
+    session_id = request.session_id or str(uuid.uuid4())
+    store = await get_session_store()
+    
+    context = await get_salon_context(request.salon_id)
+    if request.context:
+        context.update(request.context)
+    
+    async def events() -> AsyncIterator[str]:
+        timer = StreamTimer()
+        parts = []
+        outcome: Dict[str, Any] = {}
+        yield sse_event({"type": "start", "session_id": session_id, "agent_type": request.agent_type})
+        
+        # Turns on the same session run one at a time
+        async with store.turn(session_id) as session:
+            history = [ChatMessage(**msg) for msg in session.history()]
+            pipeline_request = {
+                "prompt": request.message,
+                "context": context,
+                "history": history or None,
+                # Pipeline cache keys ignore history, so only cache opening turns
+                "use_cache": not history,
+            }
+            try:
+                async for event in get_processor().stream_agent(
+                    request.agent_type,
+                    pipeline_request,
+                    {"salon_id": request.salon_id, "session_id": session_id, "channel": "web"},
+                ):
+                    if event["type"] == "chunk":
+                        timer.mark()
+                        parts.append(event["content"])
+                    elif event["type"] == "done":
+                        outcome = event["metadata"]
+                        outcome["ttft_ms"] = timer.ttft_ms
+                        outcome["session_id"] = session_id
+                    else:
+                        outcome = {"error": event.get("message")}
+                    yield sse_event(event)
+            except Exception as e:
+                logger.error("chat_stream_error", session_id=session_id, error=str(e))
+                outcome = {"error": str(e)}
+                yield sse_event(error_event(str(e)))
+            
+            session.append("user", request.message)
+            if parts and "error" not in outcome and not outcome.get("blocked"):
+                session.append("assistant", "".join(parts))
+        
+        get_stream_metrics().record(
+            "chat_stream",
+            timer.ttft_ms,
+            timer.elapsed_ms,
+            cached=bool(outcome.get("cached")),
+            error="error" in outcome,
+        )
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/booking/suggest", response_model=AIResponse)
 async def suggest_booking(request: BookingSuggestionRequest):
     """Get AI-powered booking suggestions"""
@@ -120,6 +191,6 @@ async def recommend_stylist(request: StylistRecommendationRequest):
 @router.delete("/session/{session_id}")
 async def clear_session(session_id: str):
     """Clear chat session history"""
-    if session_id in sessions:
-        del sessions[session_id]
+    store = await get_session_store()
+    await store.delete(session_id)
     return {"status": "cleared", "session_id": session_id}
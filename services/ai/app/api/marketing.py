@@ -1,10 +1,14 @@
 """Marketing API endpoints for AI Service"""
+import json
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 import structlog
 
-from app.schemas.requests import CampaignRequest, FeedbackRequest
+from app.schemas.requests import BatchGenerationRequest, CampaignRequest, FeedbackRequest
 from app.schemas.responses import AIResponse, CampaignResponse
 from app.services.agents import get_agent, MarketingAgent, CustomerSupportAgent
+from app.services.batch_generation import BATCH_TASKS, BatchGenerator
 
 logger = structlog.get_logger()
 router = APIRouter(prefix="/marketing", tags=["Marketing"])
@@ -95,3 +99,46 @@ async def generate_feedback_request(request: FeedbackRequest):
     except Exception as e:
         logger.error("feedback_request_error", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch")
+async def generate_batch(request: BatchGenerationRequest):
+    """Generate one message per customer, streamed as NDJSON.
+
+    Each line is ``{"type": "item", ...}`` as soon as that customer's message
+    is ready, followed by a final ``{"type": "summary", ...}`` line with
+    throughput and cost per item.
+    """
+    task = BATCH_TASKS.get(request.task)
+    if task is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown batch task: {request.task}. Expected one of: {', '.join(BATCH_TASKS)}",
+        )
+    ids = [item.get("id") for item in request.items]
+    if any(item_id is None for item_id in ids):
+        raise HTTPException(status_code=400, detail="Every item needs an id")
+    if len({str(item_id) for item_id in ids}) != len(ids):
+        raise HTTPException(status_code=400, detail="Item ids must be unique")
+
+    generator = BatchGenerator(
+        get_agent(task.agent),
+        task,
+        pack_size=request.pack_size,
+        concurrency=request.concurrency,
+    )
+
+    async def lines():
+        try:
+            async for result in generator.stream(
+                request.items,
+                shared=request.shared,
+                context={"salon_id": request.salon_id},
+            ):
+                yield json.dumps({"type": "item", **result.to_dict()}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error("batch_generation_error", task=request.task, error=str(e))
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+        yield json.dumps({"type": "summary", **generator.summary.to_dict()}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
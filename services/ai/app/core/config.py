@@ -1,6 +1,6 @@
 """AI Service Configuration"""
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 from functools import lru_cache
 
 
@@ -20,17 +20,44 @@ class Settings(BaseSettings):
     openrouter_base_url: str = "https://openrouter.ai/api/v1"
     openrouter_site_url: str = "https://salonflow.app"
     openrouter_site_name: str = "Salon Flow"
+    openrouter_timeout: float = 60.0
+    openrouter_max_connections: int = 100
+
+    # Client-side scheduling (per model)
+    openrouter_max_concurrency: int = 16
+    openrouter_requests_per_minute: int = 200
+    # e.g. OPENROUTER_MODEL_LIMITS='{"google/gemini-2.5-flash": {"max_concurrency": 8, "requests_per_minute": 60}}'
+    openrouter_model_limits: Dict[str, Dict[str, int]] = {}
+    openrouter_max_retries: int = 2
+    # Hedge to the fallback model past this latency percentile (0 disables)
+    openrouter_hedge_percentile: float = 0.95
 
     # Model Configuration
     default_model: str = "google/gemini-2.5-flash"
     fallback_model: str = "google/gemini-2.0-flash-001"
     max_tokens: int = 4096
     temperature: float = 0.7
+    # Cost estimate when the provider does not report usage cost (USD)
+    llm_cost_per_1k_tokens: float = 0.001
 
     # Upstash Redis Configuration (REST API)
     upstash_redis_rest_url: str = ""
     upstash_redis_rest_token: str = ""
     cache_ttl: int = 3600  # 1 hour
+    # Per-agent response cache TTLs, e.g. AGENT_CACHE_TTLS='{"analytics_agent": 300}'
+    agent_cache_ttls: Dict[str, int] = {}
+
+    # Prompt context rendering
+    prompt_context_budget: int = 1500  # estimated tokens of context per prompt
+    # Per-agent overrides, e.g. AGENT_CONTEXT_BUDGETS='{"analytics_agent": 3000}'
+    agent_context_budgets: Dict[str, int] = {}
+    prompt_list_limit: int = 20  # rows per list before the rest is summarized
+    
+    # Conversation sessions (chat, voice, WhatsApp)
+    session_ttl: int = 86400  # 24 hours after the last turn
+    session_max_sessions: int = 10000  # in-process LRU capacity
+    session_token_budget: int = 2000  # history kept per session
+    session_l1_ttl: int = 30  # seconds before re-reading Redis
 
     # API Service URL (for fetching salon data)
     api_service_url: str = "http://localhost:8000"
@@ -0,0 +1,315 @@
+"""Distributed rate limiter for the AI service.
+
+GCRA (generic cell rate algorithm) over Redis. Each limit is one key
+holding its "theoretical arrival time"; a Lua script checks and advances
+every limit of a request atomically, so all instances share one budget
+instead of each enforcing the full limit. GCRA needs no log of
+timestamps: a limit admits ``burst`` requests at once and then one every
+``period / limit`` seconds, so a window of ``period`` seconds can see up
+to ``limit + burst - 1``. ``Limit.window`` builds a limit that never
+exceeds its count in any window.
+
+- Pre-allocation: an instance reserves a small batch of tokens per key
+  (``prealloc_fraction`` of the limit, at most ``max_prealloc``) and
+  serves them locally for up to ``lease_ttl`` seconds, so most requests
+  skip the Redis hop. Unused tokens of an expired lease are forfeited,
+  which bounds over-counting to one batch per instance per lease.
+- Fallback: when Redis is unreachable the same algorithm runs in process,
+  so each instance still enforces the limits on its own.
+- Memory: leases and fallback state are LRUs capped at ``max_keys``; Redis
+  keys expire as soon as their bucket has refilled.
+
+The API service ships the same limiter for its own endpoints.
+
+Example:
+    limiter = RateLimiter(backend=upstash)
+    result = await limiter.acquire("salon_123", [Limit("minute", 60, 60)])
+    if not result.allowed:
+        ...  # retry after result.retry_after seconds
+"""
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Slack (in tokens) absorbing float error in stored arrival times
+_EPSILON = 0.001
+
+# KEYS: one arrival-time key per limit
+# ARGV: now_ms, wanted, needed, then interval_ms and tolerance_ms per limit
+# Returns: {granted, remaining, retry_after_ms, blocking limit (1-based)}
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local want = tonumber(ARGV[2])
+local need = tonumber(ARGV[3])
+local fit = want
+local retry = 0
+local blocking = 0
+local tats = {}
+for i, key in ipairs(KEYS) do
+  local interval = tonumber(ARGV[2 + 2 * i])
+  local tolerance = tonumber(ARGV[3 + 2 * i])
+  local tat = tonumber(redis.call('GET', key) or now)
+  if tat < now then tat = now end
+  tats[i] = tat
+  local n = math.floor((now + tolerance - tat) / interval + 0.001)
+  if n < fit then fit = n end
+  local wait = tat + need * interval - tolerance - now
+  if wait > retry then
+    retry = wait
+    blocking = i
+  end
+end
+if fit < need then
+  return {0, math.max(fit, 0), math.ceil(retry), blocking}
+end
+local remaining = 0
+for i, key in ipairs(KEYS) do
+  local interval = tonumber(ARGV[2 + 2 * i])
+  local tolerance = tonumber(ARGV[3 + 2 * i])
+  local tat = tats[i] + fit * interval
+  redis.call('SET', key, string.format('%.3f', tat), 'PX', math.max(1, math.ceil(tat - now)))
+  local left = math.floor((now + tolerance - tat) / interval + 0.001)
+  if i == 1 or left < remaining then remaining = left end
+end
+return {fit, remaining, 0, 0}
+"""
+
+
+@dataclass(frozen=True)
+class Limit:
+    """``limit`` requests per ``period`` seconds, up to ``burst`` at once.
+
+    ``burst`` defaults to ``limit``, so a window of ``period`` seconds
+    admits up to ``2 * limit - 1``; use ``window`` for a hard cap.
+    """
+    name: str
+    limit: int
+    period: float
+    burst: Optional[int] = None
+
+    @classmethod
+    def window(cls, name: str, limit: int, period: float) -> "Limit":
+        """At most ``limit`` requests in any ``period``; about half at once."""
+        burst = (limit + 1) // 2
+        return cls(name, limit + 1 - burst, period, burst)
+
+    @property
+    def interval_ms(self) -> float:
+        return self.period * 1000 / self.limit
+
+    @property
+    def tolerance_ms(self) -> float:
+        return (self.burst or self.limit) * self.interval_ms
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of one ``acquire``."""
+    allowed: bool
+    remaining: int
+    retry_after: float = 0.0  # seconds
+    limit: Optional[str] = None  # name of the limit that blocked
+
+
+def gcra(
+    tats: Sequence[Optional[float]],
+    now: float,
+    limits: Sequence[Limit],
+    want: int,
+    need: int,
+) -> Tuple[int, List[float], int, float, int]:
+    """In-process mirror of ``GCRA_SCRIPT``.
+
+    Grants between ``need`` and ``want`` tokens from every limit, or none.
+
+    Returns:
+        (granted, new arrival times, remaining, retry_after_ms, blocking index)
+    """
+    current = [now if tat is None or tat < now else tat for tat in tats]
+    fit = want
+    retry = 0.0
+    blocking = -1
+    for i, (tat, limit) in enumerate(zip(current, limits, strict=True)):
+        fit = min(fit, math.floor((now + limit.tolerance_ms - tat) / limit.interval_ms + _EPSILON))
+        wait = tat + need * limit.interval_ms - limit.tolerance_ms - now
+        if wait > retry:
+            retry, blocking = wait, i
+    if fit < need:
+        return 0, current, max(fit, 0), math.ceil(retry), blocking
+    updated = [tat + fit * limit.interval_ms for tat, limit in zip(current, limits, strict=True)]
+    remaining = min(
+        math.floor((now + limit.tolerance_ms - tat) / limit.interval_ms + _EPSILON)
+        for tat, limit in zip(updated, limits, strict=True)
+    )
+    return fit, updated, remaining, 0.0, -1
+
+
+class _Lease:
+    __slots__ = ("tokens", "expires_at", "remaining")
+
+    def __init__(self, tokens: int, expires_at: float, remaining: int):
+        self.tokens = tokens
+        self.expires_at = expires_at
+        self.remaining = remaining
+
+
+@dataclass
+class RateLimiterStats:
+    """Rate limiter counters."""
+    allowed: int = 0
+    limited: int = 0
+    lease_hits: int = 0
+    backend_calls: int = 0
+    backend_errors: int = 0
+    local_decisions: int = 0
+
+
+class RateLimiter:
+    """Shared GCRA limiter with local pre-allocation"""
+
+    def __init__(
+        self,
+        backend: Any = None,
+        key_prefix: str = "ratelimit",
+        prealloc_fraction: float = 0.05,
+        max_prealloc: int = 20,
+        lease_ttl: float = 1.0,
+        max_keys: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            backend: Object with async ``evalsha``/``eval`` (redis.asyncio,
+                AsyncUpstashRedis); None limits per process only
+            key_prefix: Redis key prefix
+            prealloc_fraction: Share of a limit reserved per Redis call
+            max_prealloc: Upper bound on tokens reserved per Redis call
+            lease_ttl: Seconds reserved tokens may be served locally
+            max_keys: Capacity of the lease and fallback LRUs
+        """
+        self.backend = backend
+        self.key_prefix = key_prefix
+        self.prealloc_fraction = prealloc_fraction
+        self.max_prealloc = max_prealloc
+        self.lease_ttl = lease_ttl
+        self.max_keys = max_keys
+        self._clock = clock
+        self._sha = hashlib.sha1(GCRA_SCRIPT.encode()).hexdigest()
+        self._leases: "OrderedDict[str, _Lease]" = OrderedDict()
+        self._local: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._stats = RateLimiterStats()
+
+    def _keys(self, key: str, limits: Sequence[Limit]) -> List[str]:
+        # Hash tag keeps every limit of a key in one cluster slot
+        return [f"{self.key_prefix}:{{{key}}}:{limit.name}" for limit in limits]
+
+    def _batch(self, limits: Sequence[Limit], cost: int) -> int:
+        batch = min(max(1, int(limit.limit * self.prealloc_fraction)) for limit in limits)
+        return max(cost, min(batch, self.max_prealloc))
+
+    @staticmethod
+    def _lru_put(lru: "OrderedDict[str, Any]", key: str, value: Any, capacity: int) -> None:
+        lru[key] = value
+        lru.move_to_end(key)
+        while len(lru) > capacity:
+            lru.popitem(last=False)
+
+    async def acquire(self, key: str, limits: Sequence[Limit], cost: int = 1) -> RateLimitResult:
+        """Take ``cost`` tokens from every limit of ``key``, or none.
+
+        Args:
+            key: What is limited (e.g. a salon id)
+            limits: Limits that all have to allow the request
+            cost: Tokens this request consumes
+        """
+        now = self._clock()
+        lease_key = key + "|" + ",".join(
+            f"{limit.name}:{limit.limit}/{limit.period}:{limit.burst}" for limit in limits
+        )
+        lease = self._leases.get(lease_key)
+        if lease is not None:
+            if lease.expires_at > now and lease.tokens >= cost:
+                lease.tokens -= cost
+                self._leases.move_to_end(lease_key)
+                self._stats.lease_hits += 1
+                self._stats.allowed += 1
+                return RateLimitResult(True, lease.remaining + lease.tokens)
+            del self._leases[lease_key]
+
+        granted, remaining, retry_ms, blocking = await self._reserve(
+            key, limits, self._batch(limits, cost), cost, now
+        )
+        if not granted:
+            self._stats.limited += 1
+            return RateLimitResult(False, 0, retry_ms / 1000, limits[blocking].name if blocking >= 0 else None)
+
+        self._stats.allowed += 1
+        if granted > cost:
+            self._lru_put(
+                self._leases, lease_key,
+                _Lease(granted - cost, now + self.lease_ttl, remaining), self.max_keys,
+            )
+        return RateLimitResult(True, remaining + granted - cost)
+
+    async def _reserve(
+        self,
+        key: str,
+        limits: Sequence[Limit],
+        want: int,
+        need: int,
+        now: float,
+    ) -> Tuple[int, int, float, int]:
+        """(granted, remaining, retry_after_ms, blocking index) from Redis or in process."""
+        keys = self._keys(key, limits)
+        if self.backend is not None:
+            args: List[Any] = [round(now * 1000, 3), want, need]
+            for limit in limits:
+                args += [limit.interval_ms, limit.tolerance_ms]
+            try:
+                self._stats.backend_calls += 1
+                try:
+                    reply = await self.backend.evalsha(self._sha, len(keys), *keys, *args)
+                except Exception as e:
+                    if "NOSCRIPT" not in str(e):
+                        raise
+                    reply = await self.backend.eval(GCRA_SCRIPT, len(keys), *keys, *args)
+                granted, remaining, retry_ms, blocking = (int(value) for value in reply)
+                return granted, remaining, retry_ms, blocking - 1
+            except Exception as e:
+                self._stats.backend_errors += 1
+                logger.warning("rate_limit_backend_error", key=key, error=str(e))
+
+        # Per-process fallback
+        self._stats.local_decisions += 1
+        now_ms = now * 1000
+        state = self._local.get(key) or {}
+        granted, tats, remaining, retry_ms, blocking = gcra(
+            [state.get(limit.name) for limit in limits], now_ms, limits, want, need
+        )
+        if granted:
+            state.update({limit.name: tat for limit, tat in zip(limits, tats, strict=True)})
+            self._lru_put(self._local, key, state, self.max_keys)
+        return granted, remaining, retry_ms, blocking
+
+    def stats(self) -> Dict[str, Any]:
+        """Decisions, lease hit rate and backend health."""
+        stats = self._stats
+        decisions = stats.allowed + stats.limited
+        return {
+            "allowed": stats.allowed,
+            "limited": stats.limited,
+            "lease_hits": stats.lease_hits,
+            "lease_hit_rate": round(stats.lease_hits / decisions, 4) if decisions else 0.0,
+            "backend_calls": stats.backend_calls,
+            "backend_errors": stats.backend_errors,
+            "local_decisions": stats.local_decisions,
+            "leases": len(self._leases),
+            "local_keys": len(self._local),
+        }
@@ -2,9 +2,9 @@
 
 Implements the Pipeline pattern with middleware chain for:
 - Guardrails (salon-only validation)
-- Caching (exact + semantic via GCP Vertex AI Vector Search)
+- Caching (exact via Redis + semantic via an in-process vector index)
 - Model Routing (tier-based selection)
-- Logging and Metrics
+- Logging and Metrics (per-stage timing, see ``/metrics``)
 - Rate Limiting
 
 Usage:
@@ -31,6 +31,14 @@ from .middleware import (
     LoggingMiddleware,
     RateLimitMiddleware,
 )
+from .semantic_cache import (
+    EmbeddingProvider,
+    HashingEmbedder,
+    VertexEmbeddingProvider,
+    SemanticIndex,
+    get_embedding_provider,
+)
+from .metrics import PipelineMetrics, get_pipeline_metrics
 from .processor import (
     RequestProcessor,
     PipelineConfig,
@@ -48,9 +56,18 @@ __all__ = [
     "ModelRouterMiddleware",
     "LoggingMiddleware",
     "RateLimitMiddleware",
+    # Semantic cache
+    "EmbeddingProvider",
+    "HashingEmbedder",
+    "VertexEmbeddingProvider",
+    "SemanticIndex",
+    "get_embedding_provider",
     # Processor
     "RequestProcessor",
     "PipelineConfig",
     "get_processor",
     "initialize_pipeline",
+    # Metrics
+    "PipelineMetrics",
+    "get_pipeline_metrics",
 ]
@@ -0,0 +1,119 @@
+"""Pipeline Metrics
+
+Aggregates the per-request stage traces recorded by ``RequestProcessor``
+(time spent in each middleware and in the agent itself) so ``/metrics``
+can show where AI latency goes.
+
+Example:
+    metrics = get_pipeline_metrics()
+    metrics.record(context, total_ms=412.0, result=result)
+    metrics.stats()["stages"]["agent"]["p95_ms"]
+"""
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from .middleware import MiddlewareContext, MiddlewareResult
+
+
+def _percentile(samples: Deque[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+
+class _StageStats:
+    __slots__ = ("count", "total_ms", "samples")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total_ms = 0.0
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.samples.append(ms)
+
+
+class PipelineMetrics:
+    """Request counts, end-to-end latency and per-stage time (recent window)"""
+
+    def __init__(self, window: int = 1000, recent: int = 20):
+        self.window = window
+        self.requests = 0
+        self.cached = 0
+        self.blocked = 0
+        self.errors = 0
+        self._latency: Deque[float] = deque(maxlen=window)
+        self._stages: Dict[str, _StageStats] = {}
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=recent)
+
+    def record(
+        self,
+        context: MiddlewareContext,
+        total_ms: float,
+        result: Optional[MiddlewareResult] = None,
+    ) -> None:
+        """Add one request's trace."""
+        stages = context.stage_timings()
+        self.requests += 1
+        self._latency.append(total_ms)
+        if result is None or not result.success:
+            self.errors += 1
+        elif result.blocked:
+            self.blocked += 1
+        elif result.cached or context.cache_hit:
+            self.cached += 1
+        for name, ms in stages.items():
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = _StageStats(self.window)
+            stats.add(ms)
+        self._recent.append({
+            "request_id": context.request_id,
+            "agent": context.agent_name,
+            "total_ms": round(total_ms, 3),
+            "stages": stages,
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        """Latency percentiles, per-stage breakdown and the latest traces."""
+        stage_total = sum(s.total_ms for s in self._stages.values())
+        return {
+            "requests": self.requests,
+            "cached": self.cached,
+            "blocked": self.blocked,
+            "errors": self.errors,
+            "latency_ms": {
+                "p50": round(_percentile(self._latency, 0.5), 3),
+                "p95": round(_percentile(self._latency, 0.95), 3),
+                "p99": round(_percentile(self._latency, 0.99), 3),
+            },
+            "stages": {
+                name: {
+                    "count": s.count,
+                    "avg_ms": round(s.total_ms / s.count, 3),
+                    "p50_ms": round(_percentile(s.samples, 0.5), 3),
+                    "p95_ms": round(_percentile(s.samples, 0.95), 3),
+                    "share": round(s.total_ms / stage_total, 4) if stage_total else 0.0,
+                }
+                for name, s in self._stages.items()
+            },
+            "recent": list(self._recent),
+        }
+
+    def reset(self) -> None:
+        self.__init__(self.window, self._recent.maxlen)
+
+
+# Singleton instance
+_pipeline_metrics_instance: Optional[PipelineMetrics] = None
+
+
+def get_pipeline_metrics() -> PipelineMetrics:
+    """Get or create pipeline metrics singleton"""
+    global _pipeline_metrics_instance
+    if _pipeline_metrics_instance is None:
+        _pipeline_metrics_instance = PipelineMetrics()
+    return _pipeline_metrics_instance
@@ -2,21 +2,36 @@
 
 Implements the Pipeline Layer with:
 - GuardrailMiddleware: Salon-only validation
-- CacheMiddleware: Exact + semantic caching (GCP Vertex AI Vector Search)
+- CacheMiddleware: Exact + semantic caching (in-process vector index)
 - ModelRouterMiddleware: Tier-based model selection
 - LoggingMiddleware: Request/response logging
+- RateLimitMiddleware: Per-salon limits shared across instances
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List, Callable
+from typing import Dict, Any, AsyncIterator, Optional, List, Callable, Tuple
 from datetime import datetime
+import os
 import time
 import hashlib
 import json
 import structlog
 from pydantic import BaseModel, Field
 
+from app.core.rate_limiter import Limit, RateLimiter
+from app.services.streaming import (
+    StreamEvent,
+    StreamTimer,
+    chunk_event,
+    done_event,
+    replay_events,
+)
+from .semantic_cache import EmbeddingProvider, SemanticIndex, get_embedding_provider
+
 logger = structlog.get_logger()
 
+# Next stage of a streaming chain: (request, context) -> event iterator
+StreamHandler = Callable[[Dict[str, Any], "MiddlewareContext"], AsyncIterator[StreamEvent]]
+
 
 # ============================================================================
 # Base Middleware
@@ -33,13 +48,33 @@ class MiddlewareContext(BaseModel):
     session_id: Optional[str] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
     
+    # Caller's context dict, forwarded to the agent
+    agent_context: Dict[str, Any] = Field(default_factory=dict)
+    
     # Pipeline state
     start_time: float = Field(default_factory=time.time)
     cache_hit: bool = False
     guardrail_passed: bool = True
     model_selected: Optional[str] = None
+    # Inclusive ms per stage in chain order; None while the stage runs
+    timings: Dict[str, Optional[float]] = Field(default_factory=dict)
     
     model_config = {"arbitrary_types_allowed": True}
+    
+    def stage_timings(self) -> Dict[str, float]:
+        """Milliseconds spent in each finished stage, excluding later stages.
+        
+        Stages nest (each wraps the rest of the chain), so a stage's own
+        time is its inclusive time minus the next stage's.
+        """
+        stages = list(self.timings.items())
+        own = {}
+        for i, (name, inclusive) in enumerate(stages):
+            if inclusive is None:
+                continue
+            inner = stages[i + 1][1] if i + 1 < len(stages) else None
+            own[name] = round(inclusive - (inner or 0.0), 3)
+        return own
 
 
 class MiddlewareResult(BaseModel):
@@ -72,6 +107,16 @@ class BaseMiddleware(ABC):
         """Process request through middleware"""
         pass
     
+    async def process_stream(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext,
+        next_stream: StreamHandler
+    ) -> AsyncIterator[StreamEvent]:
+        """Streaming counterpart of ``process``; passes events through by default"""
+        async for event in next_stream(request, context):
+            yield event
+    
     async def initialize(self) -> bool:
         """Initialize middleware resources"""
         return True
@@ -81,6 +126,12 @@ class BaseMiddleware(ABC):
         pass
 
 
+async def _blocked_stream(result: "MiddlewareResult", context: MiddlewareContext) -> AsyncIterator[StreamEvent]:
+    """Stream a rejection the way agents do: message chunk, then blocked ``done``"""
+    yield chunk_event(result.message)
+    yield done_event(agent=context.agent_name, cached=False, blocked=True)
+
+
 # ============================================================================
 # Guardrail Middleware
 # ============================================================================
@@ -93,7 +144,7 @@ class GuardrailMiddleware(BaseMiddleware):
     """
     
     def __init__(self):
-        self._guardrails = {}
+        self._guardrail = None
         self._initialized = False
     
     @property
@@ -101,28 +152,26 @@ class GuardrailMiddleware(BaseMiddleware):
         return "guardrail"
     
     async def initialize(self) -> bool:
-        """Initialize guardrails for all supported languages"""
+        """Attach the shared guardrail (one matcher for all languages)"""
         try:
-            from app.services.guardrails import SalonGuardrail
+            from app.services.guardrails import get_guardrail
             
-            # Initialize guardrails for supported languages
-            for lang in ["en", "hi", "te"]:
-                self._guardrails[lang] = SalonGuardrail()
+            # Shared with agents so a prompt is classified only once
+            self._guardrail = get_guardrail()
             
             self._initialized = True
-            logger.info("guardrail_middleware_initialized", languages=list(self._guardrails.keys()))
+            logger.info("guardrail_middleware_initialized", languages=["en", "hi", "te"])
             return True
         except Exception as e:
             logger.error("guardrail_init_failed", error=str(e))
             return False
     
-    async def process(
+    async def _validate(
         self,
         request: Dict[str, Any],
-        context: MiddlewareContext,
-        next_middleware: Callable
-    ) -> MiddlewareResult:
-        """Validate request against salon guardrails"""
+        context: MiddlewareContext
+    ) -> Optional[MiddlewareResult]:
+        """Blocked result for off-topic prompts, None if the request may pass"""
         if not self._initialized:
             await self.initialize()
         
@@ -132,10 +181,9 @@ class GuardrailMiddleware(BaseMiddleware):
         
         if skip_guardrail:
             context.guardrail_passed = True
-            return await next_middleware(request, context)
+            return None
         
-        # Get appropriate guardrail
-        guardrail = self._guardrails.get(language, self._guardrails.get("en"))
+        guardrail = self._guardrail
         
         if guardrail:
             is_valid, reason = guardrail.validate_query(prompt)
@@ -156,11 +204,35 @@ class GuardrailMiddleware(BaseMiddleware):
                 )
         
         context.guardrail_passed = True
+        return None
+    
+    async def process(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext,
+        next_middleware: Callable
+    ) -> MiddlewareResult:
+        """Validate request against salon guardrails"""
+        blocked = await self._validate(request, context)
+        if blocked is not None:
+            return blocked
         return await next_middleware(request, context)
+    
+    async def process_stream(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext,
+        next_stream: StreamHandler
+    ) -> AsyncIterator[StreamEvent]:
+        """Validate the prompt before any tokens are generated"""
+        blocked = await self._validate(request, context)
+        stream = _blocked_stream(blocked, context) if blocked else next_stream(request, context)
+        async for event in stream:
+            yield event
 
 
 # ============================================================================
-# Cache Middleware (GCP Vertex AI Vector Search)
+# Cache Middleware (Redis + semantic vector index)
 # ============================================================================
 
 class CacheMiddleware(BaseMiddleware):
@@ -168,22 +240,28 @@ class CacheMiddleware(BaseMiddleware):
     
     Uses:
     - Redis for exact match caching
-    - GCP Vertex AI Vector Search for semantic similarity caching
+    - A per-salon in-process vector index for semantic similarity caching;
+      prompts are embedded by a pluggable ``EmbeddingProvider``
     """
     
     def __init__(
         self,
         redis_client: Optional[Any] = None,
-        vector_search_client: Optional[Any] = None,
+        embedder: Optional[EmbeddingProvider] = None,
         exact_ttl: int = 3600,  # 1 hour
         semantic_ttl: int = 7200,  # 2 hours
-        similarity_threshold: float = 0.95
+        similarity_threshold: float = 0.95,
+        semantic_index: Optional[SemanticIndex] = None,
+        persist_path: Optional[str] = None,
     ):
         self._redis = redis_client
-        self._vector_search = vector_search_client
+        self._embedder = embedder
         self._exact_ttl = exact_ttl
         self._semantic_ttl = semantic_ttl
         self._similarity_threshold = similarity_threshold
+        self._index = semantic_index or SemanticIndex(ttl=semantic_ttl)
+        self._persist_path = persist_path or os.environ.get("SEMANTIC_CACHE_PATH")
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
         self._initialized = False
     
     @property
@@ -199,41 +277,48 @@ class CacheMiddleware(BaseMiddleware):
                 redis_url = os.environ.get("REDIS_URL", "redis://localhost:6379")
                 self._redis = redis.from_url(redis_url)
             
-            # Initialize GCP Vertex AI Vector Search if not provided
-            if not self._vector_search:
-                self._vector_search = await self._init_vertex_vector_search()
+            if not self._embedder:
+                self._embedder = get_embedding_provider()
+            
+            if self._persist_path:
+                loaded = self._index.load(self._persist_path)
+                logger.info("semantic_cache_loaded", entries=loaded, path=self._persist_path)
             
             self._initialized = True
-            logger.info("cache_middleware_initialized")
+            logger.info(
+                "cache_middleware_initialized",
+                embedder=self._embedder.name if self._embedder else None,
+            )
             return True
         except Exception as e:
             logger.warning("cache_init_partial", error=str(e))
             # Continue without caching if init fails
             return True
     
-    async def _init_vertex_vector_search(self):
-        """Initialize GCP Vertex AI Vector Search client"""
-        try:
-            from google.cloud import aiplatform
-            import os
-            
-            project_id = os.environ.get("GCP_PROJECT_ID", "salon-saas-487508")
-            location = os.environ.get("GCP_REGION", "asia-south1")
-            index_endpoint = os.environ.get("VERTEX_INDEX_ENDPOINT")
-            
-            if index_endpoint:
-                aiplatform.init(project=project_id, location=location)
-                return aiplatform.MatchServiceClient()
-            return None
-        except Exception as e:
-            logger.warning("vertex_vector_search_init_failed", error=str(e))
-            return None
-    
-    def _generate_cache_key(self, prompt: str, salon_id: str, agent_name: str) -> str:
+    async def cleanup(self) -> None:
+        """Persist the semantic index if a path is configured"""
+        if self._persist_path:
+            try:
+                self._index.save(self._persist_path)
+            except Exception as e:
+                logger.warning("semantic_cache_save_failed", error=str(e))
+    
+    def _generate_cache_key(self, prompt: str, salon_id: str, agent_name: str, scope: str = "") -> str:
         """Generate cache key for exact matching"""
-        content = f"{agent_name}:{salon_id}:{prompt}"
+        content = f"{agent_name}:{scope}:{salon_id}:{prompt}"
         return hashlib.sha256(content.encode()).hexdigest()
     
+    @staticmethod
+    def _context_scope(request: Dict[str, Any], context: MiddlewareContext) -> str:
+        """Hash of the context the agent answers with.
+        
+        Replies can depend on user or customer fields, so callers only share
+        entries when their agent context is identical.
+        """
+        agent_context = request["context"] if "context" in request else context.agent_context
+        canonical = json.dumps(agent_context or {}, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+    
     async def _get_exact_cache(self, key: str) -> Optional[Dict[str, Any]]:
         """Get from exact cache (Redis)"""
         if not self._redis:
@@ -261,58 +346,92 @@ class CacheMiddleware(BaseMiddleware):
         except Exception as e:
             logger.warning("exact_cache_set_failed", error=str(e))
     
-    async def _get_semantic_cache(self, prompt: str, salon_id: str) -> Optional[Dict[str, Any]]:
-        """Get from semantic cache (GCP Vertex AI Vector Search)"""
-        if not self._vector_search:
-            return None
+    async def _get_semantic_cache(
+        self,
+        prompt: str,
+        salon_id: str,
+        agent_name: str = "default",
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """Get from semantic cache.
+        
+        Returns:
+            Tuple of (cached response or None, prompt embedding or None); the
+            embedding is reused to index the response on a miss
+        """
+        embedding = await self._generate_embedding(prompt)
+        if not embedding:
+            return None, None
         
         try:
-            # Generate embedding for the query
-            embedding = await self._generate_embedding(prompt)
-            if not embedding:
-                return None
-            
-            # Search for similar cached queries
-            # This would use Vertex AI Vector Search's FindNeighbors API
-            # For now, return None as placeholder
-            # TODO: Implement actual vector search
-            
+            matches = self._index.search(
+                salon_id,
+                agent_name,
+                embedding,
+                k=1,
+                min_score=self._similarity_threshold,
+            )
+            if matches:
+                score, entry = matches[0]
+                logger.debug("semantic_cache_match", score=round(score, 4), cached_prompt=entry.prompt[:100])
+                return entry.response, embedding
         except Exception as e:
             logger.warning("semantic_cache_get_failed", error=str(e))
-        return None
+        return None, embedding
+    
+    def _set_semantic_cache(
+        self,
+        prompt: str,
+        salon_id: str,
+        agent_name: str,
+        embedding: Optional[List[float]],
+        value: Dict[str, Any],
+    ) -> None:
+        """Index a response under the prompt's embedding"""
+        if not embedding or self._semantic_ttl <= 0:
+            return
+        self._index.add(salon_id, agent_name, prompt, embedding, value, ttl=self._semantic_ttl)
     
     async def _generate_embedding(self, text: str) -> Optional[List[float]]:
-        """Generate embedding using Vertex AI"""
+        """Embed text with the configured provider (never blocks the loop)"""
+        if not self._embedder:
+            return None
         try:
-            from vertexai.language_models import TextEmbeddingModel
-            
-            model = TextEmbeddingModel.from_pretrained("text-embedding-004")
-            embeddings = model.get_embeddings([text])
-            return embeddings[0].values
+            return await self._embedder.embed(text)
         except Exception as e:
             logger.warning("embedding_generation_failed", error=str(e))
             return None
     
-    async def process(
+    def stats(self) -> Dict[str, Any]:
+        """Hit counters and the number of LLM calls avoided"""
+        saved = self._stats["exact_hits"] + self._stats["semantic_hits"]
+        total = saved + self._stats["misses"]
+        return {
+            **self._stats,
+            "llm_calls_saved": saved,
+            "hit_rate": round(saved / total, 4) if total else 0.0,
+            "semantic_entries": len(self._index),
+        }
+    
+    async def _lookup(
         self,
         request: Dict[str, Any],
-        context: MiddlewareContext,
-        next_middleware: Callable
-    ) -> MiddlewareResult:
-        """Process request through cache layers"""
+        context: MiddlewareContext
+    ) -> Tuple[str, Optional[Dict[str, Any]], Optional[List[float]]]:
+        """Exact then semantic lookup.
+        
+        Returns:
+            Tuple of (exact cache key, cached data or None, prompt embedding)
+        """
         if not self._initialized:
             await self.initialize()
         
-        use_cache = request.get("use_cache", True)
-        if not use_cache:
-            return await next_middleware(request, context)
-        
         prompt = request.get("prompt", "")
         salon_id = context.salon_id or "default"
         agent_name = context.agent_name or "default"
+        scope = self._context_scope(request, context)
         
         # Try exact cache first
-        cache_key = self._generate_cache_key(prompt, salon_id, agent_name)
+        cache_key = self._generate_cache_key(prompt, salon_id, agent_name, scope)
         cached_result = await self._get_exact_cache(cache_key)
         
         if cached_result:
@@ -321,27 +440,60 @@ class CacheMiddleware(BaseMiddleware):
                 request_id=context.request_id,
                 agent=agent_name
             )
+            self._stats["exact_hits"] += 1
             context.cache_hit = True
-            return MiddlewareResult(
-                success=True,
-                cached=True,
-                data=cached_result,
-                skip_remaining=True
-            )
+            return cache_key, cached_result, None
         
         # Try semantic cache
-        semantic_result = await self._get_semantic_cache(prompt, salon_id)
+        semantic_result, embedding = await self._get_semantic_cache(prompt, salon_id, f"{agent_name}:{scope}")
         if semantic_result:
             logger.info(
                 "semantic_cache_hit",
                 request_id=context.request_id,
                 agent=agent_name
             )
+            self._stats["semantic_hits"] += 1
             context.cache_hit = True
+            return cache_key, semantic_result, embedding
+        
+        self._stats["misses"] += 1
+        return cache_key, None, embedding
+    
+    async def _store(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext,
+        cache_key: str,
+        embedding: Optional[List[float]],
+        data: Dict[str, Any],
+    ) -> None:
+        await self._set_exact_cache(cache_key, data)
+        agent_name = context.agent_name or "default"
+        self._set_semantic_cache(
+            request.get("prompt", ""),
+            context.salon_id or "default",
+            f"{agent_name}:{self._context_scope(request, context)}",
+            embedding,
+            data,
+        )
+    
+    async def process(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext,
+        next_middleware: Callable
+    ) -> MiddlewareResult:
+        """Process request through cache layers"""
+        use_cache = request.get("use_cache", True)
+        if not use_cache:
+            return await next_middleware(request, context)
+        
+        cache_key, cached, embedding = await self._lookup(request, context)
+        if cached:
             return MiddlewareResult(
                 success=True,
                 cached=True,
-                data=semantic_result,
+                data=cached,
                 skip_remaining=True
             )
         
@@ -350,9 +502,55 @@ class CacheMiddleware(BaseMiddleware):
         
         # Cache the result if successful
         if result.success and result.data:
-            await self._set_exact_cache(cache_key, result.data)
+            await self._store(request, context, cache_key, embedding, result.data)
         
         return result
+    
+    async def process_stream(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext,
+        next_stream: StreamHandler
+    ) -> AsyncIterator[StreamEvent]:
+        """Replay cache hits as chunks; tee misses and cache the completed stream"""
+        if not request.get("use_cache", True):
+            async for event in next_stream(request, context):
+                yield event
+            return
+        
+        cache_key, cached, embedding = await self._lookup(request, context)
+        if cached:
+            timer = StreamTimer()
+            async for event in replay_events(cached.get("message", "")):
+                timer.mark()
+                yield event
+            yield done_event(
+                agent=context.agent_name, cached=True, blocked=False,
+                ttft_ms=timer.ttft_ms, duration_ms=timer.elapsed_ms,
+            )
+            return
+        
+        parts: List[str] = []
+        completed = False
+        async for event in next_stream(request, context):
+            kind = event.get("type")
+            if kind == "chunk":
+                parts.append(event["content"])
+            elif kind == "done":
+                completed = not event.get("metadata", {}).get("blocked")
+            yield event
+        
+        # Only complete, unblocked streams are cached, in the shape
+        # non-streaming agent execution stores
+        if completed and parts:
+            await self._store(request, context, cache_key, embedding, {
+                "success": True,
+                "message": "".join(parts),
+                "data": None,
+                "suggestions": None,
+                "confidence": 0.9,
+                "blocked": False,
+            })
 
 
 # ============================================================================
@@ -407,13 +605,8 @@ class ModelRouterMiddleware(BaseMiddleware):
         self._model_usage[model] = self._model_usage.get(model, 0) + 1
         return model
     
-    async def process(
-        self,
-        request: Dict[str, Any],
-        context: MiddlewareContext,
-        next_middleware: Callable
-    ) -> MiddlewareResult:
-        """Route to appropriate model"""
+    def _route(self, request: Dict[str, Any], context: MiddlewareContext) -> None:
+        """Select the model and record it on the request and context"""
         # Get agent tier from registry or use default
         tier = request.get("model_tier", self._default_tier)
         capabilities = request.get("capabilities", [])
@@ -433,8 +626,27 @@ class ModelRouterMiddleware(BaseMiddleware):
         
         # Add model to request for downstream use
         request["model"] = context.model_selected
-        
+    
+    async def process(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext,
+        next_middleware: Callable
+    ) -> MiddlewareResult:
+        """Route to appropriate model"""
+        self._route(request, context)
         return await next_middleware(request, context)
+    
+    async def process_stream(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext,
+        next_stream: StreamHandler
+    ) -> AsyncIterator[StreamEvent]:
+        """Route to appropriate model, then stream"""
+        self._route(request, context)
+        async for event in next_stream(request, context):
+            yield event
 
 
 # ============================================================================
@@ -482,6 +694,8 @@ class LoggingMiddleware(BaseMiddleware):
             
             duration_ms = (time.time() - start_time) * 1000
             
+            stages = context.stage_timings()
+            
             # Log successful response
             logger.info(
                 "request_completed",
@@ -491,11 +705,13 @@ class LoggingMiddleware(BaseMiddleware):
                 cache_hit=context.cache_hit,
                 model=context.model_selected,
                 success=result.success,
-                blocked=result.blocked
+                blocked=result.blocked,
+                stages=stages
             )
             
             # Add timing to result
             result.metadata["duration_ms"] = round(duration_ms, 2)
+            result.metadata["stages"] = stages
             
             return result
             
@@ -515,77 +731,168 @@ class LoggingMiddleware(BaseMiddleware):
                 message=f"Request failed: {str(e)}",
                 metadata={"duration_ms": round(duration_ms, 2)}
             )
+    
+    async def process_stream(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext,
+        next_stream: StreamHandler
+    ) -> AsyncIterator[StreamEvent]:
+        """Log a streamed request with time to first chunk"""
+        timer = StreamTimer()
+        chunks = 0
+        outcome: Dict[str, Any] = {}
+        
+        logger.info(
+            "request_started",
+            request_id=context.request_id,
+            agent=context.agent_name,
+            salon_id=context.salon_id,
+            channel=context.channel,
+            prompt_preview=request.get("prompt", "")[:100],
+            stream=True
+        )
+        
+        try:
+            async for event in next_stream(request, context):
+                kind = event.get("type")
+                if kind == "chunk":
+                    timer.mark()
+                    chunks += 1
+                elif kind == "done":
+                    outcome = event.get("metadata", {})
+                elif kind == "error":
+                    outcome = {"error": event.get("message")}
+                yield event
+        except Exception as e:
+            logger.error(
+                "request_failed",
+                request_id=context.request_id,
+                agent=context.agent_name,
+                duration_ms=timer.elapsed_ms,
+                error=str(e),
+                stream=True
+            )
+            raise
+        
+        logger.info(
+            "request_completed",
+            request_id=context.request_id,
+            agent=context.agent_name,
+            duration_ms=timer.elapsed_ms,
+            ttft_ms=timer.ttft_ms,
+            chunks=chunks,
+            cache_hit=context.cache_hit,
+            model=context.model_selected,
+            success="error" not in outcome,
+            blocked=bool(outcome.get("blocked")),
+            stream=True
+        )
 
 
 # ============================================================================
 # Rate Limiting Middleware
 # ============================================================================
 
+# Requests per minute / hour by salon subscription plan
+DEFAULT_PLAN_LIMITS: Dict[str, Dict[str, int]] = {
+    "free": {"minute": 10, "hour": 100},
+    "basic": {"minute": 30, "hour": 500},
+    "professional": {"minute": 60, "hour": 1000},
+    "enterprise": {"minute": 200, "hour": 5000},
+}
+
+# Tokens a request consumes by model tier (default 1)
+DEFAULT_TIER_COSTS: Dict[str, int] = {"premium": 3, "image": 5}
+
+_PERIODS = {"minute": 60, "hour": 3600}
+
+
 class RateLimitMiddleware(BaseMiddleware):
     """Middleware for rate limiting requests.
     
-    Implements token bucket algorithm per salon.
+    Per-salon GCRA limits shared by every instance through Redis (see
+    ``app.core.rate_limiter``). Limits come from the salon's plan
+    (``plan`` in the request context) and are rates: a salon may spend a
+    full period's allowance at once, then refills at the plan's pace.
+    Requests for pricier model tiers consume more tokens.
     """
     
     def __init__(
         self,
         requests_per_minute: int = 60,
-        requests_per_hour: int = 1000
+        requests_per_hour: int = 1000,
+        plan_limits: Optional[Dict[str, Dict[str, int]]] = None,
+        tier_costs: Optional[Dict[str, int]] = None,
+        limiter: Optional[RateLimiter] = None,
     ):
+        """
+        Args:
+            requests_per_minute: Limit for salons without a known plan
+            requests_per_hour: Limit for salons without a known plan
+            plan_limits: ``{plan: {"minute": n, "hour": n}}``
+            tier_costs: ``{model_tier: tokens}``
+            limiter: Shared limiter; by default built on the cache's Redis
+        """
         self._rpm = requests_per_minute
         self._rph = requests_per_hour
-        self._buckets: Dict[str, Dict[str, Any]] = {}
+        self._default_limits = self._build_limits({"minute": requests_per_minute, "hour": requests_per_hour})
+        self._plan_limits = {
+            plan: self._build_limits(limits)
+            for plan, limits in (DEFAULT_PLAN_LIMITS if plan_limits is None else plan_limits).items()
+        }
+        self._tier_costs = DEFAULT_TIER_COSTS if tier_costs is None else tier_costs
+        self._limiter = limiter
+    
+    @staticmethod
+    def _build_limits(limits: Dict[str, int]) -> Tuple[Limit, ...]:
+        return tuple(Limit(name, count, _PERIODS[name]) for name, count in limits.items())
     
     @property
     def name(self) -> str:
         return "rate_limit"
     
-    def _check_rate_limit(self, salon_id: str) -> tuple[bool, str]:
+    async def initialize(self) -> bool:
+        """Share limits through the cache service's Redis when enabled"""
+        if self._limiter is None:
+            from app.services.cache_service import get_cache_service
+            
+            cache = await get_cache_service()
+            self._limiter = RateLimiter(
+                backend=cache._client if cache._enabled else None,
+                key_prefix="ai:ratelimit",
+            )
+        return True
+    
+    async def _check_rate_limit(
+        self,
+        salon_id: str,
+        plan: Optional[str] = None,
+        tier: Optional[str] = None
+    ) -> tuple[bool, str]:
         """Check if request is within rate limits"""
-        now = time.time()
-        
-        if salon_id not in self._buckets:
-            self._buckets[salon_id] = {
-                "minute_tokens": self._rpm,
-                "hour_tokens": self._rph,
-                "last_minute_reset": now,
-                "last_hour_reset": now
-            }
-        
-        bucket = self._buckets[salon_id]
-        
-        # Reset tokens if time window passed
-        if now - bucket["last_minute_reset"] >= 60:
-            bucket["minute_tokens"] = self._rpm
-            bucket["last_minute_reset"] = now
-        
-        if now - bucket["last_hour_reset"] >= 3600:
-            bucket["hour_tokens"] = self._rph
-            bucket["last_hour_reset"] = now
-        
-        # Check limits
-        if bucket["minute_tokens"] <= 0:
-            return False, "Rate limit exceeded: too many requests per minute"
-        
-        if bucket["hour_tokens"] <= 0:
-            return False, "Rate limit exceeded: too many requests per hour"
-        
-        # Consume tokens
-        bucket["minute_tokens"] -= 1
-        bucket["hour_tokens"] -= 1
+        if self._limiter is None:
+            await self.initialize()
         
-        return True, ""
+        limits = self._plan_limits.get(plan, self._default_limits) if plan else self._default_limits
+        result = await self._limiter.acquire(salon_id, limits, self._tier_costs.get(tier, 1))
+        if result.allowed:
+            return True, ""
+        return False, f"Rate limit exceeded: too many requests per {result.limit or 'minute'}"
     
-    async def process(
+    def stats(self) -> Dict[str, Any]:
+        return self._limiter.stats() if self._limiter else {}
+    
+    async def _limit(
         self,
         request: Dict[str, Any],
-        context: MiddlewareContext,
-        next_middleware: Callable
-    ) -> MiddlewareResult:
-        """Check rate limits before processing"""
+        context: MiddlewareContext
+    ) -> Optional[MiddlewareResult]:
+        """Blocked result when the salon is over its limits, else None"""
         salon_id = context.salon_id or "default"
+        plan = context.metadata.get("plan") or context.agent_context.get("plan")
         
-        allowed, message = self._check_rate_limit(salon_id)
+        allowed, message = await self._check_rate_limit(salon_id, plan, request.get("model_tier"))
         
         if not allowed:
             logger.warning(
@@ -598,8 +905,31 @@ class RateLimitMiddleware(BaseMiddleware):
                 blocked=True,
                 message=message
             )
-        
+        return None
+    
+    async def process(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext,
+        next_middleware: Callable
+    ) -> MiddlewareResult:
+        """Check rate limits before processing"""
+        blocked = await self._limit(request, context)
+        if blocked is not None:
+            return blocked
         return await next_middleware(request, context)
+    
+    async def process_stream(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext,
+        next_stream: StreamHandler
+    ) -> AsyncIterator[StreamEvent]:
+        """Check rate limits before streaming"""
+        blocked = await self._limit(request, context)
+        stream = _blocked_stream(blocked, context) if blocked else next_stream(request, context)
+        async for event in stream:
+            yield event
 
 
 # Export all middleware
@@ -612,4 +942,5 @@ __all__ = [
     "ModelRouterMiddleware",
     "LoggingMiddleware",
     "RateLimitMiddleware",
+    "StreamHandler",
 ]
@@ -2,8 +2,15 @@
 
 Implements the Pipeline pattern for processing AI requests through
 a chain of middleware components.
+
+The chain is built once (at initialization, and again whenever the
+middleware list changes) and ends in the agent itself, so rate limits,
+guardrails and caching all apply to real agent execution. Every stage is
+timed into the request's ``MiddlewareContext.timings`` and aggregated by
+``PipelineMetrics``.
 """
-from typing import Dict, Any, Optional, List, Callable
+from typing import Dict, Any, AsyncIterator, Awaitable, Optional, List, Callable
+import time
 import structlog
 from datetime import datetime
 
@@ -16,10 +23,15 @@ from .middleware import (
     ModelRouterMiddleware,
     LoggingMiddleware,
     RateLimitMiddleware,
+    StreamHandler,
 )
+from .metrics import get_pipeline_metrics
+from app.services.streaming import StreamEvent, error_event
 
 logger = structlog.get_logger()
 
+Handler = Callable[[Dict[str, Any], MiddlewareContext], Awaitable[MiddlewareResult]]
+
 
 class PipelineConfig:
     """Configuration for the request pipeline"""
@@ -35,6 +47,9 @@ class PipelineConfig:
         rate_limit_rph: int = 1000,
         cache_exact_ttl: int = 3600,
         cache_semantic_ttl: int = 7200,
+        cache_similarity_threshold: float = 0.95,
+        rate_limit_plans: Optional[Dict[str, Dict[str, int]]] = None,
+        rate_limit_tier_costs: Optional[Dict[str, int]] = None,
     ):
         self.enable_guardrail = enable_guardrail
         self.enable_cache = enable_cache
@@ -45,6 +60,10 @@ class PipelineConfig:
         self.rate_limit_rph = rate_limit_rph
         self.cache_exact_ttl = cache_exact_ttl
         self.cache_semantic_ttl = cache_semantic_ttl
+        self.cache_similarity_threshold = cache_similarity_threshold
+        # None keeps the middleware defaults (per-plan limits, tier costs)
+        self.rate_limit_plans = rate_limit_plans
+        self.rate_limit_tier_costs = rate_limit_tier_costs
 
 
 class RequestProcessor:
@@ -70,42 +89,58 @@ class RequestProcessor:
     
     def __init__(self, config: Optional[PipelineConfig] = None):
         self.config = config or PipelineConfig()
-        self.middlewares: List[BaseMiddleware] = []
+        self._middlewares: List[BaseMiddleware] = []
+        self._chain: Optional[Handler] = None
+        self._stream_chain: Optional[StreamHandler] = None
         self._initialized = False
     
+    @property
+    def middlewares(self) -> List[BaseMiddleware]:
+        return self._middlewares
+    
+    @middlewares.setter
+    def middlewares(self, middlewares: List[BaseMiddleware]) -> None:
+        self._middlewares = list(middlewares)
+        self._invalidate_chain()
+    
     async def initialize(self) -> bool:
         """Initialize all middleware components"""
         if self._initialized:
             return True
         
         # Build middleware chain based on config
-        self.middlewares = []
+        middlewares: List[BaseMiddleware] = []
         
         # 1. Logging (always first)
         if self.config.enable_logging:
-            self.middlewares.append(LoggingMiddleware())
+            middlewares.append(LoggingMiddleware())
         
         # 2. Rate Limiting
         if self.config.enable_rate_limit:
-            self.middlewares.append(RateLimitMiddleware(
+            middlewares.append(RateLimitMiddleware(
                 requests_per_minute=self.config.rate_limit_rpm,
-                requests_per_hour=self.config.rate_limit_rph
+                requests_per_hour=self.config.rate_limit_rph,
+                plan_limits=self.config.rate_limit_plans,
+                tier_costs=self.config.rate_limit_tier_costs,
             ))
         
         # 3. Guardrails
         if self.config.enable_guardrail:
-            self.middlewares.append(GuardrailMiddleware())
+            middlewares.append(GuardrailMiddleware())
         
         # 4. Cache
         if self.config.enable_cache:
-            self.middlewares.append(CacheMiddleware(
+            middlewares.append(CacheMiddleware(
                 exact_ttl=self.config.cache_exact_ttl,
-                semantic_ttl=self.config.cache_semantic_ttl
+                semantic_ttl=self.config.cache_semantic_ttl,
+                similarity_threshold=self.config.cache_similarity_threshold,
             ))
         
         # 5. Model Router
         if self.config.enable_model_router:
-            self.middlewares.append(ModelRouterMiddleware())
+            middlewares.append(ModelRouterMiddleware())
+        
+        self.middlewares = middlewares
         
         # Initialize all middleware
         init_results = []
@@ -126,6 +161,7 @@ class RequestProcessor:
                 )
                 init_results.append(False)
         
+        self._build_chain()
         self._initialized = True
         logger.info(
             "pipeline_initialized",
@@ -152,83 +188,146 @@ class RequestProcessor:
         if not self._initialized:
             await self.initialize()
         
-        # Build middleware context
-        ctx = MiddlewareContext(
-            salon_id=context.get("salon_id") if context else None,
-            agent_name=context.get("agent_name") if context else None,
-            channel=context.get("channel", "web") if context else "web",
-            language=context.get("language", "en") if context else "en",
-            user_id=context.get("user_id") if context else None,
-            session_id=context.get("session_id") if context else None,
-            metadata=context.get("metadata", {}) if context else {}
-        )
-        
-        # Build middleware chain
-        chain = self._build_chain(request, ctx)
+        ctx = self._build_context(context)
+        chain = self._chain or self._build_chain()
         
-        # Execute chain
+        started = time.perf_counter()
         try:
             result = await chain(request, ctx)
-            return result
         except Exception as e:
             logger.error(
                 "pipeline_execution_error",
                 request_id=ctx.request_id,
                 error=str(e)
             )
-            return MiddlewareResult(
+            result = MiddlewareResult(
                 success=False,
                 message=f"Pipeline error: {str(e)}"
             )
+        get_pipeline_metrics().record(ctx, (time.perf_counter() - started) * 1000, result)
+        return result
     
-    def _build_chain(
-        self,
-        request: Dict[str, Any],
-        context: MiddlewareContext
-    ) -> Callable:
-        """Build the middleware chain.
+    def _build_context(self, context: Optional[Dict[str, Any]]) -> MiddlewareContext:
+        """Middleware context from the caller's context dict"""
+        return MiddlewareContext(
+            salon_id=context.get("salon_id") if context else None,
+            agent_name=context.get("agent_name") if context else None,
+            channel=context.get("channel", "web") if context else "web",
+            language=context.get("language", "en") if context else "en",
+            user_id=context.get("user_id") if context else None,
+            session_id=context.get("session_id") if context else None,
+            metadata=context.get("metadata", {}) if context else {},
+            agent_context=context or {}
+        )
+    
+    def _invalidate_chain(self) -> None:
+        self._chain = None
+        self._stream_chain = None
+    
+    def _build_chain(self) -> Handler:
+        """Compose the middleware around agent execution.
         
-        Returns a callable that executes the chain.
+        Built once and reused by every request; per-request state lives in
+        the ``MiddlewareContext``. Each stage, including the agent, is timed.
         """
-        # Start with the final handler (agent execution)
-        async def final_handler(
-            req: Dict[str, Any],
-            ctx: MiddlewareContext
-        ) -> MiddlewareResult:
-            # This will be replaced by actual agent execution
-            return MiddlewareResult(
-                success=True,
-                message="Pipeline completed - no agent execution",
-                data={"request": req}
-            )
-        
-        chain = final_handler
+        chain: Handler = self._timed("agent", self._run_agent)
+        stream_chain: StreamHandler = self._stream_agent
         
         # Wrap with middleware in reverse order
         for middleware in reversed(self.middlewares):
             chain = self._wrap_middleware(middleware, chain)
+            stream_chain = self._wrap_stream(middleware, stream_chain)
         
+        self._chain = chain
+        self._stream_chain = stream_chain
         return chain
     
+    def _timed(self, stage: str, handler: Handler) -> Handler:
+        """Record a stage's inclusive time in the request context."""
+        async def timed(
+            request: Dict[str, Any],
+            context: MiddlewareContext
+        ) -> MiddlewareResult:
+            # Reserve the slot so stages stay in chain order
+            context.timings[stage] = None
+            started = time.perf_counter()
+            try:
+                return await handler(request, context)
+            finally:
+                context.timings[stage] = (time.perf_counter() - started) * 1000
+        
+        return timed
+    
     def _wrap_middleware(
         self,
         middleware: BaseMiddleware,
-        next_handler: Callable
-    ) -> Callable:
+        next_handler: Handler
+    ) -> Handler:
         """Wrap a middleware around the next handler."""
         async def wrapper(
             request: Dict[str, Any],
             context: MiddlewareContext
         ) -> MiddlewareResult:
-            result = await middleware.process(request, context, next_handler)
-            
-            # Check if we should skip remaining middleware
-            if result.skip_remaining:
-                return result
-            
-            return result
+            return await middleware.process(request, context, next_handler)
         
-        return wrapper
+        return self._timed(middleware.name, wrapper)
+    
+    def _agent_request(self, request: Dict[str, Any], context: MiddlewareContext) -> Dict[str, Any]:
+        agent_request = {"context": context.agent_context, **request}
+        # The guardrail middleware already checked the prompt
+        if any(m.name == "guardrail" for m in self.middlewares):
+            agent_request["skip_guardrail"] = True
+        return agent_request
+    
+    async def _run_agent(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext
+    ) -> MiddlewareResult:
+        """Terminal handler: execute the agent through the plugin registry."""
+        if not context.agent_name:
+            return MiddlewareResult(success=False, message="No agent specified")
+        
+        from app.plugins import get_registry
+        
+        try:
+            data = await get_registry().execute(
+                context.agent_name,
+                self._agent_request(request, context),
+                context.agent_context
+            )
+        except Exception as e:
+            logger.error(
+                "agent_execution_failed",
+                agent=context.agent_name,
+                error=str(e)
+            )
+            return MiddlewareResult(
+                success=False,
+                message=f"Agent execution failed: {str(e)}"
+            )
+        
+        return MiddlewareResult(
+            success=data.get("success", True),
+            blocked=data.get("blocked", False),
+            message=data.get("message", ""),
+            data=data
+        )
+    
+    async def _stream_agent(
+        self,
+        request: Dict[str, Any],
+        context: MiddlewareContext
+    ) -> AsyncIterator[StreamEvent]:
+        """Terminal stream handler: stream the agent through the registry."""
+        from app.plugins import get_registry
+        
+        async for event in get_registry().execute_stream(
+            context.agent_name,
+            self._agent_request(request, context),
+            context.agent_context
+        ):
+            yield event
     
     async def execute_agent(
         self,
@@ -246,42 +345,65 @@ class RequestProcessor:
         Returns:
             MiddlewareResult with agent response
         """
+        ctx = dict(context or {})
+        ctx["agent_name"] = agent_name
+        return await self.process(request, ctx)
+    
+    async def stream_agent(
+        self,
+        agent_name: str,
+        request: Dict[str, Any],
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[StreamEvent]:
+        """Stream an agent's response through the pipeline.
+        
+        Every middleware sees the stream: rate limits and guardrails run
+        before the agent is called, the cache replays hits and stores the
+        completed stream on a miss, and logging records time to first token.
+        
+        Args:
+            agent_name: Name (or alias) of the agent to execute
+            request: The request data (``prompt``, ``history``, ``use_cache``)
+            context: Optional context
+            
+        Yields:
+            ``chunk`` events followed by ``done`` or ``error``
+        """
         if not self._initialized:
             await self.initialize()
         
-        # Add agent name to context
-        ctx = context or {}
+        ctx = dict(context or {})
         ctx["agent_name"] = agent_name
+        middleware_ctx = self._build_context(ctx)
+        if self._stream_chain is None:
+            self._build_chain()
+        chain = self._stream_chain
         
-        # Process through pipeline
-        result = await self.process(request, ctx)
-        
-        # If pipeline completed without agent execution, execute now
-        if result.success and not result.data:
-            try:
-                from app.plugins import get_registry
-                
-                registry = get_registry()
-                agent_result = await registry.execute(agent_name, request, ctx)
-                
-                return MiddlewareResult(
-                    success=True,
-                    data=agent_result,
-                    cached=result.cached,
-                    metadata=result.metadata
-                )
-            except Exception as e:
-                logger.error(
-                    "agent_execution_failed",
-                    agent=agent_name,
-                    error=str(e)
-                )
-                return MiddlewareResult(
-                    success=False,
-                    message=f"Agent execution failed: {str(e)}"
-                )
+        try:
+            async for event in chain(request, middleware_ctx):
+                yield event
+        except Exception as e:
+            logger.error(
+                "pipeline_stream_error",
+                request_id=middleware_ctx.request_id,
+                agent=agent_name,
+                error=str(e)
+            )
+            yield error_event(f"Pipeline error: {str(e)}")
+    
+    def _wrap_stream(
+        self,
+        middleware: BaseMiddleware,
+        next_stream: StreamHandler
+    ) -> StreamHandler:
+        """Wrap a middleware's streaming hook around the next stage."""
+        def wrapper(
+            request: Dict[str, Any],
+            context: MiddlewareContext
+        ) -> AsyncIterator[StreamEvent]:
+            return middleware.process_stream(request, context, next_stream)
         
-        return result
+        return wrapper
     
     def add_middleware(self, middleware: BaseMiddleware) -> None:
         """Add custom middleware to the pipeline.
@@ -290,6 +412,7 @@ class RequestProcessor:
             middleware: Middleware to add
         """
         self.middlewares.append(middleware)
+        self._invalidate_chain()
         logger.info("middleware_added", name=middleware.name)
     
     def remove_middleware(self, name: str) -> bool:
@@ -304,6 +427,7 @@ class RequestProcessor:
         for i, middleware in enumerate(self.middlewares):
             if middleware.name == name:
                 self.middlewares.pop(i)
+                self._invalidate_chain()
                 logger.info("middleware_removed", name=name)
                 return True
         return False
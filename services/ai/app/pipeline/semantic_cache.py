@@ -0,0 +1,416 @@
+"""Semantic Response Cache
+
+Embeds prompts through a pluggable provider and keeps the vectors in an
+in-process, per-salon cosine index so paraphrased prompts can reuse a cached
+response without another LLM call.
+
+Components:
+- EmbeddingProvider: async ``embed(text)`` returning a unit vector
+- HashingEmbedder: deterministic local provider (feature hashing), no model
+- VertexEmbeddingProvider: Vertex AI text embeddings, loaded once off-loop
+- SemanticIndex: per-salon, per-agent numpy cosine top-k with TTL and LRU bounds,
+  serializable to disk or Redis
+
+Example:
+    index = SemanticIndex(ttl=7200)
+    embedder = HashingEmbedder()
+    vector = await embedder.embed("Book a haircut tomorrow")
+    index.add("salon_1", "booking", "Book a haircut tomorrow", vector, {"message": "..."})
+    matches = index.search("salon_1", "booking", vector, k=1)
+"""
+import asyncio
+import json
+import math
+import os
+import re
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from operator import mul
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _normalize(vector: List[float]) -> Optional[List[float]]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    if not norm:
+        return None
+    return [v / norm for v in vector]
+
+
+def cosine(a: List[float], b: List[float]) -> float:
+    """Cosine similarity of two unit vectors."""
+    return sum(map(mul, a, b))
+
+
+# ============================================================================
+# Embedding providers
+# ============================================================================
+
+class EmbeddingProvider(ABC):
+    """Turns text into a unit-length embedding vector."""
+
+    name: str = "base"
+
+    @abstractmethod
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """Embed ``text``; None when the provider is unavailable."""
+        pass
+
+
+class HashingEmbedder(EmbeddingProvider):
+    """Deterministic bag-of-words/char-trigram embedder.
+
+    Hashes normalized word tokens and character trigrams into a fixed number
+    of signed buckets. It needs no model, gives identical vectors in every
+    process, and scores case, punctuation and small wording changes as
+    near-duplicates, which makes it a local stand-in for a real embedding model.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> List[Tuple[str, float]]:
+        tokens = _TOKEN.findall(text.lower())
+        features = [(f"w:{token}", 1.0) for token in tokens]
+        for token in tokens:
+            padded = f" {token} "
+            features.extend(
+                (f"c:{padded[i:i + 3]}", 0.5) for i in range(len(padded) - 2)
+            )
+        return features
+
+    def embed_sync(self, text: str) -> Optional[List[float]]:
+        vector = [0.0] * self.dimensions
+        for feature, weight in self._features(text):
+            digest = zlib.crc32(feature.encode())
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % self.dimensions] += sign * weight
+        return _normalize(vector)
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        return self.embed_sync(text)
+
+
+class VertexEmbeddingProvider(EmbeddingProvider):
+    """Vertex AI text embeddings.
+
+    The model is loaded once, and both loading and inference run in a worker
+    thread so the event loop is never blocked. If the SDK or credentials are
+    missing, the provider disables itself after the first failure.
+    """
+
+    name = "vertex"
+
+    def __init__(self, model_name: str = "text-embedding-004"):
+        self.model_name = model_name
+        self._model = None
+        self._unavailable = False
+        self._lock = asyncio.Lock()
+
+    async def _get_model(self):
+        if self._model is None and not self._unavailable:
+            async with self._lock:
+                if self._model is None and not self._unavailable:
+                    try:
+                        from vertexai.language_models import TextEmbeddingModel
+                        self._model = await asyncio.to_thread(
+                            TextEmbeddingModel.from_pretrained, self.model_name
+                        )
+                    except Exception as e:
+                        self._unavailable = True
+                        logger.warning("embedding_model_unavailable", model=self.model_name, error=str(e))
+        return self._model
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        model = await self._get_model()
+        if model is None:
+            return None
+        try:
+            embeddings = await asyncio.to_thread(model.get_embeddings, [text])
+            return _normalize(list(embeddings[0].values))
+        except Exception as e:
+            logger.warning("embedding_generation_failed", error=str(e))
+            return None
+
+
+def get_embedding_provider(kind: Optional[str] = None) -> Optional[EmbeddingProvider]:
+    """Build the provider named by ``kind`` or ``SEMANTIC_CACHE_EMBEDDER``.
+
+    Supported: ``vertex`` (default), ``hashing`` and ``none``.
+    """
+    kind = (kind or os.environ.get("SEMANTIC_CACHE_EMBEDDER", "vertex")).lower()
+    if kind == "none":
+        return None
+    if kind == "hashing":
+        return HashingEmbedder()
+    return VertexEmbeddingProvider(os.environ.get("SEMANTIC_CACHE_MODEL", "text-embedding-004"))
+
+
+# ============================================================================
+# Vector index
+# ============================================================================
+
+@dataclass
+class SemanticEntry:
+    """One cached prompt/response pair."""
+    agent_name: str
+    prompt: str
+    vector: List[float]
+    response: Dict[str, Any]
+    expires_at: float
+
+
+class _Partition:
+    """Vector matrix for one salon/agent pair.
+
+    Rows are preallocated in doubling steps up to the salon cap and reused
+    after eviction, so a search is a single matrix-vector product.
+    """
+
+    def __init__(self, dimensions: int, max_rows: int, initial_rows: int = 16):
+        self.dimensions = dimensions
+        self.max_rows = max_rows
+        rows = max(1, min(initial_rows, max_rows))
+        self.vectors = np.zeros((rows, dimensions), dtype=np.float32)
+        self.expires = np.full(rows, -np.inf)
+        self.entry_ids = np.full(rows, -1, dtype=np.int64)
+        self.rows: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._used = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _grow(self) -> None:
+        old = len(self.vectors)
+        rows = max(old + 1, min(old * 2, self.max_rows))
+        vectors = np.zeros((rows, self.dimensions), dtype=np.float32)
+        vectors[:old] = self.vectors
+        self.vectors = vectors
+        self.expires = np.concatenate([self.expires, np.full(rows - old, -np.inf)])
+        self.entry_ids = np.concatenate([self.entry_ids, np.full(rows - old, -1, dtype=np.int64)])
+
+    def add(self, entry_id: int, vector: List[float], expires_at: float) -> None:
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._used == len(self.vectors):
+                self._grow()
+            row = self._used
+            self._used += 1
+        self.vectors[row] = vector
+        self.expires[row] = expires_at
+        self.entry_ids[row] = entry_id
+        self.rows[entry_id] = row
+
+    def remove(self, entry_id: int) -> None:
+        row = self.rows.pop(entry_id, None)
+        if row is None:
+            return
+        self.expires[row] = -np.inf
+        self.entry_ids[row] = -1
+        self._free.append(row)
+
+    def search(
+        self,
+        vector: List[float],
+        k: int,
+        min_score: float,
+        now: float,
+    ) -> Tuple[List[Tuple[float, int]], List[int]]:
+        """Top-``k`` (score, entry_id) pairs plus the ids of expired rows."""
+        used = self._used
+        entry_ids = self.entry_ids[:used]
+        live = self.expires[:used] > now
+        expired = entry_ids[~live & (entry_ids >= 0)].tolist()
+
+        scores = self.vectors[:used] @ np.asarray(vector, dtype=np.float32)
+        candidates = np.flatnonzero(live & (scores >= min_score))
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(float(scores[row]), int(entry_ids[row])) for row in candidates], expired
+
+
+class SemanticIndex:
+    """Per-salon cosine index with TTL expiry and an LRU size bound.
+
+    Vectors are partitioned by salon and agent into numpy matrices, so a
+    lookup only scores candidates that could match and costs one
+    matrix-vector product instead of a Python loop over every entry.
+    """
+
+    def __init__(
+        self,
+        ttl: int = 7200,
+        max_entries_per_salon: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl = ttl
+        self.max_entries_per_salon = max_entries_per_salon
+        self._clock = clock
+        self._salons: Dict[str, "OrderedDict[int, SemanticEntry]"] = {}
+        self._partitions: Dict[Tuple[str, str], _Partition] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._salons.values())
+
+    def _discard(self, salon_id: str, entry_id: int, entry: SemanticEntry) -> None:
+        key = (salon_id, entry.agent_name)
+        partition = self._partitions.get(key)
+        if partition is None:
+            return
+        partition.remove(entry_id)
+        if not partition:
+            del self._partitions[key]
+
+    def add(
+        self,
+        salon_id: str,
+        agent_name: str,
+        prompt: str,
+        vector: List[float],
+        response: Dict[str, Any],
+        ttl: Optional[int] = None,
+    ) -> None:
+        """Index a response; evicts the salon's least recently used entry when full."""
+        entries = self._salons.setdefault(salon_id, OrderedDict())
+        while entries and len(entries) >= self.max_entries_per_salon:
+            evicted_id, evicted = entries.popitem(last=False)
+            self._discard(salon_id, evicted_id, evicted)
+
+        key = (salon_id, agent_name)
+        partition = self._partitions.get(key)
+        if partition is not None and partition.dimensions != len(vector):
+            # The embedder changed; old vectors are no longer comparable
+            for entry_id in list(partition.rows):
+                entries.pop(entry_id, None)
+            partition = None
+        if partition is None:
+            partition = self._partitions[key] = _Partition(len(vector), self.max_entries_per_salon)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        entry = SemanticEntry(
+            agent_name=agent_name,
+            prompt=prompt,
+            vector=vector,
+            response=response,
+            expires_at=self._clock() + (self.ttl if ttl is None else ttl),
+        )
+        entries[entry_id] = entry
+        partition.add(entry_id, vector, entry.expires_at)
+
+    def search(
+        self,
+        salon_id: str,
+        agent_name: str,
+        vector: List[float],
+        k: int = 1,
+        min_score: float = -1.0,
+    ) -> List[Tuple[float, SemanticEntry]]:
+        """Top-``k`` live entries for this salon and agent by cosine score."""
+        partition = self._partitions.get((salon_id, agent_name))
+        if partition is None or k <= 0 or partition.dimensions != len(vector):
+            return []
+
+        entries = self._salons[salon_id]
+        top, expired = partition.search(vector, k, min_score, self._clock())
+        for entry_id in expired:
+            self._discard(salon_id, entry_id, entries.pop(entry_id))
+        for _, entry_id in top:
+            entries.move_to_end(entry_id)
+        return [(score, entries[entry_id]) for score, entry_id in top]
+
+    def evict_expired(self) -> int:
+        """Drop expired entries in every salon; returns the count removed."""
+        now = self._clock()
+        removed = 0
+        for salon_id, entries in self._salons.items():
+            for entry_id in [i for i, e in entries.items() if e.expires_at <= now]:
+                self._discard(salon_id, entry_id, entries.pop(entry_id))
+                removed += 1
+        return removed
+
+    def clear(self, salon_id: Optional[str] = None) -> None:
+        """Forget one salon's entries, or everything."""
+        if salon_id is None:
+            self._salons.clear()
+            self._partitions.clear()
+        else:
+            self._salons.pop(salon_id, None)
+            for key in [key for key in self._partitions if key[0] == salon_id]:
+                del self._partitions[key]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def dumps(self) -> str:
+        """Serialize live entries to JSON."""
+        self.evict_expired()
+        return json.dumps({
+            salon_id: [asdict(entry) for entry in entries.values()]
+            for salon_id, entries in self._salons.items()
+        })
+
+    def loads(self, payload: str) -> int:
+        """Merge entries from ``dumps`` output; expired ones are skipped."""
+        now = self._clock()
+        loaded = 0
+        for salon_id, entries in json.loads(payload).items():
+            for data in entries:
+                if data["expires_at"] <= now:
+                    continue
+                self.add(
+                    salon_id,
+                    data["agent_name"],
+                    data["prompt"],
+                    data["vector"],
+                    data["response"],
+                    ttl=data["expires_at"] - now,
+                )
+                loaded += 1
+        return loaded
+
+    def save(self, path: str) -> None:
+        """Write the index to ``path`` atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.dumps())
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """Load entries from ``path`` if it exists."""
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            return self.loads(f.read())
+
+    async def save_to_redis(self, redis: Any, key: str) -> None:
+        """Store the index under ``key`` until its last entry expires."""
+        payload = self.dumps()
+        expires = [e.expires_at for entries in self._salons.values() for e in entries.values()]
+        ttl = max(1, int(max(expires, default=self._clock() + 1) - self._clock()))
+        await redis.set(key, payload, ex=ttl)
+
+    async def load_from_redis(self, redis: Any, key: str) -> int:
+        """Merge entries stored by ``save_to_redis``."""
+        payload = await redis.get(key)
+        if not payload:
+            return 0
+        if isinstance(payload, bytes):
+            payload = payload.decode()
+        return self.loads(payload)
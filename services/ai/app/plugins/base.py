@@ -4,7 +4,7 @@ Provides the foundation for the Microkernel architecture with plugin-based agent
 All agents must inherit from AgentPlugin for hot-reloadable, discoverable functionality.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List, Type, ClassVar
+from typing import Dict, Any, AsyncIterator, Optional, List, Type, ClassVar
 from pydantic import BaseModel, Field
 from enum import Enum
 from datetime import datetime
@@ -137,6 +137,34 @@ class AgentPlugin(ABC):
         """
         pass
     
+    async def execute_stream(
+        self,
+        request: Dict[str, Any],
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream agent output as ``chunk``/``done``/``error`` events.
+        
+        Override to stream tokens as they are generated. The default runs
+        ``execute`` and emits the whole message as one chunk.
+        
+        Args:
+            request: The request data containing prompt and parameters
+            context: Optional execution context (salon_id, user_id, etc.)
+            
+        Yields:
+            Stream events (see ``app.services.streaming``)
+        """
+        response = await self.execute(request, context)
+        yield {"type": "chunk", "content": response.get("message", "")}
+        yield {
+            "type": "done",
+            "metadata": {
+                "agent": self.metadata.name,
+                "cached": False,
+                "blocked": response.get("blocked", False),
+            },
+        }
+    
     async def validate_input(self, request: Dict[str, Any]) -> bool:
         """Validate input before execution.
         
@@ -8,7 +8,7 @@ import sys
 import importlib
 import importlib.util
 import inspect
-from typing import Dict, Type, Optional, List
+from typing import Any, Callable, Dict, Type, Optional, List
 from pathlib import Path
 import structlog
 import asyncio
@@ -104,6 +104,8 @@ class PluginLoader:
         try:
             # Import the agents module
             module = importlib.import_module(self.agents_module)
+            # Warm instances shared with get_agent(), when the module pools them
+            get_pooled = getattr(module, "get_pooled_agent", None)
             
             # Find all agent classes
             for name, obj in inspect.getmembers(module):
@@ -111,7 +113,7 @@ class PluginLoader:
                     # Check if it's an agent class (has name and generate method)
                     if obj.__module__ == module.__name__ and obj.__name__ != 'BaseAgent':
                         # Create a plugin wrapper for the agent
-                        plugin_class = self._create_plugin_wrapper(obj)
+                        plugin_class = self._create_plugin_wrapper(obj, get_pooled)
                         if plugin_class:
                             agent_name = getattr(obj, 'name', obj.__name__.lower().replace('agent', ''))
                             plugins[agent_name] = plugin_class
@@ -184,7 +186,11 @@ class PluginLoader:
         
         return plugins
     
-    def _create_plugin_wrapper(self, agent_class: type) -> Optional[Type[AgentPlugin]]:
+    def _create_plugin_wrapper(
+        self,
+        agent_class: type,
+        get_pooled: Optional[Callable[[type], Optional[Any]]] = None,
+    ) -> Optional[Type[AgentPlugin]]:
         """Create a plugin wrapper for an existing agent class.
         
         This enables backward compatibility with existing agents
@@ -192,6 +198,9 @@ class PluginLoader:
         
         Args:
             agent_class: The original agent class to wrap
+            get_pooled: Returns the warm shared instance of a class, if any;
+                the wrapper delegates to it so plugin and legacy lookups
+                use the same agent
             
         Returns:
             A plugin class that wraps the original agent
@@ -205,16 +214,25 @@ class PluginLoader:
                 """Wrapper for legacy agents"""
                 
                 def __init__(wrapper_self):
-                    wrapper_self._agent = agent_class()
+                    wrapper_self._own_agent = None
                     wrapper_self._name = agent_name
                 
+                @property
+                def _agent(wrapper_self):
+                    pooled = get_pooled(agent_class) if get_pooled else None
+                    if pooled is not None:
+                        return pooled
+                    if wrapper_self._own_agent is None:
+                        wrapper_self._own_agent = agent_class()
+                    return wrapper_self._own_agent
+                
                 @property
                 def metadata(wrapper_self) -> AgentMetadata:
                     return AgentMetadata(
                         name=agent_name,
                         version="1.0.0",
                         description=description,
-                        capabilities=self._extract_capabilities(wrapper_self._agent),
+                        capabilities=wrapper_self._extract_capabilities(wrapper_self._agent),
                         model_tier="standard",
                         channels=["web", "whatsapp"]
                     )
@@ -242,6 +260,22 @@ class PluginLoader:
                     
                     return response.model_dump()
                 
+                async def execute_stream(
+                    wrapper_self,
+                    request: dict,
+                    context: Optional[dict] = None
+                ):
+                    """Stream tokens from the wrapped agent"""
+                    async for event in wrapper_self._agent.generate_stream(
+                        prompt=request.get("prompt", ""),
+                        context=request.get("context", context),
+                        history=request.get("history", None),
+                        use_cache=request.get("use_cache", True),
+                        skip_guardrail=request.get("skip_guardrail", False),
+                    ):
+                        yield event
+                
+                @staticmethod
                 def _extract_capabilities(agent) -> List[str]:
                     """Extract capabilities from agent methods"""
                     capabilities = []
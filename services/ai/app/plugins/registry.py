@@ -3,7 +3,7 @@
 Implements a singleton registry pattern for managing all agent plugins.
 Provides registration, lookup, and lifecycle management capabilities.
 """
-from typing import Dict, List, Optional, Type, Any
+from typing import AsyncIterator, Dict, List, Optional, Type, Any
 import structlog
 import asyncio
 from datetime import datetime
@@ -57,6 +57,7 @@ class AgentRegistry:
         self._metadata_cache: Dict[str, AgentMetadata] = {}
         self._loader: Optional[PluginLoader] = None
         self._metrics: Dict[str, Dict[str, Any]] = {}
+        self._aliases: Dict[str, str] = {}
         self._initialized_at: datetime = datetime.utcnow()
         
         AgentRegistry._initialized = True
@@ -80,6 +81,7 @@ class AgentRegistry:
             cls._instance._agents.clear()
             cls._instance._metadata_cache.clear()
             cls._instance._metrics.clear()
+            cls._instance._aliases.clear()
         cls._initialized = False
         cls._instance = None
     
@@ -133,6 +135,16 @@ class AgentRegistry:
                 message=f"Failed to register agent: {str(e)}"
             )
     
+    def register_alias(self, alias: str, name: str) -> None:
+        """Resolve ``alias`` (e.g. the legacy AGENTS key) to agent ``name``.
+        
+        Args:
+            alias: Alternative lookup name
+            name: Registered agent name
+        """
+        if alias != name:
+            self._aliases[alias] = name
+    
     def unregister(self, name: str) -> bool:
         """Unregister an agent plugin.
         
@@ -162,6 +174,7 @@ class AgentRegistry:
         Raises:
             AgentNotFoundError: If agent not found
         """
+        name = self._aliases.get(name, name)
         if name in self._agents:
             return self._agents[name]
         
@@ -311,6 +324,46 @@ class AgentRegistry:
                 message=f"Execution failed: {str(e)}"
             )
     
+    async def execute_stream(
+        self,
+        name: str,
+        request: Dict[str, Any],
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream an agent's response events with metrics tracking.
+        
+        Args:
+            name: Name (or alias) of the agent to execute
+            request: Request data
+            context: Optional execution context
+            
+        Yields:
+            ``chunk`` events followed by ``done`` or ``error``
+            
+        Raises:
+            AgentNotFoundError: If agent not found
+            AgentExecutionError: If input validation fails
+        """
+        agent = self.get(name)
+        name = self._aliases.get(name, name)
+        start_time = datetime.utcnow()
+        
+        if not await agent.validate_input(request):
+            self._update_metrics(name, 0, success=False)
+            raise AgentExecutionError(
+                agent_name=name,
+                message="Input validation failed"
+            )
+        
+        success = True
+        async for event in agent.execute_stream(request, context):
+            if event.get("type") == "error":
+                success = False
+            yield event
+        
+        execution_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+        self._update_metrics(name, execution_time, success=success)
+    
     def _update_metrics(self, name: str, execution_time_ms: float, success: bool) -> None:
         """Update agent metrics.
         
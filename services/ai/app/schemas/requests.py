@@ -37,6 +37,16 @@ class CampaignRequest(BaseModel):
     offer_details: Dict[str, Any]
 
 
+class BatchGenerationRequest(BaseModel):
+    """Batch of per-customer messages for one task"""
+    salon_id: str
+    task: str = Field(..., description="Task: birthday_offer, rebooking_reminder, campaign, winback")
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=1000, description="Customer contexts, each with a unique id")
+    shared: Optional[Dict[str, Any]] = Field(default=None, description="Details common to every customer")
+    pack_size: int = Field(default=20, ge=1, le=50, description="Customers per LLM call; 1 fans out one call each")
+    concurrency: int = Field(default=4, ge=1, le=16)
+
+
 class AnalyticsRequest(BaseModel):
     """Analytics request"""
     salon_id: str
@@ -4,14 +4,32 @@ Specialized agents for booking, marketing, analytics, customer support,
 waitlist management, slot optimization, upselling, dynamic pricing,
 bundle creation, inventory management, staff scheduling, and retention.
 """
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple, Type
 from pydantic import BaseModel, Field
 from abc import ABC, abstractmethod
 import structlog
 
 from app.services.openrouter_client import OpenRouterClient, ChatMessage, get_openrouter_client
+from app.core.config import get_settings
 from app.services.cache_service import get_cache_service
+from app.services.response_cache import get_response_cache
 from app.services.guardrails import SalonGuardrail, get_guardrail, SALON_ONLY_INSTRUCTION
+from app.services.prompt_context import (
+    RenderedContext,
+    estimate_tokens,
+    get_prompt_metrics,
+    render_context,
+    render_value,
+)
+from app.services.streaming import (
+    StreamEvent,
+    StreamTimer,
+    chunk_event,
+    done_event,
+    error_event,
+    get_stream_metrics,
+    replay_events,
+)
 
 logger = structlog.get_logger()
 
@@ -32,11 +50,26 @@ class BaseAgent(ABC):
     name: str = "base_agent"
     description: str = "Base agent class"
     system_prompt: str = "You are a helpful AI assistant."
+    # Response cache TTL in seconds; None uses settings.cache_ttl, 0 disables
+    cache_ttl: Optional[int] = None
+    # Context token budget; None uses settings.prompt_context_budget
+    context_budget: Optional[int] = None
+    # Context keys kept longest when over budget (scalars are never cut)
+    context_priorities: Dict[str, int] = {}
     
     def __init__(self, client: Optional[OpenRouterClient] = None):
         self._client = client
         self._cache = None
         self._guardrail: Optional[SalonGuardrail] = None
+        self._base_system_prompt: Optional[str] = None
+    
+    async def warm(self) -> "BaseAgent":
+        """Resolve client, cache and guardrail and build the system prompt up front"""
+        await self._get_client()
+        await self._get_cache()
+        self._get_guardrail()
+        self._build_system_prompt()
+        return self
     
     async def _get_client(self) -> OpenRouterClient:
         if self._client is None:
@@ -98,67 +131,226 @@ class BaseAgent(ABC):
         
         client = await self._get_client()
         
-        # Build enhanced system prompt with context and salon-only instruction
-        system_prompt = f"{SALON_ONLY_INSTRUCTION}\n\n{self.system_prompt}"
-        if context:
-            context_str = self._format_context(context)
-            system_prompt = f"{system_prompt}\n\nCurrent Context:\n{context_str}"
-        
-        # Check cache if enabled
-        if use_cache:
-            cache = await self._get_cache()
-            cache_data = {
-                "agent": self.name,
-                "prompt": prompt,
-                "context": context,
-            }
-            cached = await cache.get(cache._generate_key(self.name, cache_data))
-            if cached:
-                logger.info("agent_cache_hit", agent=self.name)
-                return AgentResponse.parse_raw(cached)
-        
-        # Generate response
-        try:
-            response = await client.chat(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                history=history,
-            )
+        system_prompt, rendered = self._system_prompt_with_context(context)
+        
+        async def compute() -> Tuple[AgentResponse, Optional[str]]:
+            # Only the miss path sends a prompt upstream
+            self._record_prompt_tokens(prompt, system_prompt, rendered, history)
+            try:
+                response = await client.chat(
+                    prompt=prompt,
+                    system_prompt=system_prompt,
+                    history=history,
+                )
+            except Exception as e:
+                logger.error("agent_generation_error", agent=self.name, error=str(e))
+                # Failures are shared with coalesced callers but never cached
+                return AgentResponse(
+                    success=False,
+                    message=f"Error generating response: {str(e)}",
+                    confidence=0.0
+                ), None
             
             result = AgentResponse(
                 success=True,
                 message=response.content,
                 confidence=0.9
             )
-            
-            # Cache the result
-            if use_cache:
-                cache = await self._get_cache()
-                await cache.set(
-                    cache._generate_key(self.name, {"prompt": prompt, "context": context}),
-                    result.json()
-                )
-            
+            return result, result.model_dump_json()
+        
+        ttl = self._get_cache_ttl()
+        if not use_cache or ttl <= 0:
+            result, _ = await compute()
             return result
-            
+        
+        response_cache = get_response_cache()
+        key = self._cache_key(client, prompt, context, history)
+        return await response_cache.get_or_compute(
+            self.name,
+            key,
+            compute,
+            decode=AgentResponse.model_validate_json,
+            cache=await self._get_cache(),
+            ttl=ttl,
+        )
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        history: Optional[List[ChatMessage]] = None,
+        use_cache: bool = True,
+        skip_guardrail: bool = False,
+    ) -> AsyncIterator[StreamEvent]:
+        """Stream the response as ``chunk`` events, then ``done`` or ``error``.
+        
+        Cached responses are replayed in chunks. A stream that completes is
+        stored under the same key as ``generate``, so either path hits it
+        afterwards; failed or abandoned streams are never cached.
+        """
+        timer = StreamTimer()
+        
+        if not skip_guardrail:
+            is_valid, rejection_message = self._check_guardrail(prompt)
+            if not is_valid:
+                yield chunk_event(rejection_message)
+                yield done_event(agent=self.name, cached=False, blocked=True)
+                return
+        
+        client = await self._get_client()
+        system_prompt, rendered = self._system_prompt_with_context(context)
+        
+        ttl = self._get_cache_ttl() if use_cache else 0
+        response_cache = get_response_cache()
+        key = self._cache_key(client, prompt, context, history) if ttl > 0 else None
+        cache = await self._get_cache() if key else None
+        metrics = get_stream_metrics()
+        
+        if key:
+            cached = await response_cache.lookup(self.name, key, AgentResponse.model_validate_json, cache)
+            if cached is not None:
+                async for event in replay_events(cached.message):
+                    timer.mark()
+                    yield event
+                metrics.record(self.name, timer.ttft_ms, timer.elapsed_ms, cached=True)
+                yield done_event(
+                    agent=self.name, cached=True, blocked=False,
+                    ttft_ms=timer.ttft_ms, duration_ms=timer.elapsed_ms,
+                )
+                return
+        
+        self._record_prompt_tokens(prompt, system_prompt, rendered, history)
+        parts: List[str] = []
+        try:
+            async for text in client.chat_stream(
+                prompt=prompt,
+                system_prompt=system_prompt,
+                history=history,
+            ):
+                timer.mark()
+                parts.append(text)
+                yield chunk_event(text)
         except Exception as e:
-            logger.error("agent_generation_error", agent=self.name, error=str(e))
-            return AgentResponse(
-                success=False,
-                message=f"Error generating response: {str(e)}",
-                confidence=0.0
-            )
+            logger.error("agent_stream_error", agent=self.name, error=str(e))
+            metrics.record(self.name, timer.ttft_ms, timer.elapsed_ms, error=True)
+            yield error_event(f"Error generating response: {str(e)}")
+            return
+        
+        if key and parts:
+            result = AgentResponse(success=True, message="".join(parts), confidence=0.9)
+            await response_cache.store(self.name, key, result.model_dump_json(), cache, ttl)
+        metrics.record(self.name, timer.ttft_ms, timer.elapsed_ms)
+        logger.info("agent_stream_complete", agent=self.name, ttft_ms=timer.ttft_ms,
+                    duration_ms=timer.elapsed_ms, chunks=len(parts))
+        yield done_event(
+            agent=self.name, cached=False, blocked=False,
+            ttft_ms=timer.ttft_ms, duration_ms=timer.elapsed_ms,
+        )
+    
+    def _record_prompt_tokens(
+        self,
+        prompt: str,
+        system_prompt: str,
+        rendered: Optional[RenderedContext],
+        history: Optional[List[ChatMessage]],
+    ) -> None:
+        """Record the estimated tokens of a prompt sent upstream"""
+        prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt)
+        for message in history or []:
+            prompt_tokens += estimate_tokens(message.content)
+        get_prompt_metrics().record(self.name, prompt_tokens, rendered)
+    
+    def _cache_key(
+        self,
+        client: OpenRouterClient,
+        prompt: str,
+        context: Optional[Dict[str, Any]],
+        history: Optional[List[ChatMessage]],
+    ) -> str:
+        return get_response_cache().make_key(
+            agent=self.name,
+            system_prompt=self._build_system_prompt(),
+            model=getattr(client, "default_model", None),
+            prompt=prompt,
+            context=context,
+            history=history,
+        )
+    
+    def _build_system_prompt(self, context: Optional[Dict[str, Any]] = None) -> str:
+        """Agent system prompt with the salon-only instruction and context"""
+        return self._system_prompt_with_context(context)[0]
+    
+    def _system_prompt_with_context(
+        self, context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Optional[RenderedContext]]:
+        """System prompt plus the budgeted context rendering it includes"""
+        if self._base_system_prompt is None:
+            self._base_system_prompt = f"{SALON_ONLY_INSTRUCTION}\n\n{self.system_prompt}"
+        if not context:
+            return self._base_system_prompt, None
+        rendered = self._render_context(context)
+        return f"{self._base_system_prompt}\n\nCurrent Context:\n{rendered.text}", rendered
+    
+    def _get_cache_ttl(self) -> int:
+        """Response cache TTL for this agent (0 disables caching).
+
+        ``AGENT_CACHE_TTLS`` overrides the class ``cache_ttl``, which falls
+        back to the global ``CACHE_TTL``.
+        """
+        overrides = get_settings().agent_cache_ttls
+        if self.name in overrides:
+            return overrides[self.name]
+        return self.cache_ttl if self.cache_ttl is not None else get_settings().cache_ttl
+    
+    def _get_context_budget(self) -> int:
+        """Context token budget for this agent.
+
+        ``AGENT_CONTEXT_BUDGETS`` overrides the class ``context_budget``,
+        which falls back to the global ``PROMPT_CONTEXT_BUDGET``.
+        """
+        settings = get_settings()
+        if self.name in settings.agent_context_budgets:
+            return settings.agent_context_budgets[self.name]
+        return self.context_budget if self.context_budget is not None else settings.prompt_context_budget
+    
+    def _render_context(self, context: Dict[str, Any]) -> RenderedContext:
+        """Compact context within the agent's token budget"""
+        return render_context(
+            context,
+            budget=self._get_context_budget(),
+            priorities=self.context_priorities,
+            list_limit=get_settings().prompt_list_limit,
+        )
     
     def _format_context(self, context: Dict[str, Any]) -> str:
         """Format context for prompt injection"""
-        lines = []
-        for key, value in context.items():
-            if isinstance(value, (dict, list)):
-                import json
-                lines.append(f"{key}: {json.dumps(value, indent=2)}")
-            else:
-                lines.append(f"{key}: {value}")
+        return self._render_context(context).text
+    
+    def _format_lines(self, lines: List[str]) -> str:
+        """Join list lines for a prompt, capped at ``PROMPT_LIST_LIMIT``"""
+        limit = get_settings().prompt_list_limit
+        if len(lines) > limit:
+            lines = lines[:limit] + [f"- ... and {len(lines) - limit} more"]
         return "\n".join(lines)
+    
+    def _format_data(self, value: Any, limit: Optional[int] = None) -> str:
+        """Compact table/text for structured prompt data, long lists summarized"""
+        return render_value(value, limit=limit or get_settings().prompt_list_limit)
+    
+    def _format_services(self, services) -> str:
+        if not services:
+            return "No services"
+        lines = []
+        if isinstance(services, dict):
+            for name, price in services.items():
+                lines.append(f"- {name}: Rs.{price}")
+        elif isinstance(services, list):
+            for s in services:
+                if isinstance(s, dict):
+                    lines.append(f"- {s.get('name', 'Unknown')}: Rs.{s.get('price', 'N/A')}")
+                else:
+                    lines.append(f"- {s}")
+        return self._format_lines(lines)
 
 
 class BookingAgent(BaseAgent):
@@ -166,6 +358,8 @@ class BookingAgent(BaseAgent):
     
     name = "booking_agent"
     description = "Handles appointment booking, rescheduling, and availability"
+    cache_ttl = 300  # availability changes quickly
+    context_priorities = {"availability": 90, "services": 70, "staff": 70}
     system_prompt = """You are an intelligent booking assistant for a salon management system.
 Your role is to help customers book appointments, check availability, and manage their bookings.
 
@@ -330,6 +524,7 @@ class AnalyticsAgent(BaseAgent):
     
     name = "analytics_agent"
     description = "Provides business insights, reports, and recommendations"
+    cache_ttl = 900
     system_prompt = """You are a business analytics expert for salon management.
 Your role is to analyze data, identify trends, and provide actionable insights.
 
@@ -418,6 +613,7 @@ class CustomerSupportAgent(BaseAgent):
     
     name = "support_agent"
     description = "Handles customer queries, complaints, and feedback"
+    cache_ttl = 86400  # FAQ-style answers are stable
     system_prompt = """You are a customer support specialist for a salon.
 Your role is to handle customer inquiries, resolve complaints, and collect feedback.
 
@@ -483,6 +679,7 @@ class WaitlistManagerAgent(BaseAgent):
     
     name = "waitlist_agent"
     description = "Auto-fills cancellations and no-shows with prioritized waitlist customers"
+    cache_ttl = 120
     system_prompt = """You are an intelligent waitlist manager for a salon.
 Your role is to maximize booking utilization by efficiently filling cancelled and no-show slots.
 
@@ -629,7 +826,7 @@ Provide:
                 f"Waitlisted: {entry.get('created_at', 'N/A')}, "
                 f"Service: {entry.get('service_name', 'Any')})"
             )
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 
 class SlotOptimizerAgent(BaseAgent):
@@ -637,6 +834,7 @@ class SlotOptimizerAgent(BaseAgent):
     
     name = "slot_optimizer"
     description = "Detects and fills schedule gaps with targeted offers and dynamic adjustments"
+    cache_ttl = 300
     system_prompt = """You are a slot optimization specialist for a salon.
 Your role is to maximize schedule utilization by detecting and filling gaps.
 
@@ -670,14 +868,13 @@ Always balance revenue optimization with customer experience."""
         context: Optional[Dict[str, Any]] = None,
     ) -> AgentResponse:
         """Detect schedule gaps for optimization"""
-        import json
         prompt = f"""Analyze this schedule for optimization opportunities:
 
 Staff ID: {staff_id}
 Date: {date}
 
 Schedule Data:
-{json.dumps(schedule_data, indent=2)}
+{self._format_data(schedule_data)}
 
 Identify:
 1. All gaps >= 30 minutes with times
@@ -750,13 +947,12 @@ Provide:
         context: Optional[Dict[str, Any]] = None,
     ) -> AgentResponse:
         """Optimize multiple staff schedules for the day"""
-        import json
         prompt = f"""Optimize staff schedules for maximum utilization:
 
 Date: {date}
 
 Staff Schedules:
-{json.dumps(staff_schedules, indent=2)}
+{self._format_data(staff_schedules)}
 
 Provide:
 1. Overall utilization analysis
@@ -777,22 +973,7 @@ Provide:
                 f"- {c.get('name')} (Tier: {c.get('loyalty_tier')}, "
                 f"Last Visit: {c.get('last_visit', 'N/A')})"
             )
-        return "\n".join(lines)
-
-    def _format_services(self, services) -> str:
-        if not services:
-            return "No services"
-        lines = []
-        if isinstance(services, dict):
-            for name, price in services.items():
-                lines.append(f"- {name}: Rs.{price}")
-        elif isinstance(services, list):
-            for s in services:
-                if isinstance(s, dict):
-                    lines.append(f"- {s.get('name', 'Unknown')}: Rs.{s.get('price', 'N/A')}")
-                else:
-                    lines.append(f"- {s}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 class UpsellEngineAgent(BaseAgent):
     """AI agent for intelligent upselling"""
@@ -949,12 +1130,11 @@ Generate:
         context: Optional[Dict[str, Any]] = None,
     ) -> AgentResponse:
         """Analyze upsell success rates and provide insights"""
-        import json
         prompt = f"""Analyze upsell performance:
 
 Period: {period}
 Upsell Data:
-{json.dumps(upsell_data[:10], indent=2)}
+{self._format_data(upsell_data, limit=10)}
 
 Provide:
 1. Overall success rate
@@ -976,28 +1156,14 @@ Provide:
             lines.append(
                 f"- {h.get('date')}: {h.get('service')} (Rs.{h.get('price')})"
             )
-        return "\n".join(lines)
-
-    def _format_services(self, services) -> str:
-        if not services:
-            return "No services"
-        lines = []
-        if isinstance(services, dict):
-            for name, price in services.items():
-                lines.append(f"- {name}: Rs.{price}")
-        elif isinstance(services, list):
-            for s in services:
-                if isinstance(s, dict):
-                    lines.append(f"- {s.get('name', 'Unknown')}: Rs.{s.get('price', 'N/A')}")
-                else:
-                    lines.append(f"- {s}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 class DynamicPricingAgent(BaseAgent):
     """AI agent for dynamic pricing optimization"""
     
     name = "dynamic_pricing"
     description = "Analyzes demand patterns and suggests optimal pricing strategies"
+    cache_ttl = 300
     system_prompt = """You are a dynamic pricing specialist for a salon business.
 Your role is to optimize pricing based on demand, competition, and market conditions.
 
@@ -1031,13 +1197,12 @@ Always provide data-driven recommendations with clear reasoning."""
         context: Optional[Dict[str, Any]] = None,
     ) -> AgentResponse:
         """Analyze demand patterns for pricing optimization"""
-        import json
         prompt = f"""Analyze demand patterns for dynamic pricing:
 
 Service Category: {service_category or 'All services'}
 
 Historical Data:
-{json.dumps(historical_data, indent=2)}
+{self._format_data(historical_data)}
 
 Provide:
 1. Peak hours/days identification
@@ -1156,7 +1321,7 @@ Provide:
         lines = []
         for p in periods:
             lines.append(f"- {p.get('day', 'N/A')} {p.get('time', 'N/A')}: Demand {p.get('demand_level', 'N/A')}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_prices(self, prices: Dict[str, float]) -> str:
         if not prices:
@@ -1169,22 +1334,7 @@ Provide:
         lines = []
         for c in data:
             lines.append(f"- {c.get('name')}: {c.get('service')} at Rs.{c.get('price')}")
-        return "\n".join(lines)
-
-    def _format_services(self, services) -> str:
-        if not services:
-            return "No services"
-        lines = []
-        if isinstance(services, dict):
-            for name, price in services.items():
-                lines.append(f"- {name}: Rs.{price}")
-        elif isinstance(services, list):
-            for s in services:
-                if isinstance(s, dict):
-                    lines.append(f"- {s.get('name', 'Unknown')}: Rs.{s.get('price', 'N/A')}")
-                else:
-                    lines.append(f"- {s}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 class BundleCreatorAgent(BaseAgent):
     """AI agent for creating attractive service bundles"""
@@ -1358,6 +1508,7 @@ class InventoryIntelligenceAgent(BaseAgent):
     
     name = "inventory"
     description = "Monitors stock levels, predicts reorders, and optimizes inventory"
+    cache_ttl = 900
     system_prompt = """You are an inventory management specialist for a salon.
 Your role is to ensure optimal stock levels, minimize waste, and predict inventory needs.
 
@@ -1391,11 +1542,10 @@ Always balance cost optimization with service quality."""
         context: Optional[Dict[str, Any]] = None,
     ) -> AgentResponse:
         """Monitor stock levels and identify alerts"""
-        import json
         prompt = f"""Analyze inventory stock levels:
 
 Inventory Data:
-{json.dumps(inventory_data[:20], indent=2)}
+{self._format_data(inventory_data, limit=20)}
 
 Threshold Config: {threshold_config}
 
@@ -1463,14 +1613,13 @@ Provide:
         context: Optional[Dict[str, Any]] = None,
     ) -> AgentResponse:
         """Analyze product usage patterns"""
-        import json
         prompt = f"""Analyze usage patterns:
 
 Usage Data:
-{json.dumps(usage_data[:15], indent=2)}
+{self._format_data(usage_data, limit=15)}
 
 Service Data:
-{json.dumps(list(service_data.items())[:10] if isinstance(service_data, dict) else service_data[:10], indent=2)}
+{self._format_data(service_data, limit=10)}
 
 Provide:
 1. Most used products
@@ -1513,7 +1662,7 @@ Provide:
         lines = []
         for u in usage:
             lines.append(f"- {u.get('product')}: {u.get('quantity')} units on {u.get('date')}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_inventory(self, inventory: List[Dict[str, Any]]) -> str:
         if not inventory:
@@ -1521,7 +1670,7 @@ Provide:
         lines = []
         for i in inventory:
             lines.append(f"- {i.get('name')}: {i.get('quantity')} units, expires {i.get('expiry_date', 'N/A')}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 
 class StaffSchedulingAgent(BaseAgent):
@@ -1529,6 +1678,7 @@ class StaffSchedulingAgent(BaseAgent):
     
     name = "scheduling"
     description = "Optimizes staff schedules based on demand and skills"
+    cache_ttl = 600
     system_prompt = """You are a staff scheduling specialist for a salon.
 Your role is to create optimal schedules that balance business needs with staff satisfaction.
 
@@ -1562,14 +1712,13 @@ Always consider both business efficiency and staff wellbeing."""
         context: Optional[Dict[str, Any]] = None,
     ) -> AgentResponse:
         """Create optimized weekly schedule"""
-        import json
         prompt = f"""Create a weekly staff schedule:
 
 Staff List:
 {self._format_staff(staff_list)}
 
 Demand Forecast:
-{json.dumps(demand_forecast, indent=2)}
+{self._format_data(demand_forecast)}
 
 Constraints: {constraints}
 
@@ -1697,11 +1846,10 @@ Provide:
                     lines.append(f"- {s.get('name', 'Unknown')} ({s.get('role', 'N/A')}): Skills: {skills_str}")
                 else:
                     lines.append(f"- {s}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_schedule(self, schedule: Dict[str, Any]) -> str:
-        import json
-        return json.dumps(schedule, indent=2)
+        return self._format_data(schedule)
 
     def _format_preferences(self, prefs) -> str:
         if not prefs:
@@ -1716,7 +1864,7 @@ Provide:
                     lines.append(f"- {p.get('staff_name', 'Unknown')}: Prefers {p.get('preference', 'N/A')}")
                 else:
                     lines.append(f"- {p}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_demand(self, demand: List[Dict[str, Any]]) -> str:
         if not demand:
@@ -1724,7 +1872,7 @@ Provide:
         lines = []
         for d in demand:
             lines.append(f"- {d.get('service')}: {d.get('bookings')} bookings")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_skills(self, skills: List[Dict[str, Any]]) -> str:
         if not skills:
@@ -1732,7 +1880,7 @@ Provide:
         lines = []
         for s in skills:
             lines.append(f"- {s.get('staff_name')}: {', '.join(s.get('skills', []))}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_timesheet(self, timesheet: List[Dict[str, Any]]) -> str:
         if not timesheet:
@@ -1740,7 +1888,7 @@ Provide:
         lines = []
         for t in timesheet:
             lines.append(f"- {t.get('staff_name')}: {t.get('hours_worked')}h this week")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 
 class CustomerRetentionAgent(BaseAgent):
@@ -1781,11 +1929,10 @@ Always focus on genuine customer value and relationship building."""
         context: Optional[Dict[str, Any]] = None,
     ) -> AgentResponse:
         """Identify customers at risk of churning"""
-        import json
         prompt = f"""Identify at-risk customers:
 
 Customer Data:
-{json.dumps(customer_data[:15], indent=2)}
+{self._format_data(customer_data, limit=15)}
 
 Visit Threshold: {visit_threshold_days} days
 
@@ -1882,14 +2029,13 @@ Provide:
         context: Optional[Dict[str, Any]] = None,
     ) -> AgentResponse:
         """Analyze factors contributing to customer churn"""
-        import json
         prompt = f"""Analyze churn factors:
 
 Churned Customers Sample:
-{json.dumps(churned_customers[:5], indent=2)}
+{self._format_data(churned_customers, limit=5)}
 
 Active Customers Sample:
-{json.dumps(active_customers[:5], indent=2)}
+{self._format_data(active_customers, limit=5)}
 
 Provide:
 1. Key churn indicators
@@ -1913,7 +2059,7 @@ Provide:
                 else:
                     preview = str(f)[:50] + "..." if len(str(f)) > 50 else str(f)
                     lines.append(f"- {preview}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 # =============================================================================
 # PHASE 2 AGENTS (HIGH PRIORITY)
@@ -1928,6 +2074,7 @@ class DemandPredictorAgent(BaseAgent):
     
     name = "demand_predictor"
     description = "Forecasts service demand and predicts busy periods for staffing optimization"
+    cache_ttl = 1800
     system_prompt = """You are a demand forecasting specialist for a salon business.
 Your role is to analyze patterns and predict future demand to optimize operations.
 
@@ -1970,11 +2117,10 @@ Always provide data-driven insights with clear reasoning."""
         Returns:
             7-day demand forecast with confidence levels
         """
-        import json
         prompt = f"""Generate a 7-day demand forecast:
 
 Historical Data:
-{json.dumps(historical_data, indent=2)}
+{self._format_data(historical_data)}
 
 Service Category: {service_category or 'All services'}
 Context: {context or 'None'}
@@ -2042,11 +2188,10 @@ Provide:
         Returns:
             Staffing recommendations with cost optimization
         """
-        import json
         prompt = f"""Create optimal staffing plan:
 
 Demand Forecast:
-{json.dumps(demand_forecast, indent=2)}
+{self._format_data(demand_forecast)}
 
 Staff Availability:
 {self._format_staff_list(staff_availability)}
@@ -2103,7 +2248,7 @@ Provide:
         lines = []
         for key, value in patterns.items():
             lines.append(f"- {key}: {value}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_staff_list(self, staff: List[Dict[str, Any]]) -> str:
         if not staff:
@@ -2111,11 +2256,10 @@ Provide:
         lines = []
         for s in staff:
             lines.append(f"- {s.get('name')}: {s.get('role')}, Skills: {', '.join(s.get('skills', []))}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_yearly_data(self, data: Dict[str, Any]) -> str:
-        import json
-        return json.dumps(data, indent=2)
+        return self._format_data(data)
 
     def _format_events(self, events: List[Dict[str, Any]]) -> str:
         if not events:
@@ -2123,7 +2267,7 @@ Provide:
         lines = []
         for e in events:
             lines.append(f"- {e.get('date')}: {e.get('name')} ({e.get('type', 'event')})")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 
 class WhatsAppConciergeAgent(BaseAgent):
@@ -2306,7 +2450,7 @@ Supported: English (en), Hindi (hi), Telugu (te)"""
         lines = []
         for h in history[-5:]:
             lines.append(f"- {h.get('sender', 'Customer')}: {h.get('message', '')}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 
 # =============================================================================
@@ -2366,14 +2510,13 @@ Always provide specific, actionable recommendations for improvement."""
         Returns:
             Quality assessment with improvement recommendations
         """
-        import json
         prompt = f"""Analyze service quality for {period} review:
 
 Service Records:
-{json.dumps(service_records[:10], indent=2)}
+{self._format_data(service_records, limit=10)}
 
 Quality Metrics:
-{json.dumps(quality_metrics, indent=2)}
+{self._format_data(quality_metrics)}
 
 Provide:
 1. Overall quality score (0-100)
@@ -2438,17 +2581,16 @@ Provide:
         Returns:
             Formatted audit report with findings and recommendations
         """
-        import json
         prompt = f"""Generate a comprehensive audit report for {period}:
 
 Quality Data:
-{json.dumps(quality_data, indent=2)}
+{self._format_data(quality_data)}
 
 Compliance Data:
-{json.dumps(compliance_data, indent=2)}
+{self._format_data(compliance_data)}
 
 Staff Performance:
-{json.dumps(staff_performance[:5], indent=2)}
+{self._format_data(staff_performance, limit=5)}
 
 Provide:
 1. Executive Summary
@@ -2509,7 +2651,7 @@ Provide:
         lines = []
         for i in incidents:
             lines.append(f"- {i.get('date')}: {i.get('description')} ({i.get('severity', 'low')})")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_feedback(self, feedback: List[Dict[str, Any]]) -> str:
         if not feedback:
@@ -2517,11 +2659,10 @@ Provide:
         lines = []
         for f in feedback:
             lines.append(f"- {f.get('customer', 'Anonymous')}: {f.get('rating', 'N/A')}/5 - {f.get('comment', '')[:50]}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_trends(self, trends: Dict[str, Any]) -> str:
-        import json
-        return json.dumps(trends, indent=2)
+        return self._format_data(trends)
 
 
 class ResourceAllocatorAgent(BaseAgent):
@@ -2703,14 +2844,13 @@ Provide:
         Returns:
             Optimization recommendations
         """
-        import json
         prompt = f"""Optimize resource utilization:
 
 Current Utilization:
-{json.dumps(resource_usage_data, indent=2)}
+{self._format_data(resource_usage_data)}
 
 Demand Forecast:
-{json.dumps(demand_forecast, indent=2)}
+{self._format_data(demand_forecast)}
 
 Provide:
 1. Utilization analysis by resource
@@ -2728,7 +2868,7 @@ Provide:
         lines = []
         for c in chairs:
             lines.append(f"- Chair {c.get('id')}: {c.get('location')}, Features: {', '.join(c.get('features', []))}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_assignments(self, assignments: Dict[str, Any]) -> str:
         if not assignments:
@@ -2736,7 +2876,7 @@ Provide:
         lines = []
         for chair, booking in assignments.items():
             lines.append(f"- {chair}: {booking.get('staff')} ({booking.get('time')})")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_rooms(self, rooms: List[Dict[str, Any]]) -> str:
         if not rooms:
@@ -2744,11 +2884,10 @@ Provide:
         lines = []
         for r in rooms:
             lines.append(f"- Room {r.get('id')}: {r.get('type')}, Equipment: {', '.join(r.get('equipment', []))}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_schedule(self, schedule: Dict[str, Any]) -> str:
-        import json
-        return json.dumps(schedule, indent=2)
+        return self._format_data(schedule)
 
     def _format_bookings(self, bookings: List[Dict[str, Any]]) -> str:
         if not bookings:
@@ -2756,11 +2895,10 @@ Provide:
         lines = []
         for b in bookings:
             lines.append(f"- {b.get('customer_name')}: {b.get('service')} at {b.get('time')} (VIP: {b.get('is_vip', False)})")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_alternatives(self, alternatives: Dict[str, Any]) -> str:
-        import json
-        return json.dumps(alternatives, indent=2)
+        return self._format_data(alternatives)
 
 
 class ComplianceMonitorAgent(BaseAgent):
@@ -2891,11 +3029,10 @@ Provide:
         Returns:
             Formatted compliance report
         """
-        import json
         prompt = f"""Generate compliance report for {period}:
 
 Compliance Data:
-{json.dumps(compliance_data, indent=2)}
+{self._format_data(compliance_data)}
 
 Violations:
 {self._format_violations(violations)}
@@ -2965,7 +3102,7 @@ Provide:
         lines = []
         for a in audits:
             lines.append(f"- {a.get('date')}: Score {a.get('score', 'N/A')}/100")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_incidents(self, incidents: List[Dict[str, Any]]) -> str:
         if not incidents:
@@ -2973,7 +3110,7 @@ Provide:
         lines = []
         for i in incidents:
             lines.append(f"- {i.get('date')}: {i.get('type')} - {i.get('severity')}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_adherence(self, adherence: Dict[str, Any]) -> str:
         if not adherence:
@@ -2981,7 +3118,7 @@ Provide:
         lines = []
         for protocol, score in adherence.items():
             lines.append(f"- {protocol}: {score}%")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_violations(self, violations: List[Dict[str, Any]]) -> str:
         if not violations:
@@ -2989,7 +3126,7 @@ Provide:
         lines = []
         for v in violations:
             lines.append(f"- {v.get('date')}: {v.get('category')} - {v.get('description')}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_actions(self, actions: List[Dict[str, Any]]) -> str:
         if not actions:
@@ -2997,7 +3134,7 @@ Provide:
         lines = []
         for a in actions:
             lines.append(f"- {a.get('action')}: {a.get('status')} ({a.get('owner', 'Unassigned')})")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_certs(self, certs: List[Dict[str, Any]]) -> str:
         if not certs:
@@ -3005,7 +3142,7 @@ Provide:
         lines = []
         for c in certs:
             lines.append(f"- {c.get('staff_name')}: {c.get('certification')} (Expires: {c.get('expiry_date', 'N/A')})")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_required_certs(self, reqs: Dict[str, List[str]]) -> str:
         if not reqs:
@@ -3013,7 +3150,7 @@ Provide:
         lines = []
         for role, certs in reqs.items():
             lines.append(f"- {role}: {', '.join(certs)}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 
 # =============================================================================
@@ -3029,6 +3166,7 @@ class VoiceReceptionistAgent(BaseAgent):
     
     name = "voice_receptionist"
     description = "Handles voice calls and IVR (Placeholder - requires Twilio Voice credentials)"
+    cache_ttl = 0  # live calls are never replayed
     system_prompt = """You are a voice receptionist for a salon.
 Your role is to handle phone calls professionally and efficiently.
 
@@ -3321,11 +3459,10 @@ Provide:
         Returns:
             Trend analysis with predictions
         """
-        import json
         prompt = f"""Analyze feedback trends:
 
 Historical Data:
-{json.dumps(historical_feedback, indent=2)}
+{self._format_data(historical_feedback)}
 
 Current Period: {current_period}
 
@@ -3382,11 +3519,10 @@ Provide:
             sentiment = f.get('sentiment', 'unknown')
             text = f.get('text', '')[:80]
             lines.append(f"- [{sentiment}] {text}...")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_analysis(self, analysis: Dict[str, Any]) -> str:
-        import json
-        return json.dumps(analysis, indent=2)
+        return self._format_data(analysis)
 
 
 class VIPPriorityAgent(BaseAgent):
@@ -3587,8 +3723,7 @@ Provide:
         return await self.generate(prompt, context)
 
     def _format_availability(self, availability: Dict[str, Any]) -> str:
-        import json
-        return json.dumps(availability, indent=2)
+        return self._format_data(availability)
 
     def _format_vip_list(self, vips: List[Dict[str, Any]]) -> str:
         if not vips:
@@ -3596,7 +3731,7 @@ Provide:
         lines = []
         for v in vips:
             lines.append(f"- {v.get('name')} ({v.get('tier')}): {v.get('total_visits')} visits, Rs.{v.get('total_spend')}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_visits(self, visits: List[Dict[str, Any]]) -> str:
         if not visits:
@@ -3604,7 +3739,7 @@ Provide:
         lines = []
         for v in visits:
             lines.append(f"- {v.get('customer')}: {v.get('service')} on {v.get('date')}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_vip_feedback(self, feedback: List[Dict[str, Any]]) -> str:
         if not feedback:
@@ -3612,7 +3747,7 @@ Provide:
         lines = []
         for f in feedback:
             lines.append(f"- {f.get('customer')}: {f.get('rating')}/5 - {f.get('comment', '')[:50]}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 
 # =============================================================================
@@ -3750,11 +3885,10 @@ Provide:
         Returns:
             Engagement analysis with recommendations
         """
-        import json
         prompt = f"""Analyze {platform} engagement for {period}:
 
 Engagement Data:
-{json.dumps(engagement_data, indent=2)}
+{self._format_data(engagement_data)}
 
 Provide:
 1. Engagement rate trend
@@ -3805,7 +3939,7 @@ Provide:
         lines = []
         for e in events:
             lines.append(f"- {e.get('date')}: {e.get('name')} ({e.get('type', 'event')})")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_goals(self, goals: Dict[str, Any]) -> str:
         if not goals:
@@ -3813,7 +3947,7 @@ Provide:
         lines = []
         for goal, target in goals.items():
             lines.append(f"- {goal}: {target}")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 
 class ImageCreativesGeneratorAgent(BaseAgent):
@@ -4369,7 +4503,7 @@ Provide:
         lines = []
         for r in reviews:
             lines.append(f"- {r.get('rating')}/5 by {r.get('reviewer_name', 'Anonymous')}: {r.get('content', '')[:60]}...")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
 
 class CampaignOrchestratorAgent(BaseAgent):
@@ -4474,15 +4608,14 @@ Provide:
         Returns:
             Performance analysis
         """
-        import json
         prompt = f"""Track campaign performance:
 
 Campaign ID: {campaign_id}
 Campaign Data:
-{json.dumps(campaign_data, indent=2)}
+{self._format_data(campaign_data)}
 
 Metrics:
-{json.dumps(metrics, indent=2)}
+{self._format_data(metrics)}
 
 Provide:
 1. Performance summary
@@ -4574,8 +4707,7 @@ Provide:
         return await self.generate(prompt, context)
 
     def _format_performance(self, performance: Dict[str, Any]) -> str:
-        import json
-        return json.dumps(performance, indent=2)
+        return self._format_data(performance)
 
     def _format_segments(self, segments: List[Dict[str, Any]]) -> str:
         if not segments:
@@ -4583,7 +4715,7 @@ Provide:
         lines = []
         for s in segments:
             lines.append(f"- {s.get('name')}: {s.get('size')} customers ({s.get('criteria')})")
-        return "\n".join(lines)
+        return self._format_lines(lines)
 
     def _format_budget(self, budget: Dict[str, float]) -> str:
         if not budget:
@@ -4649,9 +4781,56 @@ def get_agent(agent_name: str, **kwargs) -> BaseAgent:
     agent_class = AGENTS.get(agent_name)
     if agent_class is None:
         raise ValueError(f"Unknown agent type: {agent_name}")
+    if not kwargs:
+        agent = _agent_pool.get(agent_class)
+        if agent is not None:
+            return agent
     return agent_class(**kwargs)
 
 
+# ============================================================================
+# Warm agent pool
+# ============================================================================
+
+# One ready instance per agent class, filled at startup. Agents keep no
+# per-request state, so a single instance serves every request.
+_agent_pool: Dict[Type[BaseAgent], BaseAgent] = {}
+
+
+async def warm_agent_pool() -> Dict[str, BaseAgent]:
+    """Create and warm one instance of every agent in AGENTS.
+    
+    Called from the application lifespan. Afterwards ``get_agent()`` and
+    the plugin registry hand out these instances instead of constructing
+    (and lazily re-resolving dependencies for) a new agent per request.
+    
+    Returns:
+        Mapping of agent type to its pooled instance
+    """
+    for agent_name, agent_class in AGENTS.items():
+        if agent_class in _agent_pool:
+            continue
+        agent = agent_class()
+        try:
+            await agent.warm()
+        except Exception as e:
+            # Dependencies are resolved lazily on first use instead
+            logger.warning("agent_warm_failed", agent=agent_name, error=str(e))
+        _agent_pool[agent_class] = agent
+    logger.info("agent_pool_warmed", agents=len(_agent_pool))
+    return {name: _agent_pool[agent_class] for name, agent_class in AGENTS.items()}
+
+
+def get_pooled_agent(agent_class: Type[BaseAgent]) -> Optional[BaseAgent]:
+    """Warm instance of ``agent_class``, or None before the pool is warmed"""
+    return _agent_pool.get(agent_class)
+
+
+def reset_agent_pool() -> None:
+    """Drop pooled instances (shutdown and tests)"""
+    _agent_pool.clear()
+
+
 def get_all_agents() -> dict:
     """Get all registered agents.
     
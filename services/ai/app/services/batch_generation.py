@@ -0,0 +1,336 @@
+"""Batched LLM generation for marketing and retention messages
+
+Generates one message per customer for campaigns that target hundreds of
+customers, without one sequential LLM call per customer:
+
+- Packs up to ``pack_size`` customer contexts into a single structured
+  prompt that asks for ``{"items": [{"id", "message"}]}`` back
+- Runs packs on ``concurrency`` workers; ``pack_size=1`` is plain fan-out
+- Streams per-customer results as their pack completes
+- Re-queues customers missing from a reply (or whose call failed) in
+  smaller packs, up to ``max_retries`` times
+- Splits each call's token usage and cost across the customers it served
+  and reports throughput and cost per item
+
+Calls go through the agent's OpenRouter client, so per-model concurrency,
+rate limits and retries from the request scheduler still apply.
+
+Example:
+    generator = BatchGenerator(get_agent("marketing"), BATCH_TASKS["birthday_offer"])
+    async for result in generator.stream(customers, context={"salon_id": salon_id}):
+        ...
+    print(generator.summary.to_dict())
+"""
+import asyncio
+import json
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import structlog
+
+from app.core.config import get_settings
+from app.services.agents import BaseAgent
+
+logger = structlog.get_logger()
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+@dataclass(frozen=True)
+class BatchTask:
+    """A per-customer generation task handled by one agent."""
+    agent: str
+    instruction: str
+
+
+BATCH_TASKS: Dict[str, BatchTask] = {
+    "birthday_offer": BatchTask(
+        agent="marketing",
+        instruction=(
+            "Write a warm, personalized birthday message for each customer with a "
+            "special offer tailored to their service history. Include a unique "
+            "promo code and validity period."
+        ),
+    ),
+    "rebooking_reminder": BatchTask(
+        agent="marketing",
+        instruction=(
+            "Write a friendly rebooking reminder for each customer based on their "
+            "last service, suggesting it's time for their next appointment with a "
+            "gentle call to action."
+        ),
+    ),
+    "campaign": BatchTask(
+        agent="marketing",
+        instruction=(
+            "Write a personalized WhatsApp message for each customer promoting the "
+            "campaign in the shared details, tailored to their preferences."
+        ),
+    ),
+    "winback": BatchTask(
+        agent="retention",
+        instruction=(
+            "Write a personal win-back WhatsApp message for each lapsed customer "
+            "with an offer that fits their history and the shared budget."
+        ),
+    ),
+}
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome for one customer."""
+    id: str
+    success: bool
+    message: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    tokens: float = 0.0
+    cost: float = 0.0
+    elapsed_ms: float = 0.0  # since the batch started
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["tokens"] = round(self.tokens, 1)
+        data["cost"] = round(self.cost, 6)
+        data["elapsed_ms"] = round(self.elapsed_ms, 1)
+        return data
+
+
+@dataclass
+class BatchSummary:
+    """Throughput and cost for a whole batch."""
+    items: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    llm_calls: int = 0
+    retries: int = 0
+    tokens: int = 0
+    cost: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def cost_per_item(self) -> float:
+        return self.cost / self.succeeded if self.succeeded else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "llm_calls": self.llm_calls,
+            "retries": self.retries,
+            "tokens": self.tokens,
+            "cost": round(self.cost, 6),
+            "cost_per_item": round(self.cost_per_item, 6),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "items_per_second": round(self.items_per_second, 2),
+        }
+
+
+def parse_items(content: str) -> Dict[str, str]:
+    """Map of id -> message from a multi-item reply; tolerates code fences."""
+    text = _FENCE.sub("", content.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    items = data.get("items") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return {}
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        message = item.get("message")
+        if item.get("id") is not None and isinstance(message, str) and message.strip():
+            parsed[str(item["id"])] = message.strip()
+    return parsed
+
+
+class _ItemState:
+    __slots__ = ("id", "data", "attempts", "tokens", "cost")
+
+    def __init__(self, item_id: str, data: Dict[str, Any]):
+        self.id = item_id
+        self.data = data
+        self.attempts = 0
+        self.tokens = 0.0
+        self.cost = 0.0
+
+
+class BatchGenerator:
+    """Generate one message per item with packed prompts and bounded concurrency"""
+
+    def __init__(
+        self,
+        agent: BaseAgent,
+        task: BatchTask,
+        pack_size: int = 20,
+        concurrency: int = 4,
+        max_retries: int = 2,
+        cost_per_1k_tokens: Optional[float] = None,
+    ):
+        self.agent = agent
+        self.task = task
+        self.pack_size = max(1, pack_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.cost_per_1k_tokens = (
+            get_settings().llm_cost_per_1k_tokens
+            if cost_per_1k_tokens is None else cost_per_1k_tokens
+        )
+        self.summary = BatchSummary()
+
+    def build_prompt(self, pack: List[_ItemState], shared: Optional[Dict[str, Any]]) -> str:
+        """Structured prompt covering every item in the pack."""
+        customers = json.dumps(
+            [{**item.data, "id": item.id} for item in pack],
+            ensure_ascii=False, default=str,
+        )
+        sections = [self.task.instruction]
+        if shared:
+            sections.append(f"Shared details:\n{json.dumps(shared, ensure_ascii=False, default=str)}")
+        sections.append(f"Customers ({len(pack)}):\n{customers}")
+        sections.append(
+            "Write one message per customer id. Reply with JSON only, exactly in the form "
+            '{"items": [{"id": "<customer id>", "message": "<message>"}]}'
+        )
+        return "\n\n".join(sections)
+
+    def _usage(self, usage: Optional[Dict[str, Any]], prompt: str, content: str) -> Tuple[int, float]:
+        usage = usage or {}
+        tokens = usage.get("total_tokens")
+        if tokens is None:
+            # Rough estimate when the provider reports no usage
+            tokens = (len(prompt) + len(content)) // 4
+        cost = usage.get("cost")
+        if cost is None:
+            cost = tokens / 1000 * self.cost_per_1k_tokens
+        return int(tokens), float(cost)
+
+    async def _generate_pack(
+        self, pack: List[_ItemState], system_prompt: str, shared: Optional[Dict[str, Any]]
+    ) -> Tuple[Dict[str, str], Optional[str]]:
+        client = await self.agent._get_client()
+        prompt = self.build_prompt(pack, shared)
+        content = ""
+        usage = None
+        error = None
+        try:
+            response = await client.chat(
+                prompt=prompt,
+                system_prompt=system_prompt,
+                usage={"include": True},
+            )
+            content = response.content
+            usage = response.usage
+        except Exception as e:
+            error = str(e)
+            logger.warning("batch_pack_error", agent=self.agent.name, size=len(pack), error=error)
+
+        self.summary.llm_calls += 1
+        # Failed calls return no usage and are not billed
+        tokens, cost = self._usage(usage, prompt, content) if error is None else (0, 0.0)
+        self.summary.tokens += tokens
+        self.summary.cost += cost
+        for item in pack:
+            item.attempts += 1
+            item.tokens += tokens / len(pack)
+            item.cost += cost / len(pack)
+        return (parse_items(content) if error is None else {}), error
+
+    async def stream(
+        self,
+        items: List[Dict[str, Any]],
+        shared: Optional[Dict[str, Any]] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[BatchItemResult]:
+        """Yield a result per item as soon as its pack completes.
+
+        Args:
+            items: Customer contexts, each with a unique ``id``
+            shared: Details common to every item (offer, campaign, budget)
+            context: Agent context, e.g. ``{"salon_id": ...}``
+        """
+        states = [_ItemState(str(item["id"]), item) for item in items]
+        self.summary = BatchSummary(items=len(states))
+        if not states:
+            return
+
+        system_prompt = self.agent._build_system_prompt(context)
+        work: asyncio.Queue = asyncio.Queue()
+        results: asyncio.Queue = asyncio.Queue()
+        started = time.monotonic()
+
+        for i in range(0, len(states), self.pack_size):
+            work.put_nowait((states[i:i + self.pack_size], 0))
+
+        async def worker() -> None:
+            while True:
+                pack, attempt = await work.get()
+                try:
+                    generated, error = await self._generate_pack(pack, system_prompt, shared)
+                except Exception as e:
+                    generated, error = {}, str(e)
+                elapsed_ms = (time.monotonic() - started) * 1000
+
+                missing = []
+                for item in pack:
+                    if item.id in generated:
+                        results.put_nowait(BatchItemResult(
+                            id=item.id, success=True, message=generated[item.id],
+                            attempts=item.attempts, tokens=item.tokens, cost=item.cost,
+                            elapsed_ms=elapsed_ms,
+                        ))
+                    elif attempt < self.max_retries:
+                        missing.append(item)
+                    else:
+                        results.put_nowait(BatchItemResult(
+                            id=item.id, success=False,
+                            error=error or "No message returned for this item",
+                            attempts=item.attempts, tokens=item.tokens, cost=item.cost,
+                            elapsed_ms=elapsed_ms,
+                        ))
+
+                if missing:
+                    # Smaller packs make truncated or skipped replies less likely
+                    size = max(1, self.pack_size >> (attempt + 1))
+                    for i in range(0, len(missing), size):
+                        self.summary.retries += 1
+                        work.put_nowait((missing[i:i + size], attempt + 1))
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        try:
+            for _ in range(len(states)):
+                result = await results.get()
+                if result.success:
+                    self.summary.succeeded += 1
+                else:
+                    self.summary.failed += 1
+                self.summary.elapsed_seconds = time.monotonic() - started
+                yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.summary.elapsed_seconds = time.monotonic() - started
+            logger.info("batch_generation_complete", agent=self.agent.name, **self.summary.to_dict())
+
+    async def run(
+        self,
+        items: List[Dict[str, Any]],
+        shared: Optional[Dict[str, Any]] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> List[BatchItemResult]:
+        """Collect every result, in completion order."""
+        return [result async for result in self.stream(items, shared, context)]
@@ -1,19 +1,26 @@
 """Redis Cache Service for AI Responses
 
 Caches AI responses to reduce API calls and improve latency.
-Uses Upstash Redis REST API for serverless compatibility.
+Uses the Upstash Redis REST API for serverless compatibility, through a
+non-blocking pooled client so cache calls never stall the event loop.
+
+Every ``ai:{prefix}:*`` key is registered in the tag set ``ai:tag:{prefix}``
+so a prefix can be invalidated without scanning the keyspace.
 """
 import json
 import hashlib
-from typing import Optional, Any, Dict
-from upstash_redis import Redis
+from typing import Optional, Any, Dict, List
 import structlog
 
 from app.core.config import get_settings
+from app.core.upstash import AsyncUpstashRedis
 
 logger = structlog.get_logger()
 settings = get_settings()
 
+# Tag sets outlive their members (refreshed on every write)
+TAG_TTL = 86400
+
 
 class CacheService:
     """Upstash Redis-based cache for AI responses"""
@@ -25,27 +32,38 @@ class CacheService:
     ):
         self.upstash_url = upstash_url or settings.upstash_redis_rest_url
         self.upstash_token = upstash_token or settings.upstash_redis_rest_token
-        self._client: Optional[Redis] = None
+        self._client: Optional[AsyncUpstashRedis] = None
         self._enabled = settings.enable_cache and bool(self.upstash_url and self.upstash_token)
         
     async def _ensure_client(self):
         """Ensure Redis client is initialized"""
         if self._client is None and self._enabled:
-            self._client = Redis(
+            self._client = AsyncUpstashRedis(
                 url=self.upstash_url,
                 token=self.upstash_token,
             )
     
     async def close(self):
-        """Close Redis connection (no-op for REST client)"""
-        # Upstash REST client doesn't maintain persistent connections
-        self._client = None
+        """Close pooled Redis connections"""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
     
     def _generate_key(self, prefix: str, data: Any) -> str:
         """Generate cache key from data"""
         data_str = json.dumps(data, sort_keys=True)
         hash_val = hashlib.sha256(data_str.encode()).hexdigest()[:16]
         return f"ai:{prefix}:{hash_val}"
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"ai:tag:{tag}"
+
+    @staticmethod
+    def _default_tags(key: str) -> List[str]:
+        """Tag ``ai:{prefix}:{hash}`` keys with their prefix."""
+        parts = key.split(":")
+        return [parts[1]] if len(parts) >= 3 and parts[0] == "ai" else []
     
     async def get(self, key: str) -> Optional[str]:
         """Get cached value"""
@@ -54,7 +72,7 @@ class CacheService:
             
         try:
             await self._ensure_client()
-            value = self._client.get(key)
+            value = await self._client.get(key)
             if value:
                 logger.info("cache_hit", key=key)
             return value
@@ -62,24 +80,48 @@ class CacheService:
             logger.warning("cache_get_error", error=str(e))
             return None
     
-    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
-        """Set cached value"""
+    async def set(
+        self,
+        key: str,
+        value: str,
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None,
+    ) -> bool:
+        """Set cached value and register it under its tags.
+
+        ``tags`` defaults to the key's prefix for ``ai:{prefix}:*`` keys.
+        """
         if not self._enabled:
             return False
             
         try:
             await self._ensure_client()
-            self._client.setex(
-                key,
-                ttl or settings.cache_ttl,
-                value
-            )
-            logger.info("cache_set", key=key, ttl=ttl or settings.cache_ttl)
+            ttl = ttl or settings.cache_ttl
+            # Value and tag registrations in one round trip
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.set(key, value, ex=ttl)
+                for tag in (self._default_tags(key) if tags is None else tags):
+                    pipe.sadd(self._tag_key(tag), key)
+                    pipe.expire(self._tag_key(tag), max(ttl, TAG_TTL))
+                await pipe.execute()
+            logger.info("cache_set", key=key, ttl=ttl)
             return True
         except Exception as e:
             logger.warning("cache_set_error", error=str(e))
             return False
     
+    async def delete(self, key: str) -> bool:
+        """Delete a cached value"""
+        if not self._enabled:
+            return False
+        
+        try:
+            await self._ensure_client()
+            return bool(await self._client.delete(key))
+        except Exception as e:
+            logger.warning("cache_delete_error", error=str(e))
+            return False
+    
     async def get_or_compute(
         self,
         prefix: str,
@@ -101,29 +143,37 @@ class CacheService:
         
         return result
     
-    async def invalidate_pattern(self, pattern: str) -> int:
-        """Invalidate all keys matching pattern"""
+    async def invalidate_tag(self, tag: str) -> int:
+        """Delete every key registered under a tag.
+
+        Reads the tag set and deletes its members in two calls, regardless of
+        how many keys the Redis instance holds.
+        """
+        if not self._enabled:
+            return 0
+
         try:
             await self._ensure_client()
-            # Use SCAN to find matching keys
-            keys = []
-            cursor = 0
-            while True:
-                result = self._client.scan(cursor, match=f"ai:{pattern}:*")
-                cursor = result[0]
-                keys.extend(result[1])
-                if cursor == 0:
-                    break
-            
-            if keys:
-                deleted = self._client.delete(*keys)
-                logger.info("cache_invalidated", pattern=pattern, count=deleted)
-                return deleted
-            return 0
+            tag_key = self._tag_key(tag)
+            keys = await self._client.smembers(tag_key) or []
+            if not keys:
+                return 0
+            # The count includes the tag set itself
+            deleted = await self._client.delete(*keys, tag_key) - 1
+            logger.info("cache_invalidated", tag=tag, count=deleted)
+            return deleted
         except Exception as e:
             logger.warning("cache_invalidate_error", error=str(e))
             return 0
 
+    async def invalidate_pattern(self, pattern: str) -> int:
+        """Invalidate all keys under the ``ai:{pattern}:*`` prefix.
+
+        ``pattern`` is the key prefix passed to ``_generate_key`` (an agent
+        name, for example); it is resolved through the prefix's tag set.
+        """
+        return await self.invalidate_tag(pattern)
+
 
 # Singleton instance
 _cache_instance: Optional[CacheService] = None
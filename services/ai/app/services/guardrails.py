@@ -4,11 +4,31 @@ Ensures all AI agents ONLY respond to salon-related queries.
 Provides multi-language rejection responses.
 """
 import re
-from typing import Tuple, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
 import structlog
 
 logger = structlog.get_logger()
 
+# Latin/digit words; Devanagari and Telugu runs are matched separately for
+# language detection in the same scan
+_WORD_PATTERN = r"[^\W\u0900-\u097F\u0C00-\u0C7F]+"
+_WORD = re.compile(_WORD_PATTERN)
+_SCAN = re.compile(
+    rf"(?P<word>{_WORD_PATTERN})"
+    r"|(?P<hi>[\u0900-\u097F]+)"
+    r"|(?P<te>[\u0C00-\u0C7F]+)"
+)
+
+
+@dataclass(frozen=True)
+class GuardrailClassification:
+    """Topic hit counts and detected language for one query"""
+    allowed_count: int
+    blocked_count: int
+    language: str
+
 
 # Multi-language rejection responses
 REJECTION_RESPONSES = {
@@ -141,21 +161,59 @@ class SalonGuardrail:
         "health", "medicine", "doctor", "hospital", "disease",
     ]
     
+    # Classifications kept per distinct prompt (agent + middleware share them)
+    CLASSIFICATION_CACHE_SIZE = 1024
+    
     def __init__(self):
-        """Initialize guardrail with compiled patterns"""
-        self._allowed_patterns = [
-            re.compile(r'\b' + re.escape(topic) + r'\b', re.IGNORECASE)
-            for topic in self.ALLOWED_TOPICS
-        ]
-        self._blocked_patterns = [
-            re.compile(r'\b' + re.escape(topic) + r'\b', re.IGNORECASE)
-            for topic in self.BLOCKED_TOPICS
-        ]
+        """Index topics for a single-pass token scan"""
+        # First token -> [(remaining tokens, kind, topic index)]; indices keep
+        # duplicate list entries counting separately, as before
+        self._topic_index: Dict[str, List[Tuple[Tuple[str, ...], str, int]]] = {}
+        for kind, topics in (("allowed", self.ALLOWED_TOPICS), ("blocked", self.BLOCKED_TOPICS)):
+            for index, topic in enumerate(topics):
+                tokens = tuple(_WORD.findall(topic.lower()))
+                self._topic_index.setdefault(tokens[0], []).append((tokens[1:], kind, index))
+        self._classifications: "OrderedDict[str, GuardrailClassification]" = OrderedDict()
+    
+    def classify(self, query: str) -> GuardrailClassification:
+        """Count allowed/blocked topics and detect language in one scan.
+
+        Results are memoized per query, so the agent and the pipeline
+        middleware never classify the same prompt twice.
+        """
+        cached = self._classifications.get(query)
+        if cached is not None:
+            self._classifications.move_to_end(query)
+            return cached
+        
+        tokens: List[str] = []
+        has_hindi = has_telugu = False
+        for match in _SCAN.finditer(query.lower()):
+            kind = match.lastgroup
+            if kind == "word":
+                tokens.append(match.group())
+            elif kind == "hi":
+                has_hindi = True
+            else:
+                has_telugu = True
         
-        # Hindi character range for detection
-        self._hindi_pattern = re.compile(r'[\u0900-\u097F]')
-        # Telugu character range for detection
-        self._telugu_pattern = re.compile(r'[\u0C00-\u0C7F]')
+        allowed: Set[int] = set()
+        blocked: Set[int] = set()
+        for position, token in enumerate(tokens):
+            for rest, kind, index in self._topic_index.get(token, ()):
+                if rest and tuple(tokens[position + 1:position + 1 + len(rest)]) != rest:
+                    continue
+                (allowed if kind == "allowed" else blocked).add(index)
+        
+        result = GuardrailClassification(
+            allowed_count=len(allowed),
+            blocked_count=len(blocked),
+            language="hi" if has_hindi else "te" if has_telugu else "en",
+        )
+        self._classifications[query] = result
+        if len(self._classifications) > self.CLASSIFICATION_CACHE_SIZE:
+            self._classifications.popitem(last=False)
+        return result
     
     def validate_query(self, query: str) -> Tuple[bool, str]:
         """Validate if query is salon-related.
@@ -176,8 +234,9 @@ class SalonGuardrail:
             return True, "Short query allowed"
         
         # Count allowed and blocked topics
-        allowed_count = self.count_allowed_topics(query)
-        blocked_count = self.count_blocked_topics(query)
+        classification = self.classify(query)
+        allowed_count = classification.allowed_count
+        blocked_count = classification.blocked_count
         
         # Decision logic
         if blocked_count > 0 and allowed_count == 0:
@@ -214,19 +273,11 @@ class SalonGuardrail:
     
     def count_allowed_topics(self, query: str) -> int:
         """Count number of allowed topics in query"""
-        count = 0
-        for pattern in self._allowed_patterns:
-            if pattern.search(query):
-                count += 1
-        return count
+        return self.classify(query).allowed_count
     
     def count_blocked_topics(self, query: str) -> int:
         """Count number of blocked topics in query"""
-        count = 0
-        for pattern in self._blocked_patterns:
-            if pattern.search(query):
-                count += 1
-        return count
+        return self.classify(query).blocked_count
     
     def detect_language(self, text: str) -> str:
         """Detect language from text.
@@ -237,11 +288,7 @@ class SalonGuardrail:
         Returns:
             Language code: 'en', 'hi', or 'te'
         """
-        if self._hindi_pattern.search(text):
-            return "hi"
-        if self._telugu_pattern.search(text):
-            return "te"
-        return "en"
+        return self.classify(text).language
     
     def get_rejection_response(
         self, 
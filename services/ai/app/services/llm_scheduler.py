@@ -0,0 +1,382 @@
+"""Client-side request scheduler for LLM providers
+
+Shapes outgoing OpenRouter traffic so bursts queue locally instead of
+piling up sockets and upstream 429s:
+
+- Per-model concurrency semaphore and token-bucket rate limiter
+- Retries on 429/5xx honouring ``Retry-After``; a 429 pauses the model's
+  bucket for every caller, not just the one that was throttled
+- Hedged request to the fallback model once the primary is slower than its
+  observed latency percentile; the first success wins
+- Single-flight: identical payloads in flight share one upstream call
+- Queue depth, wait time, throttling and hedge metrics per model
+
+Example:
+    scheduler = RequestScheduler(ModelLimits(max_concurrency=8, requests_per_minute=120))
+    result = await scheduler.execute(
+        "google/gemini-2.5-flash",
+        send,                       # async (model) -> response
+        fallback_model="google/gemini-2.0-flash-001",
+        key=payload_hash,
+    )
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+import structlog
+
+logger = structlog.get_logger()
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# OpenRouter caps ":free" model variants at 20 requests per minute
+FREE_MODEL_REQUESTS_PER_MINUTE = 20
+
+SendFn = Callable[[str], Awaitable[Any]]
+
+
+@dataclass
+class ModelLimits:
+    """Concurrency and rate limits for one model."""
+    max_concurrency: int = 16
+    requests_per_minute: float = 200
+    burst: Optional[int] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.burst or max(1, self.max_concurrency)
+
+
+class TokenBucket:
+    """Async token bucket that can be paused (e.g. after a 429)."""
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        capacity: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._clock = clock
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Take one token, waiting for refill or the end of a pause."""
+        while True:
+            now = self._clock()
+            self._refill(now)
+            if now < self._blocked_until:
+                wait = self._blocked_until - now
+            elif self._tokens >= 1:
+                self._tokens -= 1
+                return
+            else:
+                wait = (1 - self._tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for ``seconds``."""
+        self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+
+class LatencyWindow:
+    """Rolling window of recent latencies."""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+@dataclass
+class ModelMetrics:
+    """Scheduler counters for one model."""
+    requests: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    in_flight: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    throttled: int = 0
+    retries: int = 0
+    fallbacks: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    coalesced: int = 0
+    waits: LatencyWindow = field(default_factory=LatencyWindow)
+
+    def to_dict(self, latency: LatencyWindow) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "requests": self.requests,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queued,
+            "in_flight": self.in_flight,
+            "wait_ms_avg": ms(self.wait_total / self.requests) if self.requests else 0.0,
+            "wait_ms_p95": ms(self.waits.percentile(0.95)),
+            "wait_ms_max": ms(self.wait_max),
+            "latency_ms_p50": ms(latency.percentile(0.5)),
+            "latency_ms_p95": ms(latency.percentile(0.95)),
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "fallbacks": self.fallbacks,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "coalesced": self.coalesced,
+        }
+
+
+class _ModelState:
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self.semaphore = asyncio.Semaphore(limits.max_concurrency)
+        self.bucket = TokenBucket(limits.requests_per_minute / 60.0, limits.capacity)
+        self.latency = LatencyWindow()
+        self.metrics = ModelMetrics()
+
+
+class _Flight:
+    """A shared upstream call and the number of callers awaiting it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse ``Retry-After`` (seconds or HTTP date)."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """Per-model limiter, retry, hedging and single-flight for LLM calls"""
+
+    def __init__(
+        self,
+        default_limits: Optional[ModelLimits] = None,
+        model_limits: Optional[Dict[str, ModelLimits]] = None,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+    ):
+        self.default_limits = default_limits or ModelLimits()
+        self.model_limits = model_limits or {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._models: Dict[str, _ModelState] = {}
+        self._inflight: Dict[str, _Flight] = {}
+
+    def limits_for(self, model: str) -> ModelLimits:
+        """Configured limits, the provider's free-tier cap, or the default."""
+        if model in self.model_limits:
+            return self.model_limits[model]
+        if model.endswith(":free"):
+            return ModelLimits(
+                max_concurrency=min(self.default_limits.max_concurrency, 4),
+                requests_per_minute=FREE_MODEL_REQUESTS_PER_MINUTE,
+            )
+        return self.default_limits
+
+    def _state(self, model: str) -> _ModelState:
+        if model not in self._models:
+            self._models[model] = _ModelState(self.limits_for(model))
+        return self._models[model]
+
+    @asynccontextmanager
+    async def slot(self, model: str) -> AsyncIterator[None]:
+        """Wait for a concurrency slot and a rate token for ``model``."""
+        state = self._state(model)
+        metrics = state.metrics
+        metrics.requests += 1
+        metrics.queued += 1
+        metrics.max_queued = max(metrics.max_queued, metrics.queued)
+        start = time.monotonic()
+        try:
+            await state.semaphore.acquire()
+        finally:
+            metrics.queued -= 1
+        try:
+            await state.bucket.acquire()
+            waited = time.monotonic() - start
+            metrics.wait_total += waited
+            metrics.wait_max = max(metrics.wait_max, waited)
+            metrics.waits.record(waited)
+            metrics.in_flight += 1
+            try:
+                yield
+            finally:
+                metrics.in_flight -= 1
+        finally:
+            state.semaphore.release()
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _call(self, model: str, send: SendFn) -> Any:
+        """Send with retries on 429/5xx; sleeps happen outside the slot."""
+        state = self._state(model)
+        attempt = 0
+        while True:
+            async with self.slot(model):
+                start = time.monotonic()
+                try:
+                    result = await send(model)
+                    state.latency.record(time.monotonic() - start)
+                    return result
+                except httpx.HTTPStatusError as e:
+                    status = e.response.status_code
+                    if status not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                        raise
+                    retry_after = retry_after_seconds(e.response)
+                    delay = retry_after if retry_after is not None else self._backoff(attempt)
+                    if status == 429:
+                        state.metrics.throttled += 1
+                        # Everyone on this model waits, not just this caller
+                        state.bucket.pause(delay)
+            state.metrics.retries += 1
+            logger.warning("llm_retry", model=model, status=status, delay=round(delay, 3), attempt=attempt + 1)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        latency = self._state(model).latency
+        if not self.hedge_percentile or len(latency) < self.hedge_min_samples:
+            return None
+        return latency.percentile(self.hedge_percentile)
+
+    async def _first_success(self, primary: asyncio.Task, hedge: asyncio.Task, model: str) -> Any:
+        pending = {primary, hedge}
+        errors: Dict[asyncio.Task, BaseException] = {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._state(model).metrics.hedge_wins += 1
+                        return task.result()
+                    errors[task] = task.exception()
+            raise errors.get(primary) or errors[hedge]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _execute(self, model: str, send: SendFn, fallback_model: Optional[str]) -> Any:
+        if not fallback_model or fallback_model == model:
+            return await self._call(model, send)
+
+        primary = asyncio.ensure_future(self._call(model, send))
+        delay = self._hedge_delay(model)
+        if delay is not None:
+            try:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+            except asyncio.CancelledError:
+                primary.cancel()
+                raise
+            if not done:
+                self._state(model).metrics.hedges += 1
+                logger.info("llm_hedge", model=model, fallback=fallback_model, after_ms=round(delay * 1000))
+                hedge = asyncio.ensure_future(self._call(fallback_model, send))
+                return await self._first_success(primary, hedge, model)
+
+        try:
+            return await primary
+        except httpx.HTTPStatusError as e:
+            self._state(model).metrics.fallbacks += 1
+            logger.warning("trying_fallback_model", model=fallback_model, status=e.response.status_code)
+            return await self._call(fallback_model, send)
+
+    async def execute(
+        self,
+        model: str,
+        send: SendFn,
+        fallback_model: Optional[str] = None,
+        key: Optional[str] = None,
+    ) -> Any:
+        """Run ``send(model)`` under the model's limits.
+
+        Args:
+            model: Primary model
+            send: Coroutine function performing one request for a model
+            fallback_model: Used for hedging and after HTTP errors
+            key: Payload hash; concurrent calls with the same key share
+                one upstream request
+        """
+        if key is None:
+            return await self._execute(model, send, fallback_model)
+
+        flight = self._inflight.get(key)
+        if flight is None:
+            # The call runs in its own task so a cancelled caller doesn't
+            # take it down for everyone else
+            flight = _Flight(asyncio.ensure_future(self._execute(model, send, fallback_model)))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _: self._land(key, flight))
+        else:
+            self._state(model).metrics.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Last caller gone; nobody needs the result
+                self._land(key, flight)
+                flight.task.cancel()
+
+    def _land(self, key: str, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        if flight.task.done() and not flight.task.cancelled():
+            # Nobody may be waiting; don't leave the exception unretrieved
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait time and retry/hedge counters per model."""
+        return {
+            model: state.metrics.to_dict(state.latency)
+            for model, state in sorted(self._models.items())
+        }
@@ -11,6 +11,7 @@ from pydantic import BaseModel, Field
 import structlog
 
 from app.core.config import get_settings
+from app.services.llm_scheduler import ModelLimits, RequestScheduler
 
 logger = structlog.get_logger()
 settings = get_settings()
@@ -40,6 +41,28 @@ class OpenRouterResponse(BaseModel):
         return ""
 
 
+def _payload_key(payload: Dict[str, Any]) -> str:
+    """Hash identifying identical chat payloads for single-flight."""
+    data = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _build_scheduler() -> RequestScheduler:
+    """Scheduler configured from settings."""
+    return RequestScheduler(
+        default_limits=ModelLimits(
+            max_concurrency=settings.openrouter_max_concurrency,
+            requests_per_minute=settings.openrouter_requests_per_minute,
+        ),
+        model_limits={
+            model: ModelLimits(**limits)
+            for model, limits in settings.openrouter_model_limits.items()
+        },
+        max_retries=settings.openrouter_max_retries,
+        hedge_percentile=settings.openrouter_hedge_percentile,
+    )
+
+
 class OpenRouterClient:
     """Async client for OpenRouter API"""
     
@@ -48,11 +71,13 @@ class OpenRouterClient:
         api_key: Optional[str] = None,
         base_url: Optional[str] = None,
         default_model: Optional[str] = None,
+        scheduler: Optional[RequestScheduler] = None,
     ):
         self.api_key = api_key or settings.openrouter_api_key
         self.base_url = base_url or settings.openrouter_base_url
         self.default_model = default_model or settings.default_model
         self._client: Optional[httpx.AsyncClient] = None
+        self.scheduler = scheduler or _build_scheduler()
         
     async def __aenter__(self):
         await self._ensure_client()
@@ -65,7 +90,11 @@ class OpenRouterClient:
         """Ensure HTTP client is initialized"""
         if self._client is None or self._client.is_closed:
             self._client = httpx.AsyncClient(
-                timeout=httpx.Timeout(120.0, connect=30.0),
+                timeout=httpx.Timeout(settings.openrouter_timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=settings.openrouter_max_connections,
+                    max_keepalive_connections=settings.openrouter_max_connections,
+                ),
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
                     "Content-Type": "application/json",
@@ -127,15 +156,28 @@ class OpenRouterClient:
             message_count=len(messages)
         )
         
-        try:
+        async def send(selected_model: str) -> OpenRouterResponse:
             response = await self._client.post(
                 f"{self.base_url}/chat/completions",
-                json=payload
+                json={**payload, "model": selected_model}
             )
             response.raise_for_status()
             
             data = response.json()
-            result = OpenRouterResponse(**data)
+            return OpenRouterResponse(**data)
+        
+        # Fall back (and hedge) only when the caller didn't pin a model
+        fallback_model = None
+        if model is None and settings.fallback_model != self.default_model:
+            fallback_model = settings.fallback_model
+        
+        try:
+            result = await self.scheduler.execute(
+                payload["model"],
+                send,
+                fallback_model=fallback_model,
+                key=_payload_key(payload),
+            )
             
             logger.info(
                 "openrouter_response",
@@ -151,18 +193,6 @@ class OpenRouterClient:
                 status_code=e.response.status_code,
                 error=str(e)
             )
-            # Try fallback model if available
-            if model is None and settings.fallback_model != self.default_model:
-                logger.warning("trying_fallback_model", model=settings.fallback_model)
-                return await self.chat(
-                    prompt=prompt,
-                    system_prompt=system_prompt,
-                    history=history,
-                    model=settings.fallback_model,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    **kwargs
-                )
             raise
             
         except Exception as e:
@@ -193,7 +223,7 @@ class OpenRouterClient:
             **kwargs
         }
         
-        async with self._client.stream(
+        async with self.scheduler.slot(payload["model"]), self._client.stream(
             "POST",
             f"{self.base_url}/chat/completions",
             json=payload
@@ -0,0 +1,415 @@
+"""Compact, token-budgeted prompt context
+
+Renders agent context (catalogs, staff, bookings, histories) for prompt
+injection without pretty-printed JSON:
+
+- Lists of records become pipe-separated tables with a single header row
+- Long lists are cut to a row limit and the rest summarized in one line
+  (count, numeric ranges, most common values)
+- ``render_context`` enforces a token budget: sections are shrunk, then
+  dropped, lowest priority first; scalar values are always kept
+- Static salon context (service catalog, staff, policies) is memoized by
+  content hash, so unchanged catalogs are rendered once
+- ``PromptMetrics`` tracks prompt token counts per agent
+
+Example:
+    rendered = render_context(context, budget=1500, priorities={"services": 80})
+    system_prompt = f"{base_prompt}\\n\\nCurrent Context:\\n{rendered.text}"
+    get_prompt_metrics().record(agent.name, prompt_tokens, rendered)
+"""
+import hashlib
+import json
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+# Context keys holding salon data that rarely changes between requests
+STATIC_CONTEXT_KEYS = frozenset({
+    "salon", "salon_info", "services", "service_catalog", "catalog",
+    "staff", "staff_list", "business_hours", "policies",
+})
+
+SCALAR_PRIORITY = 100  # scalar values are never dropped
+DEFAULT_PRIORITY = 50
+MIN_ROWS = 3  # rows kept per list before a section is dropped
+
+_MAX_CELL = 80
+_MAX_DEPTH = 2
+
+
+def _tokens(chars: int) -> int:
+    return chars // 4 + 1
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return _tokens(len(text))
+
+
+# ============================================================================
+# Rendering
+# ============================================================================
+
+def _is_scalar(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def render_scalar(value: Any, max_length: Optional[int] = None) -> str:
+    """One-line text for a scalar; floats lose trailing zeros."""
+    if value is None:
+        return "-"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, float):
+        text = f"{value:.2f}".rstrip("0").rstrip(".")
+    else:
+        text = " ".join(str(value).split())
+    if max_length and len(text) > max_length:
+        text = text[:max_length - 1] + "…"
+    return text
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _cell(value: Any) -> str:
+    if isinstance(value, (list, tuple)) and all(_is_scalar(v) for v in value):
+        text = ", ".join(render_scalar(v) for v in value)
+    elif _is_scalar(value):
+        text = render_scalar(value)
+    else:
+        text = _compact_json(value)
+    text = text.replace("|", "/")
+    return text if len(text) <= _MAX_CELL else text[:_MAX_CELL - 1] + "…"
+
+
+def _columns(rows: Iterable[Dict[str, Any]]) -> List[str]:
+    """Union of keys in first-seen order."""
+    seen: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            seen.setdefault(key, None)
+    return list(seen)
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def summarize_rows(rows: List[Dict[str, Any]], columns: Optional[List[str]] = None, max_columns: int = 3) -> str:
+    """One line describing rows left out of a table.
+
+    Numeric columns report their range and mean; low-cardinality text
+    columns report their most common values.
+    """
+    columns = columns or _columns(rows)
+    parts = []
+    for column in columns:
+        values = [row.get(column) for row in rows if row.get(column) is not None]
+        if not values:
+            continue
+        numbers = [n for n in map(_number, values) if n is not None]
+        if len(numbers) == len(values):
+            low, high = render_scalar(min(numbers)), render_scalar(max(numbers))
+            mean = render_scalar(sum(numbers) / len(numbers))
+            parts.append(f"{column} {low}-{high} avg {mean}")
+        elif all(isinstance(v, str) for v in values):
+            counts = Counter(values)
+            if len(counts) <= max(5, len(values) // 4):
+                common = ", ".join(f"{render_scalar(v, 24)} {n}" for v, n in counts.most_common(3))
+                parts.append(f"{column}: {common}")
+        if len(parts) == max_columns:
+            break
+    summary = f"... +{len(rows)} more"
+    return f"{summary} ({'; '.join(parts)})" if parts else summary
+
+
+def render_table(
+    rows: List[Dict[str, Any]],
+    columns: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+) -> str:
+    """Header row plus one pipe-separated line per record."""
+    columns = columns or _columns(rows)
+    shown = rows if limit is None else rows[:limit]
+    lines = [" | ".join(columns)]
+    lines.extend(" | ".join(_cell(row.get(c)) for c in columns) for row in shown)
+    if len(shown) < len(rows):
+        lines.append(summarize_rows(rows[len(shown):], columns))
+    return "\n".join(lines)
+
+
+def render_value(value: Any, limit: Optional[int] = None, _depth: int = 0) -> str:
+    """Compact text for any context value.
+
+    Args:
+        value: Scalar, record list, scalar list or mapping
+        limit: Max list items or mapping entries shown; the rest are summarized
+    """
+    if _is_scalar(value):
+        return render_scalar(value)
+    if _depth > _MAX_DEPTH:
+        return _compact_json(value)
+    if isinstance(value, (list, tuple)):
+        items = list(value)
+        if not items:
+            return "none"
+        if all(isinstance(item, dict) for item in items):
+            return render_table(items, limit=limit)
+        shown = items if limit is None else items[:limit]
+        text = ", ".join(_cell(item) for item in shown)
+        if len(shown) < len(items):
+            text += f" ... +{len(items) - len(shown)} more"
+        return text
+    if isinstance(value, dict):
+        if not value:
+            return "none"
+        entries = list(value.items())
+        rest = len(entries) - limit if limit is not None and len(entries) > limit else 0
+        if rest:
+            entries = entries[:limit]
+        if all(_is_scalar(v) for _, v in entries):
+            text = "; ".join(f"{k}={render_scalar(v, _MAX_CELL)}" for k, v in entries)
+            return f"{text} ... +{rest} more" if rest else text
+        lines = []
+        for key, item in entries:
+            text = render_value(item, limit, _depth + 1)
+            if "\n" in text:
+                lines.append(f"{key}:\n  " + text.replace("\n", "\n  "))
+            else:
+                lines.append(f"{key}: {text}")
+        if rest:
+            lines.append(f"... +{rest} more")
+        return "\n".join(lines)
+    return render_scalar(str(value))
+
+
+# ============================================================================
+# Static context memo
+# ============================================================================
+
+class RenderMemo:
+    """Rendered text of static sections keyed by content hash"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(key: str, value: Any, limit: Optional[int]) -> str:
+        payload = json.dumps([key, limit, value], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def render(self, key: str, value: Any, limit: Optional[int]) -> str:
+        digest = self.digest(key, value, limit)
+        text = self._entries.get(digest)
+        if text is not None:
+            self.hits += 1
+            self._entries.move_to_end(digest)
+            return text
+        self.misses += 1
+        text = render_value(value, limit)
+        self._entries[digest] = text
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return text
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_render_memo = RenderMemo()
+
+
+# ============================================================================
+# Budgeted context
+# ============================================================================
+
+@dataclass
+class _Section:
+    key: str
+    value: Any
+    priority: int
+    order: int
+    limit: Optional[int] = None
+    text: str = ""
+    chars: int = 0
+    dropped: bool = False
+
+    @property
+    def rows(self) -> int:
+        return len(self.value) if isinstance(self.value, (list, tuple)) else 0
+
+    @property
+    def line(self) -> str:
+        if self.dropped:
+            return f"{self.key}: ({self.rows or len(self.value)} items omitted)"
+        return f"{self.key}:\n{self.text}" if "\n" in self.text else f"{self.key}: {self.text}"
+
+
+@dataclass
+class RenderedContext:
+    """Context text with its token accounting."""
+    text: str
+    tokens: int
+    full_tokens: int  # before the budget was applied
+    truncated: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+
+def _render_section(section: _Section, memo: RenderMemo) -> None:
+    if section.key in STATIC_CONTEXT_KEYS:
+        section.text = memo.render(section.key, section.value, section.limit)
+    else:
+        section.text = render_value(section.value, section.limit)
+    section.chars = len(section.line)
+
+
+def render_context(
+    context: Dict[str, Any],
+    budget: Optional[int] = None,
+    priorities: Optional[Dict[str, int]] = None,
+    list_limit: Optional[int] = None,
+    memo: Optional[RenderMemo] = None,
+) -> RenderedContext:
+    """Render context as compact ``key: value`` sections within a token budget.
+
+    Over budget, list sections are shrunk (down to ``MIN_ROWS`` rows, the
+    rest summarized) and then dropped, lowest priority first and later keys
+    before earlier ones at equal priority. Scalars are never cut.
+
+    Args:
+        context: Agent context
+        budget: Max estimated tokens; None renders everything
+        priorities: Per-key priority overrides (higher survives longer)
+        list_limit: Rows shown per list before any budget is applied
+        memo: Memo for static sections; defaults to the shared memo
+    """
+    memo = _render_memo if memo is None else memo
+    priorities = priorities or {}
+    sections = []
+    for order, (key, value) in enumerate(context.items()):
+        if value is None or value == "" or value == [] or value == {}:
+            continue
+        default = SCALAR_PRIORITY if _is_scalar(value) else DEFAULT_PRIORITY
+        section = _Section(key, value, priorities.get(key, default), order, limit=list_limit)
+        _render_section(section, memo)
+        sections.append(section)
+
+    def total() -> int:
+        # Tokens of the joined text, newlines included
+        return _tokens(sum(s.chars for s in sections) + len(sections) - 1) if sections else 0
+
+    full_tokens = total()
+    truncated: List[str] = []
+    dropped: List[str] = []
+    if budget is not None and full_tokens > budget:
+        candidates = sorted(
+            (s for s in sections if not _is_scalar(s.value)),
+            key=lambda s: (s.priority, -s.order),
+        )
+        # Shrink long lists first, halving rows until the budget fits
+        for section in candidates:
+            if total() <= budget:
+                break
+            rows = section.rows if section.limit is None else min(section.rows, section.limit)
+            while rows > MIN_ROWS and total() > budget:
+                rows = max(MIN_ROWS, rows // 2)
+                section.limit = rows
+                _render_section(section, memo)
+            if section.limit is not None and section.limit < section.rows:
+                truncated.append(section.key)
+        # Then drop whole sections
+        for section in candidates:
+            if total() <= budget or section.priority >= SCALAR_PRIORITY:
+                break
+            section.dropped = True
+            section.chars = len(section.line)
+            dropped.append(section.key)
+            if section.key in truncated:
+                truncated.remove(section.key)
+
+    text = "\n".join(section.line for section in sections)
+    return RenderedContext(text, total(), full_tokens, truncated, dropped)
+
+
+# ============================================================================
+# Metrics
+# ============================================================================
+
+@dataclass
+class AgentPromptStats:
+    """Per-agent prompt size counters."""
+    calls: int = 0
+    prompt_tokens: int = 0
+    max_prompt_tokens: int = 0
+    context_tokens: int = 0
+    full_context_tokens: int = 0
+    truncated_calls: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        calls = self.calls or 1
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "avg_prompt_tokens": round(self.prompt_tokens / calls, 1),
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "context_tokens": self.context_tokens,
+            "context_tokens_saved": self.full_context_tokens - self.context_tokens,
+            "truncated_calls": self.truncated_calls,
+        }
+
+
+class PromptMetrics:
+    """Estimated prompt tokens sent per agent"""
+
+    def __init__(self):
+        self._stats: Dict[str, AgentPromptStats] = {}
+
+    def record(self, agent: str, prompt_tokens: int, context: Optional[RenderedContext] = None) -> None:
+        stats = self._stats.get(agent)
+        if stats is None:
+            stats = self._stats[agent] = AgentPromptStats()
+        stats.calls += 1
+        stats.prompt_tokens += prompt_tokens
+        stats.max_prompt_tokens = max(stats.max_prompt_tokens, prompt_tokens)
+        if context is not None:
+            stats.context_tokens += context.tokens
+            stats.full_context_tokens += max(context.full_tokens, context.tokens)
+            if context.truncated or context.dropped:
+                stats.truncated_calls += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-agent counters plus static context memo hit counts."""
+        return {
+            "agents": {agent: s.to_dict() for agent, s in sorted(self._stats.items())},
+            "static_context": {
+                "entries": len(_render_memo),
+                "hits": _render_memo.hits,
+                "misses": _render_memo.misses,
+            },
+        }
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+
+# Singleton instance
+_prompt_metrics_instance: Optional[PromptMetrics] = None
+
+
+def get_prompt_metrics() -> PromptMetrics:
+    """Get or create prompt metrics singleton"""
+    global _prompt_metrics_instance
+    if _prompt_metrics_instance is None:
+        _prompt_metrics_instance = PromptMetrics()
+    return _prompt_metrics_instance
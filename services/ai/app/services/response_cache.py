@@ -0,0 +1,230 @@
+"""Shared response cache for AI agents
+
+Agents cache generated responses under a canonical key built from everything
+that influences the model output: agent name, system prompt version, model,
+prompt, context and conversation history. Keys keep the ``ai:{agent}:{hash}``
+layout of ``CacheService._generate_key`` so an agent's entries can still be
+dropped with ``invalidate_pattern(agent_name)``.
+
+Concurrent identical requests are coalesced (single-flight): the first caller
+computes the response while the others await the same in-process future, so
+only one LLM call is in flight per key.
+
+Example:
+    response_cache = get_response_cache()
+    key = response_cache.make_key("booking_agent", system_prompt, model, prompt)
+    response = await response_cache.get_or_compute(
+        "booking_agent", key, compute, decode=AgentResponse.parse_raw,
+        cache=cache, ttl=300,
+    )
+"""
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+# ``compute`` returns the value and the payload to cache (None: don't cache)
+ComputeFn = Callable[[], Awaitable[Tuple[Any, Optional[str]]]]
+
+
+def prompt_version(system_prompt: str) -> str:
+    """Short stable hash identifying a system prompt revision."""
+    return hashlib.sha256(system_prompt.encode()).hexdigest()[:12]
+
+
+def _canonical(value: Any) -> Any:
+    """Reduce messages/models to plain JSON-friendly data."""
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+@dataclass
+class AgentCacheStats:
+    """Per-agent cache counters."""
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    stores: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.misses + self.coalesced
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of requests served without a new LLM call."""
+        if not self.requests:
+            return 0.0
+        return (self.hits + self.coalesced) / self.requests
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stores": self.stores,
+            "requests": self.requests,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class ResponseCache:
+    """Canonical keys, single-flight and hit-rate metrics for agent responses"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats: Dict[str, AgentCacheStats] = {}
+
+    @staticmethod
+    def make_key(
+        agent: str,
+        system_prompt: str,
+        model: Optional[str],
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        history: Optional[List[Any]] = None,
+    ) -> str:
+        """Build the cache key for one generation request.
+
+        The system prompt enters the key as a version hash, so editing an
+        agent's prompt naturally retires its old entries.
+        """
+        data = {
+            "agent": agent,
+            "prompt_version": prompt_version(system_prompt),
+            "model": model,
+            "prompt": prompt,
+            "context": context or {},
+            "history": _canonical(history or []),
+        }
+        data_str = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+        hash_val = hashlib.sha256(data_str.encode()).hexdigest()[:32]
+        return f"ai:{agent}:{hash_val}"
+
+    def _agent_stats(self, agent: str) -> AgentCacheStats:
+        if agent not in self._stats:
+            self._stats[agent] = AgentCacheStats()
+        return self._stats[agent]
+
+    async def get_or_compute(
+        self,
+        agent: str,
+        key: str,
+        compute: ComputeFn,
+        decode: Callable[[str], Any],
+        cache: Any = None,
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """Return the cached response for ``key`` or compute it once.
+
+        Args:
+            agent: Agent name used for metrics
+            key: Key from ``make_key``
+            compute: Coroutine function returning ``(value, payload)``;
+                ``payload`` is stored when not None
+            decode: Turns a cached payload back into a value
+            cache: ``CacheService`` (or compatible); None skips Redis
+            ttl: Expiry for stored payloads
+
+        Followers of an in-flight computation receive the leader's result (or
+        exception) instead of issuing their own call.
+        """
+        stats = self._agent_stats(agent)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            stats.coalesced += 1
+            logger.info("agent_cache_coalesced", agent=agent)
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            if cache is not None:
+                cached = await cache.get(key)
+                if cached:
+                    stats.hits += 1
+                    logger.info("agent_cache_hit", agent=agent)
+                    value = decode(cached)
+                    future.set_result(value)
+                    return value
+
+            stats.misses += 1
+            value, payload = await compute()
+            if cache is not None and payload is not None:
+                if await cache.set(key, payload, ttl):
+                    stats.stores += 1
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; don't leave the exception unretrieved
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                # Leader was cancelled; followers are cancelled with it
+                future.cancel()
+
+    async def lookup(self, agent: str, key: str, decode: Callable[[str], Any], cache: Any) -> Any:
+        """Cached value for ``key`` or None; counts a hit or a miss.
+
+        Used by streaming generation, which cannot share an in-flight
+        future and instead stores the full response once the stream ends.
+        """
+        stats = self._agent_stats(agent)
+        cached = await cache.get(key) if cache is not None else None
+        if cached:
+            stats.hits += 1
+            logger.info("agent_cache_hit", agent=agent, stream=True)
+            return decode(cached)
+        stats.misses += 1
+        return None
+
+    async def store(self, agent: str, key: str, payload: str, cache: Any, ttl: Optional[int] = None) -> bool:
+        """Store a payload computed outside ``get_or_compute``."""
+        if cache is None or not await cache.set(key, payload, ttl):
+            return False
+        self._agent_stats(agent).stores += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-agent counters plus totals."""
+        total = AgentCacheStats()
+        for agent_stats in self._stats.values():
+            total.hits += agent_stats.hits
+            total.misses += agent_stats.misses
+            total.coalesced += agent_stats.coalesced
+            total.stores += agent_stats.stores
+        return {
+            "agents": {agent: s.to_dict() for agent, s in sorted(self._stats.items())},
+            "total": total.to_dict(),
+            "in_flight": len(self._inflight),
+        }
+
+    def reset_stats(self) -> None:
+        """Clear all counters."""
+        self._stats.clear()
+
+
+# Singleton instance
+_response_cache_instance: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create response cache singleton"""
+    global _response_cache_instance
+    if _response_cache_instance is None:
+        _response_cache_instance = ResponseCache()
+    return _response_cache_instance
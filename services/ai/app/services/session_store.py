@@ -0,0 +1,303 @@
+"""Conversation Session Store
+
+Bounded, persistent conversation state for chat, voice and WhatsApp:
+
+- L1: in-process LRU of recently active sessions, capped by count
+- L2: Redis (through CacheService) with a sliding TTL, so sessions survive
+  restarts and are visible to every instance
+- Compact encoding: role codes and tuple messages, no pretty-printing
+- History is trimmed to a token budget (oldest messages first) instead of a
+  fixed message count, so long messages can't blow up prompts
+- ``turn()`` serializes concurrent turns on the same session within an
+  instance; L1 entries older than ``l1_ttl`` are re-read from Redis so an
+  instance picks up turns handled elsewhere
+
+Example:
+    store = await get_session_store()
+    async with store.turn(session_id) as session:
+        history = session.history()
+        ...
+        session.append("user", message)
+        session.append("assistant", reply)
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from app.services.prompt_context import estimate_tokens
+
+logger = structlog.get_logger()
+
+_ROLE_CODES = {"user": "u", "assistant": "a", "system": "s"}
+_CODE_ROLES = {code: role for role, code in _ROLE_CODES.items()}
+
+
+@dataclass(slots=True)
+class Session:
+    """Messages and channel state for one conversation."""
+    session_id: str
+    messages: List[Tuple[str, str]] = field(default_factory=list)
+    state: Dict[str, Any] = field(default_factory=dict)
+    updated_at: float = 0.0
+
+    def append(self, role: str, content: str) -> None:
+        self.messages.append((role, content))
+
+    def history(self, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Messages as ``{"role", "content"}`` dicts, oldest first."""
+        messages = self.messages[-limit:] if limit else self.messages
+        return [{"role": role, "content": content} for role, content in messages]
+
+    @property
+    def tokens(self) -> int:
+        return sum(estimate_tokens(content) for _, content in self.messages)
+
+
+def encode_session(session: Session) -> str:
+    """Compact JSON for Redis."""
+    return json.dumps(
+        {
+            "m": [[_ROLE_CODES.get(role, role), content] for role, content in session.messages],
+            "s": session.state,
+            "t": round(session.updated_at, 3),
+        },
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+
+
+def decode_session(session_id: str, payload: str) -> Session:
+    data = json.loads(payload)
+    return Session(
+        session_id=session_id,
+        messages=[(_CODE_ROLES.get(role, role), content) for role, content in data.get("m", [])],
+        state=data.get("s", {}),
+        updated_at=data.get("t", 0.0),
+    )
+
+
+@dataclass
+class SessionStoreStats:
+    """Session store counters."""
+    l1_hits: int = 0
+    l2_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    truncated_messages: int = 0
+    l2_errors: int = 0
+
+
+class _SessionLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class SessionStore:
+    """Two-tier session store with token-budgeted history"""
+
+    def __init__(
+        self,
+        backend: Any = None,
+        ttl: int = 86400,
+        max_sessions: int = 10_000,
+        token_budget: int = 2000,
+        l1_ttl: float = 30.0,
+        key_prefix: str = "ai:session",
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            backend: Object with async ``get(key)``, ``set(key, value, ttl, tags)``
+                and ``delete(key)`` (CacheService); None keeps sessions in L1 only
+            ttl: Seconds a session lives after its last turn
+            max_sessions: L1 capacity; least recently used sessions are evicted
+            token_budget: Max estimated tokens of history kept per session
+            l1_ttl: Seconds an L1 copy is trusted before re-reading Redis
+            key_prefix: Redis key prefix
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.token_budget = token_budget
+        self.l1_ttl = l1_ttl
+        self.key_prefix = key_prefix
+        self._clock = clock
+        self._l1: "OrderedDict[str, Tuple[float, Session]]" = OrderedDict()
+        self._locks: Dict[str, _SessionLock] = {}
+        self._stats = SessionStoreStats()
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}:{session_id}"
+
+    def __len__(self) -> int:
+        return len(self._l1)
+
+    # ------------------------------------------------------------------
+    # L1
+    # ------------------------------------------------------------------
+
+    def _remember(self, session: Session) -> None:
+        self._l1[session.session_id] = (self._clock(), session)
+        self._l1.move_to_end(session.session_id)
+        while len(self._l1) > self.max_sessions:
+            self._l1.popitem(last=False)
+            self._stats.evictions += 1
+
+    def _cached(self, session_id: str) -> Tuple[Optional[Session], bool]:
+        """L1 copy of a live session and whether it is still fresh."""
+        entry = self._l1.get(session_id)
+        if entry is None:
+            return None, False
+        loaded_at, session = entry
+        now = self._clock()
+        if now - session.updated_at > self.ttl:
+            del self._l1[session_id]
+            return None, False
+        self._l1.move_to_end(session_id)
+        return session, self.backend is None or now - loaded_at <= self.l1_ttl
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get(self, session_id: str) -> Session:
+        """The stored session, or a new empty one."""
+        cached, fresh = self._cached(session_id)
+        if fresh:
+            self._stats.l1_hits += 1
+            return cached
+
+        if self.backend is not None:
+            try:
+                payload = await self.backend.get(self._key(session_id))
+            except Exception as e:
+                self._stats.l2_errors += 1
+                logger.warning("session_load_error", session_id=session_id, error=str(e))
+                payload = None
+            if payload:
+                session = decode_session(session_id, payload)
+                self._stats.l2_hits += 1
+                self._remember(session)
+                return session
+            if cached is not None:
+                # Redis lost or never got the write; keep the local copy
+                self._stats.l1_hits += 1
+                self._remember(cached)
+                return cached
+
+        self._stats.misses += 1
+        return Session(session_id=session_id, updated_at=self._clock())
+
+    def truncate(self, session: Session) -> int:
+        """Drop the oldest messages until history fits the token budget.
+
+        The newest message is always kept, and history never starts with an
+        assistant reply whose question was dropped. Returns the count removed.
+        """
+        messages = session.messages
+        total = session.tokens
+        start = 0
+        while total > self.token_budget and start < len(messages) - 1:
+            total -= estimate_tokens(messages[start][1])
+            start += 1
+        while start and start < len(messages) - 1 and messages[start][0] == "assistant":
+            start += 1
+        if start:
+            del messages[:start]
+            self._stats.truncated_messages += start
+        return start
+
+    async def save(self, session: Session) -> None:
+        """Trim, stamp and write the session through to Redis."""
+        self.truncate(session)
+        session.updated_at = self._clock()
+        self._remember(session)
+        if self.backend is None:
+            return
+        try:
+            await self.backend.set(self._key(session.session_id), encode_session(session), ttl=self.ttl, tags=[])
+        except Exception as e:
+            self._stats.l2_errors += 1
+            logger.warning("session_save_error", session_id=session.session_id, error=str(e))
+
+    async def delete(self, session_id: str) -> None:
+        """Forget a session everywhere."""
+        self._l1.pop(session_id, None)
+        if self.backend is not None:
+            try:
+                await self.backend.delete(self._key(session_id))
+            except Exception as e:
+                self._stats.l2_errors += 1
+                logger.warning("session_delete_error", session_id=session_id, error=str(e))
+
+    @asynccontextmanager
+    async def lock(self, session_id: str) -> AsyncIterator[None]:
+        """Serialize work on one session; the lock is dropped when unused."""
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = _SessionLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if not entry.users:
+                self._locks.pop(session_id, None)
+
+    @asynccontextmanager
+    async def turn(self, session_id: str) -> AsyncIterator[Session]:
+        """Load a session under its lock and save it if the block succeeds."""
+        async with self.lock(session_id):
+            session = await self.get(session_id)
+            yield session
+            await self.save(session)
+
+    def stats(self) -> Dict[str, Any]:
+        """Tier hit counts, evictions and truncation."""
+        stats = self._stats
+        lookups = stats.l1_hits + stats.l2_hits + stats.misses
+        return {
+            "l1_sessions": len(self._l1),
+            "l1_hits": stats.l1_hits,
+            "l2_hits": stats.l2_hits,
+            "misses": stats.misses,
+            "hit_rate": round((stats.l1_hits + stats.l2_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": stats.evictions,
+            "truncated_messages": stats.truncated_messages,
+            "l2_errors": stats.l2_errors,
+            "locked_sessions": len(self._locks),
+        }
+
+
+# Singleton instance
+_session_store_instance: Optional[SessionStore] = None
+
+
+async def get_session_store() -> SessionStore:
+    """Get or create the session store, persisted through the cache service"""
+    global _session_store_instance
+    if _session_store_instance is None:
+        from app.core.config import get_settings
+        from app.services.cache_service import get_cache_service
+
+        settings = get_settings()
+        cache = await get_cache_service()
+        _session_store_instance = SessionStore(
+            backend=cache if cache._enabled else None,
+            ttl=settings.session_ttl,
+            max_sessions=settings.session_max_sessions,
+            token_budget=settings.session_token_budget,
+            l1_ttl=settings.session_l1_ttl,
+        )
+    return _session_store_instance
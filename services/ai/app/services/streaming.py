@@ -0,0 +1,157 @@
+"""Streaming responses
+
+Event format shared by every streaming layer (agent, pipeline, SSE
+endpoint, web adapter):
+
+- ``{"type": "chunk", "content": "..."}``: response text as it arrives
+- ``{"type": "done", "metadata": {...}}``: end of a successful stream;
+  ``metadata`` carries ``agent``, ``cached``, ``blocked``, ``ttft_ms`` and
+  ``duration_ms``
+- ``{"type": "error", "message": "..."}``: the stream failed
+
+Blocked (guardrail, rate limit) requests stream their rejection message as
+a chunk followed by ``done`` with ``blocked: true``, mirroring the
+non-streaming ``AgentResponse``.
+
+``StreamMetrics`` keeps time-to-first-token and total stream duration
+per agent.
+
+Example:
+    async for event in agent.generate_stream(prompt, context):
+        yield sse_event(event)
+"""
+import json
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+StreamEvent = Dict[str, Any]
+
+
+def chunk_event(content: str) -> StreamEvent:
+    return {"type": "chunk", "content": content}
+
+
+def done_event(**metadata: Any) -> StreamEvent:
+    return {"type": "done", "metadata": metadata}
+
+
+def error_event(message: str) -> StreamEvent:
+    return {"type": "error", "message": message}
+
+
+def replay_chunks(text: str, chunk_size: int = 20) -> Iterator[str]:
+    """Split a complete (e.g. cached) response into stream-sized chunks."""
+    for i in range(0, len(text), chunk_size):
+        yield text[i:i + chunk_size]
+
+
+async def replay_events(text: str, chunk_size: int = 20) -> AsyncIterator[StreamEvent]:
+    for chunk in replay_chunks(text, chunk_size):
+        yield chunk_event(chunk)
+
+
+def sse_event(event: StreamEvent) -> str:
+    """Server-Sent Events frame for one event."""
+    return f"data: {json.dumps(event, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+def _percentile(samples: Deque[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+
+class _AgentStreamStats:
+    __slots__ = ("streams", "cached", "errors", "ttft", "duration")
+
+    def __init__(self, window: int):
+        self.streams = 0
+        self.cached = 0
+        self.errors = 0
+        self.ttft: Deque[float] = deque(maxlen=window)
+        self.duration: Deque[float] = deque(maxlen=window)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "streams": self.streams,
+            "cached": self.cached,
+            "errors": self.errors,
+            "ttft_ms_p50": round(_percentile(self.ttft, 0.5), 1),
+            "ttft_ms_p95": round(_percentile(self.ttft, 0.95), 1),
+            "duration_ms_p50": round(_percentile(self.duration, 0.5), 1),
+            "duration_ms_p95": round(_percentile(self.duration, 0.95), 1),
+        }
+
+
+class StreamMetrics:
+    """Time-to-first-token and stream duration per agent (recent window)"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._stats: Dict[str, _AgentStreamStats] = {}
+
+    def _agent(self, agent: str) -> _AgentStreamStats:
+        stats = self._stats.get(agent)
+        if stats is None:
+            stats = self._stats[agent] = _AgentStreamStats(self.window)
+        return stats
+
+    def record(
+        self,
+        agent: str,
+        ttft_ms: Optional[float],
+        duration_ms: float,
+        cached: bool = False,
+        error: bool = False,
+    ) -> None:
+        stats = self._agent(agent)
+        stats.streams += 1
+        stats.cached += cached
+        stats.errors += error
+        if ttft_ms is not None:
+            stats.ttft.append(ttft_ms)
+        stats.duration.append(duration_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        return {agent: s.to_dict() for agent, s in sorted(self._stats.items())}
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+
+class StreamTimer:
+    """Measures time to the first chunk and the whole stream."""
+
+    __slots__ = ("started", "first_at")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_at: Optional[float] = None
+
+    def mark(self) -> None:
+        if self.first_at is None:
+            self.first_at = time.perf_counter()
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        if self.first_at is None:
+            return None
+        return round((self.first_at - self.started) * 1000, 2)
+
+    @property
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 2)
+
+
+# Singleton instance
+_stream_metrics_instance: Optional[StreamMetrics] = None
+
+
+def get_stream_metrics() -> StreamMetrics:
+    """Get or create stream metrics singleton"""
+    global _stream_metrics_instance
+    if _stream_metrics_instance is None:
+        _stream_metrics_instance = StreamMetrics()
+    return _stream_metrics_instance
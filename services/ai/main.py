@@ -15,6 +15,13 @@ from app.core.logging import configure_logging
 from app.api import chat, marketing, analytics, agents_router
 from app.services.openrouter_client import get_openrouter_client
 from app.services.cache_service import get_cache_service
+from app.services.response_cache import get_response_cache
+from app.services.prompt_context import get_prompt_metrics
+from app.services.streaming import get_stream_metrics
+from app.pipeline import get_processor
+from app.pipeline.metrics import get_pipeline_metrics
+from app.services.agents import warm_agent_pool, reset_agent_pool
+from app.plugins import initialize_registry
 
 settings = get_settings()
 configure_logging()
@@ -40,10 +47,22 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("upstash_redis_connection_failed", error=str(e))
     
+    # Warm agent instances once; legacy get_agent() and the plugin
+    # registry both hand out these instead of building one per request
+    try:
+        agents = await warm_agent_pool()
+        registry = initialize_registry()
+        for agent_type, agent in agents.items():
+            registry.register_alias(agent_type, agent.name)
+        logger.info("agent_registry_warmed", agents=len(agents), plugins=len(registry.list_names()))
+    except Exception as e:
+        logger.warning("agent_registry_warm_failed", error=str(e))
+    
     yield
     
     # Shutdown
     logger.info("ai_service_shutting_down")
+    reset_agent_pool()
     if client:
         await client.close()
     if cache:
@@ -93,8 +112,7 @@ async def health_check():
     try:
         cache = await get_cache_service()
         if cache._enabled and cache._client:
-            # Test with a simple get operation
-            cache._client.get("__health_check__")
+            await cache._client.ping()
         elif not cache._enabled:
             redis_status = "disabled"
         else:
@@ -112,6 +130,46 @@ async def health_check():
     }
 
 
+@app.get("/health/cache")
+async def cache_stats():
+    """Per-agent response cache hit rates"""
+    return get_response_cache().stats()
+
+
+@app.get("/health/prompts")
+async def prompt_stats():
+    """Per-agent prompt token counts and static context memo hits"""
+    return get_prompt_metrics().stats()
+
+
+@app.get("/health/streams")
+async def stream_stats():
+    """Per-agent time to first token and stream duration"""
+    return get_stream_metrics().stats()
+
+
+@app.get("/metrics")
+async def pipeline_metrics():
+    """Pipeline latency with time per middleware stage and recent traces"""
+    return get_pipeline_metrics().stats()
+
+
+@app.get("/health/rate-limits")
+async def rate_limit_stats():
+    """Pipeline rate limiter decisions, lease hit rate and Redis errors"""
+    for middleware in get_processor().middlewares:
+        if middleware.name == "rate_limit":
+            return middleware.stats()
+    return {}
+
+
+@app.get("/health/llm")
+async def llm_scheduler_stats():
+    """Per-model queue depth, wait time and retry/hedge counters"""
+    client = await get_openrouter_client()
+    return client.scheduler.stats()
+
+
 @app.get("/models")
 async def list_models():
     """List available AI models"""
@@ -1,11 +1,15 @@
 """AI Service Proxy Router
 
 Proxies requests to the AI service with shared authentication and context injection.
+All endpoints share one pooled keep-alive ``httpx.AsyncClient`` instead of
+opening a connection per request; streamed chat is relayed chunk by chunk.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+import json
+import time
 import httpx
 import structlog
 
@@ -16,6 +20,37 @@ router = APIRouter(prefix="", tags=["AI Service"])
 logger = structlog.get_logger()
 # settings already imported
 
+_ai_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_ai_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Get or create the pooled HTTP client for the AI service.
+    
+    Args:
+        transport: Optional transport override (tests)
+    """
+    global _ai_http_client
+    if _ai_http_client is None or _ai_http_client.is_closed:
+        _ai_http_client = httpx.AsyncClient(
+            base_url=settings.AI_SERVICE_URL,
+            timeout=httpx.Timeout(settings.AI_SERVICE_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0),
+            transport=transport,
+        )
+    return _ai_http_client
+
+
+async def close_ai_http_client() -> None:
+    """Close the pooled AI service client (application shutdown)."""
+    global _ai_http_client
+    if _ai_http_client is not None:
+        await _ai_http_client.aclose()
+        _ai_http_client = None
+
+
+def _sse_error(message: str) -> bytes:
+    return f"data: {json.dumps({'type': 'error', 'message': message})}\n\n".encode()
+
 
 class ChatRequest(BaseModel):
     """Chat request to AI service"""
@@ -49,12 +84,11 @@ class AgentsListResponse(BaseModel):
 @router.get("/health", summary="Check AI service health")
 async def check_ai_health():
     """Check if AI service is healthy"""
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            response = await client.get(f"{settings.AI_SERVICE_URL}/health")
-            return response.json()
-        except Exception as e:
-            return {"status": "unhealthy", "error": str(e)}
+    try:
+        response = await get_ai_http_client().get("/health", timeout=10.0)
+        return response.json()
+    except Exception as e:
+        return {"status": "unhealthy", "error": str(e)}
 
 
 @router.get("/agents", response_model=AgentsListResponse, summary="List available AI agents")
@@ -63,19 +97,18 @@ async def list_agents(
     salon_id: str = Depends(get_current_salon)
 ):
     """List all available AI agents"""
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            response = await client.get(f"{settings.AI_SERVICE_URL}/agents")
-            data = response.json()
-            return AgentsListResponse(
-                agents=[AgentInfo(**agent) for agent in data.get("agents", [])]
-            )
-        except Exception as e:
-            logger.error("ai_service_error", error=str(e))
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="AI service unavailable"
-            )
+    try:
+        response = await get_ai_http_client().get("/agents", timeout=10.0)
+        data = response.json()
+        return AgentsListResponse(
+            agents=[AgentInfo(**agent) for agent in data.get("agents", [])]
+        )
+    except Exception as e:
+        logger.error("ai_service_error", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service unavailable"
+        )
 
 
 @router.post("/chat", response_model=ChatResponse, summary="Chat with AI agent")
@@ -99,33 +132,33 @@ async def chat_with_agent(
         "stream": request.stream
     }
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        try:
-            response = await client.post(
-                f"{settings.AI_SERVICE_URL}/api/v1/chat",
-                json=payload
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=response.text
-                )
-            
-            return ChatResponse(**response.json())
-            
-        except httpx.TimeoutException:
-            logger.error("ai_service_timeout")
-            raise HTTPException(
-                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-                detail="AI service request timed out"
-            )
-        except Exception as e:
-            logger.error("ai_service_error", error=str(e))
+    try:
+        response = await get_ai_http_client().post(
+            "/api/v1/chat",
+            json=payload,
+            timeout=60.0
+        )
+        
+        if response.status_code != 200:
             raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"AI service error: {str(e)}"
+                status_code=response.status_code,
+                detail=response.text
             )
+        
+        return ChatResponse(**response.json())
+        
+    except httpx.TimeoutException:
+        logger.error("ai_service_timeout")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="AI service request timed out"
+        )
+    except Exception as e:
+        logger.error("ai_service_error", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI service error: {str(e)}"
+        )
 
 
 @router.post("/chat/stream", summary="Stream chat with AI agent")
@@ -134,7 +167,12 @@ async def stream_chat(
     current_user = Depends(get_current_user),
     salon_id: str = Depends(get_current_salon)
 ):
-    """Stream a chat response from an AI agent"""
+    """Stream a chat response from an AI agent.
+    
+    Server-Sent Events from the AI service are relayed as they arrive
+    (``start``, ``chunk``..., then ``done`` or ``error``). Upstream failures
+    become an ``error`` event since the response has already started.
+    """
     
     # Inject salon context
     context = request.context or {}
@@ -143,24 +181,49 @@ async def stream_chat(
     
     payload = {
         "message": request.message,
-        "agent": request.agent,
+        "salon_id": salon_id,
+        "session_id": context.pop("session_id", None),
+        "agent_type": request.agent,
         "context": context,
-        "stream": True
     }
     
     async def stream_generator():
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            async with client.stream(
+        started = time.perf_counter()
+        ttfb_ms = None
+        size = 0
+        try:
+            async with get_ai_http_client().stream(
                 "POST",
-                f"{settings.AI_SERVICE_URL}/api/v1/chat/stream",
-                json=payload
+                "/api/v1/chat/stream",
+                json=payload,
+                timeout=httpx.Timeout(settings.AI_SERVICE_TIMEOUT, connect=5.0, read=None)
             ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    logger.error("ai_stream_error", status=response.status_code, body=response.text[:200])
+                    yield _sse_error(f"AI service returned {response.status_code}")
+                    return
                 async for chunk in response.aiter_bytes():
+                    if ttfb_ms is None:
+                        ttfb_ms = round((time.perf_counter() - started) * 1000, 2)
+                    size += len(chunk)
                     yield chunk
+        except httpx.HTTPError as e:
+            logger.error("ai_stream_error", error=str(e))
+            yield _sse_error("AI service unavailable")
+            return
+        logger.info(
+            "ai_stream_proxied",
+            agent=request.agent,
+            ttfb_ms=ttfb_ms,
+            duration_ms=round((time.perf_counter() - started) * 1000, 2),
+            bytes=size,
+        )
     
     return StreamingResponse(
         stream_generator(),
-        media_type="text/event-stream"
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
@@ -186,19 +249,19 @@ async def get_business_insights(
         "salon_id": salon_id
     }
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.post(
-                f"{settings.AI_SERVICE_URL}/api/v1/analytics/insights",
-                json=payload
-            )
-            return response.json()
-        except Exception as e:
-            logger.error("ai_insights_error", error=str(e))
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"AI service error: {str(e)}"
-            )
+    try:
+        response = await get_ai_http_client().post(
+            "/api/v1/analytics/insights",
+            json=payload,
+            timeout=30.0
+        )
+        return response.json()
+    except Exception as e:
+        logger.error("ai_insights_error", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI service error: {str(e)}"
+        )
 
 
 
@@ -233,34 +296,34 @@ async def invoke_agent(
         "params": request.get("params", {}),
     }
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        try:
-            response = await client.post(
-                f"{settings.AI_SERVICE_URL}/api/v1/agents/{agent_name}/invoke",
-                json=payload
-            )
-
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=response.text
-                )
-
-            return response.json()
+    try:
+        response = await get_ai_http_client().post(
+            f"/api/v1/agents/{agent_name}/invoke",
+            json=payload,
+            timeout=60.0
+        )
 
-        except httpx.TimeoutException:
-            logger.error("ai_agent_timeout", agent=agent_name)
+        if response.status_code != 200:
             raise HTTPException(
-                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-                detail="Agent invocation timed out"
-            )
-        except Exception as e:
-            logger.error("ai_agent_error", agent=agent_name, error=str(e))
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Agent invocation error: {str(e)}"
+                status_code=response.status_code,
+                detail=response.text
             )
 
+        return response.json()
+
+    except httpx.TimeoutException:
+        logger.error("ai_agent_timeout", agent=agent_name)
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Agent invocation timed out"
+        )
+    except Exception as e:
+        logger.error("ai_agent_error", agent=agent_name, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Agent invocation error: {str(e)}"
+        )
+
 @router.post("/marketing/campaign", summary="Generate marketing campaign")
 async def generate_campaign(
     campaign_type: str,
@@ -283,16 +346,16 @@ async def generate_campaign(
         "salon_id": salon_id
     }
     
-    async with httpx.AsyncClient(timeout=45.0) as client:
-        try:
-            response = await client.post(
-                f"{settings.AI_SERVICE_URL}/api/v1/marketing/campaign",
-                json=payload
-            )
-            return response.json()
-        except Exception as e:
-            logger.error("ai_campaign_error", error=str(e))
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"AI service error: {str(e)}"
-            )
+    try:
+        response = await get_ai_http_client().post(
+            "/api/v1/marketing/campaign",
+            json=payload,
+            timeout=45.0
+        )
+        return response.json()
+    except Exception as e:
+        logger.error("ai_campaign_error", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI service error: {str(e)}"
+        )
@@ -37,6 +37,7 @@ from app.models.autonomous import (
     OutreachStatus,
     OutreachType,
 )
+from app.models.base import InvalidCursorError
 from app.schemas.autonomous import (
     DecisionCreate,
     DecisionResponse,
@@ -132,6 +133,7 @@ async def list_decisions(
     date_to: Optional[date] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Continuation token from a previous page"),
     salon_id: str = Depends(get_salon_id),
     user: dict = Depends(get_current_user),
 ):
@@ -153,30 +155,31 @@ async def list_decisions(
     if date_to:
         filters.append(("created_at", "<=", date_to.isoformat()))
     
-    offset = (page - 1) * page_size
-    
-    decisions = await model.list(
-        salon_id=salon_id,
-        filters=filters,
-        order_by="created_at",
-        order_direction="DESCENDING",
-        limit=page_size,
-        offset=offset,
-    )
+    try:
+        decisions, next_cursor = await model.list_page(
+            salon_id=salon_id,
+            filters=filters,
+            order_by="created_at",
+            order_direction="DESCENDING",
+            page_size=page_size,
+            cursor=cursor,
+            offset=None if cursor else (page - 1) * page_size,
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid pagination cursor", "code": "invalid_cursor"},
+        )
     
-    # Get total count (approximate)
-    total_decisions = await model.list(
-        salon_id=salon_id,
-        filters=filters,
-        limit=1000,
-    )
+    total = await model.count(salon_id=salon_id, filters=filters)
     
     return DecisionListResponse(
         items=decisions,
-        total=len(total_decisions),
+        total=total,
         page=page,
         page_size=page_size,
-        has_more=len(decisions) == page_size,
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor,
     )
 
 
@@ -423,6 +426,7 @@ async def list_approvals(
     priority: Optional[ApprovalPriority] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Continuation token from a previous page"),
     salon_id: str = Depends(get_salon_id),
     user: dict = Depends(get_current_user),
 ):
@@ -435,29 +439,31 @@ async def list_approvals(
     if priority:
         filters.append(("priority", "==", priority.value))
     
-    offset = (page - 1) * page_size
-    
-    approvals = await model.list(
-        salon_id=salon_id,
-        filters=filters,
-        order_by="created_at",
-        order_direction="ASCENDING",
-        limit=page_size,
-        offset=offset,
-    )
+    try:
+        approvals, next_cursor = await model.list_page(
+            salon_id=salon_id,
+            filters=filters,
+            order_by="created_at",
+            order_direction="ASCENDING",
+            page_size=page_size,
+            cursor=cursor,
+            offset=None if cursor else (page - 1) * page_size,
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid pagination cursor", "code": "invalid_cursor"},
+        )
     
-    total_approvals = await model.list(
-        salon_id=salon_id,
-        filters=filters,
-        limit=1000,
-    )
+    total = await model.count(salon_id=salon_id, filters=filters)
     
     return ApprovalListResponse(
         items=approvals,
-        total=len(total_approvals),
+        total=total,
         page=page,
         page_size=page_size,
-        has_more=len(approvals) == page_size,
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor,
     )
 
 
@@ -572,6 +578,7 @@ async def list_gaps(
     min_duration: int = Query(30, ge=15),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Continuation token from a previous page"),
     salon_id: str = Depends(get_salon_id),
     user: dict = Depends(get_current_user),
 ):
@@ -588,29 +595,31 @@ async def list_gaps(
     
     filters.append(("duration_minutes", ">=", min_duration))
     
-    offset = (page - 1) * page_size
-    
-    gaps = await model.list(
-        salon_id=salon_id,
-        filters=filters,
-        order_by="duration_minutes",
-        order_direction="DESCENDING",
-        limit=page_size,
-        offset=offset,
-    )
+    try:
+        gaps, next_cursor = await model.list_page(
+            salon_id=salon_id,
+            filters=filters,
+            order_by="duration_minutes",
+            order_direction="DESCENDING",
+            page_size=page_size,
+            cursor=cursor,
+            offset=None if cursor else (page - 1) * page_size,
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid pagination cursor", "code": "invalid_cursor"},
+        )
     
-    total_gaps = await model.list(
-        salon_id=salon_id,
-        filters=filters,
-        limit=1000,
-    )
+    total = await model.count(salon_id=salon_id, filters=filters)
     
     return GapListResponse(
         items=gaps,
-        total=len(total_gaps),
+        total=total,
         page=page,
         page_size=page_size,
-        has_more=len(gaps) == page_size,
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor,
     )
 
 
@@ -719,6 +728,7 @@ async def list_outreach(
     customer_id: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Continuation token from a previous page"),
     salon_id: str = Depends(get_salon_id),
     user: dict = Depends(get_current_user),
 ):
@@ -733,29 +743,31 @@ async def list_outreach(
     if customer_id:
         filters.append(("customer_id", "==", customer_id))
     
-    offset = (page - 1) * page_size
-    
-    outreach_list = await model.list(
-        salon_id=salon_id,
-        filters=filters,
-        order_by="created_at",
-        order_direction="DESCENDING",
-        limit=page_size,
-        offset=offset,
-    )
+    try:
+        outreach_list, next_cursor = await model.list_page(
+            salon_id=salon_id,
+            filters=filters,
+            order_by="created_at",
+            order_direction="DESCENDING",
+            page_size=page_size,
+            cursor=cursor,
+            offset=None if cursor else (page - 1) * page_size,
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid pagination cursor", "code": "invalid_cursor"},
+        )
     
-    total_outreach = await model.list(
-        salon_id=salon_id,
-        filters=filters,
-        limit=1000,
-    )
+    total = await model.count(salon_id=salon_id, filters=filters)
     
     return OutreachListResponse(
         items=outreach_list,
-        total=len(total_outreach),
+        total=total,
         page=page,
         page_size=page_size,
-        has_more=len(outreach_list) == page_size,
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor,
     )
 
 
@@ -26,7 +26,9 @@ from app.api.dependencies import (
     verify_booking_access,
 )
 from app.models import BookingModel, ServiceModel, StaffModel, CustomerModel
-from app.services.event_publisher import publish_event, EventTypes
+from app.models.base import InvalidCursorError
+from app.schemas.events import BookingCancelled, BookingCompleted, BookingCreated, BookingUpdated
+from app.services.event_bus import get_event_bus
 from app.schemas import (
     BookingCreate,
     BookingUpdate,
@@ -158,6 +160,7 @@ async def list_bookings(
     status_filter: Optional[BookingStatus] = Query(None, alias="status", description="Filter by status"),
     staff_id: Optional[str] = Query(None, description="Filter by staff"),
     customer_id: Optional[str] = Query(None, description="Filter by customer"),
+    cursor: Optional[str] = Query(None, description="Continuation token from a previous page"),
     salon_id: str = Depends(get_salon_id),
     current_user: AuthContext = Depends(get_current_user),
 ) -> PaginatedResponse[BookingSummary]:
@@ -176,6 +179,7 @@ async def list_bookings(
         status_filter: Filter by booking status
         staff_id: Filter by staff ID
         customer_id: Filter by customer ID
+        cursor: Continuation token returned as ``next_cursor``
         salon_id: Current salon ID from auth context
         current_user: Authenticated user context
         
@@ -183,7 +187,7 @@ async def list_bookings(
         Paginated list of booking summaries
         
     Raises:
-        HTTPException: 500 if database operation fails
+        HTTPException: 400 if the cursor is invalid, 500 if database operation fails
     """
     try:
         booking_model = BookingModel()
@@ -196,10 +200,16 @@ async def list_bookings(
             customer_id=customer_id,
             page=page,
             page_size=page_size,
+            cursor=cursor,
         )
         
         return result
         
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid pagination cursor", "code": "invalid_cursor"},
+        )
     except Exception as e:
         logger.error("Failed to list bookings", error=str(e))
         raise HTTPException(
@@ -271,8 +281,11 @@ async def create_booking(
         is_available = await booking_model.check_availability(
             salon_id=salon_id,
             staff_id=request.staff_id,
+            booking_date=request.booking_date,
             start_time=request.start_time,
-            duration_minutes=service.duration.base_minutes,
+            end_time=request.end_time,
+            service_id=request.service_id,
+            resource_type=service.resource_requirement.resource_type,
         )
         
         if not is_available:
@@ -295,16 +308,15 @@ async def create_booking(
         )
         
         # Publish booking created event
-        publish_event(
-            event_type=EventTypes.BOOKING_CREATED,
-            data={
-                "booking_id": booking.id,
-                "customer_id": request.customer_id,
-                "service_id": request.service_id,
-                "staff_id": request.staff_id,
-                "start_time": request.start_time.isoformat(),
-                "status": "pending",
-            },
+        await get_event_bus().publish(
+            BookingCreated(
+                booking_id=booking.id,
+                customer_id=request.customer_id,
+                service_id=request.service_id,
+                staff_id=request.staff_id,
+                start_time=request.start_time.isoformat(),
+                status="pending",
+            ),
             salon_id=salon_id,
         )
         logger.info(
@@ -376,6 +388,7 @@ async def check_availability(
             staff_id=staff_id,
             date=date_param,
             duration_minutes=service.duration.base_minutes,
+            resource_type=service.resource_requirement.resource_type,
         )
         
         # Check specific time if provided
@@ -391,6 +404,8 @@ async def check_availability(
                 staff_id=staff_id,
                 start_time=slot_datetime,
                 duration_minutes=service.duration.base_minutes,
+                service_id=service_id,
+                resource_type=service.resource_requirement.resource_type,
             )
             
             if not available:
@@ -462,6 +477,7 @@ async def get_available_slots(
             staff_id=staff_id,
             date=date_param,
             duration_minutes=service.duration.base_minutes,
+            resource_type=service.resource_requirement.resource_type,
         )
         
         return SlotsResponse(
@@ -569,15 +585,14 @@ async def update_booking(
         )
         
         # Publish booking updated event
-        publish_event(
-            event_type=EventTypes.BOOKING_UPDATED,
-            data={
-                "booking_id": booking_id,
-                "customer_id": updated.customer_id if hasattr(updated, 'customer_id') else None,
-                "staff_id": updated.staff_id if hasattr(updated, 'staff_id') else None,
-                "start_time": updated.start_time.isoformat() if hasattr(updated, 'start_time') else None,
-                "status": str(updated.status) if hasattr(updated, 'status') else "updated",
-            },
+        await get_event_bus().publish(
+            BookingUpdated(
+                booking_id=booking_id,
+                customer_id=updated.customer_id if hasattr(updated, 'customer_id') else None,
+                staff_id=updated.staff_id if hasattr(updated, 'staff_id') else None,
+                start_time=updated.start_time.isoformat() if hasattr(updated, 'start_time') else None,
+                status=str(updated.status) if hasattr(updated, 'status') else "updated",
+            ),
             salon_id=salon_id,
         )
         logger.info(
@@ -647,16 +662,15 @@ async def cancel_booking(
         )
         
         # Publish booking cancelled event
-        publish_event(
-            event_type=EventTypes.BOOKING_CANCELLED,
-            data={
-                "booking_id": booking_id,
-                "customer_id": existing.customer_id if hasattr(existing, 'customer_id') else None,
-                "staff_id": existing.staff_id if hasattr(existing, 'staff_id') else None,
-                "start_time": existing.start_time.isoformat() if hasattr(existing, 'start_time') else None,
-                "status": "cancelled",
-                "reason": reason,
-            },
+        await get_event_bus().publish(
+            BookingCancelled(
+                booking_id=booking_id,
+                customer_id=existing.customer_id if hasattr(existing, 'customer_id') else None,
+                staff_id=existing.staff_id if hasattr(existing, 'staff_id') else None,
+                start_time=existing.start_time.isoformat() if hasattr(existing, 'start_time') else None,
+                status="cancelled",
+                reason=reason,
+            ),
             salon_id=salon_id,
         )
         logger.info(
@@ -728,13 +742,12 @@ async def check_in_customer(
         )
         
         # Publish booking checked_in event
-        publish_event(
-            event_type=EventTypes.BOOKING_UPDATED,
-            data={
-                "booking_id": booking_id,
-                "status": "checked_in",
-                "checked_in_by": current_user.uid,
-            },
+        await get_event_bus().publish(
+            BookingUpdated(
+                booking_id=booking_id,
+                status="checked_in",
+                checked_in_by=current_user.uid,
+            ),
             salon_id=salon_id,
         )
         logger.info(
@@ -807,13 +820,12 @@ async def start_service(
         )
         
         # Publish booking started event
-        publish_event(
-            event_type=EventTypes.BOOKING_UPDATED,
-            data={
-                "booking_id": booking_id,
-                "status": "in_progress",
-                "started_by": current_user.uid,
-            },
+        await get_event_bus().publish(
+            BookingUpdated(
+                booking_id=booking_id,
+                status="in_progress",
+                started_by=current_user.uid,
+            ),
             salon_id=salon_id,
         )
         logger.info(
@@ -893,15 +905,14 @@ async def complete_service(
         )
         
         # Publish booking completed event
-        publish_event(
-            event_type=EventTypes.BOOKING_COMPLETED,
-            data={
-                "booking_id": booking_id,
-                "status": "completed",
-                "completed_by": current_user.uid,
-                "rating": request.rating,
-                "feedback": request.customer_feedback,
-            },
+        await get_event_bus().publish(
+            BookingCompleted(
+                booking_id=booking_id,
+                status="completed",
+                completed_by=current_user.uid,
+                rating=request.rating,
+                feedback=request.customer_feedback,
+            ),
             salon_id=salon_id,
         )
         logger.info(
@@ -978,14 +989,13 @@ async def add_upsell_service(
         )
         
         # Publish booking upsell event
-        publish_event(
-            event_type=EventTypes.BOOKING_UPDATED,
-            data={
-                "booking_id": booking_id,
-                "upsell_service_id": request.service_id,
-                "upsell_staff_id": request.staff_id,
-                "added_by": current_user.uid,
-            },
+        await get_event_bus().publish(
+            BookingUpdated(
+                booking_id=booking_id,
+                upsell_service_id=request.service_id,
+                upsell_staff_id=request.staff_id,
+                added_by=current_user.uid,
+            ),
             salon_id=salon_id,
         )
         logger.info(
@@ -25,6 +25,7 @@ from app.api.dependencies import (
     verify_customer_access,
 )
 from app.models import CustomerModel, BookingModel, LoyaltyModel, MembershipModel
+from app.models.base import InvalidCursorError
 from app.schemas import (
     CustomerCreate,
     CustomerUpdate,
@@ -109,6 +110,7 @@ async def list_customers(
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     search: Optional[str] = Query(None, description="Search by name, phone, or email"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    cursor: Optional[str] = Query(None, description="Continuation token from a previous page"),
     salon_id: str = Depends(get_salon_id),
     current_user: AuthContext = Depends(get_current_user),
 ) -> PaginatedResponse[CustomerSummary]:
@@ -124,6 +126,7 @@ async def list_customers(
         page_size: Number of items per page
         search: Search string for name, phone, or email
         is_active: Filter by active status
+        cursor: Continuation token returned as ``next_cursor``
         salon_id: Current salon ID from auth context
         current_user: Authenticated user context
         
@@ -131,27 +134,33 @@ async def list_customers(
         Paginated list of customer summaries
         
     Raises:
-        HTTPException: 500 if database operation fails
+        HTTPException: 400 if the cursor is invalid, 500 if database operation fails
     """
     try:
         customer_model = CustomerModel()
         
         # Build query
         query = CustomerSearch(
-            salon_id=salon_id,
-            search=search,
+            query=search,
             is_active=is_active,
         )
         
         # Get paginated results
-        result = await customer_model.search(
+        result = await customer_model.paginate_customers(
+            salon_id=salon_id,
             query=query,
             page=page,
             page_size=page_size,
+            cursor=cursor,
         )
         
         return result
         
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid pagination cursor", "code": "invalid_cursor"},
+        )
     except Exception as e:
         logger.error("Failed to list customers", error=str(e))
         raise HTTPException(
@@ -373,6 +382,7 @@ async def get_customer_bookings(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     status_filter: Optional[str] = Query(None, alias="status"),
+    cursor: Optional[str] = Query(None, description="Continuation token from a previous page"),
     salon_id: str = Depends(get_salon_id),
     current_user: AuthContext = Depends(get_current_user),
 ) -> PaginatedResponse[BookingSummary]:
@@ -383,6 +393,7 @@ async def get_customer_bookings(
         page: Page number (1-indexed)
         page_size: Number of items per page
         status_filter: Filter by booking status
+        cursor: Continuation token returned as ``next_cursor``
         salon_id: Current salon ID from auth context
         current_user: Authenticated user context
         
@@ -390,7 +401,8 @@ async def get_customer_bookings(
         Paginated list of booking summaries
         
     Raises:
-        HTTPException: 404 if customer not found, 403 if access denied
+        HTTPException: 404 if customer not found, 403 if access denied,
+            400 if the cursor is invalid
     """
     try:
         # Verify customer belongs to salon
@@ -398,18 +410,24 @@ async def get_customer_bookings(
         
         # Get bookings
         booking_model = BookingModel()
-        bookings = await booking_model.get_by_customer(
-            customer_id=customer.customer_id,
+        bookings = await booking_model.search_bookings(
             salon_id=salon_id,
+            customer_id=customer.customer_id,
             status=status_filter,
             page=page,
             page_size=page_size,
+            cursor=cursor,
         )
         
         return bookings
         
     except HTTPException:
         raise
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid pagination cursor", "code": "invalid_cursor"},
+        )
     except Exception as e:
         logger.error("Failed to get customer bookings", error=str(e))
         raise HTTPException(
@@ -7,7 +7,7 @@ Endpoints for Cloud Tasks to execute:
 - Cleanup jobs
 """
 import json
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from typing import Dict, Any, Optional
 import structlog
 
@@ -16,6 +16,7 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
 from app.core.config import settings
+from app.models.analytics import AnalyticsRollupModel
 from app.models.autonomous import (
     AgentStateModel,
     AgentStatus,
@@ -272,7 +273,9 @@ async def analytics_task(
 ):
     """Run analytics aggregation.
     
-    Called by Cloud Tasks for scheduled analytics.
+    Called by Cloud Tasks for scheduled analytics. Supported task types:
+    - ``rollup_backfill``: rebuild daily rollups for ``data.start_date``..``data.end_date``
+    - ``rollup_consistency``: compare rollups to raw documents (``data.repair`` to fix drift)
     """
     logger.info(
         "analytics_task_received",
@@ -280,7 +283,31 @@ async def analytics_task(
         task_type=payload.task_type,
     )
     
-    # TODO: Implement analytics aggregation
+    if payload.task_type in ("rollup_backfill", "rollup_consistency"):
+        today = date.today()
+        start_date = date.fromisoformat(
+            payload.data.get("start_date") or (today - timedelta(days=30)).isoformat()
+        )
+        end_date = date.fromisoformat(payload.data.get("end_date") or today.isoformat())
+        rollup_model = AnalyticsRollupModel()
+        
+        if payload.task_type == "rollup_backfill":
+            days = await rollup_model.backfill(payload.salon_id, start_date, end_date)
+            return {"status": "success", "task_type": payload.task_type, "days": days}
+        
+        report = await rollup_model.check_consistency(
+            payload.salon_id,
+            start_date,
+            end_date,
+            repair=bool(payload.data.get("repair", False)),
+        )
+        return {
+            "status": "success",
+            "task_type": payload.task_type,
+            "consistent": report.is_consistent,
+            "report": report.model_dump(),
+        }
+    
     return {"status": "success", "task_type": payload.task_type}
 
 
@@ -19,7 +19,13 @@ from app.api.dependencies import (
     require_staff,
     require_manager,
 )
-from app.models import ResourceModel, BookingModel
+from app.models import ResourceModel
+from app.services.availability import (
+    IntervalIndex,
+    OccupancyGrid,
+    availability_engine,
+    from_minutes,
+)
 from app.schemas import (
     ResourceCreate,
     ResourceUpdate,
@@ -46,16 +52,46 @@ class ResourceAvailabilitySlot(BaseModel):
     booking_id: Optional[str] = None
 
 
+class ResourceFreeWindow(BaseModel):
+    """Contiguous free time of a resource."""
+    start_time: time
+    end_time: time
+
+
 class ResourceAvailabilityResponse(BaseModel):
     """Resource availability response."""
     resource_id: str
     resource_name: str
     date: date
+    slot_minutes: int
     slots: List[ResourceAvailabilitySlot]
+    free_windows: List[ResourceFreeWindow]
     total_slots: int
     available_slots: int
 
 
+def _run_booking_ids(
+    grid: OccupancyGrid,
+    bookings: IntervalIndex,
+    first: int,
+    stop: int,
+) -> List[Optional[str]]:
+    """Earliest booking holding each slot of a busy run.
+
+    The index is queried once for the whole run rather than once per slot.
+    """
+    run_start = grid.slot_bounds(first)[0]
+    run_end = grid.slot_bounds(stop - 1)[1]
+    spans = bookings.overlapping(run_start, run_end)[::-1]  # Start order
+    booking_ids = []
+    for index in range(first, stop):
+        start, end = grid.slot_bounds(index)
+        booking_ids.append(
+            next((ref for span_start, span_end, ref in spans if span_start < end and span_end > start), None)
+        )
+    return booking_ids
+
+
 # ============================================================================
 # Routes
 # ============================================================================
@@ -160,13 +196,18 @@ async def get_resource_availability(
     date_param: date = Query(..., alias="date", description="Date to check"),
     resource_type: Optional[ResourceType] = Query(None, description="Filter by type"),
     resource_id: Optional[str] = Query(None, description="Specific resource ID"),
+    slot_minutes: int = Query(30, ge=5, le=240, description="Slot granularity in minutes"),
     salon_id: str = Depends(get_salon_id),
     current_user: AuthContext = Depends(get_current_user),
 ):
-    """Get resource availability for a specific date."""
+    """Get resource availability for a specific date.
+    
+    Slots span the salon's business hours for the day. All resources are
+    filled from the day's bookings in one pass, so the cost does not grow
+    with resources x bookings.
+    """
     try:
         resource_model = ResourceModel()
-        booking_model = BookingModel()
         
         # Get resources
         if resource_id:
@@ -177,65 +218,70 @@ async def get_resource_availability(
                     detail="Resource not found",
                 )
         else:
-            resources = await resource_model.get_all(
+            filters = [("is_active", "==", True)]
+            if resource_type:
+                filters.append(("resource_type", "==", resource_type.value))
+            resources = await resource_model.list(
                 salon_id=salon_id,
-                resource_type=resource_type,
-                status=ResourceStatus.AVAILABLE,
+                filters=filters,
+                limit=500,
             )
         
+        schedule = await availability_engine.get_schedule(salon_id, date_param)
+        grid = OccupancyGrid.from_schedule(
+            schedule,
+            [
+                (
+                    resource.id,
+                    resource.capacity.max_concurrent_services,
+                    not resource.is_available_at(date_param, time.min),
+                )
+                for resource in resources
+            ],
+            slot_minutes,
+        )
+        
+        # Slot labels are shared by every resource row
+        labels = [
+            (from_minutes(start), from_minutes(end))
+            for start, end in map(grid.slot_bounds, range(grid.slot_count))
+        ]
+        
         result = []
         for resource in resources:
-            if not resource:
-                continue
-                
-            # Get bookings for this resource on this date
-            bookings = await booking_model.get_by_resource(
-                resource_id=resource.id,
-                date=date_param,
-            )
+            bookings = schedule.resource_bookings.get(resource.id)
             
-            # Generate availability slots (30-minute intervals)
             slots = []
-            start_hour = 9  # 9 AM
-            end_hour = 21   # 9 PM
-            
-            for hour in range(start_hour, end_hour):
-                for minute in [0, 30]:
-                    slot_start = time(hour, minute)
-                    slot_end = time(
-                        hour + 1 if minute == 30 else hour,
-                        0 if minute == 30 else 30
-                    )
-                    
-                    # Check if slot is booked
-                    is_available = True
-                    booking_id = None
-                    
-                    for booking in bookings:
-                        booking_start = booking.start_time.time()
-                        booking_end = booking.end_time.time()
-                        
-                        if slot_start < booking_end and slot_end > booking_start:
-                            is_available = False
-                            booking_id = booking.id
-                            break
-                    
-                    slots.append(ResourceAvailabilitySlot(
-                        start_time=slot_start,
-                        end_time=slot_end,
-                        available=is_available,
+            for first, stop, busy in grid.runs(resource.id):
+                booking_ids = (
+                    _run_booking_ids(grid, bookings, first, stop)
+                    if busy and bookings
+                    else [None] * (stop - first)
+                )
+                slots.extend(
+                    ResourceAvailabilitySlot(
+                        start_time=start_time,
+                        end_time=end_time,
+                        available=not busy,
                         booking_id=booking_id,
-                    ))
-            
-            available_count = sum(1 for s in slots if s.available)
+                    )
+                    for (start_time, end_time), booking_id in zip(
+                        labels[first:stop], booking_ids, strict=True
+                    )
+                )
             
             result.append(ResourceAvailabilityResponse(
                 resource_id=resource.id,
                 resource_name=resource.name,
                 date=date_param,
+                slot_minutes=slot_minutes,
                 slots=slots,
-                total_slots=len(slots),
-                available_slots=available_count,
+                free_windows=[
+                    ResourceFreeWindow(start_time=from_minutes(start), end_time=from_minutes(end))
+                    for start, end in grid.free_runs(resource.id)
+                ],
+                total_slots=grid.slot_count,
+                available_slots=grid.available_count(resource.id),
             ))
         
         return result
@@ -54,19 +54,23 @@ def service_list_cache_key(salon_id: str, category: str = None, page: int = 1) -
 def categories_cache_key(salon_id: str) -> str:
     return f"{CacheConfig.PREFIX_CATALOG}:{salon_id}:categories"
 
+def catalog_cache_tag(salon_id: str) -> str:
+    return f"{CacheConfig.PREFIX_CATALOG}:{salon_id}"
+
+def service_cache_tag(salon_id: str) -> str:
+    return f"{CacheConfig.PREFIX_SERVICE}:{salon_id}"
+
 
 async def invalidate_service_cache(salon_id: str, service_id: str = None):
     """Invalidate service-related caches."""
     if not redis_client.is_connected:
         return
 
-    # Delete specific service cache
-    if service_id:
-        await redis_client.delete(service_cache_key(service_id))
-
-    # Delete all list/catalog caches for this salon
-    await redis_client.delete_pattern(f"{CacheConfig.PREFIX_CATALOG}:{salon_id}:*")
-    await redis_client.delete_pattern(f"{CacheConfig.PREFIX_SERVICE}:{salon_id}:*")
+    # Specific service plus all list/catalog caches tagged for this salon
+    await redis_client.invalidate_tags(
+        [catalog_cache_tag(salon_id), service_cache_tag(salon_id)],
+        keys=[service_cache_key(service_id)] if service_id else [],
+    )
 
 
 # ============================================================================
@@ -163,7 +167,8 @@ async def list_services(
             await redis_client.set(
                 cache_key,
                 result.model_dump(),
-                expire=CacheConfig.SERVICE_CATALOG_TTL
+                expire=CacheConfig.SERVICE_CATALOG_TTL,
+                tags=[catalog_cache_tag(salon_id)],
             )
 
         return result
@@ -264,7 +269,8 @@ async def list_categories(
             await redis_client.set(
                 cache_key,
                 [c.model_dump() for c in categories],
-                expire=CacheConfig.SERVICE_CATALOG_TTL
+                expire=CacheConfig.SERVICE_CATALOG_TTL,
+                tags=[catalog_cache_tag(salon_id)],
             )
 
         return categories
@@ -326,7 +332,8 @@ async def get_service(
             await redis_client.set(
                 cache_key,
                 service.model_dump(),
-                expire=CacheConfig.SERVICE_CATALOG_TTL
+                expire=CacheConfig.SERVICE_CATALOG_TTL,
+                tags=[service_cache_tag(salon_id)],
             )
 
         return service
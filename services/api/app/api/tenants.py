@@ -56,6 +56,9 @@ def salon_settings_cache_key(salon_id: str) -> str:
 def salon_business_settings_cache_key(salon_id: str) -> str:
     return f"{CacheConfig.PREFIX_SALON}:{salon_id}:business_settings"
 
+def salon_cache_tag(salon_id: str) -> str:
+    return f"{CacheConfig.PREFIX_SALON}:{salon_id}"
+
 
 # ============================================================================
 # Request/Response Schemas
@@ -211,7 +214,8 @@ async def get_salon(
             await redis_client.set(
                 cache_key,
                 salon.model_dump(),
-                expire=CacheConfig.SALON_CONFIG_TTL
+                expire=CacheConfig.SALON_CONFIG_TTL,
+                tags=[salon_cache_tag(salon_id)],
             )
 
         return salon
@@ -326,7 +330,8 @@ async def get_salon_layout(
             await redis_client.set(
                 cache_key,
                 layout.model_dump(),
-                expire=CacheConfig.SALON_CONFIG_TTL
+                expire=CacheConfig.SALON_CONFIG_TTL,
+                tags=[salon_cache_tag(salon_id)],
             )
 
         return layout
@@ -451,7 +456,8 @@ async def get_salon_settings(
             await redis_client.set(
                 cache_key,
                 settings.model_dump(),
-                expire=CacheConfig.SALON_CONFIG_TTL
+                expire=CacheConfig.SALON_CONFIG_TTL,
+                tags=[salon_cache_tag(salon_id)],
             )
 
         return settings
@@ -566,7 +572,8 @@ async def get_salon_business_settings(
             await redis_client.set(
                 cache_key,
                 settings.model_dump(),
-                expire=CacheConfig.SALON_CONFIG_TTL
+                expire=CacheConfig.SALON_CONFIG_TTL,
+                tags=[salon_cache_tag(salon_id)],
             )
 
         return settings
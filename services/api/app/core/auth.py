@@ -14,6 +14,7 @@ from enum import Enum
 from typing import Any, Dict, List, Optional
 import uuid
 import json
+import math
 
 # Third-party imports
 import bcrypt
@@ -373,7 +374,7 @@ async def increment_rate_limit(
         if exists:
             await redis_client.client.incr(key)
         else:
-            await redis_client.set(key, "1", ex=window_seconds)
+            await redis_client.set(key, "1", expire=window_seconds)
     except Exception as e:
         logger.warning("Rate limit increment failed", error=str(e))
 
@@ -384,39 +385,31 @@ async def apply_rate_limit(
     max_attempts: int = 5,
     window_minutes: int = 15
 ) -> bool:
-    """Apply rate limiting for authentication attempts."""
-    from app.core.redis import get_redis_client
-    
-    try:
-        redis = await get_redis_client()
-        key = f"rate_limit:{limit_type.value}:{identifier}"
-        
-        current = await redis.get(key)
-        current_count = int(current) if current else 0
-        
-        if current_count >= max_attempts:
-            ttl = await redis.ttl(key)
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail={
-                    "message": f"Too many {limit_type.value} attempts.",
-                    "code": "rate_limit_exceeded",
-                    "retry_after": ttl
-                }
-            )
-        
-        pipe = redis.pipeline()
-        pipe.incr(key)
-        pipe.expire(key, window_minutes * 60)
-        await pipe.execute()
-        
-        return True
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.warning("Rate limiting unavailable", error=str(e))
-        return True
+    """Apply rate limiting for authentication attempts.
+
+    Allows at most ``max_attempts`` in any ``window_minutes`` window (about
+    half of them back to back), shared across instances through Redis (per
+    instance if Redis is down).
+
+    Raises:
+        HTTPException: 429 with ``retry_after`` seconds when exceeded
+    """
+    from app.core.rate_limiter import Limit, get_rate_limiter
+
+    result = await get_rate_limiter().acquire(
+        f"{limit_type.value}:{identifier}",
+        [Limit.window(limit_type.value, max_attempts, window_minutes * 60)],
+    )
+    if not result.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "message": f"Too many {limit_type.value} attempts.",
+                "code": "rate_limit_exceeded",
+                "retry_after": math.ceil(result.retry_after)
+            }
+        )
+    return True
 
 
 # ============================================================================
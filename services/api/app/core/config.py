@@ -31,6 +31,26 @@ class Settings(BaseSettings):
     # GCP
     GCP_PROJECT_ID: str = "salon-saas-487508"
     PUBSUB_TOPIC: str = "salon-events"
+    PUBSUB_BATCH_MAX_MESSAGES: int = 100  # client-side batch per publish RPC
+    PUBSUB_BATCH_MAX_BYTES: int = 1_000_000
+    PUBSUB_BATCH_MAX_LATENCY: float = 0.05  # seconds a batch may wait to fill
+    PUBSUB_PUBLISH_TIMEOUT: float = 30.0  # seconds of retries before an event is spilled
+    
+    # Cloud Tasks
+    GCP_REGION: str = "asia-south1"
+    API_BASE_URL: str = "http://localhost:8080"  # target of task HTTP requests
+    CLOUD_TASKS_EMULATOR_HOST: str = ""  # host:port of a local queue; disables auth
+    CLOUD_TASKS_CONCURRENCY: int = 20  # in-flight create requests per batch
+    CLOUD_TASKS_TIMEOUT: float = 10.0  # seconds per create request
+    CLOUD_TASKS_MAX_RETRIES: int = 3  # retries on 429/5xx and connection errors
+    
+    # Event bus - events wait in the outbox instead of blocking the request
+    EVENT_TRANSPORT: str = "pubsub"  # "pubsub" or "memory" (tests, local development)
+    EVENT_OUTBOX_SIZE: int = 10_000  # buffered + in-flight events held in memory
+    EVENT_FLUSH_SIZE: int = 100  # flush once this many events are buffered
+    EVENT_FLUSH_INTERVAL: float = 0.05  # seconds, flush at least this often
+    EVENT_OUTBOX_PATH: str = "/tmp/salon-flow/event-outbox.jsonl"  # durable fallback
+    EVENT_REPLAY_INTERVAL: float = 30.0  # seconds between fallback replays
     
     # AI Service
     AI_SERVICE_URL: str = "http://localhost:8081"  # Default for local dev
@@ -0,0 +1,174 @@
+"""In-process (L1) cache in front of Redis.
+
+Salon config and the service catalog change a few times an hour but are read
+on almost every request. ``LocalCache`` keeps decoded values in per-prefix
+LRU maps bounded by size and TTL, so repeat reads skip the Redis round trip
+and JSON decode entirely.
+
+Which prefixes are cached locally, for how long and how many entries, comes
+from ``CacheConfig.L1_POLICIES``; keys with other prefixes bypass L1.
+Values are shared between callers and must be treated as read-only.
+
+Every eviction bumps ``generation``; a caller that read from Redis passes the
+generation it saw before the round trip to ``set`` so a value fetched while
+an invalidation was in flight is not cached.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Returned by LocalCache.get when the key is absent or expired
+MISS = object()
+
+
+@dataclass
+class PrefixStats:
+    """Counters for one key prefix."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+class _PrefixCache:
+    """LRU map with per-entry expiry for a single key prefix."""
+
+    __slots__ = ("ttl", "max_entries", "entries", "stats")
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.stats = PrefixStats()
+
+
+def key_prefix(key: str) -> str:
+    """The part of a cache key before the first ``:``."""
+    return key.split(":", 1)[0]
+
+
+class LocalCache:
+    """Size- and TTL-bounded in-process cache with per-prefix policy.
+
+    Example:
+        cache = LocalCache({"salon": (300, 1000)})
+        cache.set("salon:abc", {"name": "Glow"})
+        cache.get("salon:abc")
+    """
+
+    def __init__(
+        self,
+        policies: Dict[str, Tuple[int, int]],
+        enabled: bool = True,
+        clock=time.monotonic,
+    ):
+        self.enabled = enabled
+        # Optional upper bound on every prefix TTL
+        self.ttl_cap: Optional[int] = None
+        self.generation = 0
+        self._clock = clock
+        self._prefixes = {
+            prefix: _PrefixCache(ttl, max_entries)
+            for prefix, (ttl, max_entries) in policies.items()
+        }
+
+    def covers(self, key: str) -> bool:
+        """Whether a key's prefix has an L1 policy."""
+        return self.enabled and key_prefix(key) in self._prefixes
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or ``MISS``."""
+        if not self.enabled:
+            return MISS
+        cache = self._prefixes.get(key_prefix(key))
+        if cache is None:
+            return MISS
+
+        entry = cache.entries.get(key)
+        if entry is None:
+            cache.stats.misses += 1
+            return MISS
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del cache.entries[key]
+            cache.stats.expirations += 1
+            cache.stats.misses += 1
+            return MISS
+
+        cache.entries.move_to_end(key)
+        cache.stats.hits += 1
+        return value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        """Store a value; ``ttl`` can only shorten the prefix TTL.
+
+        If ``generation`` is given and an eviction happened since, the value
+        may be stale and is not stored.
+        """
+        if not self.enabled or value is None:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        cache = self._prefixes.get(key_prefix(key))
+        if cache is None:
+            return
+
+        lifetime = min(
+            limit for limit in (cache.ttl, ttl, self.ttl_cap) if limit is not None
+        )
+        cache.entries[key] = (self._clock() + lifetime, value)
+        cache.entries.move_to_end(key)
+        while len(cache.entries) > cache.max_entries:
+            cache.entries.popitem(last=False)
+            cache.stats.evictions += 1
+
+    def delete(self, keys: Iterable[str]) -> int:
+        """Evict exact keys; returns how many were present."""
+        self.generation += 1
+        removed = 0
+        for key in keys:
+            cache = self._prefixes.get(key_prefix(key))
+            if cache is not None and cache.entries.pop(key, None) is not None:
+                cache.stats.invalidations += 1
+                removed += 1
+        return removed
+
+    def delete_pattern(self, pattern: str) -> int:
+        """Evict keys matching a glob pattern; returns how many were removed."""
+        self.generation += 1
+        prefix = key_prefix(pattern)
+        if any(char in prefix for char in "*?["):
+            candidates = self._prefixes.values()
+        else:
+            candidates = [self._prefixes[prefix]] if prefix in self._prefixes else []
+
+        removed = 0
+        for cache in candidates:
+            matching = [key for key in cache.entries if fnmatchcase(key, pattern)]
+            for key in matching:
+                del cache.entries[key]
+            cache.stats.invalidations += len(matching)
+            removed += len(matching)
+        return removed
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        self.generation += 1
+        for cache in self._prefixes.values():
+            cache.entries.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-prefix counters and current sizes."""
+        return {
+            prefix: {**asdict(cache.stats), "size": len(cache.entries)}
+            for prefix, cache in self._prefixes.items()
+        }
@@ -8,6 +8,8 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 import structlog
 
+from app.core.request_context import request_scope
+
 logger = structlog.get_logger()
 
 
@@ -33,6 +35,8 @@ class GZipMiddleware(BaseHTTPMiddleware):
             "application/pdf",
             "application/zip",
             "application/octet-stream",
+            # Compressing would buffer the whole stream
+            "text/event-stream",
         ]
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
@@ -134,18 +138,24 @@ class CacheControlMiddleware(BaseHTTPMiddleware):
 
 
 class PerformanceHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware to add performance-related headers."""
+    """Middleware to add performance-related headers.
+
+    Opens a request scope (identity map) for the request and reports its
+    Firestore reads, cache hits, identity-map hits and model validations.
+    """
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         import time
         start_time = time.time()
 
-        response = await call_next(request)
+        with request_scope() as scope:
+            response = await call_next(request)
 
         # Add server timing header
         process_time = (time.time() - start_time) * 1000
         response.headers["x-process-time-ms"] = f"{process_time:.2f}"
         response.headers["x-server"] = "salon-flow-api"
+        response.headers.update(scope.stats.as_headers())
 
         return response
 
@@ -1,32 +1,33 @@
 """Enhanced Redis client for caching with connection pooling and utilities.
 
 Supports both local Redis and Upstash (serverless Redis with TLS).
-Uses Upstash REST API for serverless environments.
+Uses Upstash REST API for serverless environments, through the non-blocking
+``AsyncUpstashRedis`` client so both backends share one async code path.
 """
 import os
 import json
+import contextlib
+import uuid
+import asyncio
 import hashlib
 import gzip
 import base64
 import structlog
-from typing import Optional, Any, List, Callable, TypeVar, ParamSpec
+from typing import Optional, Any, Dict, List, Callable, TypeVar, ParamSpec
 from functools import wraps
 from datetime import timedelta
 
+import redis.asyncio as redis
+from redis.asyncio.connection import ConnectionPool
+
+from app.core.local_cache import MISS, LocalCache, key_prefix
+from app.core.upstash import AsyncUpstashRedis
+
 logger = structlog.get_logger()
 
 P = ParamSpec('P')
 T = TypeVar('T')
 
-# Try to import Upstash Redis first, fall back to standard Redis
-try:
-    from upstash_redis import Redis as UpstashRedis
-    UPSTASH_AVAILABLE = True
-except ImportError:
-    UPSTASH_AVAILABLE = False
-    import redis.asyncio as redis
-    from redis.asyncio.connection import ConnectionPool
-
 
 class CacheConfig:
     """Cache configuration constants."""
@@ -44,6 +45,27 @@ class CacheConfig:
     PREFIX_CUSTOMER = "customer"
     PREFIX_BOOKING = "booking"
     PREFIX_CATALOG = "catalog"
+    PREFIX_TAG = "tag"
+
+    # Tag sets outlive their members: every write refreshes the tag TTL to at
+    # least this, so a member can never outlive the set that indexes it.
+    TAG_TTL = 86400
+
+    # In-process (L1) cache: prefix -> (ttl seconds, max entries). Only hot,
+    # rarely-changing data; customer and booking keys stay Redis-only.
+    # "salons"/"services" are the FirestoreBase document keys.
+    L1_ENABLED = os.getenv("CACHE_L1_ENABLED", "true").lower() == "true"
+    L1_POLICIES = {
+        PREFIX_SALON: (300, 2000),
+        PREFIX_SERVICE: (300, 5000),
+        PREFIX_CATALOG: (300, 2000),
+        PREFIX_STAFF: (60, 2000),
+        "salons": (300, 2000),
+        "services": (300, 5000),
+    }
+    # Upper bound on L1 TTL when invalidations cannot be received (REST API)
+    L1_UNSUBSCRIBED_TTL = 30
+    L1_INVALIDATION_CHANNEL = "cache:l1:invalidate"
 
 
 class RedisClient:
@@ -55,6 +77,8 @@ class RedisClient:
     - Upstash Redis (rediss://) with TLS
     - Connection pooling for optimal performance
     - Graceful fallback when Redis is unavailable
+    - In-process L1 cache for prefixes in ``CacheConfig.L1_POLICIES``,
+      invalidated across instances via pub/sub
     """
 
     def __init__(self, url: str = None):
@@ -71,6 +95,11 @@ class RedisClient:
         self._is_upstash_rest = bool(self.rest_url and self.rest_token)
         self._is_upstash = self.url.startswith("rediss://") if self.url else False
 
+        # L1 cache and the cross-instance invalidation listener
+        self.instance_id = uuid.uuid4().hex
+        self.local = LocalCache(CacheConfig.L1_POLICIES, enabled=CacheConfig.L1_ENABLED)
+        self._listener: Optional[asyncio.Task] = None
+
         # Connection pool settings for traditional Redis
         self.pool_settings = {
             "max_connections": 50,
@@ -92,14 +121,17 @@ class RedisClient:
 
         try:
             # Prefer Upstash REST API for serverless
-            if self._is_upstash_rest and UPSTASH_AVAILABLE:
-                self.client = UpstashRedis(
+            if self._is_upstash_rest:
+                self.client = AsyncUpstashRedis(
                     url=self.rest_url,
-                    token=self.rest_token
+                    token=self.rest_token,
+                    max_connections=self.pool_settings["max_connections"],
                 )
                 # Test connection
-                self.client.ping()
+                await self.client.ping()
                 self._connected = True
+                # REST cannot subscribe, so L1 entries only expire by TTL
+                self.local.ttl_cap = CacheConfig.L1_UNSUBSCRIBED_TTL
                 logger.info("Connected to Upstash Redis via REST API")
             else:
                 # Fall back to traditional Redis connection
@@ -114,13 +146,21 @@ class RedisClient:
                 self._connected = True
                 logger.info("Connected to Redis with connection pool",
                            url=self.url.replace(self.url.split('@')[-1], '***') if '@' in self.url else self.url)
+                if self.local.enabled:
+                    self._listener = asyncio.create_task(self._listen_for_invalidations())
         except Exception as e:
             logger.warning("Redis connection failed - running without cache", error=str(e))
             self._connected = False
 
     async def disconnect(self):
         """Disconnect from Redis and release connections."""
-        if self.client and not self._is_upstash_rest:
+        if self._listener:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        self.local.clear()
+        if self.client:
             await self.client.aclose()
         if self._pool:
             await self._pool.aclose()
@@ -132,11 +172,8 @@ class RedisClient:
         if not self.client:
             return False
         try:
-            if self._is_upstash_rest:
-                return self.client.ping() == "PONG"
-            else:
-                await self.client.ping()
-                return True
+            await self.client.ping()
+            return True
         except Exception:
             return False
 
@@ -153,17 +190,18 @@ class RedisClient:
         """Get value from Redis with JSON deserialization."""
         if not self.is_connected:
             return None
+        local = self.local.get(key)
+        if local is not MISS:
+            return local
+        generation = self.local.generation
         try:
-            if self._is_upstash_rest:
-                value = self.client.get(key)
-            else:
-                value = await self.client.get(key)
+            value = await self.client.get(key)
             
             if value:
-                try:
-                    return json.loads(value)
-                except json.JSONDecodeError:
-                    return value
+                with contextlib.suppress(json.JSONDecodeError):
+                    value = json.loads(value)
+                self.local.set(key, value, generation=generation)
+                return value
             return None
         except Exception as e:
             logger.warning("Redis get failed", key=key, error=str(e))
@@ -175,34 +213,36 @@ class RedisClient:
         value: Any,
         expire: int = 3600,
         compress: bool = False,
-        nx: bool = False
+        nx: bool = False,
+        tags: Optional[List[str]] = None,
     ) -> bool:
-        """Set value in Redis with optional compression."""
+        """Set value in Redis with optional compression.
+
+        Args:
+            tags: Tags to register the key under; ``invalidate_tags`` deletes
+                every key registered under a tag.
+        """
         if not self.is_connected:
             return False
+        original = value
         try:
             if isinstance(value, (dict, list)):
-                value = json.dumps(value)
+                value = json.dumps(value, default=str)
 
             if compress and len(value) > 1024:
                 value = self._compress(value)
-                if self._is_upstash_rest:
-                    self.client.set(f"{key}:compressed", "1", ex=expire)
-                else:
-                    await self.client.set(f"{key}:compressed", "1", ex=expire)
+                await self.client.set(f"{key}:compressed", "1", ex=expire)
 
-            if self._is_upstash_rest:
-                if nx:
-                    return self.client.set(key, value, ex=expire, nx=True)
-                else:
-                    self.client.set(key, value, ex=expire)
-                return True
+            if nx:
+                stored = await self.client.set(key, value, ex=expire, nx=True)
             else:
-                if nx:
-                    return await self.client.set(key, value, ex=expire, nx=True)
-                else:
-                    await self.client.set(key, value, ex=expire)
-                return True
+                await self.client.set(key, value, ex=expire)
+                stored = True
+            if stored:
+                if tags:
+                    await self._tag_keys(tags, [key], expire)
+                self.local.set(key, original, ttl=expire)
+            return stored
         except Exception as e:
             logger.warning("Redis set failed", key=key, error=str(e))
             return False
@@ -211,11 +251,9 @@ class RedisClient:
         """Delete key from Redis."""
         if not self.is_connected:
             return False
+        await self._invalidate_local(keys=[key])
         try:
-            if self._is_upstash_rest:
-                self.client.delete(key, f"{key}:compressed")
-            else:
-                await self.client.delete(key, f"{key}:compressed")
+            await self.client.delete(key, f"{key}:compressed")
             return True
         except Exception as e:
             logger.warning("Redis delete failed", key=key, error=str(e))
@@ -226,10 +264,7 @@ class RedisClient:
         if not self.is_connected:
             return False
         try:
-            if self._is_upstash_rest:
-                return self.client.exists(key) > 0
-            else:
-                return await self.client.exists(key) > 0
+            return await self.client.exists(key) > 0
         except Exception:
             return False
 
@@ -238,10 +273,7 @@ class RedisClient:
         if not self.is_connected:
             return False
         try:
-            if self._is_upstash_rest:
-                return self.client.expire(key, seconds)
-            else:
-                return await self.client.expire(key, seconds)
+            return await self.client.expire(key, seconds)
         except Exception:
             return False
 
@@ -250,13 +282,23 @@ class RedisClient:
         if not self.is_connected:
             return -2
         try:
-            if self._is_upstash_rest:
-                return self.client.ttl(key)
-            else:
-                return await self.client.ttl(key)
+            return await self.client.ttl(key)
         except Exception:
             return -2
 
+    async def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        """Run a Lua script; raises if Redis is unavailable."""
+        if not self.is_connected:
+            raise ConnectionError("Redis not connected")
+        return await self.client.eval(script, numkeys, *keys_and_args)
+
+    async def evalsha(self, sha: str, numkeys: int, *keys_and_args: Any) -> Any:
+        """Run a cached Lua script; raises if Redis is unavailable or the
+        script is not loaded (NOSCRIPT)."""
+        if not self.is_connected:
+            raise ConnectionError("Redis not connected")
+        return await self.client.evalsha(sha, numkeys, *keys_and_args)
+
     # ========================================================================
     # Batch Operations
     # ========================================================================
@@ -265,41 +307,58 @@ class RedisClient:
         """Get multiple values at once (pipeline)."""
         if not self.is_connected or not keys:
             return {}
-        try:
-            if self._is_upstash_rest:
-                values = self.client.mget(keys)
+        result = {}
+        remote_keys = []
+        for key in keys:
+            local = self.local.get(key)
+            if local is MISS:
+                remote_keys.append(key)
             else:
-                values = await self.client.mget(keys)
+                result[key] = local
+        if not remote_keys:
+            return result
+        generation = self.local.generation
+        try:
+            values = await self.client.mget(remote_keys)
             
-            result = {}
-            for key, value in zip(keys, values):
+            for key, value in zip(remote_keys, values):
                 if value:
                     try:
                         result[key] = json.loads(value)
                     except json.JSONDecodeError:
                         result[key] = value
+                    self.local.set(key, result[key], generation=generation)
             return result
         except Exception as e:
             logger.warning("Redis mget failed", error=str(e))
             return {}
 
-    async def set_multi(self, mapping: dict, expire: int = 3600) -> bool:
-        """Set multiple values at once (pipeline)."""
+    async def set_multi(
+        self,
+        mapping: dict,
+        expire: int = 3600,
+        tags: Optional[List[str]] = None,
+        expires: Optional[Dict[str, int]] = None,
+    ) -> bool:
+        """Set multiple values at once (pipeline), optionally tagging them.
+
+        Args:
+            expires: Per-key TTL overrides; other keys use ``expire``.
+        """
         if not self.is_connected or not mapping:
             return False
         try:
-            if self._is_upstash_rest:
+            expires = expires or {}
+            async with self.client.pipeline(transaction=False) as pipe:
                 for key, value in mapping.items():
                     if isinstance(value, (dict, list)):
-                        value = json.dumps(value)
-                    self.client.set(key, value, ex=expire)
-            else:
-                async with self.client.pipeline() as pipe:
-                    for key, value in mapping.items():
-                        if isinstance(value, (dict, list)):
-                            value = json.dumps(value)
-                        pipe.set(key, value, ex=expire)
-                    await pipe.execute()
+                        value = json.dumps(value, default=str)
+                    pipe.set(key, value, ex=expires.get(key, expire))
+                await pipe.execute()
+            if tags:
+                await self._tag_keys(tags, list(mapping), max([expire, *expires.values()]))
+            for key, value in mapping.items():
+                self.local.set(key, value, ttl=expires.get(key, expire))
             return True
         except Exception as e:
             logger.warning("Redis mset failed", error=str(e))
@@ -309,12 +368,10 @@ class RedisClient:
         """Delete multiple keys at once."""
         if not self.is_connected or not keys:
             return 0
+        await self._invalidate_local(keys=keys)
         try:
             all_keys = keys + [f"{k}:compressed" for k in keys]
-            if self._is_upstash_rest:
-                return self.client.delete(*all_keys)
-            else:
-                return await self.client.delete(*all_keys)
+            return await self.client.delete(*all_keys)
         except Exception as e:
             logger.warning("Redis multi-delete failed", error=str(e))
             return 0
@@ -324,25 +381,18 @@ class RedisClient:
     # ========================================================================
 
     async def delete_pattern(self, pattern: str) -> int:
-        """Delete all keys matching a pattern."""
+        """Delete all keys matching a pattern.
+
+        Walks the whole keyspace (SCAN, or KEYS on Upstash REST); prefer
+        tagging keys on write and ``invalidate_tags`` on hot paths.
+        """
         if not self.is_connected:
             return 0
+        await self._invalidate_local(patterns=[pattern])
         try:
-            keys = []
-            if self._is_upstash_rest:
-                # Upstash REST API doesn't support scan_iter directly
-                # Use keys command for small datasets
-                all_keys = self.client.keys(pattern)
-                keys = all_keys if all_keys else []
-            else:
-                async for key in self.client.scan_iter(match=pattern):
-                    keys.append(key)
-            
+            keys = [key async for key in self.client.scan_iter(match=pattern)]
             if keys:
-                if self._is_upstash_rest:
-                    return self.client.delete(*keys)
-                else:
-                    return await self.client.delete(*keys)
+                return await self.client.delete(*keys)
             return 0
         except Exception as e:
             logger.warning("Redis pattern delete failed", pattern=pattern, error=str(e))
@@ -353,39 +403,162 @@ class RedisClient:
         if not self.is_connected:
             return []
         try:
-            if self._is_upstash_rest:
-                return self.client.keys(pattern) or []
-            else:
-                keys = []
-                async for key in self.client.scan_iter(match=pattern):
-                    keys.append(key)
-                return keys
+            return [key async for key in self.client.scan_iter(match=pattern)]
         except Exception:
             return []
 
+    # ========================================================================
+    # Tag Operations
+    # ========================================================================
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"{CacheConfig.PREFIX_TAG}:{tag}"
+
+    async def _tag_keys(self, tags: List[str], keys: List[str], expire: int):
+        """Register keys in each tag's member set."""
+        tag_ttl = max(expire, CacheConfig.TAG_TTL)
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.sadd(self._tag_key(tag), *keys)
+                    pipe.expire(self._tag_key(tag), tag_ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Redis tag registration failed", tags=tags, error=str(e))
+
+    async def invalidate_tags(self, tags: List[str], keys: List[str] = ()) -> int:
+        """Delete every key registered under the tags, plus any exact keys.
+
+        Costs one round trip to read the tag sets and one DEL, independent of
+        the total keyspace size.
+
+        Returns:
+            Number of Redis keys deleted (tag sets included).
+        """
+        if not self.is_connected or not (tags or keys):
+            return 0
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        try:
+            members: List[str] = []
+            if tag_keys:
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for tag_key in tag_keys:
+                        pipe.smembers(tag_key)
+                    tagged = await pipe.execute()
+                members = sorted({key for group in tagged for key in (group or [])})
+
+            targets = list(dict.fromkeys([*keys, *members]))
+            await self._invalidate_local(keys=targets)
+            all_keys = targets + [f"{k}:compressed" for k in targets] + tag_keys
+            return await self.client.delete(*all_keys)
+        except Exception as e:
+            logger.warning("Redis tag invalidation failed", tags=tags, error=str(e))
+            return 0
+
     # ========================================================================
     # Cache Invalidation
     # ========================================================================
 
     async def invalidate_salon_cache(self, salon_id: str):
-        """Invalidate all cache entries for a salon."""
-        patterns = [
-            f"{CacheConfig.PREFIX_SALON}:{salon_id}:*",
-            f"{CacheConfig.PREFIX_SERVICE}:{salon_id}:*",
-            f"{CacheConfig.PREFIX_STAFF}:{salon_id}:*",
-            f"{CacheConfig.PREFIX_CATALOG}:{salon_id}:*",
+        """Invalidate all cache entries for a salon.
+
+        Covers the salon document key and every key tagged with the salon's
+        salon/service/staff/catalog namespaces.
+        """
+        tags = [
+            f"{CacheConfig.PREFIX_SALON}:{salon_id}",
+            f"{CacheConfig.PREFIX_SERVICE}:{salon_id}",
+            f"{CacheConfig.PREFIX_STAFF}:{salon_id}",
+            f"{CacheConfig.PREFIX_CATALOG}:{salon_id}",
         ]
-        total_deleted = 0
-        for pattern in patterns:
-            total_deleted += await self.delete_pattern(pattern)
+        total_deleted = await self.invalidate_tags(
+            tags, keys=[f"{CacheConfig.PREFIX_SALON}:{salon_id}"]
+        )
         logger.info("Invalidated salon cache", salon_id=salon_id, keys_deleted=total_deleted)
         return total_deleted
 
     async def invalidate_service_cache(self, salon_id: str, service_id: str = None):
-        """Invalidate service cache entries."""
-        if service_id:
-            await self.delete(f"{CacheConfig.PREFIX_SERVICE}:{salon_id}:{service_id}")
-        await self.delete_pattern(f"{CacheConfig.PREFIX_CATALOG}:{salon_id}:*")
+        """Invalidate a service entry and the salon's catalog listings."""
+        keys = [f"{CacheConfig.PREFIX_SERVICE}:{service_id}"] if service_id else []
+        return await self.invalidate_tags([f"{CacheConfig.PREFIX_CATALOG}:{salon_id}"], keys=keys)
+
+    # ========================================================================
+    # L1 Cache
+    # ========================================================================
+
+    async def _invalidate_local(self, keys: List[str] = (), patterns: List[str] = ()):
+        """Evict keys/patterns from L1 here and on every other instance."""
+        if not self.local.enabled:
+            return
+        keys = [key for key in keys if self.local.covers(key)]
+        patterns = [
+            pattern for pattern in patterns
+            if self.local.covers(pattern) or any(c in key_prefix(pattern) for c in "*?[")
+        ]
+        if not keys and not patterns:
+            return
+
+        self.local.delete(keys)
+        for pattern in patterns:
+            self.local.delete_pattern(pattern)
+
+        message = json.dumps({"origin": self.instance_id, "keys": keys, "patterns": patterns})
+        try:
+            await self.client.publish(CacheConfig.L1_INVALIDATION_CHANNEL, message)
+        except Exception as e:
+            logger.warning("L1 invalidation publish failed", error=str(e))
+
+    def apply_invalidation(self, message: Any) -> int:
+        """Apply an invalidation published by another instance.
+
+        Returns:
+            Number of L1 entries evicted.
+        """
+        try:
+            payload = json.loads(message)
+        except (TypeError, ValueError):
+            logger.warning("Malformed L1 invalidation message")
+            return 0
+        if payload.get("origin") == self.instance_id:
+            return 0
+
+        evicted = self.local.delete(payload.get("keys", []))
+        for pattern in payload.get("patterns", []):
+            evicted += self.local.delete_pattern(pattern)
+        return evicted
+
+    async def _listen_for_invalidations(self):
+        """Subscribe to the invalidation channel, reconnecting with backoff."""
+        backoff = 1
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(CacheConfig.L1_INVALIDATION_CHANNEL)
+                backoff = 1
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.apply_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("L1 invalidation listener failed", error=str(e), retry_in=backoff)
+                # Invalidations may have been missed while disconnected
+                self.local.clear()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                with contextlib.suppress(Exception):
+                    await pubsub.aclose()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """L1 configuration and per-prefix hit/miss/eviction counters."""
+        return {
+            "l1_enabled": self.local.enabled,
+            "l1_subscribed": self._listener is not None and not self._listener.done(),
+            "l1_ttl_cap": self.local.ttl_cap,
+            "prefixes": self.local.stats(),
+        }
 
     # ========================================================================
     # Utility Methods
@@ -0,0 +1,100 @@
+"""Request-scoped identity map and data-access counters.
+
+A single request often loads the same documents several times (access
+checks, then the handler, then a status update). ``RequestScope`` holds the
+validated models loaded during one request or background task so repeated
+``FirestoreBase.get`` calls return the same instance without a Redis round
+trip or another Pydantic validation. Writes update the map through.
+
+The scope lives in a ``ContextVar``; outside a scope the identity map is
+disabled and counters are not recorded.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Sentinel distinguishing "not in the map" from a cached missing document
+MISSING = object()
+
+
+@dataclass
+class ScopeStats:
+    """Data-access counters for one scope."""
+    firestore_reads: int = 0
+    cache_hits: int = 0
+    identity_hits: int = 0
+    validations: int = 0
+
+    def as_headers(self) -> Dict[str, str]:
+        """Render counters as response headers."""
+        return {
+            "x-firestore-reads": str(self.firestore_reads),
+            "x-cache-hits": str(self.cache_hits),
+            "x-identity-hits": str(self.identity_hits),
+            "x-model-validations": str(self.validations),
+        }
+
+
+class RequestScope:
+    """Identity map of documents loaded within one request or task."""
+
+    def __init__(self):
+        self.stats = ScopeStats()
+        self._documents: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+
+    def lookup(self, collection: str, document_id: str, model: Any) -> Any:
+        """Return the cached value for a document, or ``MISSING``.
+
+        A cached ``None`` means the document is known not to exist. Entries
+        loaded through a different model class for the same collection are
+        ignored.
+        """
+        entry = self._documents.get((collection, document_id))
+        if entry is None or entry[0] is not model:
+            return MISSING
+        self.stats.identity_hits += 1
+        return entry[1]
+
+    def store(self, collection: str, document_id: str, model: Any, value: Any) -> None:
+        """Remember a loaded (or written) document; ``None`` marks it missing."""
+        self._documents[(collection, document_id)] = (model, value)
+
+    def discard(self, collection: str, document_id: str) -> None:
+        """Forget a document so the next read goes to the backing store."""
+        self._documents.pop((collection, document_id), None)
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+
+_current_scope: ContextVar[Optional[RequestScope]] = ContextVar("request_scope", default=None)
+
+
+def current_scope() -> Optional[RequestScope]:
+    """Return the active scope, if any."""
+    return _current_scope.get()
+
+
+@contextmanager
+def request_scope() -> Iterator[RequestScope]:
+    """Open a fresh identity map for the enclosed request or task.
+
+    Example:
+        with request_scope() as scope:
+            await run_agent_task()
+        logger.info("task reads", reads=scope.stats.firestore_reads)
+    """
+    scope = RequestScope()
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def record(counter: str, amount: int = 1) -> None:
+    """Increment a counter on the active scope (no-op outside a scope)."""
+    scope = _current_scope.get()
+    if scope is not None:
+        setattr(scope.stats, counter, getattr(scope.stats, counter) + amount)
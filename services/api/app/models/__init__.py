@@ -5,6 +5,7 @@ Each model extends FirestoreBase with specialized domain methods.
 """
 
 from app.models.base import FirestoreBase
+from app.models.analytics import AnalyticsRollupModel, RollupSource
 from app.models.salon import SalonModel
 from app.models.customer import CustomerModel
 from app.models.staff import StaffModel
@@ -18,6 +19,8 @@ from app.models.shift import ShiftModel
 
 __all__ = [
     "FirestoreBase",
+    "AnalyticsRollupModel",
+    "RollupSource",
     "SalonModel",
     "CustomerModel",
     "StaffModel",
@@ -0,0 +1,432 @@
+"""Analytics Rollup Firestore Model.
+
+Maintains pre-aggregated daily metrics per salon so analytics endpoints read
+O(days) rollup documents instead of scanning every booking and payment.
+
+Rollups are kept current incrementally: every model write is published on the
+event bus as a ``DocumentChanged`` (before, after) pair; for bookings,
+payments and customers the contribution of both
+versions is computed and only the difference is applied with atomic
+``Increment`` transforms. A backfill rebuilds rollups from raw documents and
+a consistency checker reports (and optionally repairs) drift.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.transforms import Increment
+import structlog
+
+from app.models.base import FirestoreBase
+from app.schemas.analytics import (
+    DailyMetricsRollup,
+    RollupConsistencyReport,
+    merge_counters,
+)
+from app.schemas.events import DocumentChanged
+from app.services.event_bus import EventEnvelope, get_event_bus
+
+logger = structlog.get_logger()
+
+# Counters whose stored value may differ from the recomputed one by rounding
+_FLOAT_TOLERANCE = 0.01
+
+
+class RollupSource(str, Enum):
+    """Raw collections that feed the daily rollups."""
+    BOOKING = "bookings"
+    PAYMENT = "payments"
+    CUSTOMER = "customers"
+
+
+# ============================================================================
+# Contribution extractors
+# ============================================================================
+
+def _first(data: Dict[str, Any], *paths: str) -> Any:
+    """Return the first non-empty value among dotted field paths."""
+    for path in paths:
+        value: Any = data
+        for part in path.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _day(value: Any) -> Optional[str]:
+    """Normalize a date/datetime/ISO string to YYYY-MM-DD."""
+    if value is None:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()[:10]
+    return str(value)[:10]
+
+
+def _hour(value: Any) -> Optional[str]:
+    """Extract a zero-padded hour from a time/datetime/ISO string."""
+    if isinstance(value, (time, datetime)):
+        return f"{value.hour:02d}"
+    if isinstance(value, str) and ":" in value:
+        text = value.split("T")[-1]
+        return text.split(":")[0].zfill(2)
+    return None
+
+
+def _key(value: Any) -> str:
+    """Make a value safe to use as a Firestore map key."""
+    text = value.value if isinstance(value, Enum) else str(value)
+    return text.replace(".", "_") or "unknown"
+
+
+def booking_contribution(data: Dict[str, Any]) -> Optional[Tuple[str, str, Dict[str, float]]]:
+    """Counters a booking document contributes to its appointment day."""
+    salon_id = data.get("salon_id")
+    day = _day(_first(data, "booking_date", "date"))
+    if not salon_id or not day:
+        return None
+
+    status = _key(_first(data, "status") or "pending")
+    service_id = _first(data, "service_id")
+    staff_id = _first(data, "staff_id")
+
+    counters: Dict[str, float] = {
+        "bookings_total": 1,
+        f"bookings_by_status.{status}": 1,
+        "booked_minutes": int(_first(data, "service_duration", "duration_minutes") or 0),
+    }
+    hour = _hour(_first(data, "start_time", "time.start_time"))
+    if hour:
+        counters[f"bookings_by_hour.{hour}"] = 1
+    if service_id:
+        counters[f"service_counts.{_key(service_id)}"] = 1
+    if staff_id:
+        counters[f"staff_bookings.{_key(staff_id)}"] = 1
+        if service_id:
+            counters[f"staff_services.{_key(staff_id)}.{_key(service_id)}"] = 1
+
+    if status == "completed":
+        price = float(_first(data, "actual_price", "service_price", "pricing.total_amount") or 0)
+        if service_id:
+            counters[f"service_revenue.{_key(service_id)}"] = price
+        if staff_id:
+            counters[f"staff_revenue.{_key(staff_id)}"] = price
+
+    return salon_id, day, counters
+
+
+def payment_contribution(data: Dict[str, Any]) -> Optional[Tuple[str, str, Dict[str, float]]]:
+    """Counters a completed payment contributes to its payment day."""
+    salon_id = data.get("salon_id")
+    status = _first(data, "payment_status", "status")
+    if not salon_id or _key(status or "") != "completed":
+        return None
+
+    day = _day(_first(data, "payment_date", "transaction_time", "created_at"))
+    if not day:
+        return None
+
+    amount = float(_first(data, "total_amount", "amount") or 0)
+    method = _key(_first(data, "payment_method", "method") or "unknown")
+    return salon_id, day, {
+        "revenue_total": amount,
+        f"revenue_by_method.{method}": amount,
+        "payments_completed": 1,
+    }
+
+
+def customer_contribution(data: Dict[str, Any]) -> Optional[Tuple[str, str, Dict[str, float]]]:
+    """Counters a customer document contributes to its creation day."""
+    salon_id = data.get("salon_id")
+    day = _day(data.get("created_at"))
+    if not salon_id or not day:
+        return None
+    return salon_id, day, {"new_customers": 1}
+
+
+_EXTRACTORS = {
+    RollupSource.BOOKING: booking_contribution,
+    RollupSource.PAYMENT: payment_contribution,
+    RollupSource.CUSTOMER: customer_contribution,
+}
+
+
+def _nest(flat: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand dotted counter paths into nested maps."""
+    nested: Dict[str, Any] = {}
+    for path, value in flat.items():
+        parts = path.split(".")
+        target = nested
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return nested
+
+
+def _flatten(nested: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Collapse nested counter maps into dotted paths."""
+    flat: Dict[str, float] = {}
+    for key, value in nested.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+# ============================================================================
+# Model
+# ============================================================================
+
+class AnalyticsRollupModel(FirestoreBase[DailyMetricsRollup, DailyMetricsRollup, DailyMetricsRollup]):
+    """Model for per-salon, per-day analytics rollups.
+
+    Document IDs are ``{salon_id}_{YYYY-MM-DD}`` so a date range is fetched
+    with a single batched ``get_all``.
+
+    Example:
+        rollups = AnalyticsRollupModel()
+        days = await rollups.get_range("salon_123", date(2024, 1, 1), date(2024, 1, 7))
+    """
+
+    collection_name = "analytics_daily"
+    model = DailyMetricsRollup
+    cache_enabled = False
+
+    @staticmethod
+    def rollup_id(salon_id: str, day: str) -> str:
+        """Document ID for a salon's rollup on a given day."""
+        return f"{salon_id}_{day}"
+
+    async def record_change(
+        self,
+        source: RollupSource,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]],
+    ) -> None:
+        """Apply the difference between two versions of a raw document.
+
+        Args:
+            source: Collection the document belongs to
+            before: Document data before the write (None on create)
+            after: Document data after the write (None on delete)
+        """
+        extractor = _EXTRACTORS[source]
+        deltas: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+        for data, sign in ((before, -1), (after, 1)):
+            contribution = extractor(data) if data else None
+            if contribution:
+                salon_id, day, counters = contribution
+                for path, value in counters.items():
+                    deltas[(salon_id, day)][path] += sign * value
+
+        for (salon_id, day), counters in deltas.items():
+            changed = {path: value for path, value in counters.items() if value}
+            if not changed:
+                continue
+            update = _nest({path: Increment(value) for path, value in changed.items()})
+            update.update({
+                "salon_id": salon_id,
+                "date": day,
+                "updated_at": datetime.utcnow(),
+            })
+            doc_ref = self.collection.document(self.rollup_id(salon_id, day))
+            await doc_ref.set(update, merge=True)
+
+    async def get_range(
+        self,
+        salon_id: str,
+        start_date: date,
+        end_date: date,
+    ) -> List[DailyMetricsRollup]:
+        """Get one rollup per day in the inclusive range (zero-filled).
+
+        Args:
+            salon_id: Salon ID for multi-tenant filtering
+            start_date: First day
+            end_date: Last day
+
+        Returns:
+            Rollups ordered by date
+        """
+        days = [
+            (start_date + timedelta(days=offset)).isoformat()
+            for offset in range((end_date - start_date).days + 1)
+        ]
+        if not days:
+            return []
+
+        refs = [self.collection.document(self.rollup_id(salon_id, day)) for day in days]
+        found: Dict[str, Dict[str, Any]] = {}
+        async for snapshot in self.async_client.get_all(refs):
+            if snapshot.exists:
+                found[snapshot.id] = snapshot.to_dict()
+
+        rollups = []
+        for day in days:
+            data = found.get(self.rollup_id(salon_id, day)) or {}
+            data.pop("updated_at", None)
+            data.update({"salon_id": salon_id, "date": day})
+            rollups.append(DailyMetricsRollup.model_validate(data))
+        return rollups
+
+    async def get_totals(
+        self,
+        salon_id: str,
+        start_date: date,
+        end_date: date,
+    ) -> Tuple[DailyMetricsRollup, List[DailyMetricsRollup]]:
+        """Get the period total along with the per-day rollups."""
+        days = await self.get_range(salon_id, start_date, end_date)
+        return DailyMetricsRollup.combine(salon_id, days), days
+
+    # ========================================================================
+    # Backfill & Consistency
+    # ========================================================================
+
+    async def _recompute(
+        self,
+        salon_id: str,
+        start_date: date,
+        end_date: date,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Recompute nested counters per day from raw documents."""
+        first, last = start_date.isoformat(), end_date.isoformat()
+        totals: Dict[str, Dict[str, Any]] = {}
+
+        for source, extractor in _EXTRACTORS.items():
+            query = self.async_client.collection(source.value).where(
+                filter=FieldFilter("salon_id", "==", salon_id)
+            )
+            async for doc in query.stream():
+                contribution = extractor(doc.to_dict() or {})
+                if not contribution:
+                    continue
+                _, day, counters = contribution
+                if first <= day <= last:
+                    merge_counters(totals.setdefault(day, {}), _nest(counters))
+
+        return totals
+
+    async def backfill(
+        self,
+        salon_id: str,
+        start_date: date,
+        end_date: date,
+    ) -> int:
+        """Rebuild rollups for a date range from raw documents.
+
+        Streams the salon's bookings, payments and customers once and
+        overwrites every rollup document in the range, including days with
+        no activity.
+
+        Args:
+            salon_id: Salon ID
+            start_date: First day to rebuild
+            end_date: Last day to rebuild
+
+        Returns:
+            Number of rollup documents written
+        """
+        totals = await self._recompute(salon_id, start_date, end_date)
+
+        batch = self.async_client.batch()
+        written = 0
+        day = start_date
+        while day <= end_date:
+            key = day.isoformat()
+            data = dict(totals.get(key, {}))
+            data.update({"salon_id": salon_id, "date": key, "updated_at": datetime.utcnow()})
+            batch.set(self.collection.document(self.rollup_id(salon_id, key)), data)
+            written += 1
+            # Firestore batches are limited to 500 writes
+            if written % 500 == 0:
+                await batch.commit()
+                batch = self.async_client.batch()
+            day += timedelta(days=1)
+        if written % 500:
+            await batch.commit()
+
+        logger.info(
+            "Analytics rollups backfilled",
+            salon_id=salon_id,
+            start_date=start_date.isoformat(),
+            end_date=end_date.isoformat(),
+            days=written,
+        )
+        return written
+
+    async def check_consistency(
+        self,
+        salon_id: str,
+        start_date: date,
+        end_date: date,
+        repair: bool = False,
+    ) -> RollupConsistencyReport:
+        """Compare stored rollups with counters recomputed from raw documents.
+
+        Args:
+            salon_id: Salon ID
+            start_date: First day to check
+            end_date: Last day to check
+            repair: Backfill the range if any drift is found
+
+        Returns:
+            Report of counters that differ, keyed by day
+        """
+        expected = await self._recompute(salon_id, start_date, end_date)
+        stored = await self.get_range(salon_id, start_date, end_date)
+
+        drifted: Dict[str, Dict[str, List[float]]] = {}
+        for rollup in stored:
+            actual = _flatten(rollup.model_dump(exclude={"salon_id", "date"}))
+            wanted = _flatten(expected.get(rollup.date, {}))
+            diff = {
+                path: [actual.get(path, 0), wanted.get(path, 0)]
+                for path in set(actual) | set(wanted)
+                if abs(actual.get(path, 0) - wanted.get(path, 0)) > _FLOAT_TOLERANCE
+            }
+            if diff:
+                drifted[rollup.date] = diff
+
+        report = RollupConsistencyReport(
+            salon_id=salon_id,
+            start_date=start_date.isoformat(),
+            end_date=end_date.isoformat(),
+            days_checked=len(stored),
+            drifted_days=drifted,
+        )
+
+        if drifted:
+            logger.warning(
+                "Analytics rollup drift detected",
+                salon_id=salon_id,
+                days=sorted(drifted),
+            )
+            if repair:
+                await self.backfill(salon_id, start_date, end_date)
+                report.repaired = True
+
+        return report
+
+
+# ============================================================================
+# Write subscription
+# ============================================================================
+
+_SOURCES = {source.value: source for source in RollupSource}
+
+
+async def _update_rollups(envelope: EventEnvelope) -> None:
+    """Keep daily rollups in step with booking, payment and customer writes."""
+    change = envelope.event
+    source = _SOURCES.get(change.collection)
+    if source is not None:
+        await AnalyticsRollupModel().record_change(source, change.before, change.after)
+
+
+get_event_bus().subscribe(DocumentChanged, _update_rollups)
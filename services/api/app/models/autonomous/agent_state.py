@@ -3,7 +3,7 @@
 Manages runtime state for autonomous agents per salon.
 """
 from datetime import datetime, date, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from enum import Enum
 
 from google.cloud.firestore_v1.base_query import FieldFilter
@@ -55,6 +55,85 @@ class AgentStateModel(FirestoreBase):
         state_id = f"state_{salon_id}_{agent_name}"
         return await self.get(state_id)
     
+    async def get_states(
+        self,
+        salon_ids: List[str],
+        agent_names: List[str],
+    ) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Get state for many agents across many salons in one batched read.
+        
+        Args:
+            salon_ids: Salon IDs
+            agent_names: Agent names to read for every salon
+            
+        Returns:
+            Agent states keyed by (salon_id, agent_name); missing states are omitted
+        """
+        pairs = {
+            f"state_{salon_id}_{agent_name}": (salon_id, agent_name)
+            for salon_id in salon_ids
+            for agent_name in agent_names
+        }
+        states = await self.get_multi(list(pairs))
+        return {pairs[state["id"]]: state for state in states}
+    
+    async def get_due_agents(
+        self,
+        salon_ids: List[str],
+        intervals: Dict[str, int],
+    ) -> List[Tuple[str, str]]:
+        """Find the agents due for a periodic run across many salons.
+        
+        Reads every agent state with one ``get_all`` (chunked) instead of
+        several reads per agent, then applies the same rules as a single
+        scheduled run: an agent is due when its interval has passed since
+        ``last_execution`` (or it has never run), it is not paused, and its
+        circuit breaker lets it operate. Breakers whose cooldown has expired
+        are moved to half-open in one batched write.
+        
+        Args:
+            salon_ids: Salon IDs
+            intervals: Run interval in minutes by agent name
+            
+        Returns:
+            (salon_id, agent_name) pairs in salon, then agent order
+        """
+        states = await self.get_states(salon_ids, list(intervals))
+        now = datetime.utcnow()
+        due = []
+        recovering = {}
+        
+        for salon_id in salon_ids:
+            for agent_name, interval in intervals.items():
+                state = states.get((salon_id, agent_name))
+                if state is None:
+                    due.append((salon_id, agent_name))  # No state, should run
+                    continue
+                
+                last_execution = state.get("last_execution")
+                if last_execution:
+                    last_dt = datetime.fromisoformat(last_execution.replace("Z", "+00:00"))
+                    next_run = last_dt + timedelta(minutes=interval)
+                    if now < next_run.replace(tzinfo=None):
+                        continue
+                
+                if state.get("status") == AgentStatus.PAUSED.value:
+                    continue
+                
+                cb_check = self._evaluate_circuit_breaker(state, now)
+                if not cb_check["can_operate"]:
+                    continue
+                if cb_check.get("testing"):
+                    recovering[state["id"]] = {
+                        "circuit_breaker.state": CircuitBreakerState.HALF_OPEN.value,
+                    }
+                due.append((salon_id, agent_name))
+        
+        if recovering:
+            await self.update_batch(recovering)
+        
+        return due
+    
     async def get_all_agents_state(
         self,
         salon_id: str,
@@ -410,13 +489,34 @@ class AgentStateModel(FirestoreBase):
         if not state:
             return {"can_operate": False, "reason": "state_not_found"}
         
+        now = datetime.utcnow()
+        result = self._evaluate_circuit_breaker(state, now)
+        
+        # Cooldown expired - move to half-open
+        if result.get("testing"):
+            await self.update(state_id, {
+                "circuit_breaker.state": CircuitBreakerState.HALF_OPEN.value,
+                "updated_at": now.isoformat(),
+            })
+        
+        return result
+    
+    @staticmethod
+    def _evaluate_circuit_breaker(
+        state: Dict[str, Any],
+        now: datetime,
+    ) -> Dict[str, Any]:
+        """Decide from a state document whether the agent can operate.
+        
+        ``testing`` is set when an expired cooldown allows a half-open
+        trial; the caller persists that transition.
+        """
         cb = state.get("circuit_breaker", {})
         cb_state = cb.get("state", CircuitBreakerState.CLOSED.value)
         
         if cb_state == CircuitBreakerState.CLOSED.value:
             return {"can_operate": True, "state": cb_state}
         
-        now = datetime.utcnow()
         cooldown_until = cb.get("cooldown_until")
         
         if cooldown_until:
@@ -428,20 +528,13 @@ class AgentStateModel(FirestoreBase):
                     "remaining_seconds": int((cooldown_time - now).total_seconds()),
                 }
         
-        # Cooldown expired - move to half-open
         if cb.get("auto_recovery", True):
-            await self.update(state_id, {
-                "circuit_breaker.state": CircuitBreakerState.HALF_OPEN.value,
-                "updated_at": now.isoformat(),
-            })
-            
             return {
                 "can_operate": True,
                 "state": CircuitBreakerState.HALF_OPEN.value,
                 "testing": True,
             }
         
-        
         return {
             "can_operate": False,
             "state": cb_state,
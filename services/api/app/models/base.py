@@ -3,10 +3,14 @@
 Provides a generic base class for all Firestore models with:
 - Async CRUD operations using singleton client
 - Query builder for filtering
-- Pagination support with cursor-based optimization
+- Pagination support with opaque continuation cursors
 - Batch operations
 - Built-in caching support
+- Request-scoped identity map for repeated reads
 """
+import asyncio
+import base64
+import json
 from datetime import datetime
 from typing import (
     Any,
@@ -14,6 +18,7 @@ from typing import (
     Generic,
     List,
     Optional,
+    Tuple,
     Type,
     TypeVar,
     Union,
@@ -25,7 +30,10 @@ import structlog
 
 from app.core.firebase import get_firestore_async
 from app.core.redis import redis_client, CacheConfig
+from app.core.request_context import MISSING, current_scope, record
 from app.schemas.base import FirestoreModel, PaginatedResponse
+from app.schemas.events import DocumentChanged
+from app.services.event_bus import get_event_bus
 
 logger = structlog.get_logger()
 
@@ -34,6 +42,58 @@ ModelType = TypeVar("ModelType", bound=FirestoreModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=FirestoreModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=FirestoreModel)
 
+# Firestore's implicit document-id field, used as the cursor tie-breaker
+DOCUMENT_ID_FIELD = "__name__"
+
+# Cached in place of a document known not to exist (Firestore reserves
+# ``__*__`` field names, so no real document can look like this)
+MISSING_DOCUMENT = {"__missing__": True}
+
+
+def _is_missing_marker(cached: Any) -> bool:
+    return isinstance(cached, dict) and cached.get("__missing__") is True
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(value: Any, document_id: str) -> str:
+    """Encode the last document of a page into an opaque continuation token.
+
+    Args:
+        value: Value of the ``order_by`` field on the last document (or None)
+        document_id: ID of the last document
+
+    Returns:
+        URL-safe base64 token
+    """
+    if isinstance(value, datetime):
+        value = {"$dt": value.isoformat()}
+    payload = json.dumps({"v": value, "id": document_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, str]:
+    """Decode a continuation token produced by :func:`encode_cursor`.
+
+    Returns:
+        Tuple of (order_by value, document_id)
+
+    Raises:
+        InvalidCursorError: If the token is malformed
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, document_id = payload["v"], payload["id"]
+        if isinstance(value, dict) and "$dt" in value:
+            value = datetime.fromisoformat(value["$dt"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid pagination cursor: {token!r}") from e
+
+    return value, document_id
+
 
 class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """Base class for Firestore models with async CRUD operations.
@@ -51,6 +111,11 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     # Cache settings - override in subclasses
     cache_ttl: int = 300  # 5 minutes default
     cache_enabled: bool = True
+    negative_cache_ttl: int = 60  # remember missing ids; 0 disables
+
+    # Batch reads: ids per get_all call and concurrent get_all calls
+    get_all_chunk_size: int = 100
+    get_all_concurrency: int = 4
 
     def __init__(self):
         """Initialize the model with singleton async client."""
@@ -68,27 +133,112 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """Get the Firestore collection reference."""
         return self.async_client.collection(self.collection_name)
 
+    def _validate(self, data: Dict[str, Any]) -> Union[ModelType, Dict[str, Any]]:
+        """Validate raw document data into the model (or a dict if untyped)."""
+        if self.model is None:
+            return data
+        record("validations")
+        return self.model.model_validate(data)
+
+    def _from_snapshot(self, doc) -> Union[ModelType, Dict[str, Any]]:
+        """Convert a read document snapshot and remember it for the request."""
+        return self._load_snapshot(doc)[1]
+
+    def _load_snapshot(self, doc) -> Tuple[Dict[str, Any], Union[ModelType, Dict[str, Any]]]:
+        """Like ``_from_snapshot`` but also return the raw data for caching."""
+        record("firestore_reads")
+        data = doc.to_dict()
+        data["id"] = doc.id
+        result = self._validate(data)
+        self._remember(doc.id, result)
+        return data, result
+
+    def _remember(self, document_id: str, value: Optional[Any]) -> None:
+        """Write a document (None if missing) through to the identity map."""
+        scope = current_scope()
+        if scope is not None:
+            scope.store(self.collection_name, document_id, self.model, value)
+
+    def _forget(self, document_id: str) -> None:
+        """Drop a document from the identity map."""
+        scope = current_scope()
+        if scope is not None:
+            scope.discard(self.collection_name, document_id)
+
+    def _build_query(
+        self,
+        salon_id: Optional[str] = None,
+        filters: Optional[List[tuple]] = None,
+    ) -> BaseQuery:
+        """Build a filtered query for the collection."""
+        query = self.collection
+
+        if salon_id:
+            query = query.where(filter=FieldFilter("salon_id", "==", salon_id))
+
+        if filters:
+            for field, op, value in filters:
+                query = query.where(filter=FieldFilter(field, op, value))
+
+        return query
+
+    async def _notify_write(
+        self,
+        document_id: str,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]],
+    ) -> None:
+        """Publish a ``DocumentChanged`` event without failing the write itself.
+
+        In-process subscribers (availability cache, analytics rollups) run
+        before this returns. ``before`` is None on create and ``after`` is
+        None on delete.
+        """
+        try:
+            await get_event_bus().publish(
+                DocumentChanged(
+                    collection=self.collection_name,
+                    document_id=document_id,
+                    before=before,
+                    after=after,
+                ),
+                salon_id=(after or before or {}).get("salon_id", ""),
+            )
+        except Exception as e:
+            logger.warning(
+                "Write hook failed",
+                collection=self.collection_name,
+                document_id=document_id,
+                error=str(e),
+            )
+
     def _get_cache_key(self, document_id: str) -> str:
         """Generate cache key for a document."""
         return f"{self.collection_name}:{document_id}"
 
     def _get_list_cache_key(self, salon_id: str, **filters) -> str:
-        """Generate cache key for list queries."""
+        """Generate cache key for list queries.
+
+        List results must be cached with ``tags=[self._get_list_cache_tag(salon_id)]``
+        so writes can invalidate them.
+        """
         filter_str = ":".join(f"{k}={v}" for k, v in sorted(filters.items()) if v is not None)
         return f"{self.collection_name}:list:{salon_id}:{filter_str}"
 
+    def _get_list_cache_tag(self, salon_id: str) -> str:
+        """Tag grouping every cached list query for a salon."""
+        return f"{self.collection_name}:list:{salon_id}"
+
     async def _invalidate_cache(self, document_id: str, salon_id: str = None):
         """Invalidate cache for a document and related lists."""
         if not self.cache_enabled or not redis_client.is_connected:
             return
 
-        # Delete document cache
-        await redis_client.delete(self._get_cache_key(document_id))
-
-        # Delete list caches for the salon
-        if salon_id:
-            pattern = f"{self.collection_name}:list:{salon_id}:*"
-            await redis_client.delete_pattern(pattern)
+        # Document cache and the salon's tagged list caches in one round trip
+        await redis_client.invalidate_tags(
+            [self._get_list_cache_tag(salon_id)] if salon_id else [],
+            keys=[self._get_cache_key(document_id)] if document_id else [],
+        )
 
     # ========================================================================
     # CREATE Operations
@@ -120,10 +270,10 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
             doc_data[self.id_field] = document_id
 
-            # Invalidate list cache for this salon
-            salon_id = doc_data.get("salon_id")
-            if salon_id:
-                await self._invalidate_cache(document_id, salon_id)
+            # Invalidate list cache for this salon (and any cached miss)
+            await self._invalidate_cache(document_id, doc_data.get("salon_id"))
+
+            await self._notify_write(document_id, None, doc_data)
 
             logger.info(
                 "Document created",
@@ -131,7 +281,9 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 document_id=document_id,
             )
 
-            return self.model.model_validate(doc_data)
+            result = self._validate(doc_data)
+            self._remember(document_id, result)
+            return result
 
         except Exception as e:
             logger.error(
@@ -153,6 +305,7 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             batch = self.async_client.batch()
             now = datetime.utcnow()
             created_items = []
+            created_docs = []
             salon_ids = set()
 
             for item in items:
@@ -171,13 +324,22 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                     salon_ids.add(doc_data["salon_id"])
 
                 batch.set(doc_ref, doc_data)
-                created_items.append(self.model.model_validate(doc_data))
+                created_docs.append(doc_data)
+                created_items.append(self._validate(doc_data))
 
             await batch.commit()
 
-            # Invalidate list caches
-            for salon_id in salon_ids:
-                await self._invalidate_cache(None, salon_id)
+            # Invalidate list caches and any cached miss for the new ids in
+            # one round trip
+            if self.cache_enabled and redis_client.is_connected:
+                await redis_client.invalidate_tags(
+                    [self._get_list_cache_tag(salon_id) for salon_id in salon_ids],
+                    keys=[self._get_cache_key(doc_data["id"]) for doc_data in created_docs],
+                )
+
+            for doc_data, item in zip(created_docs, created_items, strict=True):
+                self._remember(doc_data["id"], item)
+                await self._notify_write(doc_data["id"], None, doc_data)
 
             logger.info(
                 "Batch created",
@@ -200,7 +362,18 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     # ========================================================================
 
     async def get(self, document_id: str, use_cache: bool = True) -> Optional[ModelType]:
-        """Get a document by ID with optional caching."""
+        """Get a document by ID with optional caching.
+
+        Within a request scope, repeated reads of the same document return
+        the instance loaded first. ``use_cache=False`` bypasses both the
+        identity map and Redis, and refreshes the map with the result.
+        """
+        scope = current_scope()
+        if use_cache and scope is not None:
+            known = scope.lookup(self.collection_name, document_id, self.model)
+            if known is not MISSING:
+                return known
+
         cache_key = self._get_cache_key(document_id)
 
         # Try cache first
@@ -208,11 +381,15 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             cached = await redis_client.get(cache_key)
             if cached is not None:
                 logger.debug("Cache hit", collection=self.collection_name, document_id=document_id)
-                return self.model.model_validate(cached)
+                record("cache_hits")
+                result = None if _is_missing_marker(cached) else self._validate(cached)
+                self._remember(document_id, result)
+                return result
 
         try:
             doc_ref = self.collection.document(document_id)
             doc = await doc_ref.get()
+            record("firestore_reads")
 
             if not doc.exists:
                 logger.debug(
@@ -220,12 +397,16 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                     collection=self.collection_name,
                     document_id=document_id,
                 )
+                self._remember(document_id, None)
+                if use_cache and self.cache_enabled and self.negative_cache_ttl and redis_client.is_connected:
+                    await redis_client.set(cache_key, MISSING_DOCUMENT, expire=self.negative_cache_ttl)
                 return None
 
             data = doc.to_dict()
             data["id"] = doc.id
 
-            result = self.model.model_validate(data)
+            result = self._validate(data)
+            self._remember(document_id, result)
 
             # Cache the result
             if use_cache and self.cache_enabled and redis_client.is_connected:
@@ -247,50 +428,54 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         document_ids: List[str],
         use_cache: bool = True,
     ) -> List[ModelType]:
-        """Get multiple documents by IDs with caching."""
+        """Get multiple documents by IDs with caching.
+
+        Results follow the order of ``document_ids``; missing documents are
+        omitted. Documents already loaded in the current request scope are
+        served from the identity map, the rest from one Redis MGET, and only
+        then from Firestore in chunked ``get_all`` calls. Fetched documents
+        (and, with ``negative_cache_ttl``, missing ids) are written back in
+        one pipelined batch.
+        """
         if not document_ids:
             return []
 
-        results = []
-        uncached_ids = []
-        cached_data = {}
+        found: Dict[str, Optional[ModelType]] = {}
+        pending_ids = list(dict.fromkeys(document_ids))
+        use_redis = use_cache and self.cache_enabled and redis_client.is_connected
+
+        scope = current_scope()
+        if use_cache and scope is not None:
+            remaining = []
+            for doc_id in pending_ids:
+                known = scope.lookup(self.collection_name, doc_id, self.model)
+                if known is MISSING:
+                    remaining.append(doc_id)
+                else:
+                    found[doc_id] = known
+            pending_ids = remaining
 
         # Check cache for all documents
-        if use_cache and self.cache_enabled and redis_client.is_connected:
-            cache_keys = [self._get_cache_key(doc_id) for doc_id in document_ids]
-            cached_data = await redis_client.get_multi(cache_keys)
-
-            for doc_id in document_ids:
-                cache_key = self._get_cache_key(doc_id)
-                if cache_key in cached_data:
-                    results.append(self.model.model_validate(cached_data[cache_key]))
-                else:
-                    uncached_ids.append(doc_id)
-        else:
-            uncached_ids = document_ids
+        if pending_ids and use_redis:
+            cached_data = await redis_client.get_multi(
+                [self._get_cache_key(doc_id) for doc_id in pending_ids]
+            )
+            remaining = []
+            for doc_id in pending_ids:
+                cached = cached_data.get(self._get_cache_key(doc_id))
+                if cached is None:
+                    remaining.append(doc_id)
+                    continue
+                record("cache_hits")
+                result = None if _is_missing_marker(cached) else self._validate(cached)
+                self._remember(doc_id, result)
+                found[doc_id] = result
+            pending_ids = remaining
 
         # Fetch uncached documents
-        if uncached_ids:
+        if pending_ids:
             try:
-                doc_refs = [
-                    self.collection.document(doc_id)
-                    for doc_id in uncached_ids
-                ]
-                docs = await self.async_client.get_all(doc_refs)
-
-                for doc in docs:
-                    if doc.exists:
-                        data = doc.to_dict()
-                        data["id"] = doc.id
-                        results.append(self.model.model_validate(data))
-
-                        # Cache the result
-                        if use_cache and self.cache_enabled and redis_client.is_connected:
-                            await redis_client.set(
-                                self._get_cache_key(doc.id),
-                                data,
-                                expire=self.cache_ttl
-                            )
+                snapshots = await self._get_all(pending_ids)
             except Exception as e:
                 logger.error(
                     "Failed to get multiple documents",
@@ -299,7 +484,42 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 )
                 raise
 
-        return results
+            fill: Dict[str, Any] = {}
+            expires: Dict[str, int] = {}
+            for doc_id in pending_ids:
+                doc = snapshots.get(doc_id)
+                if doc is not None and doc.exists:
+                    data, found[doc_id] = self._load_snapshot(doc)
+                    fill[self._get_cache_key(doc_id)] = data
+                else:
+                    record("firestore_reads")
+                    self._remember(doc_id, None)
+                    found[doc_id] = None
+                    if self.negative_cache_ttl:
+                        key = self._get_cache_key(doc_id)
+                        fill[key] = MISSING_DOCUMENT
+                        expires[key] = self.negative_cache_ttl
+
+            if fill and use_redis:
+                await redis_client.set_multi(fill, expire=self.cache_ttl, expires=expires)
+
+        return [found[doc_id] for doc_id in document_ids if found.get(doc_id) is not None]
+
+    async def _get_all(self, document_ids: List[str]) -> Dict[str, Any]:
+        """Read documents in ``get_all_chunk_size`` chunks, at most
+        ``get_all_concurrency`` at a time. Returns snapshots by id."""
+        semaphore = asyncio.Semaphore(self.get_all_concurrency)
+        size = self.get_all_chunk_size
+
+        async def fetch(chunk: List[str]) -> List[Any]:
+            async with semaphore:
+                refs = [self.collection.document(doc_id) for doc_id in chunk]
+                return [doc async for doc in self.async_client.get_all(refs)]
+
+        batches = await asyncio.gather(*(
+            fetch(document_ids[i:i + size]) for i in range(0, len(document_ids), size)
+        ))
+        return {doc.id: doc for batch in batches for doc in batch}
 
     async def get_by_field(
         self,
@@ -318,9 +538,7 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             docs = query.stream()
 
             async for doc in docs:
-                data = doc.to_dict()
-                data["id"] = doc.id
-                return self.model.model_validate(data)
+                return self._from_snapshot(doc)
 
             return None
 
@@ -347,6 +565,7 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         try:
             doc_ref = self.collection.document(document_id)
             doc = await doc_ref.get()
+            record("firestore_reads")
 
             if not doc.exists:
                 logger.warning(
@@ -363,19 +582,23 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
             update_data["updated_at"] = datetime.utcnow()
 
+            existing_data = doc.to_dict()
+
             if merge:
                 await doc_ref.update(update_data)
+                new_data = {**existing_data, **update_data}
             else:
-                existing_data = doc.to_dict()
                 update_data["id"] = document_id
                 update_data["created_at"] = existing_data.get("created_at")
                 await doc_ref.set(update_data)
+                new_data = update_data
 
             # Invalidate cache
-            existing_data = doc.to_dict()
             salon_id = existing_data.get("salon_id")
             await self._invalidate_cache(document_id, salon_id)
 
+            await self._notify_write(document_id, existing_data, new_data)
+
             return await self.get(document_id, use_cache=False)
 
         except Exception as e:
@@ -396,10 +619,14 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             return 0
 
         try:
+            # Current state for the change events, read in batched get_all calls
+            snapshots = await self._get_all(list(updates))
+            record("firestore_reads", len(snapshots))
+
             batch = self.async_client.batch()
             now = datetime.utcnow()
             count = 0
-            salon_ids = set()
+            changes = []
 
             for doc_id, data in updates.items():
                 if isinstance(data, FirestoreModel):
@@ -413,11 +640,17 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 batch.update(doc_ref, update_data)
                 count += 1
 
+                snapshot = snapshots.get(doc_id)
+                existing_data = snapshot.to_dict() if snapshot is not None and snapshot.exists else {}
+                changes.append((doc_id, existing_data, {**existing_data, **update_data}))
+
             await batch.commit()
 
-            # Invalidate caches
-            for doc_id in updates.keys():
-                await self._invalidate_cache(doc_id, None)
+            # Invalidate caches and publish one DocumentChanged per document
+            for doc_id, existing_data, new_data in changes:
+                self._forget(doc_id)
+                await self._invalidate_cache(doc_id, existing_data.get("salon_id"))
+                await self._notify_write(doc_id, existing_data, new_data)
 
             logger.info(
                 "Batch updated",
@@ -444,6 +677,7 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         try:
             doc_ref = self.collection.document(document_id)
             doc = await doc_ref.get()
+            record("firestore_reads")
 
             if not doc.exists:
                 logger.debug(
@@ -458,10 +692,13 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             salon_id = data.get("salon_id")
 
             await doc_ref.delete()
+            self._remember(document_id, None)
 
             # Invalidate cache
             await self._invalidate_cache(document_id, salon_id)
 
+            await self._notify_write(document_id, data, None)
+
             logger.info(
                 "Document deleted",
                 collection=self.collection_name,
@@ -499,16 +736,13 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         end_before: Optional[Any] = None,
         use_cache: bool = False,
     ) -> List[ModelType]:
-        """List documents with optional filtering and cursor-based pagination."""
-        try:
-            query = self.collection
-
-            if salon_id:
-                query = query.where(filter=FieldFilter("salon_id", "==", salon_id))
+        """List documents with optional filtering and cursor-based pagination.
 
-            if filters:
-                for field, op, value in filters:
-                    query = query.where(filter=FieldFilter(field, op, value))
+        ``offset`` is pushed down to Firestore, but skipped documents are still
+        billed as reads; prefer :meth:`list_page` for deep pagination.
+        """
+        try:
+            query = self._build_query(salon_id=salon_id, filters=filters)
 
             if order_by:
                 direction = BaseQuery.DESCENDING if order_direction.upper() == "DESCENDING" else BaseQuery.ASCENDING
@@ -520,18 +754,15 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             if end_before is not None and order_by:
                 query = query.end_before({order_by: end_before})
 
+            if offset and offset > 0:
+                query = query.offset(offset)
+
             if limit:
                 query = query.limit(limit)
 
             results = []
             async for doc in query.stream():
-                data = doc.to_dict()
-                data["id"] = doc.id
-                results.append(self.model.model_validate(data))
-
-            # Offset is applied after fetch (not recommended for large datasets)
-            if offset and offset > 0:
-                results = results[offset:]
+                results.append(self._from_snapshot(doc))
 
             return results
 
@@ -543,6 +774,78 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             )
             raise
 
+    async def list_page(
+        self,
+        salon_id: Optional[str] = None,
+        filters: Optional[List[tuple]] = None,
+        order_by: Optional[str] = None,
+        order_direction: str = "ASCENDING",
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        offset: Optional[int] = None,
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Fetch one page of documents using an opaque continuation cursor.
+
+        Results are ordered by ``order_by`` with the document ID as a
+        tie-breaker, so the cursor (built from both) resumes exactly after the
+        last document of the previous page and each page costs ``page_size``
+        document reads regardless of how deep it is.
+
+        Args:
+            salon_id: Salon ID for multi-tenant filtering
+            filters: List of (field, op, value) filters
+            order_by: Field to order by (document ID if omitted)
+            order_direction: "ASCENDING" or "DESCENDING"
+            page_size: Number of documents per page
+            cursor: Token returned as ``next_cursor`` by the previous page
+            offset: Fallback server-side offset when no cursor is available
+
+        Returns:
+            Tuple of (items, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        try:
+            query = self._build_query(salon_id=salon_id, filters=filters)
+
+            direction = BaseQuery.DESCENDING if order_direction.upper() == "DESCENDING" else BaseQuery.ASCENDING
+            if order_by:
+                query = query.order_by(order_by, direction=direction)
+            query = query.order_by(DOCUMENT_ID_FIELD, direction=direction)
+
+            if cursor:
+                value, document_id = decode_cursor(cursor)
+                position = {DOCUMENT_ID_FIELD: document_id}
+                if order_by:
+                    position = {order_by: value, **position}
+                query = query.start_after(position)
+            elif offset and offset > 0:
+                query = query.offset(offset)
+
+            query = query.limit(page_size)
+
+            items = []
+            last_doc = None
+            async for doc in query.stream():
+                items.append(self._from_snapshot(doc))
+                last_doc = doc
+
+            next_cursor = None
+            if last_doc is not None and len(items) == page_size:
+                value = last_doc.get(order_by) if order_by else None
+                next_cursor = encode_cursor(value, last_doc.id)
+
+            return items, next_cursor
+
+        except Exception as e:
+            logger.error(
+                "Failed to list page",
+                collection=self.collection_name,
+                error=str(e),
+            )
+            raise
+
     async def count(
         self,
         salon_id: Optional[str] = None,
@@ -550,17 +853,11 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> int:
         """Count documents matching filters."""
         try:
-            query = self.collection
-
-            if salon_id:
-                query = query.where(filter=FieldFilter("salon_id", "==", salon_id))
-
-            if filters:
-                for field, op, value in filters:
-                    query = query.where(filter=FieldFilter(field, op, value))
+            query = self._build_query(salon_id=salon_id, filters=filters)
 
             count_query = query.count()
             result = await count_query.get()
+            record("firestore_reads")
 
             return result[0][0].value if result else 0
 
@@ -580,33 +877,38 @@ class FirestoreBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         filters: Optional[List[tuple]] = None,
         order_by: Optional[str] = None,
         order_direction: str = "ASCENDING",
-        use_cache: bool = False,
+        cursor: Optional[str] = None,
     ) -> PaginatedResponse:
-        """Get paginated results with optimized counting."""
+        """Get paginated results with optimized counting.
+
+        When ``cursor`` is given the page is resumed from it; otherwise the
+        page number is translated into a server-side offset. The response's
+        ``next_cursor`` should be passed back to fetch the following page.
+        """
         try:
             # Run count and items in parallel for better performance
             import asyncio
 
             count_task = self.count(salon_id=salon_id, filters=filters)
 
-            offset = (page - 1) * page_size
-            items_task = self.list(
+            items_task = self.list_page(
                 salon_id=salon_id,
                 filters=filters,
                 order_by=order_by,
                 order_direction=order_direction,
-                limit=page_size,
-                offset=offset,
-                use_cache=use_cache,
+                page_size=page_size,
+                cursor=cursor,
+                offset=None if cursor else (page - 1) * page_size,
             )
 
-            total, items = await asyncio.gather(count_task, items_task)
+            total, (items, next_cursor) = await asyncio.gather(count_task, items_task)
 
             return PaginatedResponse(
                 items=items,
                 total=total,
                 page=page,
                 page_size=page_size,
+                next_cursor=next_cursor,
             )
 
         except Exception as e:
@@ -3,7 +3,7 @@
 Handles all database operations for booking entities.
 """
 from datetime import datetime, date, time, timedelta
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Union
 
 from google.cloud.firestore_v1.base_query import FieldFilter
 import structlog
@@ -14,8 +14,14 @@ from app.schemas import (
     BookingCreate,
     BookingUpdate,
     BookingStatus,
+    TimeSlot,
 )
 from app.schemas.base import PaginatedResponse
+from app.services.availability import (
+    DEFAULT_SLOT_STEP_MINUTES,
+    availability_engine,
+    to_minutes,
+)
 
 logger = structlog.get_logger()
 
@@ -182,65 +188,63 @@ class BookingModel(FirestoreBase[Booking, BookingCreate, BookingUpdate]):
     async def check_availability(
         self,
         salon_id: str,
-        staff_id: str,
-        booking_date: date,
-        start_time: time,
-        end_time: time,
+        staff_id: Optional[str],
+        start_time: Union[datetime, time],
+        duration_minutes: Optional[int] = None,
+        booking_date: Optional[date] = None,
+        end_time: Optional[time] = None,
+        service_id: Optional[str] = None,
+        resource_type: Optional[str] = None,
         exclude_booking_id: Optional[str] = None,
-    ) -> Tuple[bool, List[Dict[str, Any]]]:
-        """Check if a time slot is available for a staff member.
+    ) -> bool:
+        """Check if a time slot can be booked.
+        
+        The salon day is always reloaded so the check never acts on a stale
+        cached schedule; the refreshed schedule also serves later slot
+        searches.
         
         Args:
             salon_id: Salon ID for multi-tenant filtering
-            staff_id: Staff document ID
-            booking_date: Date to check
-            start_time: Proposed start time
+            staff_id: Staff document ID, or None for any eligible staff
+            start_time: Proposed start (datetime, or time with booking_date)
+            duration_minutes: Appointment length (if end_time is not given)
+            booking_date: Date to check when start_time is a time
             end_time: Proposed end time
+            service_id: Service ID used to match staff skills
+            resource_type: Resource type the service needs
             exclude_booking_id: Booking ID to exclude from conflict check
             
         Returns:
-            Tuple of (is_available, conflicting_bookings)
+            True if the slot is free
+        
+        Raises:
+            ValueError: If the date or end of the slot cannot be determined
         """
+        if isinstance(start_time, datetime):
+            booking_date = booking_date or start_time.date()
+        if booking_date is None:
+            raise ValueError("booking_date is required when start_time is a time")
+        
+        start = to_minutes(start_time)
+        if end_time is not None:
+            end = to_minutes(end_time)
+        elif duration_minutes:
+            end = start + duration_minutes
+        else:
+            raise ValueError("Either end_time or duration_minutes is required")
+        
         try:
-            # Get all bookings for the staff on that date
-            filters = [
-                ("staff_id", "==", staff_id),
-                ("date", "==", booking_date.isoformat()),
-                ("status", "in", ["pending", "confirmed", "checked_in", "in_progress"]),
-            ]
-            
-            bookings = await self.list(
-                salon_id=salon_id,
-                filters=filters,
-                limit=100,
+            schedule = await availability_engine.get_schedule(
+                salon_id, booking_date, refresh=True
+            )
+            return schedule.is_available(
+                start,
+                end,
+                staff_id=staff_id,
+                service_id=service_id,
+                resource_type=resource_type,
+                exclude_booking_id=exclude_booking_id,
             )
-            
-            # Convert times to comparable format
-            start_minutes = start_time.hour * 60 + start_time.minute
-            end_minutes = end_time.hour * 60 + end_time.minute
-            
-            conflicts = []
-            for booking in bookings:
-                # Skip the booking being edited
-                if exclude_booking_id and booking.id == exclude_booking_id:
-                    continue
-                
-                # Check for time overlap
-                booking_start = booking.time.start_time
-                booking_end = booking.time.end_time
-                
-                booking_start_minutes = booking_start.hour * 60 + booking_start.minute
-                booking_end_minutes = booking_end.hour * 60 + booking_end.minute
-                
-                # Overlap condition: start < existing_end AND end > existing_start
-                if start_minutes < booking_end_minutes and end_minutes > booking_start_minutes:
-                    conflicts.append({
-                        "booking_id": booking.id,
-                        "start_time": booking_start.isoformat(),
-                        "end_time": booking_end.isoformat(),
-                    })
-            
-            return len(conflicts) == 0, conflicts
             
         except Exception as e:
             logger.error(
@@ -251,6 +255,48 @@ class BookingModel(FirestoreBase[Booking, BookingCreate, BookingUpdate]):
             )
             raise
     
+    async def get_available_slots(
+        self,
+        salon_id: str,
+        date: date,
+        duration_minutes: int,
+        service_id: Optional[str] = None,
+        staff_id: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        step_minutes: int = DEFAULT_SLOT_STEP_MINUTES,
+    ) -> List[TimeSlot]:
+        """Get all free slots of a duration across eligible staff.
+        
+        Args:
+            salon_id: Salon ID for multi-tenant filtering
+            date: Date to search
+            duration_minutes: Appointment length
+            service_id: Service ID used to match staff skills
+            staff_id: Optional staff ID to restrict the search
+            resource_type: Resource type the service needs
+            step_minutes: Slot grid granularity
+            
+        Returns:
+            Free slots in start order with the staff free for each
+        """
+        schedule = await availability_engine.get_schedule(salon_id, date)
+        slots = schedule.find_slots(
+            duration_minutes,
+            service_id=service_id,
+            staff_id=staff_id,
+            resource_type=resource_type,
+            step_minutes=step_minutes,
+        )
+        return [
+            TimeSlot(
+                start_time=slot.start_time,
+                end_time=slot.end_time,
+                slot_date=date,
+                staff_ids=slot.staff_ids,
+            )
+            for slot in slots
+        ]
+    
     async def get_by_status(
         self,
         status: str,
@@ -640,8 +686,9 @@ class BookingModel(FirestoreBase[Booking, BookingCreate, BookingUpdate]):
         customer_id: Optional[str] = None,
         page: int = 1,
         page_size: int = 20,
+        cursor: Optional[str] = None,
     ) -> "PaginatedResponse":
-        """Search bookings with filters and pagination.
+        """Search bookings with filters and cursor pagination.
 
         Args:
             salon_id: Salon ID for multi-tenant filtering
@@ -651,9 +698,11 @@ class BookingModel(FirestoreBase[Booking, BookingCreate, BookingUpdate]):
             customer_id: Filter by customer ID
             page: Page number (1-indexed)
             page_size: Number of items per page
+            cursor: Continuation token from the previous page (takes
+                precedence over ``page``)
 
         Returns:
-            Paginated response with booking summaries
+            Paginated response with booking summaries and ``next_cursor``
         """
         filters = []
 
@@ -677,6 +726,7 @@ class BookingModel(FirestoreBase[Booking, BookingCreate, BookingUpdate]):
             order_direction="DESCENDING",
             page=page,
             page_size=page_size,
+            cursor=cursor,
         )
 
         return result
@@ -13,6 +13,7 @@ from app.schemas import (
     Customer,
     CustomerCreate,
     CustomerUpdate,
+    CustomerSearch,
 )
 from app.schemas.base import PaginatedResponse
 
@@ -144,6 +145,52 @@ class CustomerModel(FirestoreBase[Customer, CustomerCreate, CustomerUpdate]):
             )
             raise
     
+    async def paginate_customers(
+        self,
+        salon_id: str,
+        query: Optional[CustomerSearch] = None,
+        page: int = 1,
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+    ) -> PaginatedResponse:
+        """List customers one page at a time using continuation cursors.
+        
+        A text query is matched as a prefix on phone (if numeric) or name,
+        and results are ordered by the matched field so the range filter
+        and cursor share one index.
+        
+        Args:
+            salon_id: Salon ID for multi-tenant filtering
+            query: Optional search parameters (query text, active status)
+            page: Page number (1-indexed), used when no cursor is given
+            page_size: Number of items per page
+            cursor: Continuation token from the previous page
+            
+        Returns:
+            Paginated response with ``next_cursor`` for the following page
+        """
+        filters = []
+        order_by = "name"
+        
+        if query and query.query:
+            term = query.query.strip()
+            if term.replace("+", "").replace(" ", "").isdigit():
+                order_by = "phone"
+            filters.append((order_by, ">=", term))
+            filters.append((order_by, "<", term + "\uf8ff"))
+        
+        if query and query.is_active is not None:
+            filters.append(("is_active", "==", query.is_active))
+        
+        return await self.paginate(
+            salon_id=salon_id,
+            filters=filters if filters else None,
+            order_by=order_by,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+        )
+    
     async def update_loyalty(
         self,
         customer_id: str,
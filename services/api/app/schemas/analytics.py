@@ -133,3 +133,63 @@ class ReportResponse(BaseModel):
     date_range: DateRange
     data: Dict[str, Any]
     summary: Optional[Dict[str, Any]] = None
+
+
+class DailyMetricsRollup(BaseModel):
+    """Pre-aggregated per-salon, per-day counters.
+
+    Maintained incrementally on booking/payment/customer writes so that
+    analytics endpoints read one document per day instead of raw history.
+    Bookings are bucketed by appointment date, payments by payment date and
+    customers by creation date.
+    """
+    salon_id: str
+    date: str
+    revenue_total: float = 0
+    revenue_by_method: Dict[str, float] = Field(default_factory=dict)
+    payments_completed: int = 0
+    bookings_total: int = 0
+    bookings_by_status: Dict[str, int] = Field(default_factory=dict)
+    bookings_by_hour: Dict[str, int] = Field(default_factory=dict)
+    booked_minutes: int = 0
+    new_customers: int = 0
+    staff_bookings: Dict[str, int] = Field(default_factory=dict)
+    staff_revenue: Dict[str, float] = Field(default_factory=dict)
+    staff_services: Dict[str, Dict[str, int]] = Field(default_factory=dict)
+    service_counts: Dict[str, int] = Field(default_factory=dict)
+    service_revenue: Dict[str, float] = Field(default_factory=dict)
+
+    @classmethod
+    def combine(cls, salon_id: str, rollups: List["DailyMetricsRollup"]) -> "DailyMetricsRollup":
+        """Sum a list of daily rollups into a single period total."""
+        total: Dict[str, Any] = {}
+        for rollup in rollups:
+            merge_counters(total, rollup.model_dump(exclude={"salon_id", "date"}))
+        label = f"{rollups[0].date}..{rollups[-1].date}" if rollups else ""
+        return cls(salon_id=salon_id, date=label, **total)
+
+
+def merge_counters(target: Dict[str, Any], source: Dict[str, Any]) -> None:
+    """Recursively add numeric counters from source into target."""
+    for key, value in source.items():
+        if isinstance(value, dict):
+            merge_counters(target.setdefault(key, {}), value)
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+class RollupConsistencyReport(BaseModel):
+    """Result of comparing stored rollups against raw documents."""
+    salon_id: str
+    start_date: str
+    end_date: str
+    days_checked: int
+    drifted_days: Dict[str, Dict[str, List[float]]] = Field(
+        default_factory=dict,
+        description="day -> counter path -> [stored, expected]",
+    )
+    repaired: bool = False
+
+    @property
+    def is_consistent(self) -> bool:
+        return not self.drifted_days
@@ -81,6 +81,7 @@ class ApprovalListResponse(BaseModel):
     page: int
     page_size: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 
 class ApprovalStatsResponse(BaseModel):
@@ -113,6 +113,7 @@ class DecisionListResponse(BaseModel):
     page: int
     page_size: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 
 class DecisionStatsResponse(BaseModel):
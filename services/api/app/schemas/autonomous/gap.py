@@ -70,6 +70,7 @@ class GapListResponse(BaseModel):
     page: int
     page_size: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 
 class GapStatsResponse(BaseModel):
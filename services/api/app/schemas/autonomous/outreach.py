@@ -103,6 +103,7 @@ class OutreachListResponse(BaseModel):
     page: int
     page_size: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 
 class OutreachStatsResponse(BaseModel):
@@ -286,6 +286,7 @@ class PaginatedResponse(BaseModel, Generic[TypeVar('T')]):
     total_pages: int = Field(default=0)
     has_next: bool = Field(default=False)
     has_previous: bool = Field(default=False)
+    next_cursor: Optional[str] = Field(default=None, description="Opaque token for the next page")
     
     @model_validator(mode='after')
     def calculate_pagination(self) -> 'PaginatedResponse':
@@ -29,6 +29,7 @@ class TimeSlot(FirestoreModel):
     start_time: time_type = Field(..., description="Slot start time")
     end_time: time_type = Field(..., description="Slot end time")
     slot_date: date_type = Field(..., description="Slot date")
+    staff_ids: List[str] = Field(default_factory=list, description="Staff free for this slot")
     
     @model_validator(mode='after')
     def validate_times(self) -> 'TimeSlot':
@@ -0,0 +1,237 @@
+"""Domain Event Schemas
+
+Typed payloads for events published on the event bus
+(``app.services.event_bus``). Each schema is registered under a small
+integer ``schema_id`` that is unique per (event family, version), so the
+wire format carries a number instead of field names of an envelope and
+subscribers decode straight to the right class.
+
+Versioning: never change a registered schema incompatibly. Add a new class
+with the next ``version`` and a new ``schema_id``; old payloads keep
+decoding to the old class.
+"""
+from typing import Any, ClassVar, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Event(BaseModel):
+    """Base class for event payloads.
+
+    Class attributes:
+        event_type: Name subscribers filter on (Pub/Sub ``event_type`` attribute)
+        schema_id: Registry id, unique across all schemas and versions
+        version: Schema version
+        entity: Payload field identifying the entity the event is about
+        coalesce: Whether rapid repeats for one entity merge before sending
+        attributes: Payload fields also sent as Pub/Sub attributes
+        local_only: Delivered to in-process subscribers only, never sent
+    """
+    model_config = ConfigDict(frozen=True)
+
+    event_type: ClassVar[str]
+    schema_id: ClassVar[int]
+    version: ClassVar[int] = 1
+    entity: ClassVar[Optional[str]] = None
+    coalesce: ClassVar[bool] = False
+    attributes: ClassVar[Tuple[str, ...]] = ()
+    local_only: ClassVar[bool] = False
+
+    @property
+    def name(self) -> str:
+        """Event type of this instance (families derive it from a field)."""
+        return self.event_type
+
+    @property
+    def entity_id(self) -> Optional[str]:
+        return getattr(self, self.entity) if self.entity else None
+
+
+_SCHEMAS: Dict[int, Type[Event]] = {}
+
+
+def register(cls: Type[Event]) -> Type[Event]:
+    """Class decorator adding an event schema to the registry."""
+    existing = _SCHEMAS.get(cls.schema_id)
+    if existing is not None and existing is not cls:
+        raise ValueError(f"schema_id {cls.schema_id} already used by {existing.__name__}")
+    _SCHEMAS[cls.schema_id] = cls
+    return cls
+
+
+def schema_for(schema_id: int) -> Type[Event]:
+    """Look up a registered schema.
+
+    Raises:
+        KeyError: If no schema has this id
+    """
+    return _SCHEMAS[schema_id]
+
+
+# ============================================================================
+# Booking events
+# ============================================================================
+
+@register
+class BookingCreated(Event):
+    """A booking was made."""
+    event_type: ClassVar[str] = "booking.created"
+    schema_id: ClassVar[int] = 1
+    entity: ClassVar[Optional[str]] = "booking_id"
+
+    booking_id: str
+    customer_id: Optional[str] = None
+    service_id: Optional[str] = None
+    staff_id: Optional[str] = None
+    start_time: Optional[str] = None
+    status: str = "pending"
+
+
+@register
+class BookingUpdated(Event):
+    """Fields of a booking changed; only the changed fields are set.
+
+    Rapid updates to one booking (check-in, start, upsell) are merged into
+    one event per flush window.
+    """
+    event_type: ClassVar[str] = "booking.updated"
+    schema_id: ClassVar[int] = 2
+    entity: ClassVar[Optional[str]] = "booking_id"
+    coalesce: ClassVar[bool] = True
+
+    booking_id: str
+    customer_id: Optional[str] = None
+    staff_id: Optional[str] = None
+    start_time: Optional[str] = None
+    status: Optional[str] = None
+    checked_in_by: Optional[str] = None
+    started_by: Optional[str] = None
+    upsell_service_id: Optional[str] = None
+    upsell_staff_id: Optional[str] = None
+    added_by: Optional[str] = None
+
+
+@register
+class BookingCancelled(Event):
+    """A booking was cancelled."""
+    event_type: ClassVar[str] = "booking.cancelled"
+    schema_id: ClassVar[int] = 3
+    entity: ClassVar[Optional[str]] = "booking_id"
+
+    booking_id: str
+    customer_id: Optional[str] = None
+    staff_id: Optional[str] = None
+    start_time: Optional[str] = None
+    status: str = "cancelled"
+    reason: Optional[str] = None
+
+
+@register
+class BookingCompleted(Event):
+    """A booked service was completed."""
+    event_type: ClassVar[str] = "booking.completed"
+    schema_id: ClassVar[int] = 4
+    entity: ClassVar[Optional[str]] = "booking_id"
+
+    booking_id: str
+    status: str = "completed"
+    completed_by: Optional[str] = None
+    rating: Optional[int] = None
+    feedback: Optional[str] = None
+
+
+# ============================================================================
+# Autonomous agent events
+# ============================================================================
+
+@register
+class AutonomousDecision(Event):
+    """An autonomous agent made or resolved a decision."""
+    event_type: ClassVar[str] = "AUTONOMOUS_DECISION"
+    schema_id: ClassVar[int] = 20
+    entity: ClassVar[Optional[str]] = "decision_id"
+    attributes: ClassVar[Tuple[str, ...]] = ("agent_name", "decision_type")
+
+    decision_id: str
+    agent_name: str
+    decision_type: str
+    action: str
+    outcome: str
+    revenue_impact: Optional[float] = None
+
+
+@register
+class GapEvent(Event):
+    """Schedule gap lifecycle (GAP_DETECTED, GAP_FILLED, GAP_EXPIRED)."""
+    event_type: ClassVar[str] = "GAP"
+    schema_id: ClassVar[int] = 21
+    entity: ClassVar[Optional[str]] = "gap_id"
+
+    event: str
+    gap_id: str
+    staff_id: str
+    duration_minutes: int
+    potential_revenue: float
+
+    @property
+    def name(self) -> str:
+        return f"GAP_{self.event.upper()}"
+
+
+@register
+class OutreachEvent(Event):
+    """Customer outreach lifecycle (OUTREACH_SENT, OUTREACH_RESPONDED, ...)."""
+    event_type: ClassVar[str] = "OUTREACH"
+    schema_id: ClassVar[int] = 22
+    entity: ClassVar[Optional[str]] = "outreach_id"
+
+    event: str
+    outreach_id: str
+    customer_id: str
+    channel: str
+    response_action: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return f"OUTREACH_{self.event.upper()}"
+
+
+@register
+class ApprovalEvent(Event):
+    """Approval workflow (APPROVAL_REQUESTED, APPROVAL_APPROVED, ...)."""
+    event_type: ClassVar[str] = "APPROVAL"
+    schema_id: ClassVar[int] = 23
+    entity: ClassVar[Optional[str]] = "approval_id"
+
+    event: str
+    approval_id: str
+    decision_id: str
+    responded_by: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return f"APPROVAL_{self.event.upper()}"
+
+
+# ============================================================================
+# In-process events
+# ============================================================================
+
+@register
+class DocumentChanged(Event):
+    """A Firestore document was created, updated or deleted.
+
+    Published by the models after every write for in-process subscribers
+    (availability cache, analytics rollups); ``before`` is None on create
+    and ``after`` is None on delete.
+    """
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    event_type: ClassVar[str] = "document.changed"
+    schema_id: ClassVar[int] = 100
+    local_only: ClassVar[bool] = True
+
+    collection: str
+    document_id: str
+    before: Optional[Dict[str, Any]] = None
+    after: Optional[Dict[str, Any]] = None
@@ -4,16 +4,13 @@ Provides business logic for autonomous agent operations:
 - Gap detection and fill orchestration
 - Outreach coordination
 - Approval workflow management
-- Event publishing
 """
 from app.services.autonomous.gap_fill_service import GapFillService
 from app.services.autonomous.outreach_service import OutreachService
 from app.services.autonomous.approval_service import ApprovalService
-from app.services.autonomous.event_publisher import EventPublisher
 
 __all__ = [
     "GapFillService",
     "OutreachService",
     "ApprovalService",
-    "EventPublisher",
 ]
@@ -15,7 +15,8 @@ from app.models.autonomous import (
     AuditEventType,
     AuditSeverity,
 )
-from app.services.autonomous.event_publisher import EventPublisher
+from app.schemas.events import ApprovalEvent
+from app.services.event_bus import get_event_bus
 
 logger = structlog.get_logger()
 
@@ -36,7 +37,7 @@ class ApprovalService:
         self.approval_model = ApprovalModel()
         self.decision_model = AutonomousDecisionModel()
         self.audit_model = AuditLogModel()
-        self.event_publisher = EventPublisher()
+        self.event_bus = get_event_bus()
     
     async def create_approval_request(
         self,
@@ -94,11 +95,13 @@ class ApprovalService:
         )
         
         # Publish event
-        await self.event_publisher.publish_approval_event(
+        await self.event_bus.publish(
+            ApprovalEvent(
+                event="requested",
+                approval_id=approval["id"],
+                decision_id=decision_id,
+            ),
             salon_id=salon_id,
-            approval_id=approval["id"],
-            decision_id=decision_id,
-            event="requested",
         )
         
         logger.info(
@@ -181,12 +184,14 @@ class ApprovalService:
         )
         
         # Publish event
-        await self.event_publisher.publish_approval_event(
+        await self.event_bus.publish(
+            ApprovalEvent(
+                event=event,
+                approval_id=approval_id,
+                decision_id=decision_id,
+                responded_by=user_id,
+            ),
             salon_id=salon_id,
-            approval_id=approval_id,
-            decision_id=decision_id,
-            event=event,
-            responded_by=user_id,
         )
         
         logger.info(
@@ -21,7 +21,8 @@ from app.models.autonomous import (
     OutreachType,
     OutreachChannel,
 )
-from app.services.autonomous.event_publisher import EventPublisher
+from app.schemas.events import AutonomousDecision
+from app.services.event_bus import get_event_bus
 
 logger = structlog.get_logger()
 
@@ -42,7 +43,7 @@ class GapFillService:
         self.agent_model = AgentStateModel()
         self.customer_model = CustomerScoreModel()
         self.outreach_model = OutreachModel()
-        self.event_publisher = EventPublisher()
+        self.event_bus = get_event_bus()
     
     async def detect_gaps(
         self,
@@ -277,13 +278,15 @@ class GapFillService:
         )
         
         # Publish event
-        await self.event_publisher.publish_decision_event(
+        await self.event_bus.publish(
+            AutonomousDecision(
+                decision_id=decision["id"],
+                agent_name="gap_fill_agent",
+                decision_type="gap_fill",
+                action="outreach_initiated",
+                outcome="pending",
+            ),
             salon_id=salon_id,
-            decision_id=decision["id"],
-            agent_name="gap_fill_agent",
-            decision_type="gap_fill",
-            action="outreach_initiated",
-            outcome="pending",
         )
         
         logger.info(
@@ -347,14 +350,16 @@ class GapFillService:
             )
             
             # Publish event
-            await self.event_publisher.publish_decision_event(
+            await self.event_bus.publish(
+                AutonomousDecision(
+                    decision_id=decision["id"],
+                    agent_name="gap_fill_agent",
+                    decision_type="gap_fill",
+                    action="gap_filled",
+                    outcome="success",
+                    revenue_impact=revenue,
+                ),
                 salon_id=salon_id,
-                decision_id=decision["id"],
-                agent_name="gap_fill_agent",
-                decision_type="gap_fill",
-                action="gap_filled",
-                outcome="success",
-                revenue_impact=revenue,
             )
         
         logger.info(
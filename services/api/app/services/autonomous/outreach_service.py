@@ -14,7 +14,8 @@ from app.models.autonomous import (
     AutonomousDecisionModel,
     AgentStateModel,
 )
-from app.services.autonomous.event_publisher import EventPublisher
+from app.schemas.events import OutreachEvent
+from app.services.event_bus import get_event_bus
 
 logger = structlog.get_logger()
 
@@ -38,7 +39,7 @@ class OutreachService:
         self.outreach_model = OutreachModel()
         self.decision_model = AutonomousDecisionModel()
         self.agent_model = AgentStateModel()
-        self.event_publisher = EventPublisher()
+        self.event_bus = get_event_bus()
     
     async def can_send_outreach(
         self,
@@ -199,12 +200,14 @@ class OutreachService:
             })
         
         # Publish event
-        await self.event_publisher.publish_outreach_event(
+        await self.event_bus.publish(
+            OutreachEvent(
+                event=status.value,
+                outreach_id=outreach_id,
+                customer_id=outreach["customer_id"],
+                channel=outreach["channel"],
+            ),
             salon_id=outreach["salon_id"],
-            outreach_id=outreach_id,
-            customer_id=outreach["customer_id"],
-            channel=outreach["channel"],
-            event=status.value,
         )
         
         return updated
@@ -250,13 +253,15 @@ class OutreachService:
                 )
         
         # Publish event
-        await self.event_publisher.publish_outreach_event(
+        await self.event_bus.publish(
+            OutreachEvent(
+                event="responded",
+                outreach_id=outreach_id,
+                customer_id=outreach["customer_id"],
+                channel=outreach["channel"],
+                response_action=action,
+            ),
             salon_id=outreach["salon_id"],
-            outreach_id=outreach_id,
-            customer_id=outreach["customer_id"],
-            channel=outreach["channel"],
-            event="responded",
-            response_action=action,
         )
         
         logger.info(
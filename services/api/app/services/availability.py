@@ -0,0 +1,865 @@
+"""Availability engine for booking slot generation and conflict checks.
+
+Slot searches used to re-query every booking for a staff member and compare
+minute offsets linearly for each candidate time. The engine instead loads a
+salon's day once - salon hours, active staff, shifts, bookings and resources -
+and builds sorted interval indexes over staff and resource occupancy. Free
+windows are derived per staff member and intersected with resource capacity,
+so "all free slots of duration D for service S" is answered in a single pass
+over the eligible staff. ``OccupancyGrid`` lays the same bookings out as
+per-resource slot bitmaps for grid-style availability views.
+
+Day schedules are cached in-process for a short TTL and invalidated by
+booking and shift writes (a ``DocumentChanged`` subscriber on the event bus). Conflict checks that guard a write should pass
+``refresh=True`` so they never act on another instance's stale view.
+"""
+import asyncio
+import re
+import time as time_module
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import structlog
+
+from app.schemas.events import DocumentChanged
+from app.services.event_bus import EventEnvelope, get_event_bus
+
+logger = structlog.get_logger()
+
+Interval = Tuple[int, int]
+
+# Bookings in these states hold staff and resource time
+ACTIVE_BOOKING_STATUSES = frozenset({"pending", "confirmed", "checked_in", "in_progress"})
+
+# Resources in these states cannot take bookings
+UNAVAILABLE_RESOURCE_STATUSES = frozenset({"maintenance", "blocked"})
+
+DEFAULT_SLOT_STEP_MINUTES = 15
+DEFAULT_SCHEDULE_TTL_SECONDS = 60
+DEFAULT_MAX_SCHEDULES = 512
+
+# Used when a salon has no operating hours configured (matches DayHours)
+DEFAULT_OPEN_MINUTES = 9 * 60
+DEFAULT_CLOSE_MINUTES = 21 * 60
+
+MINUTES_PER_DAY = 24 * 60
+
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+# ============================================================================
+# Time helpers
+# ============================================================================
+
+def to_minutes(value: Any) -> Optional[int]:
+    """Convert a time, datetime or ``HH:MM[:SS]`` string to minutes past midnight."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.hour * 60 + value.minute
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    if isinstance(value, str):
+        try:
+            # Accept both bare times and full ISO datetimes
+            parsed = time.fromisoformat(value[11:] if "T" in value else value)
+        except ValueError:
+            return None
+        return parsed.hour * 60 + parsed.minute
+    return None
+
+
+def from_minutes(minutes: int) -> time:
+    """Convert minutes past midnight to a time, clamped to the same day."""
+    minutes = max(0, min(minutes, MINUTES_PER_DAY - 1))
+    return time(minutes // 60, minutes % 60)
+
+
+def subtract(windows: List[Interval], busy: List[Interval]) -> List[Interval]:
+    """Remove sorted, disjoint busy intervals from sorted, disjoint windows."""
+    result: List[Interval] = []
+    index = 0
+    for start, end in windows:
+        # Skip busy blocks that finish before this window
+        while index < len(busy) and busy[index][1] <= start:
+            index += 1
+        cursor = start
+        scan = index
+        while scan < len(busy) and busy[scan][0] < end:
+            busy_start, busy_end = busy[scan]
+            if busy_start > cursor:
+                result.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            scan += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+def intersect(first: List[Interval], second: List[Interval]) -> List[Interval]:
+    """Intersect two sorted lists of disjoint intervals."""
+    result: List[Interval] = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        start = max(first[i][0], second[j][0])
+        end = min(first[i][1], second[j][1])
+        if start < end:
+            result.append((start, end))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def merge(intervals: Iterable[Interval]) -> List[Interval]:
+    """Merge overlapping or touching intervals into a sorted disjoint list."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def saturated(intervals: Iterable[Interval], capacity: int) -> List[Interval]:
+    """Return the periods where at least ``capacity`` intervals overlap."""
+    events: List[Tuple[int, int]] = []
+    for start, end in intervals:
+        events.append((start, 1))
+        events.append((end, -1))
+    # Ends sort before starts at the same minute so back-to-back is allowed
+    events.sort()
+
+    result: List[Interval] = []
+    depth = 0
+    opened: Optional[int] = None
+    for minute, delta in events:
+        depth += delta
+        if depth >= capacity and opened is None:
+            opened = minute
+        elif depth < capacity and opened is not None:
+            if minute > opened:
+                result.append((opened, minute))
+            opened = None
+    return merge(result)
+
+
+# ============================================================================
+# Interval index
+# ============================================================================
+
+class IntervalIndex:
+    """Sorted interval index answering overlap queries in O(log n + k).
+
+    Intervals are kept sorted by start alongside a running maximum of their
+    end points, so a query bisects to the last interval starting before the
+    query end and walks back only while earlier intervals can still reach
+    the query start.
+    """
+
+    __slots__ = ("_starts", "_ends", "_max_end", "_refs", "_merged")
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, Optional[str]]] = ()):
+        ordered = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self._starts = [start for start, _, _ in ordered]
+        self._ends = [end for _, end, _ in ordered]
+        self._refs = [ref for _, _, ref in ordered]
+        self._max_end: List[int] = []
+        running = -1
+        for end in self._ends:
+            running = max(running, end)
+            self._max_end.append(running)
+        self._merged: Optional[List[Interval]] = None
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def overlapping(
+        self,
+        start: int,
+        end: int,
+        exclude: Optional[str] = None,
+    ) -> List[Tuple[int, int, Optional[str]]]:
+        """Return intervals overlapping [start, end), latest start first."""
+        found = []
+        index = bisect_left(self._starts, end) - 1
+        while index >= 0 and self._max_end[index] > start:
+            if self._ends[index] > start and (exclude is None or self._refs[index] != exclude):
+                found.append((self._starts[index], self._ends[index], self._refs[index]))
+            index -= 1
+        return found
+
+    def merged(self) -> List[Interval]:
+        """Occupied time as a sorted list of disjoint intervals."""
+        if self._merged is None:
+            self._merged = merge(zip(self._starts, self._ends, strict=True))
+        return self._merged
+
+    def spans(self) -> List[Interval]:
+        """All intervals in start order."""
+        return list(zip(self._starts, self._ends, strict=True))
+
+
+# ============================================================================
+# Day schedule
+# ============================================================================
+
+@dataclass
+class FreeSlot:
+    """A bookable start time and the staff who can take it."""
+    start: int
+    end: int
+    staff_ids: List[str]
+
+    @property
+    def start_time(self) -> time:
+        return from_minutes(self.start)
+
+    @property
+    def end_time(self) -> time:
+        return from_minutes(self.end)
+
+
+def _first(data: Dict[str, Any], *paths: str) -> Any:
+    """Return the first present value among dotted field paths."""
+    for path in paths:
+        value: Any = data
+        for part in path.split("."):
+            if not isinstance(value, dict) or part not in value:
+                value = None
+                break
+            value = value[part]
+        if value is not None:
+            return value
+    return None
+
+
+def _business_hours(salon: Optional[Dict[str, Any]], day: date) -> List[Interval]:
+    """Opening hours for the weekday, minus the salon's break."""
+    hours = _first(salon or {}, f"operating_hours.{_WEEKDAYS[day.weekday()]}")
+    if not isinstance(hours, dict):
+        return [(DEFAULT_OPEN_MINUTES, DEFAULT_CLOSE_MINUTES)]
+    if hours.get("is_closed"):
+        return []
+
+    open_at = to_minutes(hours.get("open_time"))
+    close_at = to_minutes(hours.get("close_time"))
+    open_at = DEFAULT_OPEN_MINUTES if open_at is None else open_at
+    close_at = DEFAULT_CLOSE_MINUTES if close_at is None else close_at
+    if open_at >= close_at:
+        return []
+
+    windows = [(open_at, close_at)]
+    break_start = to_minutes(hours.get("break_start"))
+    break_end = to_minutes(hours.get("break_end"))
+    if break_start is not None and break_end is not None and break_start < break_end:
+        windows = subtract(windows, [(break_start, break_end)])
+    return windows
+
+
+def _booking_span(booking: Dict[str, Any]) -> Optional[Interval]:
+    """Occupied minutes of a booking document."""
+    start = to_minutes(_first(booking, "start_time", "time.start_time"))
+    if start is None:
+        return None
+    end = to_minutes(_first(booking, "end_time", "time.end_time"))
+    if end is None or end <= start:
+        duration = _first(booking, "service_duration", "service.duration_minutes") or 0
+        end = start + int(duration)
+    if end <= start:
+        return None
+    return start, end
+
+
+@dataclass
+class DaySchedule:
+    """In-memory occupancy index for one salon on one day.
+
+    Built once from raw documents by ``DaySchedule.build`` and then queried
+    without further I/O.
+    """
+
+    salon_id: str
+    day: date
+    business_hours: List[Interval]
+    staff_hours: Dict[str, List[Interval]]
+    staff_skills: Dict[str, Set[str]]
+    staff_bookings: Dict[str, IntervalIndex]
+    resource_types: Dict[str, str]
+    resource_capacity: Dict[str, int]
+    resource_bookings: Dict[str, IntervalIndex]
+    built_at: float = field(default_factory=time_module.monotonic)
+    _staff_free: Dict[str, List[Interval]] = field(default_factory=dict, repr=False)
+    _resource_free: Dict[str, Optional[List[List[Interval]]]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def build(
+        cls,
+        salon_id: str,
+        day: date,
+        salon: Optional[Dict[str, Any]],
+        staff: Iterable[Tuple[str, Dict[str, Any]]],
+        shifts: Iterable[Dict[str, Any]],
+        bookings: Iterable[Tuple[str, Dict[str, Any]]],
+        resources: Iterable[Tuple[str, Dict[str, Any]]],
+    ) -> "DaySchedule":
+        """Build a schedule from raw Firestore documents.
+
+        Staff work their shifts for the day. When the salon has no shifts at
+        all for the day, every active staff member is assumed to work the
+        salon's business hours.
+
+        Args:
+            salon_id: Salon ID
+            day: Day being indexed
+            salon: Salon document (for operating hours), if any
+            staff: (staff_id, document) pairs
+            shifts: Shift documents for the day
+            bookings: (booking_id, document) pairs for the day
+            resources: (resource_id, document) pairs
+
+        Returns:
+            Indexed day schedule
+        """
+        business_hours = _business_hours(salon, day)
+
+        staff_skills: Dict[str, Set[str]] = {}
+        for staff_id, data in staff:
+            if data.get("is_active", True) is False:
+                continue
+            skills = _first(data, "skills.skills") or []
+            staff_skills[staff_id] = {
+                skill.get("service_id") for skill in skills if isinstance(skill, dict)
+            }
+
+        shift_windows: Dict[str, List[Interval]] = {}
+        has_shifts = False
+        for shift in shifts:
+            if shift.get("is_off_day") or shift.get("status") == "cancelled":
+                continue
+            has_shifts = True
+            start = to_minutes(shift.get("start_time"))
+            end = to_minutes(shift.get("end_time"))
+            staff_id = shift.get("staff_id")
+            if start is None or end is None or start >= end or staff_id not in staff_skills:
+                continue
+            shift_windows.setdefault(staff_id, []).append((start, end))
+
+        if has_shifts:
+            staff_hours = {staff_id: merge(windows) for staff_id, windows in shift_windows.items()}
+        else:
+            staff_hours = {staff_id: list(business_hours) for staff_id in staff_skills}
+
+        resource_types: Dict[str, str] = {}
+        resource_capacity: Dict[str, int] = {}
+        day_key = day.isoformat()
+        for resource_id, data in resources:
+            if data.get("is_active", True) is False:
+                continue
+            if data.get("status") in UNAVAILABLE_RESOURCE_STATUSES:
+                continue
+            if day_key in (data.get("blocked_dates") or []):
+                continue
+            resource_types[resource_id] = _first(data, "resource_type", "type") or "any"
+            resource_capacity[resource_id] = int(
+                _first(data, "capacity.max_concurrent_services") or 1
+            )
+
+        staff_spans: Dict[str, List[Tuple[int, int, Optional[str]]]] = {}
+        resource_spans: Dict[str, List[Tuple[int, int, Optional[str]]]] = {}
+        for booking_id, data in bookings:
+            if data.get("status") not in ACTIVE_BOOKING_STATUSES:
+                continue
+            span = _booking_span(data)
+            if span is None:
+                continue
+            if data.get("staff_id"):
+                staff_spans.setdefault(data["staff_id"], []).append((*span, booking_id))
+            if data.get("resource_id"):
+                resource_spans.setdefault(data["resource_id"], []).append((*span, booking_id))
+
+        return cls(
+            salon_id=salon_id,
+            day=day,
+            business_hours=business_hours,
+            staff_hours=staff_hours,
+            staff_skills=staff_skills,
+            staff_bookings={k: IntervalIndex(v) for k, v in staff_spans.items()},
+            resource_types=resource_types,
+            resource_capacity=resource_capacity,
+            resource_bookings={k: IntervalIndex(v) for k, v in resource_spans.items()},
+        )
+
+    def eligible_staff(
+        self,
+        service_id: Optional[str] = None,
+        staff_id: Optional[str] = None,
+    ) -> List[str]:
+        """Staff who work today and can perform the service.
+
+        If no staff member lists the service as a skill, the salon has not
+        configured skills for it and every working staff member is eligible.
+        """
+        if staff_id is not None:
+            return [staff_id] if staff_id in self.staff_hours else []
+
+        working = sorted(self.staff_hours)
+        if service_id is None:
+            return working
+        skilled = [s for s in working if service_id in self.staff_skills.get(s, ())]
+        if skilled:
+            return skilled
+        if any(service_id in skills for skills in self.staff_skills.values()):
+            # Skilled staff exist but none of them work today
+            return []
+        return working
+
+    def staff_free(self, staff_id: str) -> List[Interval]:
+        """Free windows of a staff member (shift time minus bookings)."""
+        if staff_id not in self._staff_free:
+            busy = self.staff_bookings.get(staff_id)
+            hours = self.staff_hours.get(staff_id, [])
+            self._staff_free[staff_id] = subtract(hours, busy.merged()) if busy else hours
+        return self._staff_free[staff_id]
+
+    def resource_free(self, resource_type: Optional[str]) -> Optional[List[List[Interval]]]:
+        """Free windows of each resource of the type, one list per resource.
+
+        Windows are kept per resource because a booking needs one resource
+        for its whole duration; it cannot move between chairs halfway.
+
+        Returns None when the type is unconstrained - ``any``, or a type the
+        salon has not modelled as resources.
+        """
+        if not resource_type or resource_type == "any":
+            return None
+        if resource_type not in self._resource_free:
+            free: List[List[Interval]] = []
+            matching = [r for r, t in self.resource_types.items() if t == resource_type]
+            for resource_id in matching:
+                busy = self.resource_bookings.get(resource_id)
+                full = saturated(busy.spans(), self.resource_capacity[resource_id]) if busy else []
+                free.append(subtract(self.business_hours, full))
+            self._resource_free[resource_type] = free if matching else None
+        return self._resource_free[resource_type]
+
+    def find_slots(
+        self,
+        duration_minutes: int,
+        service_id: Optional[str] = None,
+        staff_id: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        step_minutes: int = DEFAULT_SLOT_STEP_MINUTES,
+    ) -> List[FreeSlot]:
+        """All free start times for a service across eligible staff.
+
+        Args:
+            duration_minutes: Length of the appointment
+            service_id: Service to match against staff skills
+            staff_id: Restrict to one staff member
+            resource_type: Resource type the service needs
+            step_minutes: Slot grid granularity
+
+        Returns:
+            Slots in start order, each listing the staff free for it
+        """
+        if duration_minutes <= 0 or step_minutes <= 0:
+            return []
+
+        resource_windows = self.resource_free(resource_type)
+        by_start: Dict[int, List[str]] = {}
+
+        for candidate in self.eligible_staff(service_id, staff_id):
+            staff_windows = self.staff_free(candidate)
+            if resource_windows is None:
+                window_sets = [staff_windows]
+            else:
+                window_sets = [intersect(staff_windows, free) for free in resource_windows]
+            starts: Set[int] = set()
+            for windows in window_sets:
+                for start, end in windows:
+                    # Align to the slot grid
+                    first = -(-start // step_minutes) * step_minutes
+                    starts.update(range(first, end - duration_minutes + 1, step_minutes))
+            for slot_start in starts:
+                by_start.setdefault(slot_start, []).append(candidate)
+
+        return [
+            FreeSlot(start=start, end=start + duration_minutes, staff_ids=by_start[start])
+            for start in sorted(by_start)
+        ]
+
+    def conflicts(
+        self,
+        staff_id: str,
+        start: int,
+        end: int,
+        exclude_booking_id: Optional[str] = None,
+    ) -> List[Tuple[int, int, Optional[str]]]:
+        """Bookings of a staff member overlapping [start, end)."""
+        index = self.staff_bookings.get(staff_id)
+        if index is None:
+            return []
+        return index.overlapping(start, end, exclude=exclude_booking_id)
+
+    def is_available(
+        self,
+        start: int,
+        end: int,
+        staff_id: Optional[str] = None,
+        service_id: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        exclude_booking_id: Optional[str] = None,
+    ) -> bool:
+        """Whether [start, end) can be booked.
+
+        With a staff member the slot must fall in their working hours and not
+        clash with their bookings; without one, any eligible staff member
+        will do.
+        """
+        resource_windows = self.resource_free(resource_type)
+        if resource_windows is not None and not any(
+            _covers(free, start, end) for free in resource_windows
+        ):
+            return False
+
+        if staff_id is None:
+            if not self.staff_skills:
+                # Salon without staff records: only business hours apply
+                return _covers(self.business_hours, start, end)
+            candidates = self.eligible_staff(service_id)
+        else:
+            candidates = [staff_id]
+
+        for candidate in candidates:
+            hours = self.staff_hours.get(candidate)
+            if hours and _covers(hours, start, end) and not self.conflicts(
+                candidate, start, end, exclude_booking_id
+            ):
+                return True
+        return False
+
+
+def _covers(windows: List[Interval], start: int, end: int) -> bool:
+    """Whether a single window contains [start, end)."""
+    index = bisect_left(windows, (start + 1,)) - 1
+    return index >= 0 and windows[index][0] <= start and windows[index][1] >= end
+
+
+# ============================================================================
+# Occupancy grid
+# ============================================================================
+
+# Count stored for slots outside business hours or on blocked days
+_CLOSED = 255
+
+# translate() table adding one booking to a slot count, saturating
+_INCREMENT = bytes(min(count + 1, _CLOSED) for count in range(256))
+
+# Maximal runs of free (0) or full (1) slots in a busy mask
+_RUN = re.compile(rb"\x00+|\x01+")
+
+
+@lru_cache(maxsize=32)
+def _busy_table(capacity: int) -> bytes:
+    """translate() table mapping slot counts to 0 (free) or 1 (full)."""
+    capacity = max(1, min(capacity, _CLOSED - 1))
+    return bytes(0 if count < capacity else 1 for count in range(256))
+
+
+class OccupancyGrid:
+    """Per-resource booking counts on a fixed slot grid for one day.
+
+    Each resource row is a ``bytearray`` with one byte per slot holding the
+    number of bookings overlapping it. Rows are filled with slice
+    ``translate`` calls and free runs are found with a compiled regex, so
+    the per-slot work runs in C and a whole salon is populated from one
+    bookings fetch. Callers work run by run (``runs``), not slot by slot.
+    """
+
+    def __init__(self, business_hours: List[Interval], slot_minutes: int):
+        if slot_minutes <= 0:
+            raise ValueError("slot_minutes must be positive")
+        self.slot_minutes = slot_minutes
+        if business_hours:
+            self.open_at = business_hours[0][0]
+            self.close_at = business_hours[-1][1]
+        else:
+            self.open_at = self.close_at = 0
+        self.slot_count = -(-(self.close_at - self.open_at) // slot_minutes)
+
+        self._template = bytearray(self.slot_count)
+        for start, end in subtract([(self.open_at, self.close_at)], business_hours):
+            first, last = self._slot_range(start, end)
+            self._template[first:last] = bytes([_CLOSED]) * (last - first)
+
+        self._rows: Dict[str, bytearray] = {}
+        self._capacity: Dict[str, int] = {}
+
+    @classmethod
+    def from_schedule(
+        cls,
+        schedule: DaySchedule,
+        resources: Iterable[Tuple[str, int, bool]],
+        slot_minutes: int,
+    ) -> "OccupancyGrid":
+        """Build a grid for resources from a day schedule's bookings.
+
+        Args:
+            schedule: Day schedule holding the day's bookings
+            resources: (resource_id, capacity, blocked) triples
+            slot_minutes: Slot granularity
+
+        Returns:
+            Populated grid
+        """
+        grid = cls(schedule.business_hours, slot_minutes)
+        for resource_id, capacity, blocked in resources:
+            bookings = schedule.resource_bookings.get(resource_id)
+            grid.add(resource_id, capacity, bookings.spans() if bookings else (), blocked)
+        return grid
+
+    def _slot_range(self, start: int, end: int) -> Tuple[int, int]:
+        """Indexes of the slots overlapping [start, end)."""
+        first = max(0, (start - self.open_at) // self.slot_minutes)
+        last = min(self.slot_count, -(-(end - self.open_at) // self.slot_minutes))
+        return first, max(first, last)
+
+    def add(
+        self,
+        resource_id: str,
+        capacity: int,
+        spans: Iterable[Interval],
+        blocked: bool = False,
+    ) -> None:
+        """Add a resource row and mark its bookings."""
+        if blocked:
+            row = bytearray([_CLOSED]) * self.slot_count
+        else:
+            row = bytearray(self._template)
+            for start, end in spans:
+                first, last = self._slot_range(start, end)
+                if first < last:
+                    row[first:last] = row[first:last].translate(_INCREMENT)
+        self._rows[resource_id] = row
+        self._capacity[resource_id] = capacity
+
+    def busy_mask(self, resource_id: str) -> bytes:
+        """One byte per slot: 0 if the resource has spare capacity, else 1."""
+        return bytes(self._rows[resource_id]).translate(_busy_table(self._capacity[resource_id]))
+
+    def slot_bounds(self, index: int) -> Interval:
+        """Start and end minute of a slot."""
+        start = self.open_at + index * self.slot_minutes
+        return start, min(start + self.slot_minutes, self.close_at)
+
+    def runs(self, resource_id: str) -> List[Tuple[int, int, bool]]:
+        """Maximal runs of free or full slots as (first, stop, busy) slot indexes."""
+        return [
+            (match.start(), match.end(), match.group()[0] == 1)
+            for match in _RUN.finditer(self.busy_mask(resource_id))
+        ]
+
+    def available_count(self, resource_id: str) -> int:
+        """Number of free slots of a resource."""
+        return self.busy_mask(resource_id).count(0)
+
+    def free_runs(self, resource_id: str, min_minutes: int = 0) -> List[Interval]:
+        """Contiguous free time of a resource, at least ``min_minutes`` long."""
+        runs = []
+        for first, stop, busy in self.runs(resource_id):
+            if busy:
+                continue
+            start = self.slot_bounds(first)[0]
+            end = self.slot_bounds(stop - 1)[1]
+            if end - start >= min_minutes:
+                runs.append((start, end))
+        return runs
+
+
+# ============================================================================
+# Engine
+# ============================================================================
+
+class AvailabilityEngine:
+    """Process-wide cache of day schedules.
+
+    Schedules are loaded with one query per collection, shared between
+    concurrent callers and dropped after ``ttl_seconds`` or on invalidation.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_SCHEDULE_TTL_SECONDS,
+        max_schedules: int = DEFAULT_MAX_SCHEDULES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_schedules = max_schedules
+        self._schedules: "OrderedDict[Tuple[str, str], DaySchedule]" = OrderedDict()
+        self._loading: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._generation: Dict[Tuple[str, str], int] = {}
+
+    async def get_schedule(
+        self,
+        salon_id: str,
+        day: date,
+        refresh: bool = False,
+    ) -> DaySchedule:
+        """Return the indexed schedule for a salon day.
+
+        Args:
+            salon_id: Salon ID
+            day: Day to index
+            refresh: Bypass the cache and reload from Firestore
+
+        Returns:
+            Day schedule
+        """
+        key = (salon_id, day.isoformat())
+        if not refresh:
+            schedule = self._schedules.get(key)
+            if schedule and time_module.monotonic() - schedule.built_at < self.ttl_seconds:
+                self._schedules.move_to_end(key)
+                return schedule
+            pending = self._loading.get(key)
+            if pending is not None:
+                return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        if not refresh:
+            self._loading[key] = future
+        generation = self._generation.get(key, 0)
+        try:
+            schedule = await self._load(salon_id, day)
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so a failure nobody waited on is not logged
+            future.exception()
+            raise
+        else:
+            # A write during the load makes this snapshot stale; serve it
+            # but do not cache it
+            if self._generation.get(key, 0) == generation:
+                self._store(key, schedule)
+            future.set_result(schedule)
+            return schedule
+        finally:
+            if self._loading.get(key) is future:
+                del self._loading[key]
+            if not future.done():
+                # Leader was cancelled; followers are cancelled with it
+                future.cancel()
+
+    def invalidate(self, salon_id: str, day: Optional[date] = None) -> None:
+        """Drop cached schedules for a salon day, or every day of a salon."""
+        if day is not None:
+            keys = [(salon_id, day.isoformat())]
+        else:
+            keys = [key for key in self._schedules if key[0] == salon_id]
+        for key in keys:
+            self._schedules.pop(key, None)
+            self._generation[key] = self._generation.get(key, 0) + 1
+
+    def invalidate_document(self, *documents: Optional[Dict[str, Any]]) -> None:
+        """Invalidate the days touched by booking or shift documents."""
+        for data in documents:
+            if not data or not data.get("salon_id"):
+                continue
+            day = _first(data, "booking_date", "shift_date", "date")
+            if isinstance(day, datetime):
+                day = day.date()
+            if isinstance(day, str):
+                try:
+                    day = date.fromisoformat(day[:10])
+                except ValueError:
+                    day = None
+            self.invalidate(data["salon_id"], day if isinstance(day, date) else None)
+
+    def clear(self) -> None:
+        """Drop every cached schedule."""
+        self._schedules.clear()
+        self._generation.clear()
+
+    def _store(self, key: Tuple[str, str], schedule: DaySchedule) -> None:
+        self._schedules[key] = schedule
+        self._schedules.move_to_end(key)
+        while len(self._schedules) > self.max_schedules:
+            self._schedules.popitem(last=False)
+
+    async def _load(self, salon_id: str, day: date) -> DaySchedule:
+        """Fetch the salon day from Firestore and index it."""
+        # Imported here: the models import this module to invalidate on writes
+        from app.models import BookingModel, ResourceModel, SalonModel, ShiftModel, StaffModel
+
+        day_key = day.isoformat()
+        booking_model = BookingModel()
+        shift_model = ShiftModel()
+
+        async def documents(query) -> List[Tuple[str, Dict[str, Any]]]:
+            return [(doc.id, doc.to_dict() or {}) async for doc in query.stream()]
+
+        async def salon_document() -> Optional[Dict[str, Any]]:
+            snapshot = await SalonModel().collection.document(salon_id).get()
+            return snapshot.to_dict() if snapshot.exists else None
+
+        # Documents written by older code keep the day under ``date``
+        (
+            salon,
+            staff,
+            resources,
+            bookings,
+            legacy_bookings,
+            shifts,
+            legacy_shifts,
+        ) = await asyncio.gather(
+            salon_document(),
+            documents(StaffModel()._build_query(salon_id)),
+            documents(ResourceModel()._build_query(salon_id)),
+            documents(booking_model._build_query(salon_id, [("booking_date", "==", day_key)])),
+            documents(booking_model._build_query(salon_id, [("date", "==", day_key)])),
+            documents(shift_model._build_query(salon_id, [("shift_date", "==", day_key)])),
+            documents(shift_model._build_query(salon_id, [("date", "==", day_key)])),
+        )
+
+        unique_bookings = dict(legacy_bookings)
+        unique_bookings.update(bookings)
+        unique_shifts = dict(legacy_shifts)
+        unique_shifts.update(shifts)
+
+        schedule = DaySchedule.build(
+            salon_id=salon_id,
+            day=day,
+            salon=salon,
+            staff=staff,
+            shifts=unique_shifts.values(),
+            bookings=unique_bookings.items(),
+            resources=resources,
+        )
+        logger.debug(
+            "Availability schedule built",
+            salon_id=salon_id,
+            date=day_key,
+            staff=len(schedule.staff_hours),
+            bookings=len(unique_bookings),
+        )
+        return schedule
+
+
+availability_engine = AvailabilityEngine()
+
+
+def _invalidate_schedules(envelope: EventEnvelope) -> None:
+    """Drop cached availability for the days a booking or shift write touches."""
+    change = envelope.event
+    if change.collection in ("bookings", "shifts"):
+        availability_engine.invalidate_document(change.before, change.after)
+
+
+get_event_bus().subscribe(DocumentChanged, _invalidate_schedules)
@@ -0,0 +1,582 @@
+"""Event bus for salon domain events.
+
+The one way the API publishes events: booking events from the endpoints,
+autonomous agent events and in-process document changes all go through
+``get_event_bus().publish(event, salon_id=...)`` with a typed schema from
+``app.schemas.events``.
+
+- In-process subscribers (``subscribe``) run inline in ``publish``, before
+  it returns, so derived state such as analytics rollups and the
+  availability cache is current right after a write. Their failures are
+  logged and never fail the publish.
+- Everything not ``local_only`` is appended to a bounded in-memory outbox.
+  A background thread flushes it to the transport when ``EVENT_FLUSH_SIZE``
+  events are buffered and at least every ``EVENT_FLUSH_INTERVAL`` seconds.
+  Within one flush window, repeated ``coalesce`` events for the same entity
+  merge into one (later fields win) unless another event for that entity
+  came in between.
+- Wire format: one compact orjson array per event,
+  ``[schema_id, version, event_id, timestamp_ms, salon_id, correlation_id,
+  metadata, payload]``; ``decode`` turns it back into an ``EventEnvelope``.
+  ``event_type``, ``salon_id`` and ``schema_id`` are also sent as Pub/Sub
+  attributes so subscriptions can filter without decoding.
+- Transports: ``PubSubTransport`` (batched ``PublisherClient``) or
+  ``InMemoryTransport`` for tests and local development
+  (``EVENT_TRANSPORT=memory``).
+- Durable fallback: events the transport rejects, and events that don't
+  fit in memory, are appended to a JSON-lines file that is replayed at
+  startup and every ``EVENT_REPLAY_INTERVAL`` seconds. Delivery is
+  at-least-once; subscribers drop duplicates by ``event_id``.
+
+Example:
+    bus = get_event_bus()
+    await bus.publish(BookingCreated(booking_id="b1", customer_id="c1"), salon_id="salon_123")
+"""
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Type
+
+import orjson
+import structlog
+from google.cloud import pubsub_v1
+
+from app.core.config import settings
+from app.schemas.events import Event, schema_for
+
+logger = structlog.get_logger()
+
+
+# ============================================================================
+# Envelope & wire format
+# ============================================================================
+
+@dataclass
+class EventEnvelope:
+    """An event with its routing and tracing fields."""
+    event: Event
+    salon_id: str
+    event_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    correlation_id: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.event.name
+
+    def attributes(self) -> Dict[str, str]:
+        """Pub/Sub message attributes."""
+        attributes = {
+            "event_type": self.event.name,
+            "salon_id": str(self.salon_id),
+            "schema_id": str(self.event.schema_id),
+        }
+        for name in self.event.attributes:
+            value = getattr(self.event, name)
+            if value is not None:
+                attributes[name] = str(value)
+        return attributes
+
+
+def encode(envelope: EventEnvelope) -> bytes:
+    """Serialize an envelope to the compact wire format."""
+    event = envelope.event
+    return orjson.dumps([
+        event.schema_id,
+        event.version,
+        envelope.event_id,
+        int(envelope.timestamp.timestamp() * 1000),
+        envelope.salon_id,
+        envelope.correlation_id,
+        envelope.metadata or None,
+        event.model_dump(mode="json", exclude_none=True),
+    ])
+
+
+def decode(data: bytes) -> EventEnvelope:
+    """Parse the wire format back into a typed envelope.
+
+    Raises:
+        KeyError: If the schema id is not registered
+        ValueError: If the message is not a valid event
+    """
+    schema_id, _version, event_id, timestamp_ms, salon_id, correlation_id, metadata, payload = orjson.loads(data)
+    return EventEnvelope(
+        event=schema_for(schema_id).model_validate(payload),
+        salon_id=salon_id,
+        event_id=event_id,
+        timestamp=datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc),
+        correlation_id=correlation_id,
+        metadata=metadata or {},
+    )
+
+
+# ============================================================================
+# Transports
+# ============================================================================
+
+class PubSubTransport:
+    """Sends encoded events to the Pub/Sub topic with client-side batching."""
+
+    def __init__(self, client: Any = None, topic_path: Optional[str] = None, retry_after: float = 30.0):
+        """
+        Args:
+            client: ``PublisherClient`` (or anything with its ``publish``);
+                created lazily with ``PUBSUB_BATCH_*`` settings when None
+            topic_path: Full topic path; derived from settings when None
+            retry_after: Seconds before retrying a failed client creation
+        """
+        self._client = client
+        self._topic_path = topic_path
+        self._retry_after = retry_after
+        self._failed_at: Optional[float] = None
+
+    @property
+    def client(self) -> Any:
+        """Lazy initialization of publisher client"""
+        if self._client is None:
+            # Fail fast while credentials are missing instead of probing on every event
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self._retry_after:
+                raise RuntimeError("Pub/Sub client unavailable")
+            try:
+                self._client = pubsub_v1.PublisherClient(
+                    batch_settings=pubsub_v1.types.BatchSettings(
+                        max_messages=settings.PUBSUB_BATCH_MAX_MESSAGES,
+                        max_bytes=settings.PUBSUB_BATCH_MAX_BYTES,
+                        max_latency=settings.PUBSUB_BATCH_MAX_LATENCY,
+                    )
+                )
+            except Exception:
+                self._failed_at = time.monotonic()
+                raise
+        if self._topic_path is None:
+            self._topic_path = self._client.topic_path(settings.GCP_PROJECT_ID, settings.PUBSUB_TOPIC)
+        return self._client
+
+    def send(self, data: bytes, attributes: Dict[str, str]) -> concurrent.futures.Future:
+        client = self.client
+        return client.publish(
+            self._topic_path, data, timeout=settings.PUBSUB_PUBLISH_TIMEOUT, **attributes
+        )
+
+
+class InMemoryTransport:
+    """Keeps events in process instead of sending them.
+
+    Used by tests and local development. Every sent event is decoded and
+    stored in ``envelopes``, with its message attributes in ``attributes``,
+    and handed to each subscriber synchronously on the flush thread, the
+    way Pub/Sub subscribers would receive it.
+    """
+
+    def __init__(self, max_events: int = 10_000):
+        self.envelopes: Deque[EventEnvelope] = deque(maxlen=max_events)
+        self.attributes: Deque[Dict[str, str]] = deque(maxlen=max_events)
+        self._subscribers: List[Callable[[EventEnvelope], Any]] = []
+        self.sent = 0
+        self.bytes = 0
+
+    def subscribe(self, handler: Callable[[EventEnvelope], Any]) -> None:
+        self._subscribers.append(handler)
+
+    def send(self, data: bytes, attributes: Dict[str, str]) -> concurrent.futures.Future:
+        envelope = decode(data)
+        self.sent += 1
+        self.bytes += len(data)
+        self.envelopes.append(envelope)
+        self.attributes.append(attributes)
+        for handler in self._subscribers:
+            try:
+                handler(envelope)
+            except Exception as e:
+                logger.warning("event_subscriber_failed", event_type=envelope.name, error=str(e))
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        future.set_result(envelope.event_id)
+        return future
+
+
+# ============================================================================
+# Durable fallback
+# ============================================================================
+
+class FileOutbox:
+    """JSON-lines file of encoded events the transport did not accept.
+
+    ``take`` moves the file aside and returns its events; the moved file is
+    only deleted by ``commit`` once the replay finished, so a crash during
+    replay replays the same events again on the next start.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._replay_path = path + ".replay"
+        self._lock = threading.Lock()
+
+    def append(self, frames: List[bytes]) -> None:
+        """Append encoded events and fsync them to disk."""
+        if not frames:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(b"".join(frame + b"\n" for frame in frames))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def take(self) -> List[bytes]:
+        """Events to replay: an unfinished replay first, else the whole file."""
+        with self._lock:
+            if not os.path.exists(self._replay_path):
+                if not os.path.exists(self.path):
+                    return []
+                os.replace(self.path, self._replay_path)
+            with open(self._replay_path, "rb") as f:
+                return [line.rstrip(b"\n") for line in f if line.strip()]
+
+    def commit(self) -> None:
+        """Drop the replayed file (failures were appended to the live file)."""
+        with self._lock:
+            try:
+                os.remove(self._replay_path)
+            except FileNotFoundError:
+                pass
+
+    def __len__(self) -> int:
+        with self._lock:
+            count = 0
+            for path in (self.path, self._replay_path):
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        count += sum(1 for _ in f)
+            return count
+
+
+# ============================================================================
+# Bus
+# ============================================================================
+
+Handler = Callable[[EventEnvelope], Any]
+
+
+class EventBus:
+    """Typed event bus with in-process subscribers, batching and a durable outbox"""
+
+    def __init__(
+        self,
+        transport: Any = None,
+        outbox: Optional[FileOutbox] = None,
+        max_outbox: Optional[int] = None,
+        flush_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        replay_interval: Optional[float] = None,
+    ):
+        """
+        Args:
+            transport: Object with ``send(data, attributes) -> Future``;
+                chosen by EVENT_TRANSPORT when None
+            outbox: Durable fallback; a ``FileOutbox`` at EVENT_OUTBOX_PATH when None
+            max_outbox: Events held in memory (buffered + in flight)
+            flush_size: Buffered events that trigger an immediate flush
+            flush_interval: Seconds between flushes (the coalescing window)
+            replay_interval: Seconds between replays of the durable outbox
+        """
+        if transport is None:
+            transport = InMemoryTransport() if settings.EVENT_TRANSPORT == "memory" else PubSubTransport()
+        self.transport = transport
+        self.outbox = outbox if outbox is not None else FileOutbox(settings.EVENT_OUTBOX_PATH)
+        self.max_outbox = max_outbox or settings.EVENT_OUTBOX_SIZE
+        self.flush_size = flush_size or settings.EVENT_FLUSH_SIZE
+        self.flush_interval = flush_interval or settings.EVENT_FLUSH_INTERVAL
+        self.replay_interval = replay_interval or settings.EVENT_REPLAY_INTERVAL
+
+        self._subscribers: Dict[Type[Event], List[Handler]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._buffer: List[EventEnvelope] = []
+        # Entity -> buffer index of its latest event, for coalescing
+        self._latest: Dict[Tuple[str, str, str], int] = {}
+        self._in_flight: Dict[Any, bytes] = {}
+        self._replay_pending = 0
+        self._last_replay = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._latencies: Deque[float] = deque(maxlen=1000)
+        self._stats = {
+            "accepted": 0, "coalesced": 0, "published": 0, "failed": 0,
+            "spilled": 0, "replayed": 0, "subscriber_errors": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def subscribe(self, event_class: Type[Event], handler: Handler) -> Handler:
+        """Run ``handler(envelope)`` inline for every published ``event_class``.
+
+        The handler may be a plain function or a coroutine function.
+        """
+        self._subscribers.setdefault(event_class, []).append(handler)
+        return handler
+
+    async def publish(
+        self,
+        event: Event,
+        salon_id: str,
+        correlation_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Deliver an event to in-process subscribers and queue it for the transport
+
+        Args:
+            event: Typed event payload
+            salon_id: Salon ID for multi-tenant routing
+            correlation_id: Optional correlation ID for tracing
+            metadata: Optional additional metadata
+
+        Returns:
+            True if the event was queued (or saved to the durable outbox),
+            False if it could not be stored at all
+        """
+        envelope = EventEnvelope(
+            event=event,
+            salon_id=salon_id,
+            correlation_id=correlation_id,
+            metadata=metadata or {},
+        )
+        for handler in self._subscribers.get(type(event), ()):
+            try:
+                result = handler(envelope)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                self._stats["subscriber_errors"] += 1
+                logger.warning(
+                    "event_subscriber_failed",
+                    event_type=event.name,
+                    handler=getattr(handler, "__name__", repr(handler)),
+                    error=str(e),
+                )
+        if event.local_only:
+            return True
+        return self._enqueue(envelope)
+
+    def _enqueue(self, envelope: EventEnvelope) -> bool:
+        self._ensure_started()
+        event = envelope.event
+        with self._lock:
+            self._stats["accepted"] += 1
+            key = (envelope.salon_id, event.entity, event.entity_id) if event.entity else None
+            if key is not None and event.coalesce:
+                index = self._latest.get(key)
+                previous = self._buffer[index] if index is not None else None
+                if previous is not None and type(previous.event) is type(event) and previous.name == event.name:
+                    merged = previous.event.model_dump(exclude_unset=True)
+                    merged.update(event.model_dump(exclude_unset=True))
+                    envelope.event = type(event)(**merged)
+                    envelope.metadata = {**previous.metadata, **envelope.metadata}
+                    self._buffer[index] = envelope
+                    self._stats["coalesced"] += 1
+                    return True
+            if not self._stopping and len(self._buffer) + len(self._in_flight) < self.max_outbox:
+                self._buffer.append(envelope)
+                if key is not None:
+                    self._latest[key] = len(self._buffer) - 1
+                if len(self._buffer) >= self.flush_size:
+                    self._wake.set()
+                return True
+        # Memory outbox is full (transport slow or down) or closing: go straight to disk
+        return self._spill([encode(envelope)])
+
+    # ------------------------------------------------------------------
+    # Background flushing
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the flush thread, which first replays events left by a previous run."""
+        self._stopping = False
+        self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None or self._stopping:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-bus", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self.replay()
+        except Exception as e:
+            logger.error("event_outbox_replay_failed", error=str(e))
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() - self._last_replay >= self.replay_interval:
+                    self.replay()
+            except Exception as e:
+                logger.error("event_flush_failed", error=str(e))
+
+    def flush(self) -> int:
+        """Hand every buffered event to the transport.
+
+        Returns:
+            Number of events handed off
+        """
+        with self._lock:
+            batch = self._buffer
+            self._buffer = []
+            self._latest.clear()
+        for envelope in batch:
+            self._send(encode(envelope), envelope.attributes())
+        return len(batch)
+
+    def replay(self) -> int:
+        """Re-send events from the durable outbox.
+
+        Returns:
+            Number of events replayed
+        """
+        self._last_replay = time.monotonic()
+        with self._lock:
+            if self._replay_pending:
+                return 0  # previous replay still in flight
+        frames = self.outbox.take()
+        if not frames:
+            return 0
+        with self._lock:
+            self._replay_pending = len(frames)
+            self._stats["replayed"] += len(frames)
+        logger.info("event_outbox_replay", events=len(frames))
+        for frame in frames:
+            try:
+                attributes = decode(frame).attributes()
+            except Exception as e:
+                # Unknown schema or corrupt line: nothing will ever accept it
+                logger.error("event_outbox_invalid", error=str(e))
+                self._replayed_one()
+                continue
+            self._send(frame, attributes, replay=True)
+        return len(frames)
+
+    def _send(self, frame: bytes, attributes: Dict[str, str], replay: bool = False) -> None:
+        started = time.monotonic()
+        try:
+            future = self.transport.send(frame, attributes)
+        except Exception as e:
+            logger.error("event_publish_failed", error=str(e), event_type=attributes.get("event_type"))
+            self._failed(frame, replay)
+            return
+        with self._lock:
+            self._in_flight[future] = frame
+        future.add_done_callback(lambda f: self._done(f, attributes, started, replay))
+
+    def _done(self, future: Any, attributes: Dict[str, str], started: float, replay: bool) -> None:
+        """Completion callback, runs on the transport's thread."""
+        with self._lock:
+            frame = self._in_flight.pop(future, None)
+        if frame is None:
+            return  # already spilled by close()
+        try:
+            message_id = future.result()
+        except Exception as e:
+            logger.error("pubsub_publish_error", error=str(e), event_type=attributes.get("event_type"))
+            self._failed(frame, replay)
+            return
+        with self._lock:
+            self._stats["published"] += 1
+            self._latencies.append(time.monotonic() - started)
+        logger.debug(
+            "event_published",
+            event_type=attributes.get("event_type"),
+            salon_id=attributes.get("salon_id"),
+            message_id=message_id,
+        )
+        if replay:
+            self._replayed_one()
+
+    def _failed(self, frame: bytes, replay: bool) -> None:
+        with self._lock:
+            self._stats["failed"] += 1
+        self._spill([frame])
+        if replay:
+            self._replayed_one()
+
+    def _replayed_one(self) -> None:
+        with self._lock:
+            self._replay_pending -= 1
+            finished = self._replay_pending == 0
+        if finished:
+            self.outbox.commit()
+
+    def _spill(self, frames: List[bytes]) -> bool:
+        try:
+            self.outbox.append(frames)
+        except Exception as e:
+            logger.error("event_outbox_write_failed", error=str(e), events=len(frames))
+            return False
+        with self._lock:
+            self._stats["spilled"] += len(frames)
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush, wait up to ``timeout`` for the transport, spill what is left.
+
+        The bus stays usable: a later publish or ``start`` restarts it.
+        """
+        self._stopping = True
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+        deadline = time.monotonic() + timeout
+        while self._in_flight and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with self._lock:
+            leftover = list(self._in_flight.values())
+            self._in_flight.clear()
+        if leftover:
+            # Still unacknowledged: keep them for the next start (may duplicate)
+            self._spill(leftover)
+        self._stopping = False
+        logger.info("event_bus_closed", **self.stats())
+
+    def stats(self) -> Dict[str, Any]:
+        """Event counters, memory outbox usage and ack latency."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = dict(self._stats)
+            stats["buffered"] = len(self._buffer)
+            stats["in_flight"] = len(self._in_flight)
+        if latencies:
+            stats["ack_p50_ms"] = round(latencies[len(latencies) // 2] * 1000, 2)
+            stats["ack_p99_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2)
+        return stats
+
+
+# Singleton instance
+_event_bus: Optional[EventBus] = None
+
+
+def get_event_bus() -> EventBus:
+    """Get or create the event bus singleton"""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus()
+    return _event_bus
+
+
+async def close_event_bus() -> None:
+    """Flush the event bus on shutdown."""
+    if _event_bus is not None:
+        await asyncio.get_running_loop().run_in_executor(None, _event_bus.close)
@@ -6,10 +6,11 @@ Provides Cloud Tasks integration for async processing:
 - Cleanup jobs
 - Analytics aggregation
 """
-from app.tasks.cloud_tasks import CloudTasksClient
+from app.tasks.cloud_tasks import CloudTasksClient, TaskSpec
 from app.tasks.scheduler import AgentScheduler
 
 __all__ = [
     "CloudTasksClient",
+    "TaskSpec",
     "AgentScheduler",
 ]
@@ -1,27 +1,91 @@
 """Google Cloud Tasks Client.
 
 Manages async task execution via Cloud Tasks queues.
+
+Tasks are created through the Cloud Tasks REST API over one pooled
+keep-alive ``httpx.AsyncClient``, so enqueueing never blocks the event
+loop; ``create_tasks`` enqueues many tasks with bounded concurrency. Set
+``CLOUD_TASKS_EMULATOR_HOST`` to point the client at a local queue.
 """
-import json
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-import structlog
+import asyncio
+import base64
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
 
-from google.cloud import tasks_v2
-from google.protobuf import timestamp_pb2
+import httpx
+import orjson
+import structlog
 
 from app.core.config import settings
 
 logger = structlog.get_logger()
 
+CLOUD_TASKS_API_URL = "https://cloudtasks.googleapis.com"
+CLOUD_TASKS_SCOPE = "https://www.googleapis.com/auth/cloud-platform"
+
+# Statuses worth retrying; task names make retried creates idempotent
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+_tasks_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_cloud_tasks_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Get or create the pooled HTTP client for the Cloud Tasks API.
+    
+    Args:
+        transport: Optional transport override (tests)
+    """
+    global _tasks_http_client
+    if _tasks_http_client is None or _tasks_http_client.is_closed:
+        emulator = settings.CLOUD_TASKS_EMULATOR_HOST
+        _tasks_http_client = httpx.AsyncClient(
+            base_url=f"http://{emulator}" if emulator else CLOUD_TASKS_API_URL,
+            timeout=httpx.Timeout(settings.CLOUD_TASKS_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=settings.CLOUD_TASKS_CONCURRENCY,
+                max_keepalive_connections=settings.CLOUD_TASKS_CONCURRENCY,
+                keepalive_expiry=30.0,
+            ),
+            transport=transport,
+        )
+    return _tasks_http_client
+
+
+async def close_cloud_tasks_http_client() -> None:
+    """Close the pooled Cloud Tasks client (application shutdown)."""
+    global _tasks_http_client
+    if _tasks_http_client is not None:
+        await _tasks_http_client.aclose()
+        _tasks_http_client = None
+
+
+def _timestamp(value: datetime) -> str:
+    """RFC 3339 UTC timestamp; naive datetimes are taken as UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="microseconds") + "Z"
+
+
+@dataclass
+class TaskSpec:
+    """One task to enqueue (arguments of ``CloudTasksClient.create_task``)."""
+    queue_name: str
+    task_name: str
+    handler_path: str
+    payload: Dict[str, Any]
+    schedule_time: Optional[datetime] = None
+    delay_seconds: Optional[int] = None
+
 
 class CloudTasksClient:
     """Client for Google Cloud Tasks.
     
     Provides:
     - Task creation with scheduling
-    - Retry configuration
-    - Dead-letter handling
+    - Bounded-concurrency batch enqueue
+    - Retries on throttling and transient errors
+    - Deduplication by task name
     """
     
     # Queue names
@@ -30,17 +94,58 @@ class CloudTasksClient:
     QUEUE_ANALYTICS = "analytics"
     QUEUE_CLEANUP = "cleanup"
     
-    def __init__(self):
-        self.client = tasks_v2.CloudTasksClient()
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        authenticate: Optional[bool] = None,
+    ):
+        """Initialize the client.
+        
+        Args:
+            http_client: HTTP client (defaults to the shared pooled client)
+            authenticate: Send OAuth tokens (defaults to off for an emulator)
+        """
+        self._http_client = http_client
         self.project = settings.GCP_PROJECT_ID
         self.location = settings.GCP_REGION
         self.base_url = settings.API_BASE_URL
+        self.authenticate = (
+            not settings.CLOUD_TASKS_EMULATOR_HOST if authenticate is None else authenticate
+        )
+        self._credentials = None
+        self._auth_lock = asyncio.Lock()
+    
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        return self._http_client or get_cloud_tasks_http_client()
     
     def _get_queue_path(self, queue_name: str) -> str:
         """Get full queue path."""
-        return self.client.queue_path(self.project, self.location, queue_name)
+        return f"projects/{self.project}/locations/{self.location}/queues/{queue_name}"
     
-    async def create_task(
+    async def _auth_headers(self) -> Dict[str, str]:
+        """Bearer token for the API, refreshed off the event loop."""
+        if not self.authenticate:
+            return {}
+        
+        if self._credentials is None or not self._credentials.valid:
+            async with self._auth_lock:
+                if self._credentials is None or not self._credentials.valid:
+                    import google.auth
+                    from google.auth.transport.requests import Request
+                    
+                    def refresh():
+                        credentials = self._credentials
+                        if credentials is None:
+                            credentials, _ = google.auth.default(scopes=[CLOUD_TASKS_SCOPE])
+                        credentials.refresh(Request())
+                        return credentials
+                    
+                    self._credentials = await asyncio.to_thread(refresh)
+        
+        return {"Authorization": f"Bearer {self._credentials.token}"}
+    
+    def _build_task(
         self,
         queue_name: str,
         task_name: str,
@@ -48,50 +153,90 @@ class CloudTasksClient:
         payload: Dict[str, Any],
         schedule_time: Optional[datetime] = None,
         delay_seconds: Optional[int] = None,
-    ) -> str:
-        """Create a Cloud Task.
-        
-        Args:
-            queue_name: Target queue
-            task_name: Unique task identifier
-            handler_path: API endpoint path
-            payload: Task payload
-            schedule_time: When to execute (optional)
-            delay_seconds: Delay from now (optional)
-            
-        Returns:
-            Task name
-        """
-        queue_path = self._get_queue_path(queue_name)
-        
+    ) -> Dict[str, Any]:
+        """Build the REST representation of a task."""
         # Calculate schedule time
         if delay_seconds:
             schedule_time = datetime.utcnow() + timedelta(seconds=delay_seconds)
         
-        # Build task
         task = {
-            "name": f"{queue_path}/tasks/{task_name}",
-            "http_request": {
-                "http_method": tasks_v2.HttpMethod.POST,
+            "name": f"{self._get_queue_path(queue_name)}/tasks/{task_name}",
+            "httpRequest": {
+                "httpMethod": "POST",
                 "url": f"{self.base_url}{handler_path}",
                 "headers": {
                     "Content-Type": "application/json",
                     "X-CloudTasks-Queue": queue_name,
                 },
-                "body": json.dumps(payload).encode(),
+                "body": base64.b64encode(orjson.dumps(payload)).decode(),
             },
         }
         
         # Add schedule time if specified
         if schedule_time:
-            timestamp = timestamp_pb2.Timestamp()
-            timestamp.FromDatetime(schedule_time)
-            task["schedule_time"] = timestamp
+            task["scheduleTime"] = _timestamp(schedule_time)
         
-        # Create task
-        response = self.client.create_task(
-            request={"parent": queue_path, "task": task}
+        return task
+    
+    async def create_task(
+        self,
+        queue_name: str,
+        task_name: str,
+        handler_path: str,
+        payload: Dict[str, Any],
+        schedule_time: Optional[datetime] = None,
+        delay_seconds: Optional[int] = None,
+    ) -> str:
+        """Create a Cloud Task.
+        
+        A task whose name already exists is treated as created, so retries
+        and overlapping scheduler runs never enqueue the same task twice.
+        
+        Args:
+            queue_name: Target queue
+            task_name: Unique task identifier
+            handler_path: API endpoint path
+            payload: Task payload
+            schedule_time: When to execute (optional)
+            delay_seconds: Delay from now (optional)
+            
+        Returns:
+            Task name
+            
+        Raises:
+            httpx.HTTPError: If the task could not be created after retries
+        """
+        queue_path = self._get_queue_path(queue_name)
+        task = self._build_task(
+            queue_name, task_name, handler_path, payload, schedule_time, delay_seconds,
         )
+        body = orjson.dumps({"task": task})
+        
+        attempt = 0
+        while True:
+            try:
+                headers = {"Content-Type": "application/json", **await self._auth_headers()}
+                response = await self.http_client.post(
+                    f"/v2/{queue_path}/tasks", content=body, headers=headers,
+                )
+            except httpx.TransportError:
+                if attempt >= settings.CLOUD_TASKS_MAX_RETRIES:
+                    raise
+            else:
+                if response.is_success:
+                    break
+                if response.status_code == 409:
+                    logger.debug("cloud_task_exists", task_name=task_name, queue=queue_name)
+                    return task["name"]
+                retryable = response.status_code in RETRYABLE_STATUSES
+                if response.status_code == 401 and self.authenticate:
+                    self._credentials = None  # Token revoked or expired early
+                    retryable = True
+                if not retryable or attempt >= settings.CLOUD_TASKS_MAX_RETRIES:
+                    response.raise_for_status()
+            
+            await asyncio.sleep(0.1 * 2 ** attempt)
+            attempt += 1
         
         logger.debug(
             "cloud_task_created",
@@ -100,7 +245,80 @@ class CloudTasksClient:
             handler=handler_path,
         )
         
-        return response.name
+        return orjson.loads(response.content).get("name", task["name"])
+    
+    async def create_tasks(
+        self,
+        tasks: List[TaskSpec],
+        concurrency: Optional[int] = None,
+    ) -> List[Optional[str]]:
+        """Create many Cloud Tasks with bounded concurrency.
+        
+        A failed task does not stop the batch; it is logged and reported as
+        None.
+        
+        Args:
+            tasks: Tasks to create
+            concurrency: Max create requests in flight (defaults to settings)
+            
+        Returns:
+            Task names in the order of ``tasks`` (None where creation failed)
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.CLOUD_TASKS_CONCURRENCY)
+        
+        async def create(spec: TaskSpec) -> Optional[str]:
+            async with semaphore:
+                try:
+                    return await self.create_task(
+                        queue_name=spec.queue_name,
+                        task_name=spec.task_name,
+                        handler_path=spec.handler_path,
+                        payload=spec.payload,
+                        schedule_time=spec.schedule_time,
+                        delay_seconds=spec.delay_seconds,
+                    )
+                except Exception as e:
+                    logger.warning(
+                        "cloud_task_create_failed",
+                        task_name=spec.task_name,
+                        queue=spec.queue_name,
+                        error=str(e),
+                    )
+                    return None
+        
+        names = await asyncio.gather(*(create(spec) for spec in tasks))
+        
+        logger.info(
+            "cloud_tasks_batch_created",
+            requested=len(tasks),
+            created=sum(1 for name in names if name),
+        )
+        
+        return names
+    
+    def autonomous_task(
+        self,
+        salon_id: str,
+        agent_name: str,
+        action: str,
+        data: Dict[str, Any],
+        delay_seconds: Optional[int] = None,
+    ) -> TaskSpec:
+        """Build the task for an autonomous agent run (see ``create_autonomous_task``)."""
+        task_name = f"{agent_name}-{salon_id}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+        
+        return TaskSpec(
+            queue_name=self.QUEUE_AUTONOMOUS,
+            task_name=task_name,
+            handler_path="/internal/tasks/execute",
+            payload={
+                "salon_id": salon_id,
+                "agent_name": agent_name,
+                "action": action,
+                "data": data,
+            },
+            delay_seconds=delay_seconds,
+        )
     
     async def create_autonomous_task(
         self,
@@ -122,19 +340,14 @@ class CloudTasksClient:
         Returns:
             Task name
         """
-        task_name = f"{agent_name}-{salon_id}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+        spec = self.autonomous_task(salon_id, agent_name, action, data, delay_seconds)
         
         return await self.create_task(
-            queue_name=self.QUEUE_AUTONOMOUS,
-            task_name=task_name,
-            handler_path="/internal/tasks/execute",
-            payload={
-                "salon_id": salon_id,
-                "agent_name": agent_name,
-                "action": action,
-                "data": data,
-            },
-            delay_seconds=delay_seconds,
+            queue_name=spec.queue_name,
+            task_name=spec.task_name,
+            handler_path=spec.handler_path,
+            payload=spec.payload,
+            delay_seconds=spec.delay_seconds,
         )
     
     async def create_notification_task(
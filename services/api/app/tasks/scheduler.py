@@ -2,7 +2,6 @@
 
 Manages scheduling and execution of autonomous agent tasks.
 """
-from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 import structlog
 
@@ -103,54 +102,46 @@ class AgentScheduler:
         Returns:
             List of scheduled task names
         """
-        scheduled = []
-        
-        for agent_name, interval in self.AGENT_INTERVALS.items():
-            # Check if agent should run now
-            should_run = await self._should_run_agent(salon_id, agent_name, interval)
-            
-            if should_run:
-                task_name = await self.schedule_agent_run(
-                    salon_id=salon_id,
-                    agent_name=agent_name,
-                    action="periodic_check",
-                )
-                if task_name:
-                    scheduled.append(task_name)
-        
-        
-        return scheduled
+        return await self.schedule_periodic_agents_bulk([salon_id])
     
-    async def _should_run_agent(
+    async def schedule_periodic_agents_bulk(
         self,
-        salon_id: str,
-        agent_name: str,
-        interval_minutes: int,
-    ) -> bool:
-        """Check if agent should run based on last execution.
+        salon_ids: List[str],
+        concurrency: Optional[int] = None,
+    ) -> List[str]:
+        """Schedule all periodic agent runs for many salons.
+        
+        Due agents are found with one batched state read for every salon
+        and agent, then enqueued concurrently.
         
         Args:
-            salon_id: Salon ID
-            agent_name: Agent name
-            interval_minutes: Expected interval
+            salon_ids: Salon IDs
+            concurrency: Max task creations in flight (defaults to settings)
             
         Returns:
-            True if agent should run
+            List of scheduled task names
         """
-        state = await self.agent_model.get_agent_state(salon_id, agent_name)
-        
-        if not state:
-            return True  # No state, should run
-        
-        last_execution = state.get("last_execution")
-        if not last_execution:
-            return True
-        
-        # Check if enough time has passed
-        last_dt = datetime.fromisoformat(last_execution.replace("Z", "+00:00"))
-        next_run = last_dt + timedelta(minutes=interval_minutes)
+        due = await self.agent_model.get_due_agents(salon_ids, self.AGENT_INTERVALS)
+        
+        tasks = [
+            self.tasks_client.autonomous_task(
+                salon_id=salon_id,
+                agent_name=agent_name,
+                action="periodic_check",
+                data={},
+            )
+            for salon_id, agent_name in due
+        ]
+        names = await self.tasks_client.create_tasks(tasks, concurrency=concurrency)
+        
+        logger.info(
+            "periodic_agents_scheduled",
+            salons=len(salon_ids),
+            due=len(due),
+            scheduled=sum(1 for name in names if name),
+        )
         
-        return datetime.utcnow() >= next_run.replace(tzinfo=None)
+        return [name for name in names if name]
     
     async def schedule_gap_fill(
         self,
@@ -32,8 +32,10 @@ from app.api import (
     integrations_router,
     billing_router,
 )
-from app.api.ai_proxy import router as ai_router
+from app.api.ai_proxy import router as ai_router, close_ai_http_client
 from app.api.onboarding import router as onboarding_router
+from app.services.event_bus import close_event_bus, get_event_bus
+from app.tasks.cloud_tasks import close_cloud_tasks_http_client
 
 logger = structlog.get_logger()
 
@@ -71,6 +73,9 @@ async def lifespan(app: FastAPI):
         logger.warning("Redis connection failed - running without cache", error=str(e))
         redis_ready = False
 
+    # Start the event bus (replays events a previous run could not send)
+    get_event_bus().start()
+
     yield
 
     # Shutdown - graceful cleanup
@@ -84,6 +89,15 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning("Error closing Redis", error=str(e))
 
+    # Close pooled AI service connections
+    await close_ai_http_client()
+
+    # Close pooled Cloud Tasks connections
+    await close_cloud_tasks_http_client()
+
+    # Send queued events; unsent ones go to the durable outbox
+    await close_event_bus()
+
     # Close Firestore connections
     if firebase_ready:
         try:
@@ -154,6 +168,15 @@ async def health_check():
     }
 
 
+@app.get("/health/cache")
+async def cache_health():
+    """In-process cache counters per key prefix."""
+    return {
+        "redis": "ready" if redis_ready else "not_ready",
+        **redis_client.cache_stats(),
+    }
+
+
 # Root endpoint
 @app.get("/")
 async def root():
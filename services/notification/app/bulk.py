@@ -0,0 +1,695 @@
+"""Bulk notification fan-out
+
+``POST /bulk/send`` renders one message per recipient and enqueues them as
+``SendJob``s; a ``BulkDispatcher`` in every instance drains the queue in the
+background, so request handlers never wait on Twilio.
+
+- Queue: a Redis stream read through a consumer group (``RedisSendQueue``,
+  over Upstash REST), so jobs survive restarts and jobs left pending by a
+  crashed instance are reclaimed by the others. ``LocalSendQueue`` is an
+  in-process stand-in with the same interface for development and tests.
+- Shaping: sends are spaced per salon and per sending number. With the
+  Redis queue the slots are reserved in Redis, so the limits hold across
+  instances. A job whose reserved slot is more than ``max_wait`` away goes
+  back to the delay set until then instead of holding a worker, so one
+  large campaign cannot starve other salons; a number never exceeds its
+  Twilio rate.
+- Retries: throttling, Twilio 5xx and network errors are retried up to
+  ``max_attempts`` times after a full-jitter exponential delay.
+- Idempotency: a job's key is claimed before sending and marked done after,
+  so a redelivered job is not sent twice; resubmitting a request with the
+  same ``idempotency_key`` returns the original batch.
+- Progress: per-batch counters (total/sent/failed/retried/duplicate/done).
+
+Example:
+    batch_id, created = await get_send_queue().create_batch(batch_id, jobs, meta)
+    await get_bulk_dispatcher().start()
+    await get_send_queue().get_batch(batch_id)  # {"total": 5000, "sent": 1200, ...}
+"""
+import asyncio
+import contextlib
+import heapq
+import itertools
+import json
+import random
+import re
+import socket
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import structlog
+
+from .config import settings
+from .core.upstash import AsyncUpstashRedis, UpstashError
+from .twilio_client import MessageResult
+
+logger = structlog.get_logger()
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+_COUNTERS = ("sent", "failed", "retried", "duplicate", "done")
+
+
+def render_template(template: str, variables: Dict[str, Any]) -> str:
+    """Fill ``{name}`` placeholders; unknown placeholders are left as-is."""
+    return _PLACEHOLDER.sub(
+        lambda m: str(variables[m.group(1)]) if m.group(1) in variables else m.group(0),
+        template,
+    )
+
+
+@dataclass
+class SendJob:
+    """One message of a bulk batch"""
+    job_id: str  # Idempotency key
+    batch_id: str
+    salon_id: Optional[str]
+    channel: str  # 'whatsapp' or 'sms'
+    to: str
+    body: str
+    media_url: Optional[str] = None
+    attempt: int = 0
+    batch_total: int = 0
+    shaped: bool = False  # Already holds a shaping slot (deferred until it)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "SendJob":
+        return cls(**json.loads(raw))
+
+
+# ============================================================================
+# Queues
+# ============================================================================
+
+class SendQueue(ABC):
+    """Durable send queue with idempotency keys and batch progress.
+
+    ``claim`` returns "claimed" (send it), "done" (already sent or failed:
+    record a duplicate) or "busy" (another worker holds it: leave it pending).
+    """
+
+    @abstractmethod
+    async def create_batch(
+        self,
+        batch_id: str,
+        jobs: List[SendJob],
+        meta: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+    ) -> Tuple[str, bool]:
+        """Enqueue a batch.
+
+        Returns:
+            (batch id, created); an already used ``idempotency_key`` returns
+            the original batch id and False without enqueueing anything
+        """
+        pass
+
+    @abstractmethod
+    async def read(self, count: int) -> List[Tuple[str, SendJob]]:
+        """Up to ``count`` (entry id, job) pairs ready to send."""
+        pass
+
+    @abstractmethod
+    async def claim(self, job: SendJob) -> str:
+        """Claim the job's idempotency key before sending it."""
+        pass
+
+    @abstractmethod
+    async def complete(self, entry_id: str, job: SendJob, outcome: str) -> int:
+        """Record ``outcome`` (sent/failed/duplicate) and ack; returns the batch's done count."""
+        pass
+
+    @abstractmethod
+    async def retry(self, entry_id: str, job: SendJob, delay: float) -> None:
+        """Release the job's claim and enqueue its next attempt after ``delay`` seconds."""
+        pass
+
+    @abstractmethod
+    async def defer(self, entry_id: str, job: SendJob, delay: float) -> None:
+        """Ack the entry and enqueue ``job`` (unclaimed) after ``delay`` seconds."""
+        pass
+
+    @abstractmethod
+    async def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Progress counters for a batch, or None if it is unknown."""
+        pass
+
+    async def close(self) -> None:  # noqa: B027
+        """Release connections held by the queue."""
+
+
+def _new_batch(total: int, meta: Dict[str, Any]) -> Dict[str, Any]:
+    batch = {"total": total, **{field: 0 for field in _COUNTERS}}
+    batch["created_at"] = datetime.utcnow().isoformat()
+    batch.update({key: value for key, value in meta.items() if value is not None})
+    return batch
+
+
+class LocalSendQueue(SendQueue):
+    """In-process stand-in for ``RedisSendQueue`` (not durable across restarts)"""
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.time):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._ready: Deque[Tuple[str, SendJob]] = deque()
+        self._delayed: List[Tuple[float, int, SendJob]] = []
+        self._pending: Dict[str, SendJob] = {}
+        self._keys: "OrderedDict[str, str]" = OrderedDict()
+        self._batch_keys: Dict[str, str] = {}
+        self._batches: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+
+    def _push(self, job: SendJob) -> None:
+        self._ready.append((f"{next(self._ids)}-0", job))
+
+    def _set_key(self, job_id: str, state: str) -> None:
+        self._keys[job_id] = state
+        self._keys.move_to_end(job_id)
+        while len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+
+    async def create_batch(self, batch_id, jobs, meta, idempotency_key=None):
+        if idempotency_key:
+            key = f"{meta.get('salon_id')}:{idempotency_key}"
+            if key in self._batch_keys:
+                return self._batch_keys[key], False
+            self._batch_keys[key] = batch_id
+        self._batches[batch_id] = _new_batch(len(jobs), meta)
+        for job in jobs:
+            self._push(job)
+        return batch_id, True
+
+    async def read(self, count):
+        now = self._clock()
+        while self._delayed and self._delayed[0][0] <= now:
+            self._push(heapq.heappop(self._delayed)[2])
+        entries = []
+        while self._ready and len(entries) < count:
+            entry_id, job = self._ready.popleft()
+            self._pending[entry_id] = job
+            entries.append((entry_id, job))
+        return entries
+
+    async def claim(self, job):
+        state = self._keys.get(job.job_id)
+        if state is None:
+            self._set_key(job.job_id, "sending")
+            return "claimed"
+        return "busy" if state == "sending" else "done"
+
+    async def complete(self, entry_id, job, outcome):
+        if outcome != "duplicate":
+            self._set_key(job.job_id, outcome)
+        self._pending.pop(entry_id, None)
+        batch = self._batches.get(job.batch_id)
+        if batch is None:
+            return 0
+        batch[outcome] += 1
+        batch["done"] += 1
+        return batch["done"]
+
+    async def retry(self, entry_id, job, delay):
+        self._keys.pop(job.job_id, None)
+        await self.defer(entry_id, replace(job, attempt=job.attempt + 1, shaped=False), delay)
+        if job.batch_id in self._batches:
+            self._batches[job.batch_id]["retried"] += 1
+
+    async def defer(self, entry_id, job, delay):
+        self._pending.pop(entry_id, None)
+        heapq.heappush(self._delayed, (self._clock() + delay, next(self._ids), job))
+
+    async def get_batch(self, batch_id):
+        batch = self._batches.get(batch_id)
+        return dict(batch) if batch is not None else None
+
+    def depth(self) -> int:
+        return len(self._ready) + len(self._delayed) + len(self._pending)
+
+
+# Moves due retries from the delay set onto the stream
+# KEYS: delayed zset, stream; ARGV: now (seconds), max jobs
+PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, job in ipairs(due) do
+  redis.call('ZREM', KEYS[1], job)
+  redis.call('XADD', KEYS[2], '*', 'job', job)
+end
+return #due
+"""
+
+
+class RedisSendQueue(SendQueue):
+    """Redis stream + consumer group send queue"""
+
+    def __init__(
+        self,
+        redis: AsyncUpstashRedis,
+        prefix: str = "notify",
+        group: str = "senders",
+        consumer: Optional[str] = None,
+        claim_idle: float = 60.0,
+        claim_ttl: int = 120,
+        key_ttl: int = 86400,
+        batch_ttl: int = 7 * 86400,
+        enqueue_chunk: int = 500,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            redis: Upstash client
+            prefix: Key prefix
+            group: Consumer group shared by all instances
+            consumer: This instance's consumer name
+            claim_idle: Seconds before another instance reclaims a pending job
+            claim_ttl: Seconds a job stays claimed while it is being sent
+            key_ttl: Seconds idempotency keys are remembered
+            batch_ttl: Seconds batch progress is kept
+            enqueue_chunk: Jobs per pipelined XADD request
+        """
+        self.redis = redis
+        self.stream = f"{prefix}:send"
+        self.delayed = f"{prefix}:send:delayed"
+        self.prefix = prefix
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{random.getrandbits(32):08x}"
+        self.claim_idle = claim_idle
+        self.claim_ttl = claim_ttl
+        self.key_ttl = key_ttl
+        self.batch_ttl = batch_ttl
+        self.enqueue_chunk = enqueue_chunk
+        self._clock = clock
+        self._group_ready = False
+        self._next_reclaim = 0.0
+
+    def _job_key(self, job: SendJob) -> str:
+        return f"{self.prefix}:job:{job.job_id}"
+
+    def _batch_key(self, batch_id: str) -> str:
+        return f"{self.prefix}:batch:{batch_id}"
+
+    async def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except UpstashError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    @staticmethod
+    def _parse(entries: Optional[List[Any]]) -> List[Tuple[str, SendJob]]:
+        jobs = []
+        for entry_id, fields in entries or []:
+            if not fields:  # Deleted while pending
+                continue
+            values = dict(zip(fields[::2], fields[1::2], strict=True))
+            jobs.append((entry_id, SendJob.from_json(values["job"])))
+        return jobs
+
+    async def create_batch(self, batch_id, jobs, meta, idempotency_key=None):
+        await self._ensure_group()
+        # The batch hash is written before the idempotency key is claimed, so
+        # a key whose batch hash is missing was left by a failed request
+        batch_key = self._batch_key(batch_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(batch_key, _new_batch(len(jobs), meta))
+            pipe.expire(batch_key, self.batch_ttl)
+            await pipe.execute()
+
+        key = None
+        if idempotency_key:
+            key = f"{self.prefix}:bulk-key:{meta.get('salon_id')}:{idempotency_key}"
+            if not await self.redis.set(key, batch_id, ex=self.key_ttl, nx=True):
+                existing = await self.redis.get(key)
+                if existing and await self.redis.exists(self._batch_key(existing)):
+                    await self.redis.delete(batch_key)
+                    return existing, False
+                await self.redis.set(key, batch_id, ex=self.key_ttl)
+
+        try:
+            for start in range(0, len(jobs), self.enqueue_chunk):
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for job in jobs[start:start + self.enqueue_chunk]:
+                        pipe.xadd(self.stream, {"job": job.to_json()})
+                    await pipe.execute()
+        except Exception:
+            # Let a retry with the same key enqueue the batch again
+            if key is not None:
+                await self.redis.delete(key)
+            raise
+        return batch_id, True
+
+    async def read(self, count):
+        await self._ensure_group()
+        entries: List[Tuple[str, SendJob]] = []
+        now = self._clock()
+        if now >= self._next_reclaim:
+            # Jobs left pending by a crashed (or slow) consumer
+            self._next_reclaim = now + self.claim_idle / 2
+            reply = await self.redis.xautoclaim(
+                self.stream, self.group, self.consumer, int(self.claim_idle * 1000), count=count
+            )
+            entries += self._parse(reply[1] if reply else None)
+        if len(entries) >= count:
+            return entries
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.eval(PROMOTE_SCRIPT, 2, self.delayed, self.stream, now, count)
+            pipe.xreadgroup(self.group, self.consumer, self.stream, count - len(entries))
+            _, reply = await pipe.execute()
+        if reply:
+            entries += self._parse(reply[0][1])
+        return entries
+
+    async def claim(self, job):
+        key = self._job_key(job)
+        if await self.redis.set(key, "sending", ex=self.claim_ttl, nx=True):
+            return "claimed"
+        state = await self.redis.get(key)
+        return "done" if state in ("sent", "failed") else "busy"
+
+    async def complete(self, entry_id, job, outcome):
+        batch_key = self._batch_key(job.batch_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if outcome != "duplicate":
+                pipe.set(self._job_key(job), outcome, ex=self.key_ttl)
+            pipe.hincrby(batch_key, outcome, 1)
+            pipe.hincrby(batch_key, "done", 1)
+            pipe.xack(self.stream, self.group, entry_id)
+            pipe.xdel(self.stream, entry_id)
+            results = await pipe.execute()
+        return int(results[-3])
+
+    async def retry(self, entry_id, job, delay):
+        retried = replace(job, attempt=job.attempt + 1, shaped=False)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(self._job_key(job))
+            pipe.zadd(self.delayed, {retried.to_json(): self._clock() + delay})
+            pipe.hincrby(self._batch_key(job.batch_id), "retried", 1)
+            pipe.xack(self.stream, self.group, entry_id)
+            pipe.xdel(self.stream, entry_id)
+            await pipe.execute()
+
+    async def defer(self, entry_id, job, delay):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.delayed, {job.to_json(): self._clock() + delay})
+            pipe.xack(self.stream, self.group, entry_id)
+            pipe.xdel(self.stream, entry_id)
+            await pipe.execute()
+
+    async def get_batch(self, batch_id):
+        flat = await self.redis.hgetall(self._batch_key(batch_id))
+        if not flat:
+            return None
+        batch: Dict[str, Any] = dict(zip(flat[::2], flat[1::2], strict=True))
+        for field in ("total",) + _COUNTERS:
+            batch[field] = int(batch.get(field) or 0)
+        return batch
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+# ============================================================================
+# Dispatcher
+# ============================================================================
+
+# Reserves the next send slot for a key (GCRA); returns the wait in ms
+# KEYS: arrival time key; ARGV: now (ms), interval (ms), tolerance (ms),
+# earliest send time (ms)
+SHAPE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local at = tonumber(ARGV[4])
+local tat = tonumber(redis.call('GET', KEYS[1]) or ARGV[4])
+if tat < at then tat = at end
+local next_tat = tat + tonumber(ARGV[2])
+redis.call('SET', KEYS[1], tostring(next_tat), 'PX', math.ceil(next_tat - now) + 1000)
+local wait = math.max(tat - tonumber(ARGV[3]), at) - now
+if wait < 0 then return 0 end
+return math.ceil(wait)
+"""
+
+
+class _Shaper:
+    """Spaces sends per key: ``rate`` per second after a burst of ``burst``.
+
+    Each caller reserves the next free slot (GCRA), so waiters are served in
+    order without polling. With ``redis`` the arrival times are shared, so
+    the rate holds across every instance draining the queue; if Redis
+    fails, this instance falls back to its own state.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_keys: int = 10_000,
+        clock: Callable[[], float] = time.time,
+        redis: Optional[AsyncUpstashRedis] = None,
+        prefix: str = "notify:shape",
+    ):
+        self.interval = 1.0 / rate
+        self.tolerance = (burst - 1) * self.interval
+        self.max_keys = max_keys
+        self.redis = redis
+        self.prefix = prefix
+        self._clock = clock
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+
+    async def reserve(self, key: str, after: float = 0.0) -> float:
+        """Seconds until the reserved send may go out, at least ``after``."""
+        if self.redis is not None:
+            try:
+                now_ms = int(self._clock() * 1000)
+                wait_ms = await self.redis.eval(
+                    SHAPE_SCRIPT,
+                    1,
+                    f"{self.prefix}:{key}",
+                    now_ms,
+                    self.interval * 1000,
+                    self.tolerance * 1000,
+                    now_ms + int(after * 1000),
+                )
+                return int(wait_ms) / 1000
+            except Exception as e:
+                logger.warning("Shared send shaping unavailable, shaping locally", key=key, error=str(e))
+        return self._reserve_local(key, after)
+
+    def _reserve_local(self, key: str, after: float = 0.0) -> float:
+        now = self._clock()
+        at = now + after
+        tat = max(self._tats.get(key, at), at)
+        self._tats[key] = tat + self.interval
+        self._tats.move_to_end(key)
+        while len(self._tats) > self.max_keys:
+            self._tats.popitem(last=False)
+        return max(0.0, max(tat - self.tolerance, at) - now)
+
+
+class BulkDispatcher:
+    """Drains the send queue with bounded concurrency"""
+
+    def __init__(
+        self,
+        queue: SendQueue,
+        resolver: Any,
+        concurrency: Optional[int] = None,
+        salon_rate: Optional[float] = None,
+        number_rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_base: Optional[float] = None,
+        retry_cap: float = 300.0,
+        max_wait: float = 0.1,
+        poll_interval: float = 0.5,
+    ):
+        """
+        Args:
+            queue: Send queue to drain
+            resolver: ``CredentialResolver`` (per-salon Twilio clients)
+            concurrency: Sends in flight
+            salon_rate: Messages per second per salon
+            number_rate: Messages per second per sending number
+            burst: Messages a salon or number may send back to back
+            max_attempts: Attempts per message, including the first
+            retry_base: Seconds before the first retry (doubled per attempt, full jitter)
+            retry_cap: Longest retry delay in seconds
+            max_wait: Longest shaping wait that holds a worker; later slots are deferred
+            poll_interval: Seconds to wait when the queue is empty
+        """
+        self.queue = queue
+        self.resolver = resolver
+        self.concurrency = concurrency or settings.bulk_concurrency
+        burst = burst or settings.bulk_burst
+        # Share shaping state between instances when the queue is shared
+        redis = queue.redis if isinstance(queue, RedisSendQueue) else None
+        prefix = queue.prefix if isinstance(queue, RedisSendQueue) else "notify"
+        self._salons = _Shaper(
+            salon_rate or settings.bulk_salon_rate, burst, redis=redis, prefix=f"{prefix}:shape:salon"
+        )
+        self._numbers = _Shaper(
+            number_rate or settings.bulk_number_rate, burst, redis=redis, prefix=f"{prefix}:shape:number"
+        )
+        self.max_attempts = max_attempts or settings.bulk_max_attempts
+        self.retry_base = settings.bulk_retry_base if retry_base is None else retry_base
+        self.retry_cap = retry_cap
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._stats = {"sent": 0, "failed": 0, "retried": 0, "duplicate": 0, "deferred": 0, "errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._loop_task is not None and not self._loop_task.done()
+
+    async def start(self) -> None:
+        """Start draining in the background."""
+        if not self.running:
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop reading and let in-flight sends finish (unfinished jobs stay queued)."""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._loop_task
+            self._loop_task = None
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=timeout)
+
+    async def _run(self) -> None:
+        min_read = max(1, self.concurrency // 4)
+        while True:
+            free = self.concurrency - len(self._tasks)
+            if free < min_read:
+                await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            try:
+                entries = await self.queue.read(free)
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error("Error reading bulk send queue", error=str(e))
+                await asyncio.sleep(self.poll_interval)
+                continue
+            if not entries:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            for entry_id, job in entries:
+                task = asyncio.create_task(self._dispatch(entry_id, job))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, client: Any, job: SendJob) -> MessageResult:
+        try:
+            if job.channel == "whatsapp":
+                return await client.send_whatsapp(to=job.to, message=job.body, media_url=job.media_url)
+            return await client.send_sms(to=job.to, message=job.body)
+        except Exception as e:
+            return MessageResult(success=False, error=str(e), to=job.to, retryable=True)
+
+    async def _dispatch(self, entry_id: str, job: SendJob) -> None:
+        try:
+            try:
+                client = await self.resolver.resolve_twilio_client(job.salon_id)
+            except Exception as e:
+                # Missing credentials or resolver outage: worth another attempt
+                await self._failed(entry_id, job, MessageResult(success=False, error=str(e), to=job.to, retryable=True))
+                return
+
+            if not job.shaped:
+                number = client.whatsapp_number if job.channel == "whatsapp" else client.sms_number
+                # The number slot is taken no earlier than the salon slot, so
+                # the send goes out in exactly the number slot it reserved
+                delay = await self._numbers.reserve(
+                    number or "", after=await self._salons.reserve(job.salon_id or "")
+                )
+                if delay > self.max_wait:
+                    await self.queue.defer(entry_id, replace(job, shaped=True), delay)
+                    self._stats["deferred"] += 1
+                    return
+                if delay:
+                    await asyncio.sleep(delay)
+
+            state = await self.queue.claim(job)
+            if state == "busy":
+                return
+            if state == "done":
+                await self._finish(entry_id, job, "duplicate")
+                return
+
+            result = await self._send(client, job)
+            if result.success:
+                await self._finish(entry_id, job, "sent")
+            else:
+                await self._failed(entry_id, job, result)
+        except Exception as e:
+            # Left pending; reclaimed once claim_idle passes
+            self._stats["errors"] += 1
+            logger.error("Error dispatching bulk message", batch_id=job.batch_id, error=str(e))
+
+    async def _failed(self, entry_id: str, job: SendJob, result: MessageResult) -> None:
+        if result.retryable and job.attempt + 1 < self.max_attempts:
+            delay = random.uniform(0, min(self.retry_cap, self.retry_base * 2 ** job.attempt))
+            await self.queue.retry(entry_id, job, delay)
+            self._stats["retried"] += 1
+            return
+        logger.warning(
+            "Bulk message failed",
+            batch_id=job.batch_id,
+            to=job.to,
+            attempt=job.attempt + 1,
+            error=result.error
+        )
+        await self._finish(entry_id, job, "failed")
+
+    async def _finish(self, entry_id: str, job: SendJob, outcome: str) -> None:
+        done = await self.queue.complete(entry_id, job, outcome)
+        self._stats[outcome] += 1
+        total = job.batch_total
+        if total and (done == total or done % max(1, total // 10) == 0):
+            logger.info(
+                "Bulk batch completed" if done == total else "Bulk batch progress",
+                batch_id=job.batch_id,
+                done=done,
+                total=total
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Outcomes so far and sends in flight."""
+        return {**self._stats, "in_flight": len(self._tasks), "running": self.running}
+
+
+# Singletons
+_send_queue: Optional[SendQueue] = None
+_bulk_dispatcher: Optional[BulkDispatcher] = None
+
+
+def get_send_queue() -> SendQueue:
+    """Redis stream queue when Upstash is configured, else the local stand-in."""
+    global _send_queue
+    if _send_queue is None:
+        if settings.upstash_redis_rest_url and settings.upstash_redis_rest_token:
+            _send_queue = RedisSendQueue(
+                AsyncUpstashRedis(settings.upstash_redis_rest_url, settings.upstash_redis_rest_token)
+            )
+        else:
+            logger.warning("Upstash not configured - bulk sends use an in-process queue")
+            _send_queue = LocalSendQueue()
+    return _send_queue
+
+
+def get_bulk_dispatcher() -> BulkDispatcher:
+    """Get the dispatcher draining ``get_send_queue()``."""
+    global _bulk_dispatcher
+    if _bulk_dispatcher is None:
+        from .router import get_credential_resolver
+        _bulk_dispatcher = BulkDispatcher(get_send_queue(), get_credential_resolver())
+    return _bulk_dispatcher
@@ -29,11 +29,27 @@ class Settings(BaseSettings):
     twilio_api_key_sid: Optional[str] = None
     twilio_api_key_secret: Optional[str] = None
     twilio_whatsapp_number: Optional[str] = None  # Platform default WhatsApp number
+    twilio_api_base_url: str = "https://api.twilio.com"
+    twilio_timeout: float = 15.0
+    twilio_max_connections: int = 100  # Pooled keep-alive connections to Twilio
+    
+    # Resolved per-salon Twilio clients (invalidated on integration changes)
+    twilio_client_cache_ttl: int = 300  # seconds
+    twilio_client_cache_size: int = 5000
     
     # Redis
     upstash_redis_rest_url: Optional[str] = None
     upstash_redis_rest_token: Optional[str] = None
     
+    # Bulk sends (queue drained in the background by every instance)
+    bulk_max_recipients: int = 10000
+    bulk_concurrency: int = 64  # Sends in flight per instance
+    bulk_salon_rate: float = 100.0  # Messages/second per salon
+    bulk_number_rate: float = 80.0  # Messages/second per sending number
+    bulk_burst: int = 20
+    bulk_max_attempts: int = 5
+    bulk_retry_base: float = 2.0  # Seconds before the first retry (full jitter)
+    
     # Feature Flags
     use_platform_twilio: bool = True  # Default to platform credentials
     
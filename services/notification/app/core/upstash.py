@@ -0,0 +1,220 @@
+"""Non-blocking Upstash Redis REST client for the notification service.
+
+Same protocol and interface as the API and AI services' clients, plus the
+stream, hash and sorted-set commands the bulk send queue uses.
+
+Example:
+    client = AsyncUpstashRedis(url, token)
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.xadd("notify:send", {"job": payload})
+        pipe.hincrby("notify:batch:b1", "queued", 1)
+        await pipe.execute()
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+
+class UpstashError(Exception):
+    """Raised when Upstash rejects a command."""
+
+
+class _Commands:
+    """Redis commands shared by the client (awaitable) and pipelines (queued)."""
+
+    def _command(self, *args: Any) -> Any:
+        raise NotImplementedError
+
+    def ping(self):
+        return self._command("PING")
+
+    def get(self, key: str):
+        return self._command("GET", key)
+
+    def mget(self, keys: List[str]):
+        return self._command("MGET", *keys)
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False):
+        args = ["SET", key, value]
+        if ex:
+            args += ["EX", ex]
+        if nx:
+            args.append("NX")
+        return self._command(*args)
+
+    def delete(self, *keys: str):
+        return self._command("DEL", *keys)
+
+    def exists(self, *keys: str):
+        return self._command("EXISTS", *keys)
+
+    def expire(self, key: str, seconds: int):
+        return self._command("EXPIRE", key, seconds)
+
+    def ttl(self, key: str):
+        return self._command("TTL", key)
+
+    def incr(self, key: str):
+        return self._command("INCR", key)
+
+    def keys(self, pattern: str):
+        return self._command("KEYS", pattern)
+
+    def scan(self, cursor: int, match: Optional[str] = None, count: Optional[int] = None):
+        args = ["SCAN", cursor]
+        if match:
+            args += ["MATCH", match]
+        if count:
+            args += ["COUNT", count]
+        return self._command(*args)
+
+    def sadd(self, key: str, *members: str):
+        return self._command("SADD", key, *members)
+
+    def smembers(self, key: str):
+        return self._command("SMEMBERS", key)
+
+    def eval(self, script: str, numkeys: int, *keys_and_args: Any):
+        return self._command("EVAL", script, numkeys, *keys_and_args)
+
+    def evalsha(self, sha: str, numkeys: int, *keys_and_args: Any):
+        return self._command("EVALSHA", sha, numkeys, *keys_and_args)
+
+    def publish(self, channel: str, message: str):
+        return self._command("PUBLISH", channel, message)
+
+    def hset(self, key: str, mapping: Dict[str, Any]):
+        args: List[Any] = ["HSET", key]
+        for field, value in mapping.items():
+            args += [field, value]
+        return self._command(*args)
+
+    def hincrby(self, key: str, field: str, amount: int = 1):
+        return self._command("HINCRBY", key, field, amount)
+
+    def hgetall(self, key: str):
+        return self._command("HGETALL", key)
+
+    def zadd(self, key: str, mapping: Dict[str, float]):
+        args: List[Any] = ["ZADD", key]
+        for member, score in mapping.items():
+            args += [score, member]
+        return self._command(*args)
+
+    def xadd(self, stream: str, fields: Dict[str, Any], id: str = "*"):
+        args: List[Any] = ["XADD", stream, id]
+        for field, value in fields.items():
+            args += [field, value]
+        return self._command(*args)
+
+    def xgroup_create(self, stream: str, group: str, id: str = "0", mkstream: bool = True):
+        args = ["XGROUP", "CREATE", stream, group, id]
+        if mkstream:
+            args.append("MKSTREAM")
+        return self._command(*args)
+
+    def xreadgroup(self, group: str, consumer: str, stream: str, count: int, id: str = ">"):
+        return self._command("XREADGROUP", "GROUP", group, consumer, "COUNT", count, "STREAMS", stream, id)
+
+    def xautoclaim(self, stream: str, group: str, consumer: str, min_idle_ms: int, start: str = "0-0", count: int = 100):
+        return self._command("XAUTOCLAIM", stream, group, consumer, min_idle_ms, start, "COUNT", count)
+
+    def xack(self, stream: str, group: str, *ids: str):
+        return self._command("XACK", stream, group, *ids)
+
+    def xdel(self, stream: str, *ids: str):
+        return self._command("XDEL", stream, *ids)
+
+    def xlen(self, stream: str):
+        return self._command("XLEN", stream)
+
+
+def _result(payload: Any) -> Any:
+    if isinstance(payload, dict) and "error" in payload:
+        raise UpstashError(payload["error"])
+    return payload.get("result") if isinstance(payload, dict) else payload
+
+
+class AsyncUpstashPipeline(_Commands):
+    """Queues commands and sends them in one request on ``execute``."""
+
+    def __init__(self, client: "AsyncUpstashRedis", transaction: bool):
+        self._client = client
+        self._path = "/multi-exec" if transaction else "/pipeline"
+        self._commands: List[List[Any]] = []
+
+    async def __aenter__(self) -> "AsyncUpstashPipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._commands.clear()
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def _command(self, *args: Any) -> "AsyncUpstashPipeline":
+        self._commands.append(list(args))
+        return self
+
+    async def execute(self) -> List[Any]:
+        """Send queued commands; raises ``UpstashError`` if any failed."""
+        if not self._commands:
+            return []
+        commands, self._commands = self._commands, []
+        payload = await self._client._post(self._path, commands)
+        return [_result(item) for item in payload]
+
+
+class AsyncUpstashRedis(_Commands):
+    """Non-blocking Upstash REST client with connection pooling."""
+
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        timeout: float = 5.0,
+        max_connections: int = 50,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._http = httpx.AsyncClient(
+            base_url=url.rstrip("/"),
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=transport,
+        )
+
+    async def _post(self, path: str, body: Any) -> Any:
+        response = await self._http.post(path, json=body)
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("error", response.text)
+            except ValueError:
+                detail = response.text
+            raise UpstashError(f"Upstash HTTP {response.status_code}: {detail}")
+        return response.json()
+
+    async def _command(self, *args: Any) -> Any:
+        return _result(await self._post("/", list(args)))
+
+    def pipeline(self, transaction: bool = True) -> AsyncUpstashPipeline:
+        """Batch commands into one round trip (atomic if ``transaction``)."""
+        return AsyncUpstashPipeline(self, transaction)
+
+    async def scan_iter(self, match: Optional[str] = None, count: int = 1000) -> AsyncIterator[str]:
+        """Iterate keys matching ``match`` with SCAN."""
+        cursor = 0
+        while True:
+            cursor, keys = await self.scan(cursor, match=match, count=count)
+            for key in keys:
+                yield key
+            cursor = int(cursor)
+            if cursor == 0:
+                break
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        await self._http.aclose()
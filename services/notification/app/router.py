@@ -1,11 +1,16 @@
 """Notification Service Router with Multi-Tenant Support and Authentication"""
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple, Callable, Any, Literal
+from collections import OrderedDict
+import asyncio
 import os
+import time
+import uuid
 import structlog
 
 from .config import settings
+from .bulk import SendJob, get_bulk_dispatcher, get_send_queue, render_template
 from .twilio_client import TwilioClient, TwilioClientFactory, MessageResult
 from .core.auth import get_current_user, AuthContext
 
@@ -63,6 +68,30 @@ class TestMessageResponse(BaseModel):
     error: Optional[str] = None
 
 
+class BulkRecipient(BaseModel):
+    """One recipient of a bulk send"""
+    to: str = Field(..., description="Phone number in E.164 format")
+    variables: Dict[str, Any] = Field(default_factory=dict, description="Values for the template placeholders")
+
+
+class BulkSendRequest(BaseModel):
+    """Request to send one templated message to many recipients"""
+    channel: Literal["whatsapp", "sms"] = "whatsapp"
+    template: str = Field(..., description="Message body; {name} placeholders are filled per recipient")
+    recipients: List[BulkRecipient] = Field(..., min_length=1, max_length=settings.bulk_max_recipients)
+    media_url: Optional[str] = Field(None, description="Optional media URL (WhatsApp)")
+    salon_id: Optional[str] = Field(None, description="Salon ID for BYOK")
+    idempotency_key: Optional[str] = Field(None, description="Resubmitting with the same key returns the original batch")
+
+
+class BulkSendResponse(BaseModel):
+    """Response from a bulk send (messages are sent in the background)"""
+    batch_id: str
+    queued: int
+    duplicates: int = 0  # Repeated recipients dropped from the batch
+    created: bool = True  # False if idempotency_key matched an earlier batch
+
+
 class SalonIntegrationConfig(BaseModel):
     """Salon integration configuration from Firestore"""
     salon_id: str
@@ -78,16 +107,45 @@ class SalonIntegrationConfig(BaseModel):
 # Multi-Tenant Credential Resolution
 # ============================================================================
 
+class IntegrationLookupError(Exception):
+    """The salon's integration doc could not be read (not the same as absent)"""
+
+
 class CredentialResolver:
     """Resolves Twilio credentials for multi-tenant support.
     
     Resolution order:
     1. Check for salon-specific BYOK credentials in Firestore
     2. Fall back to platform credentials from GCP Secret Manager
+    
+    Resolved clients are cached per salon (LRU, ``twilio_client_cache_ttl``
+    seconds), so the integration doc is read and decrypted once per salon
+    instead of once per message; concurrent misses share one lookup. A
+    Firestore listener on ``salon_integrations`` evicts a salon as soon as
+    its integration changes, and the TTL bounds staleness without it.
+    
+    If the integration lookup fails, the message goes out on the platform
+    client, but that fallback is not cached, so the next message retries
+    the lookup.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self._firestore_db = None
+        self.ttl = settings.twilio_client_cache_ttl if ttl is None else ttl
+        self.max_size = settings.twilio_client_cache_size if max_size is None else max_size
+        self._clock = clock
+        self._clients: "OrderedDict[str, Tuple[float, TwilioClient]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._watch = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
     
     @property
     def firestore_db(self):
@@ -105,6 +163,9 @@ class CredentialResolver:
             
         Returns:
             SalonIntegrationConfig if found, None otherwise
+            
+        Raises:
+            IntegrationLookupError: If Firestore could not be read
         """
         try:
             doc_ref = self.firestore_db.collection("salon_integrations").document(salon_id)
@@ -126,7 +187,7 @@ class CredentialResolver:
             
         except Exception as e:
             logger.error("Error fetching salon integration", salon_id=salon_id, error=str(e))
-            return None
+            raise IntegrationLookupError(str(e)) from e
     
     def _decrypt_credential(self, encrypted: str) -> str:
         """Decrypt a credential using the encryption service.
@@ -168,36 +229,72 @@ class CredentialResolver:
         Raises:
             HTTPException: If no credentials are available
         """
-        # If salon_id provided, check for BYOK credentials
-        if salon_id:
-            integration = await self.get_salon_integration(salon_id)
-            
-            if integration and integration.mode == "byok" and integration.status == "active":
-                # Use salon's own Twilio credentials
-                try:
-                    account_sid = self._decrypt_credential(integration.twilio_account_sid)
-                    auth_token = self._decrypt_credential(integration.twilio_auth_token)
-                    
-                    if account_sid and auth_token:
-                        logger.info(
-                            "Using BYOK Twilio credentials",
-                            salon_id=salon_id,
-                            mode="byok"
-                        )
-                        return TwilioClient(
-                            account_sid=account_sid,
-                            auth_token=auth_token,
-                            whatsapp_number=integration.twilio_whatsapp_number,
-                            sms_number=integration.twilio_sms_number,
-                        )
-                except Exception as e:
-                    logger.warning(
-                        "Failed to decrypt BYOK credentials, falling back to platform",
+        if not salon_id:
+            return self._platform_client(salon_id)
+        
+        entry = self._clients.get(salon_id)
+        if entry is not None and entry[0] > self._clock():
+            self._clients.move_to_end(salon_id)
+            self.hits += 1
+            return entry[1]
+        
+        task = self._inflight.get(salon_id)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._resolve(salon_id))
+            self._inflight[salon_id] = task
+            task.add_done_callback(lambda _: self._finish(salon_id, task))
+        try:
+            return await asyncio.shield(task)
+        except IntegrationLookupError:
+            # Serve this message from the platform, but do not cache it
+            return self._platform_client(salon_id)
+    
+    def _finish(self, salon_id: str, task: asyncio.Task) -> None:
+        """Cache a finished lookup unless the salon was invalidated meanwhile."""
+        if self._inflight.get(salon_id) is not task:
+            return
+        self._inflight.pop(salon_id, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._clients[salon_id] = (self._clock() + self.ttl, task.result())
+        self._clients.move_to_end(salon_id)
+        while len(self._clients) > self.max_size:
+            self._clients.popitem(last=False)
+    
+    async def _resolve(self, salon_id: str) -> TwilioClient:
+        """Uncached lookup: BYOK integration doc, else platform credentials."""
+        integration = await self.get_salon_integration(salon_id)
+        
+        if integration and integration.mode == "byok" and integration.status == "active":
+            # Use salon's own Twilio credentials
+            try:
+                account_sid = self._decrypt_credential(integration.twilio_account_sid)
+                auth_token = self._decrypt_credential(integration.twilio_auth_token)
+                
+                if account_sid and auth_token:
+                    logger.info(
+                        "Using BYOK Twilio credentials",
                         salon_id=salon_id,
-                        error=str(e)
+                        mode="byok"
                     )
+                    return TwilioClient(
+                        account_sid=account_sid,
+                        auth_token=auth_token,
+                        whatsapp_number=integration.twilio_whatsapp_number,
+                        sms_number=integration.twilio_sms_number,
+                    )
+            except Exception as e:
+                logger.warning(
+                    "Failed to decrypt BYOK credentials, falling back to platform",
+                    salon_id=salon_id,
+                    error=str(e)
+                )
         
-        # Fall back to platform credentials
+        return self._platform_client(salon_id)
+    
+    def _platform_client(self, salon_id: Optional[str]) -> TwilioClient:
+        """Client on the platform credentials."""
         if not settings.twilio_account_sid or not settings.twilio_auth_token:
             raise HTTPException(
                 status_code=503,
@@ -211,6 +308,66 @@ class CredentialResolver:
         )
         
         return TwilioClientFactory.from_settings(settings)
+    
+    def invalidate(self, salon_id: Optional[str] = None) -> None:
+        """Drop a salon's cached client (all salons if ``salon_id`` is None)."""
+        self.invalidations += 1
+        if salon_id is None:
+            self._clients.clear()
+            self._inflight.clear()
+            return
+        self._clients.pop(salon_id, None)
+        self._inflight.pop(salon_id, None)
+    
+    def _on_integrations_snapshot(self, _docs, changes, _read_time) -> None:
+        # Runs on the Firestore watch thread; the cache is only touched on
+        # the event loop
+        for change in changes:
+            self._loop.call_soon_threadsafe(self.invalidate, change.document.id)
+    
+    def watch_integrations(self) -> bool:
+        """Evict salons as their integration docs change (one listener per instance).
+        
+        Must be called from the event loop that serves ``resolve_twilio_client``.
+        
+        Returns:
+            True if the listener is running
+        """
+        if self._watch is not None:
+            return True
+        self._loop = asyncio.get_running_loop()
+        try:
+            from google.cloud import firestore
+            db = firestore.Client(project=settings.gcp_project_id)
+            self._watch = db.collection("salon_integrations").on_snapshot(self._on_integrations_snapshot)
+            logger.info("Watching salon integrations for credential changes")
+            return True
+        except Exception as e:
+            logger.warning(
+                "Integration watch unavailable, relying on cache TTL",
+                ttl=self.ttl,
+                error=str(e)
+            )
+            return False
+    
+    def stop_watch(self) -> None:
+        """Stop the integration listener."""
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+    
+    def stats(self) -> Dict[str, object]:
+        """Cache size, hit rate and invalidations."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._clients),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "ttl_seconds": self.ttl,
+            "watching": self._watch is not None,
+        }
 
 
 # Singleton credential resolver
@@ -372,6 +529,94 @@ async def send_test_message(
         )
 
 
+@router.post("/bulk/send", response_model=BulkSendResponse, status_code=202)
+async def send_bulk(
+    request: BulkSendRequest,
+    current_user: AuthContext = Depends(get_current_user),
+):
+    """Queue one templated message per recipient.
+    
+    Returns as soon as the batch is queued; progress is available from
+    ``GET /bulk/{batch_id}``. Repeated recipients are sent once.
+    
+    **Authentication Required**: Bearer token in Authorization header.
+    """
+    effective_salon_id = request.salon_id or current_user.salon_id
+    if current_user.salon_id and effective_salon_id != current_user.salon_id:
+        raise HTTPException(status_code=403, detail="Access denied to this salon")
+    
+    batch_id = uuid.uuid4().hex
+    seen = set()
+    messages = []
+    for recipient in request.recipients:
+        if recipient.to in seen:
+            continue
+        seen.add(recipient.to)
+        messages.append((recipient.to, render_template(request.template, recipient.variables)))
+    
+    jobs = [
+        SendJob(
+            job_id=f"{batch_id}:{i}",
+            batch_id=batch_id,
+            salon_id=effective_salon_id,
+            channel=request.channel,
+            to=to,
+            body=body,
+            media_url=request.media_url,
+            batch_total=len(messages),
+        )
+        for i, (to, body) in enumerate(messages)
+    ]
+    
+    queue = get_send_queue()
+    try:
+        batch_id, created = await queue.create_batch(
+            batch_id,
+            jobs,
+            meta={"salon_id": effective_salon_id, "channel": request.channel, "created_by": current_user.uid},
+            idempotency_key=request.idempotency_key,
+        )
+    except Exception as e:
+        logger.error("Error queueing bulk send", salon_id=effective_salon_id, error=str(e))
+        raise HTTPException(status_code=503, detail="Bulk send queue unavailable")
+    
+    if not created:
+        batch = await queue.get_batch(batch_id) or {}
+        return BulkSendResponse(batch_id=batch_id, queued=batch.get("total", 0), created=False)
+    
+    logger.info(
+        "Bulk send queued",
+        batch_id=batch_id,
+        salon_id=effective_salon_id,
+        user_id=current_user.uid,
+        queued=len(jobs)
+    )
+    
+    return BulkSendResponse(
+        batch_id=batch_id,
+        queued=len(jobs),
+        duplicates=len(request.recipients) - len(jobs),
+    )
+
+
+@router.get("/bulk/{batch_id}")
+async def get_bulk_progress(
+    batch_id: str,
+    current_user: AuthContext = Depends(get_current_user),
+):
+    """Get a bulk batch's progress (total/sent/failed/retried/duplicate/done).
+    
+    **Authentication Required**: Bearer token in Authorization header.
+    """
+    batch = await get_send_queue().get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if current_user.salon_id and batch.get("salon_id") != current_user.salon_id:
+        raise HTTPException(status_code=403, detail="Access denied to this batch")
+    
+    return {"batch_id": batch_id, **batch, "complete": batch["done"] >= batch["total"]}
+
+
 @router.get("/status")
 async def get_notification_status():
     """Get notification service status."""
@@ -381,6 +626,8 @@ async def get_notification_status():
         "sms_configured": bool(settings.twilio_account_sid),
         "platform_mode": settings.use_platform_twilio,
         "multi_tenant_enabled": True,
+        "credential_cache": get_credential_resolver().stats(),
+        "bulk": get_bulk_dispatcher().stats(),
     }
 
 
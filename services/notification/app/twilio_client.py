@@ -1,13 +1,64 @@
-"""Twilio Client for WhatsApp and SMS messaging"""
-import os
+"""Twilio Client for WhatsApp and SMS messaging
+
+Messages are sent with an async POST to the Twilio REST API over one pooled
+keep-alive ``httpx.AsyncClient`` shared by every salon's client, so a send
+never blocks the event loop and does not pay a TLS handshake per message.
+"""
 from typing import Optional, Dict, Any
 from dataclasses import dataclass
+import httpx
 import structlog
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
+
+from .config import settings
 
 logger = structlog.get_logger()
 
+_twilio_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_twilio_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Get or create the pooled HTTP client for the Twilio REST API.
+    
+    Args:
+        transport: Optional transport override (tests)
+    """
+    global _twilio_http_client
+    if _twilio_http_client is None or _twilio_http_client.is_closed:
+        _twilio_http_client = httpx.AsyncClient(
+            base_url=settings.twilio_api_base_url,
+            timeout=httpx.Timeout(settings.twilio_timeout, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=settings.twilio_max_connections,
+                max_keepalive_connections=settings.twilio_max_connections,
+                keepalive_expiry=60.0,
+            ),
+            transport=transport,
+        )
+    return _twilio_http_client
+
+
+async def close_twilio_http_client() -> None:
+    """Close the pooled Twilio client (application shutdown)."""
+    global _twilio_http_client
+    if _twilio_http_client is not None:
+        await _twilio_http_client.aclose()
+        _twilio_http_client = None
+
+
+class TwilioAPIError(Exception):
+    """Error response from the Twilio REST API"""
+    
+    def __init__(self, status: int, code: Optional[int], msg: str):
+        super().__init__(f"HTTP {status} error: {msg}")
+        self.status = status
+        self.code = code
+        self.msg = msg
+    
+    @property
+    def retryable(self) -> bool:
+        """Throttling and server errors are worth retrying; 4xx are not."""
+        return self.status == 429 or self.status >= 500
+
 
 @dataclass
 class MessageResult:
@@ -18,6 +69,7 @@ class MessageResult:
     to: Optional[str] = None
     from_number: Optional[str] = None
     status: Optional[str] = None
+    retryable: bool = False  # Throttled, Twilio 5xx or network error
 
 
 class TwilioClient:
@@ -29,19 +81,44 @@ class TwilioClient:
         auth_token: str,
         whatsapp_number: Optional[str] = None,
         sms_number: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
     ):
         self.account_sid = account_sid
         self.auth_token = auth_token
         self.whatsapp_number = whatsapp_number
         self.sms_number = sms_number
-        self._client: Optional[Client] = None
+        self._http_client = http_client
     
     @property
-    def client(self) -> Client:
-        """Lazy initialization of Twilio client"""
-        if self._client is None:
-            self._client = Client(self.account_sid, self.auth_token)
-        return self._client
+    def http_client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client (shared across salons unless injected)"""
+        return self._http_client or get_twilio_http_client()
+    
+    async def _create_message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a message to the Twilio REST API.
+        
+        Returns:
+            The created message resource
+            
+        Raises:
+            TwilioAPIError: If Twilio rejects the request
+        """
+        response = await self.http_client.post(
+            f"/2010-04-01/Accounts/{self.account_sid}/Messages.json",
+            data={key: value for key, value in params.items() if value is not None},
+            auth=(self.account_sid, self.auth_token),
+        )
+        if response.status_code >= 400:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            raise TwilioAPIError(
+                status=response.status_code,
+                code=body.get("code"),
+                msg=body.get("message") or response.text or f"HTTP {response.status_code}",
+            )
+        return response.json()
     
     def _format_whatsapp_number(self, phone: str) -> str:
         """Format phone number for WhatsApp (whatsapp:+91XXXXXXXXXX)"""
@@ -83,28 +160,28 @@ class TwilioClient:
             )
             
             # Send message
-            msg = self.client.messages.create(
-                from_=from_number,
-                body=message,
-                to=to_number,
-                media_url=media_url,
-            )
+            msg = await self._create_message({
+                "From": from_number,
+                "Body": message,
+                "To": to_number,
+                "MediaUrl": media_url,
+            })
             
             logger.info(
                 "WhatsApp message sent",
-                sid=msg.sid,
-                status=msg.status
+                sid=msg.get("sid"),
+                status=msg.get("status")
             )
             
             return MessageResult(
                 success=True,
-                message_sid=msg.sid,
+                message_sid=msg.get("sid"),
                 to=to,
                 from_number=self.whatsapp_number,
-                status=msg.status
+                status=msg.get("status")
             )
             
-        except TwilioRestException as e:
+        except TwilioAPIError as e:
             logger.error(
                 "Twilio error sending WhatsApp",
                 error=str(e),
@@ -113,14 +190,16 @@ class TwilioClient:
             return MessageResult(
                 success=False,
                 error=f"Twilio error: {e.msg}",
-                to=to
+                to=to,
+                retryable=e.retryable
             )
         except Exception as e:
             logger.error("Error sending WhatsApp", error=str(e))
             return MessageResult(
                 success=False,
                 error=str(e),
-                to=to
+                to=to,
+                retryable=isinstance(e, httpx.TransportError)
             )
     
     async def send_sms(
@@ -145,27 +224,27 @@ class TwilioClient:
                 from_number=from_number
             )
             
-            msg = self.client.messages.create(
-                from_=from_number,
-                body=message,
-                to=to_number,
-            )
+            msg = await self._create_message({
+                "From": from_number,
+                "Body": message,
+                "To": to_number,
+            })
             
             logger.info(
                 "SMS sent",
-                sid=msg.sid,
-                status=msg.status
+                sid=msg.get("sid"),
+                status=msg.get("status")
             )
             
             return MessageResult(
                 success=True,
-                message_sid=msg.sid,
+                message_sid=msg.get("sid"),
                 to=to,
                 from_number=self.sms_number,
-                status=msg.status
+                status=msg.get("status")
             )
             
-        except TwilioRestException as e:
+        except TwilioAPIError as e:
             logger.error(
                 "Twilio error sending SMS",
                 error=str(e),
@@ -174,14 +253,16 @@ class TwilioClient:
             return MessageResult(
                 success=False,
                 error=f"Twilio error: {e.msg}",
-                to=to
+                to=to,
+                retryable=e.retryable
             )
         except Exception as e:
             logger.error("Error sending SMS", error=str(e))
             return MessageResult(
                 success=False,
                 error=str(e),
-                to=to
+                to=to,
+                retryable=isinstance(e, httpx.TransportError)
             )
     
     async def send_template_whatsapp(
@@ -217,18 +298,18 @@ class TwilioClient:
             
             
             # Use the API directly for template messages
-            msg = self.client.messages.create(
-                from_=from_number,
-                content_sid=template_name,  # For content templates
-                to=to_number,
-            )
+            msg = await self._create_message({
+                "From": from_number,
+                "ContentSid": template_name,  # For content templates
+                "To": to_number,
+            })
             
             return MessageResult(
                 success=True,
-                message_sid=msg.sid,
+                message_sid=msg.get("sid"),
                 to=to,
                 from_number=self.whatsapp_number,
-                status=msg.status
+                status=msg.get("status")
             )
             
         except Exception as e:
@@ -236,7 +317,8 @@ class TwilioClient:
             return MessageResult(
                 success=False,
                 error=str(e),
-                to=to
+                to=to,
+                retryable=isinstance(e, httpx.TransportError)
             )
     
     def validate_webhook(self, url: str) -> bool:
@@ -11,7 +11,9 @@ from fastapi.middleware.cors import CORSMiddleware
 import structlog
 
 from app.config import settings
-from app.router import router as notification_router
+from app.router import router as notification_router, get_credential_resolver
+from app.bulk import get_bulk_dispatcher, get_send_queue
+from app.twilio_client import close_twilio_http_client
 
 # Configure logging
 structlog.configure(
@@ -114,10 +116,20 @@ async def lifespan(app: FastAPI):
     else:
         logger.warning("Twilio credentials not configured - messaging will be unavailable")
     
+    # Evict cached per-salon Twilio clients when integrations change
+    get_credential_resolver().watch_integrations()
+    
+    # Drain bulk sends in the background
+    await get_bulk_dispatcher().start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Notification Service")
+    await get_bulk_dispatcher().stop()
+    await get_send_queue().close()
+    get_credential_resolver().stop_watch()
+    await close_twilio_http_client()
 
 
 async def load_secrets_from_gcp():
@@ -198,6 +210,7 @@ async def root():
             "health": "/health",
             "whatsapp": "/api/v1/whatsapp/send",
             "sms": "/api/v1/sms/send",
+            "bulk": "/api/v1/bulk/send",
             "test": "/api/v1/test",
             "status": "/api/v1/status"
         }
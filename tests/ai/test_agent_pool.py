@@ -0,0 +1,152 @@
+"""Tests for the warm agent pool
+
+Covers:
+- get_agent() returning pooled instances once the pool is warmed
+- Pre-resolved client/cache/guardrail and precomputed system prompt
+- Plugin wrappers and registry aliases sharing the pooled instances
+- Per-request overhead removed by the pool
+"""
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/ai'))
+
+from app.plugins.loader import PluginLoader
+from app.plugins.registry import AgentRegistry
+from app.services import agents as agents_module
+from app.services.agents import (
+    AGENTS,
+    BookingAgent,
+    get_agent,
+    get_pooled_agent,
+    reset_agent_pool,
+    warm_agent_pool,
+)
+from app.services.guardrails import SALON_ONLY_INSTRUCTION
+
+
+@pytest.fixture(autouse=True)
+def fake_dependencies():
+    """Singleton getters that count how often agents resolve them."""
+    client = MagicMock(default_model="google/gemini-2.5-flash")
+    cache = MagicMock()
+    reset_agent_pool()
+    with patch.object(agents_module, "get_openrouter_client", AsyncMock(return_value=client)) as get_client, \
+            patch.object(agents_module, "get_cache_service", AsyncMock(return_value=cache)) as get_cache:
+        yield get_client, get_cache
+    reset_agent_pool()
+
+
+@pytest.mark.asyncio
+class TestAgentPool:
+    """Test pooled instances behind get_agent()"""
+
+    async def test_cold_pool_constructs_per_call(self):
+        assert get_agent("booking") is not get_agent("booking")
+        assert get_pooled_agent(BookingAgent) is None
+
+    async def test_warm_pool_returns_shared_instances(self):
+        pooled = await warm_agent_pool()
+
+        assert set(pooled) == set(AGENTS)
+        assert get_agent("booking") is get_agent("booking") is pooled["booking"]
+        assert get_pooled_agent(BookingAgent) is pooled["booking"]
+
+    async def test_kwargs_still_build_a_new_agent(self):
+        await warm_agent_pool()
+        client = MagicMock()
+
+        agent = get_agent("booking", client=client)
+
+        assert agent is not get_agent("booking")
+        assert agent._client is client
+
+    async def test_dependencies_are_resolved_once(self, fake_dependencies):
+        get_client, get_cache = fake_dependencies
+        await warm_agent_pool()
+        calls = get_client.await_count
+
+        for _ in range(5):
+            agent = get_agent("analytics")
+            await agent._get_client()
+            await agent._get_cache()
+
+        assert get_client.await_count == calls
+        assert calls == len(set(AGENTS.values()))
+        assert get_agent("analytics")._guardrail is not None
+
+    async def test_system_prompt_is_precomputed(self):
+        await warm_agent_pool()
+        agent = get_agent("booking")
+
+        assert agent._base_system_prompt == f"{SALON_ONLY_INSTRUCTION}\n\n{agent.system_prompt}"
+        with_context = agent._build_system_prompt({"salon_id": "s1"})
+        assert with_context.startswith(agent._base_system_prompt)
+        assert "salon_id: s1" in with_context
+
+    async def test_warm_failure_still_pools_agent(self, fake_dependencies):
+        get_client, _ = fake_dependencies
+        get_client.side_effect = RuntimeError("no api key")
+
+        await warm_agent_pool()
+
+        assert get_pooled_agent(BookingAgent) is not None
+
+
+@pytest.mark.asyncio
+class TestPluginSharing:
+    """Test that plugin lookups resolve to the pooled instances"""
+
+    async def test_plugin_wrapper_delegates_to_pooled_agent(self):
+        loader = PluginLoader()
+        cold = loader.load("booking_agent")._agent
+        assert cold is loader.load("booking_agent")._agent
+
+        await warm_agent_pool()
+
+        assert loader.load("booking_agent")._agent is get_agent("booking")
+
+    async def test_registry_alias_resolves_legacy_names(self):
+        AgentRegistry.reset()
+        registry = AgentRegistry.get_instance()
+        registry.set_loader(PluginLoader())
+        pooled = await warm_agent_pool()
+        for agent_type, agent in pooled.items():
+            registry.register_alias(agent_type, agent.name)
+
+        plugin = registry.get("booking")
+
+        assert plugin is registry.get("booking_agent")
+        assert plugin._agent is get_agent("booking")
+        AgentRegistry.reset()
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestAgentPoolBenchmark:
+    """Per-request agent setup: construct-per-request vs warm pool"""
+
+    async def test_per_request_overhead(self):
+        requests = 20_000
+
+        async def setup_cost():
+            start = time.perf_counter()
+            for i in range(requests):
+                agent = get_agent("booking")
+                await agent._get_client()
+                await agent._get_cache()
+                agent._get_guardrail()
+                agent._build_system_prompt({"salon_id": f"salon_{i % 50}"})
+            return (time.perf_counter() - start) / requests * 1e6
+
+        cold_us = await setup_cost()
+        await warm_agent_pool()
+        warm_us = await setup_cost()
+
+        print(f"\nper-request agent setup: {cold_us:.2f}us constructed, {warm_us:.2f}us pooled "
+              f"({cold_us - warm_us:.2f}us saved)")
+        assert warm_us < cold_us
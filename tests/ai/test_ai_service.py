@@ -26,6 +26,13 @@ def mock_settings():
         settings.enable_cache = False
         settings.enable_logging = False
         settings.app_version = "0.1.0"
+        settings.session_ttl = 86400
+        settings.session_max_sessions = 10000
+        settings.session_token_budget = 2000
+        settings.session_l1_ttl = 30
+        settings.prompt_context_budget = 1500
+        settings.agent_context_budgets = {}
+        settings.prompt_list_limit = 20
         mock.return_value = settings
         yield settings
 
@@ -0,0 +1,291 @@
+"""Tests for batched marketing/retention generation
+
+Covers:
+- Packing many customers into one structured prompt per LLM call
+- Bounded concurrency and streaming results as packs complete
+- Retrying customers missing from a reply or whose call failed
+- Per-item token/cost split and throughput summary
+- The NDJSON /marketing/batch endpoint
+- Benchmark: one call per customer vs packed prompts
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/ai'))
+
+from app.services.agents import CustomerRetentionAgent, MarketingAgent
+from app.services.batch_generation import BATCH_TASKS, BatchGenerator, parse_items
+
+
+class FakeLLM:
+    """Answers multi-item prompts with one message per customer id."""
+
+    def __init__(self, latency=0.0, tokens_per_call=100, cost=None):
+        self.latency = latency
+        self.tokens_per_call = tokens_per_call
+        self.cost = cost
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self.skip_once = set()   # ids left out of their first reply
+        self.fail_calls = 0      # number of calls that raise
+
+    @staticmethod
+    def ids_in(prompt):
+        customers = prompt.split("):\n", 1)[1].split("\n\n", 1)[0]
+        return [c["id"] for c in json.loads(customers)]
+
+    async def chat(self, prompt, system_prompt=None, **kwargs):
+        ids = self.ids_in(prompt)
+        self.calls.append(ids)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.fail_calls:
+                self.fail_calls -= 1
+                raise RuntimeError("upstream 503")
+            items = []
+            for item_id in ids:
+                if item_id in self.skip_once:
+                    self.skip_once.discard(item_id)
+                    continue
+                items.append({"id": item_id, "message": f"Happy birthday {item_id}!"})
+            usage = {"total_tokens": self.tokens_per_call}
+            if self.cost is not None:
+                usage["cost"] = self.cost
+            return SimpleNamespace(content=json.dumps({"items": items}), usage=usage)
+        finally:
+            self.in_flight -= 1
+
+
+def _customers(n):
+    return [{"id": f"c{i}", "name": f"Customer {i}", "last_service": "Haircut"} for i in range(n)]
+
+
+def _generator(llm, task="birthday_offer", **kwargs):
+    agent = MarketingAgent(client=llm)
+    kwargs.setdefault("cost_per_1k_tokens", 0.5)
+    return BatchGenerator(agent, BATCH_TASKS[task], **kwargs)
+
+
+class TestParseItems:
+    """Test tolerant parsing of multi-item replies"""
+
+    def test_code_fences_and_surrounding_text(self):
+        content = '```json\n{"items": [{"id": 1, "message": " Hi Asha "}]}\n```'
+        assert parse_items(content) == {"1": "Hi Asha"}
+        assert parse_items('Here you go: {"items": [{"id": "a", "message": "Hi"}]}') == {"a": "Hi"}
+
+    def test_invalid_replies(self):
+        assert parse_items("Sorry, I can't help with that") == {}
+        assert parse_items('{"items": [{"id": "a", "message": "trunc') == {}
+        assert parse_items('{"items": [{"id": "a"}, {"message": "x"}, "b"]}') == {}
+
+
+@pytest.mark.asyncio
+class TestBatchGenerator:
+    """Test packing, retries and accounting"""
+
+    async def test_customers_are_packed_per_call(self):
+        llm = FakeLLM()
+        generator = _generator(llm, pack_size=20)
+
+        results = await generator.run(_customers(45), shared={"discount": "20%"}, context={"salon_id": "s1"})
+
+        assert [len(ids) for ids in llm.calls] == [20, 20, 5]
+        assert sorted(r.id for r in results) == sorted(c["id"] for c in _customers(45))
+        assert all(r.success and r.message == f"Happy birthday {r.id}!" for r in results)
+        assert generator.summary.llm_calls == 3
+
+    async def test_prompt_carries_shared_details_and_salon_context(self):
+        llm = FakeLLM()
+        agent = MarketingAgent(client=llm)
+        generator = BatchGenerator(agent, BATCH_TASKS["birthday_offer"])
+
+        with patch.object(llm, "chat", wraps=llm.chat) as chat:
+            await generator.run(_customers(2), shared={"discount": "20%"}, context={"salon_id": "s1"})
+
+        kwargs = chat.call_args.kwargs
+        assert '"discount": "20%"' in kwargs["prompt"]
+        assert "salon_id: s1" in kwargs["system_prompt"]
+        assert kwargs["usage"] == {"include": True}
+
+    async def test_pack_size_one_fans_out_with_bounded_concurrency(self):
+        llm = FakeLLM(latency=0.01)
+        generator = _generator(llm, pack_size=1, concurrency=3)
+
+        results = await generator.run(_customers(10))
+
+        assert len(llm.calls) == 10
+        assert llm.peak == 3
+        assert all(r.success for r in results)
+
+    async def test_missing_items_are_retried_in_smaller_packs(self):
+        llm = FakeLLM()
+        llm.skip_once = {"c3", "c7"}
+        generator = _generator(llm, pack_size=8)
+
+        results = {r.id: r for r in await generator.run(_customers(8))}
+
+        assert all(r.success for r in results.values())
+        assert llm.calls[1:] == [["c3", "c7"]]
+        assert (results["c3"].attempts, results["c0"].attempts) == (2, 1)
+        assert generator.summary.retries == 1
+
+    async def test_failed_calls_are_retried_then_reported(self):
+        llm = FakeLLM()
+        llm.fail_calls = 3
+        generator = _generator(llm, pack_size=4, max_retries=1)
+
+        results = {r.id: r for r in await generator.run(_customers(4))}
+
+        # First call fails, both halves of the retry fail too
+        assert [len(ids) for ids in llm.calls] == [4, 2, 2]
+        assert not any(r.success for r in results.values())
+        assert results["c0"].error == "upstream 503"
+        assert (generator.summary.succeeded, generator.summary.failed) == (0, 4)
+        assert generator.summary.cost == 0
+
+    async def test_results_stream_before_the_batch_finishes(self):
+        llm = FakeLLM(latency=0.05)
+        generator = _generator(llm, pack_size=2, concurrency=1)
+        start = time.perf_counter()
+
+        stream = generator.stream(_customers(6))
+        first = await stream.__anext__()
+        first_at = time.perf_counter() - start
+        rest = [r async for r in stream]
+
+        assert first.success and len(rest) == 5
+        assert first_at < 0.1
+        assert time.perf_counter() - start >= 0.15
+
+    async def test_usage_is_split_across_items(self):
+        llm = FakeLLM(tokens_per_call=100)
+        generator = _generator(llm, pack_size=4, cost_per_1k_tokens=1.0)
+
+        results = await generator.run(_customers(8))
+
+        assert {r.tokens for r in results} == {25.0}
+        assert {round(r.cost, 6) for r in results} == {0.025}
+        summary = generator.summary.to_dict()
+        assert (summary["tokens"], summary["cost"], summary["cost_per_item"]) == (200, 0.2, 0.025)
+        assert summary["items_per_second"] > 0
+
+    async def test_reported_cost_wins_over_estimate(self):
+        llm = FakeLLM(cost=0.004)
+        generator = _generator(llm, pack_size=2)
+
+        await generator.run(_customers(2))
+
+        assert generator.summary.cost == 0.004
+
+    async def test_winback_uses_retention_agent(self):
+        assert BATCH_TASKS["winback"].agent == "retention"
+        llm = FakeLLM()
+        generator = BatchGenerator(CustomerRetentionAgent(client=llm), BATCH_TASKS["winback"])
+
+        results = await generator.run(_customers(3), shared={"offer_budget": 500})
+
+        assert all(r.success for r in results)
+
+
+# ============================================================================
+# Endpoint
+# ============================================================================
+
+@pytest.fixture
+def batch_client():
+    from app.api.marketing import router
+
+    llm = FakeLLM()
+    app = FastAPI()
+    app.include_router(router)
+    with patch("app.api.marketing.get_agent", side_effect=lambda name: (
+        CustomerRetentionAgent(client=llm) if name == "retention" else MarketingAgent(client=llm)
+    )):
+        yield TestClient(app), llm
+
+
+class TestBatchEndpoint:
+    """Test POST /marketing/batch"""
+
+    def test_streams_items_then_summary(self, batch_client):
+        client, llm = batch_client
+
+        response = client.post("/marketing/batch", json={
+            "salon_id": "s1",
+            "task": "birthday_offer",
+            "items": _customers(25),
+            "shared": {"discount": "20%"},
+            "pack_size": 10,
+        })
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["type"] for line in lines] == ["item"] * 25 + ["summary"]
+        assert lines[-1]["succeeded"] == 25
+        assert lines[-1]["llm_calls"] == 3
+        assert len(llm.calls) == 3
+
+    def test_unknown_task(self, batch_client):
+        client, _ = batch_client
+        response = client.post("/marketing/batch", json={
+            "salon_id": "s1", "task": "horoscope", "items": _customers(1),
+        })
+        assert response.status_code == 400
+
+    def test_duplicate_or_missing_ids(self, batch_client):
+        client, _ = batch_client
+        for items in ([{"id": "a"}, {"id": "a"}], [{"name": "Asha"}]):
+            response = client.post("/marketing/batch", json={
+                "salon_id": "s1", "task": "winback", "items": items,
+            })
+            assert response.status_code == 400
+
+    def test_pack_size_is_bounded(self, batch_client):
+        client, _ = batch_client
+        response = client.post("/marketing/batch", json={
+            "salon_id": "s1", "task": "campaign", "items": _customers(1), "pack_size": 500,
+        })
+        assert response.status_code == 422
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestBatchBenchmark:
+    """500 birthday messages: one call per customer vs packed prompts"""
+
+    async def test_packed_vs_sequential(self):
+        customers = _customers(500)
+        reports = {}
+        for name, pack_size, concurrency in (
+            ("sequential", 1, 1),
+            ("fan-out x8", 1, 8),
+            ("packed 25 x4", 25, 4),
+        ):
+            llm = FakeLLM(latency=0.002, tokens_per_call=300)
+            generator = _generator(llm, pack_size=pack_size, concurrency=concurrency)
+            results = await generator.run(customers)
+            assert all(r.success for r in results)
+            reports[name] = summary = generator.summary.to_dict()
+            print(
+                f"\n{name}: {summary['items']} messages, {summary['llm_calls']} LLM calls, "
+                f"{summary['items_per_second']:.0f} items/s, "
+                f"cost/item {summary['cost_per_item']:.5f}"
+            )
+
+        assert reports["packed 25 x4"]["llm_calls"] == 20
+        assert reports["packed 25 x4"]["items_per_second"] > reports["sequential"]["items_per_second"] * 5
+        assert reports["packed 25 x4"]["cost_per_item"] < reports["sequential"]["cost_per_item"]
@@ -2,14 +2,58 @@
 
 Tests for the caching functionality.
 """
+import json
 import pytest
 import sys
 import os
 from unittest.mock import patch, AsyncMock, MagicMock
 
+import httpx
+
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/ai'))
 
 
+class FakeUpstash:
+    """In-memory Upstash REST endpoint (single commands and /pipeline)."""
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+        self.requests = []
+
+    def execute(self, command):
+        name, *args = command
+        if name == "GET":
+            return self.data.get(args[0])
+        if name == "SET":
+            self.data[args[0]] = args[1]
+            return "OK"
+        if name == "SADD":
+            self.sets.setdefault(args[0], set()).update(args[1:])
+            return len(args) - 1
+        if name == "EXPIRE":
+            return 1
+        if name == "SMEMBERS":
+            return sorted(self.sets.get(args[0], ()))
+        if name == "DEL":
+            return sum(
+                1 for key in args
+                if self.data.pop(key, None) is not None or self.sets.pop(key, None) is not None
+            )
+        raise AssertionError(f"unexpected command {name}")
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(request.url.path)
+        if request.url.path == "/pipeline":
+            return httpx.Response(200, json=[{"result": self.execute(c)} for c in body])
+        return httpx.Response(200, json={"result": self.execute(body)})
+
+    def client(self):
+        from app.core.upstash import AsyncUpstashRedis
+        return AsyncUpstashRedis("https://upstash.test", "token", transport=httpx.MockTransport(self.handler))
+
+
 class TestCacheService:
     """Test cache service functionality"""
 
@@ -127,10 +171,65 @@ class TestCacheService:
 
             from app.services.cache_service import CacheService
             service = CacheService()
-            service._client = MagicMock()
+            client = MagicMock()
+            client.aclose = AsyncMock()
+            service._client = client
 
             await service.close()
             assert service._client is None
+            client.aclose.assert_awaited_once()
+
+
+
+class TestCacheTags:
+    """Test tag-based invalidation"""
+
+    @pytest.fixture
+    def service(self):
+        from app.services.cache_service import CacheService
+        service = CacheService()
+        service._enabled = True
+        service.upstash = FakeUpstash()
+        service._client = service.upstash.client()
+        return service
+
+    @pytest.mark.asyncio
+    async def test_set_registers_prefix_tag(self, service):
+        key = service._generate_key("booking", {"prompt": "hi"})
+        await service.set(key, "cached")
+
+        assert service.upstash.sets["ai:tag:booking"] == {key}
+        assert service.upstash.requests == ["/pipeline"]
+
+    @pytest.mark.asyncio
+    async def test_invalidate_pattern_uses_tag(self, service):
+        for prompt in ("a", "b"):
+            await service.set(service._generate_key("booking", {"prompt": prompt}), "x")
+        other = service._generate_key("marketing", {"prompt": "a"})
+        await service.set(other, "y")
+
+        deleted = await service.invalidate_pattern("booking")
+
+        assert deleted == 2
+        assert list(service.upstash.data) == [other]
+        assert "ai:tag:booking" not in service.upstash.sets
+
+    @pytest.mark.asyncio
+    async def test_explicit_tags(self, service):
+        await service.set("ai:booking:1", "x", tags=["salon_001"])
+        await service.set("ai:marketing:1", "y", tags=["salon_001"])
+
+        assert await service.invalidate_tag("salon_001") == 2
+        assert await service.invalidate_pattern("booking") == 0
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_is_invalidated(self, service):
+        compute = AsyncMock(return_value="fresh")
+        await service.get_or_compute("faq", {"q": 1}, compute)
+        await service.invalidate_pattern("faq")
+        await service.get_or_compute("faq", {"q": 1}, compute)
+
+        assert compute.await_count == 2
 
 
 # Run tests with: pytest tests/ai/test_cache_service.py -v
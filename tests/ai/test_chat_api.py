@@ -27,6 +27,13 @@ def mock_settings():
         settings.enable_cache = False
         settings.enable_logging = False
         settings.app_version = "0.1.0"
+        settings.session_ttl = 86400
+        settings.session_max_sessions = 10000
+        settings.session_token_budget = 2000
+        settings.session_l1_ttl = 30
+        settings.prompt_context_budget = 1500
+        settings.agent_context_budgets = {}
+        settings.prompt_list_limit = 20
         settings.upstash_redis_rest_url = None
         settings.upstash_redis_rest_token = None
         mock.return_value = settings
@@ -234,11 +241,15 @@ class TestChatEndpoints:
     def test_clear_session(self, client):
         """Test clearing session"""
         # Create a session first
-        from app.api.chat import sessions
-        sessions["test-session-123"] = [
-            {"role": "user", "content": "Hello"},
-            {"role": "assistant", "content": "Hi!"}
-        ]
+        from app.services import session_store
+        client.post("/chat", json={
+            "salon_id": "salon-123",
+            "message": "Hello",
+            "agent_type": "booking",
+            "session_id": "test-session-123"
+        })
+        store = session_store._session_store_instance
+        assert "test-session-123" in store._l1
 
         response = client.delete("/chat/session/test-session-123")
 
@@ -246,6 +257,7 @@ class TestChatEndpoints:
         data = response.json()
         assert data["status"] == "cleared"
         assert data["session_id"] == "test-session-123"
+        assert "test-session-123" not in store._l1
 
 
 
@@ -306,11 +306,161 @@ class TestGuardrailPerformance:
         assert elapsed < 1.0, f"Validation too slow: {elapsed}s for 400 queries"
     
     def test_pattern_compilation(self, guardrail):
-        """Test that patterns are compiled on init"""
-        assert guardrail._allowed_patterns is not None
-        assert guardrail._blocked_patterns is not None
-        assert len(guardrail._allowed_patterns) == len(guardrail.ALLOWED_TOPICS)
-        assert len(guardrail._blocked_patterns) == len(guardrail.BLOCKED_TOPICS)
+        """Test that every topic is indexed on init"""
+        indexed = [entry for entries in guardrail._topic_index.values() for entry in entries]
+        assert len(indexed) == len(guardrail.ALLOWED_TOPICS) + len(guardrail.BLOCKED_TOPICS)
+
+
+# ============== Single-pass matcher ==============
+
+SALON_CORPUS = [
+    # English
+    "I want to book a haircut for tomorrow at 5pm",
+    "What is the price of keratin treatment for long hair?",
+    "Can I reschedule my bridal makeup appointment to Saturday?",
+    "Do you have any festival offers on facial and spa packages?",
+    "How many loyalty points do I have after my last visit?",
+    "Is Priya available for balayage highlights this weekend?",
+    "Who won the cricket match yesterday?",
+    "Write python code to build a website with a database",
+    "What is the bitcoin price and the stock market trend today?",
+    "Recommend a good biryani recipe and a hotel for vacation",
+    "I want a haircut and also want to know about cricket",
+    "Show me the at-risk customers segment and the churn dashboard",
+    # Hindi (Devanagari and romanized)
+    "मुझे कल शाम 5 बजे हेयरकट बुक करना है",
+    "फेशियल की कीमत क्या है?",
+    "क्या आज स्पा के लिए कोई slot available है?",
+    "mujhe kal haircut ka appointment chahiye",
+    "bridal makeup package ka price kya hai?",
+    "कल क्रिकेट मैच में कौन जीता?",
+    # Telugu (script and romanized)
+    "నాకు రేపు హెయిర్‌కట్ బుకింగ్ కావాలి",
+    "ఫేషియల్ ధర ఎంత?",
+    "ఈ రోజు spa appointment దొరుకుతుందా?",
+    "naaku repu haircut booking kavali",
+    "facial price entha?",
+    "నిన్న cricket match ఎవరు గెలిచారు?",
+]
+
+
+def _legacy_counts(guardrail, query):
+    """Per-topic regex counting used before the single-pass matcher."""
+    import re
+
+    def count(topics):
+        return sum(
+            1 for topic in topics
+            if re.search(r'\b' + re.escape(topic) + r'\b', query, re.IGNORECASE)
+        )
+
+    return count(guardrail.ALLOWED_TOPICS), count(guardrail.BLOCKED_TOPICS)
+
+
+class TestSinglePassMatcher:
+    """Test classify() against the per-pattern behaviour"""
+
+    @pytest.mark.parametrize("query", SALON_CORPUS)
+    def test_counts_match_per_pattern_regexes(self, guardrail, query):
+        result = guardrail.classify(query)
+        assert (result.allowed_count, result.blocked_count) == _legacy_counts(guardrail, query)
+
+    @pytest.mark.parametrize("query,expected", [
+        ("मुझे कल हेयरकट बुक करना है", "hi"),
+        ("నాకు రేపు హెయిర్‌కట్ బుకింగ్ కావాలి", "te"),
+        ("ఈ రోజు spa appointment దొరుకుతుందా?", "te"),
+        ("I want a haircut", "en"),
+    ])
+    def test_language_detected_in_same_scan(self, guardrail, query, expected):
+        assert guardrail.classify(query).language == expected
+
+    def test_multi_word_topics(self, guardrail):
+        assert guardrail.classify("how is the stock market doing").blocked_count == 2
+        assert guardrail.classify("the world is big, I need a cup").blocked_count == 0
+
+    def test_duplicate_topic_entries_count_separately(self, guardrail):
+        assert guardrail.count_allowed_topics("schedule") == _legacy_counts(guardrail, "schedule")[0] == 2
+
+    def test_classification_is_memoized(self, guardrail):
+        query = "I want to book a haircut"
+        with patch("app.services.guardrails._SCAN") as scan:
+            scan.finditer.side_effect = lambda text: iter(())
+            first = guardrail.classify(query)
+            second = guardrail.classify(query)
+        assert first is second
+        assert scan.finditer.call_count == 1
+
+    def test_classification_cache_is_bounded(self, guardrail):
+        guardrail.CLASSIFICATION_CACHE_SIZE = 3
+        for i in range(10):
+            guardrail.classify(f"haircut {i}")
+        assert len(guardrail._classifications) == 3
+
+    @pytest.mark.asyncio
+    async def test_agent_and_middleware_share_classification(self):
+        from app.pipeline.middleware import GuardrailMiddleware, MiddlewareContext, MiddlewareResult
+        from app.services.agents import BookingAgent
+        from app.services.guardrails import _SCAN
+
+        prompt = "Can I book a facial and a haircut on Sunday?"
+        middleware = GuardrailMiddleware()
+        await middleware.initialize()
+        shared = get_guardrail()
+        shared._classifications.pop(prompt, None)
+
+        with patch.object(shared, "classify", wraps=shared.classify) as classify, \
+                patch("app.services.guardrails._SCAN", wraps=_SCAN) as scan:
+            await middleware.process(
+                {"prompt": prompt}, MiddlewareContext(), AsyncMock(return_value=MiddlewareResult())
+            )
+            assert BookingAgent()._check_guardrail(prompt) == (True, "")
+
+        assert classify.call_count == 2
+        assert scan.finditer.call_count == 1
+
+
+def _legacy_classify(patterns, query):
+    allowed_patterns, blocked_patterns, hindi, telugu = patterns
+    allowed = sum(1 for p in allowed_patterns if p.search(query))
+    blocked = sum(1 for p in blocked_patterns if p.search(query))
+    language = "hi" if hindi.search(query) else "te" if telugu.search(query) else "en"
+    return allowed, blocked, language
+
+
+@pytest.mark.slow
+class TestGuardrailBenchmark:
+    """Throughput of the single-pass matcher over a mixed-language corpus"""
+
+    def test_throughput(self):
+        import re
+        import time
+
+        guardrail = SalonGuardrail()
+        legacy = (
+            [re.compile(r'\b' + re.escape(t) + r'\b', re.IGNORECASE) for t in guardrail.ALLOWED_TOPICS],
+            [re.compile(r'\b' + re.escape(t) + r'\b', re.IGNORECASE) for t in guardrail.BLOCKED_TOPICS],
+            re.compile(r'[\u0900-\u097F]'),
+            re.compile(r'[\u0C00-\u0C7F]'),
+        )
+        # Distinct prompts so memoization does not hide the scan cost
+        queries = [f"{query} #{i}" for i in range(200) for query in SALON_CORPUS]
+
+        start = time.perf_counter()
+        for query in queries:
+            _legacy_classify(legacy, query)
+        legacy_qps = len(queries) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for query in queries:
+            guardrail.classify(query)
+        single_qps = len(queries) / (time.perf_counter() - start)
+
+        print(
+            f"\nguardrail over {len(queries)} en/hi/te messages: per-pattern "
+            f"{legacy_qps:,.0f} q/s | single-pass {single_qps:,.0f} q/s"
+        )
+        assert single_qps > 20_000
+        assert single_qps > legacy_qps * 3
 
 
 # Run tests with: pytest tests/ai/test_guardrails.py -v
@@ -0,0 +1,280 @@
+"""Tests for the OpenRouter request scheduler
+
+Covers:
+- Per-model concurrency cap and token-bucket rate limiting
+- Retries honouring Retry-After, fallback after errors
+- Hedged requests to the fallback model
+- Single-flight dedup of identical payloads
+- Burst benchmark against a provider that throttles above its limit
+"""
+import asyncio
+import json
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from app.services.llm_scheduler import ModelLimits, RequestScheduler, retry_after_seconds
+from app.services.openrouter_client import OpenRouterClient
+
+PRIMARY = "google/gemini-2.5-flash"
+FALLBACK = "google/gemini-2.0-flash-001"
+
+
+class FakeProvider:
+    """OpenRouter stand-in with scripted latency and failures."""
+
+    def __init__(self, latency=0.0, max_concurrency=None):
+        self.latency = latency
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = []
+        self.failures = {}  # model -> list of (status, headers) to return first
+        self.model_latency = {}
+        self.throttled = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        model = body["model"]
+        self.calls.append(model)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            if self.max_concurrency and self.in_flight > self.max_concurrency:
+                self.throttled += 1
+                return httpx.Response(429, headers={"Retry-After": "0.05"}, json={"error": "rate limited"})
+            await asyncio.sleep(self.model_latency.get(model, self.latency))
+            if self.failures.get(model):
+                status, headers = self.failures[model].pop(0)
+                return httpx.Response(status, headers=headers, json={"error": "upstream"})
+            return httpx.Response(200, json={
+                "id": "gen-1",
+                "model": model,
+                "choices": [{"message": {"role": "assistant", "content": f"{model}: ok"}}],
+                "usage": {"total_tokens": 10},
+            })
+        finally:
+            self.in_flight -= 1
+
+
+def _client(provider, **scheduler_kwargs):
+    scheduler_kwargs.setdefault("backoff_base", 0.01)
+    client = OpenRouterClient(
+        api_key="test-key",
+        default_model=PRIMARY,
+        scheduler=RequestScheduler(**scheduler_kwargs),
+    )
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(provider.handler))
+    return client
+
+
+@pytest.fixture(autouse=True)
+def fallback_model(monkeypatch):
+    from app.services import openrouter_client
+    monkeypatch.setattr(openrouter_client.settings, "fallback_model", FALLBACK)
+
+
+@pytest.mark.asyncio
+class TestLimits:
+    """Test concurrency and rate limits"""
+
+    async def test_concurrency_is_capped_per_model(self):
+        provider = FakeProvider(latency=0.02)
+        client = _client(provider, default_limits=ModelLimits(max_concurrency=3, requests_per_minute=60_000))
+
+        await asyncio.gather(*(client.chat(f"Book slot {i}") for i in range(12)))
+
+        stats = client.scheduler.stats()[PRIMARY]
+        assert provider.peak == 3
+        assert stats["max_queue_depth"] >= 8
+        assert stats["queue_depth"] == 0
+        assert stats["wait_ms_max"] > 0
+
+    async def test_token_bucket_spaces_requests(self):
+        provider = FakeProvider()
+        client = _client(provider, default_limits=ModelLimits(
+            max_concurrency=10, requests_per_minute=3000, burst=1,
+        ))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client.chat(f"Book slot {i}") for i in range(6)))
+
+        # 50 tokens/s with a burst of 1: five refills of 20ms
+        assert time.perf_counter() - start >= 0.09
+
+    def test_free_models_get_provider_limit(self):
+        scheduler = RequestScheduler(ModelLimits(max_concurrency=16, requests_per_minute=200))
+        limits = scheduler.limits_for("google/gemini-2.0-flash-exp:free")
+        assert limits.requests_per_minute == 20
+        assert scheduler.limits_for(PRIMARY).requests_per_minute == 200
+
+    def test_configured_limits_win(self):
+        scheduler = RequestScheduler(model_limits={PRIMARY: ModelLimits(max_concurrency=2)})
+        assert scheduler.limits_for(PRIMARY).max_concurrency == 2
+
+
+@pytest.mark.asyncio
+class TestRetries:
+    """Test backoff, Retry-After and fallback"""
+
+    async def test_429_honours_retry_after_and_pauses_model(self):
+        provider = FakeProvider()
+        provider.failures[PRIMARY] = [(429, {"Retry-After": "0.1"})]
+        client = _client(provider)
+
+        start = time.perf_counter()
+        result = await client.chat("Book a haircut", model=PRIMARY)
+        other = await client.chat("Book a facial", model=PRIMARY)
+        elapsed = time.perf_counter() - start
+
+        assert result.content == f"{PRIMARY}: ok"
+        assert other.content == f"{PRIMARY}: ok"
+        assert elapsed >= 0.1
+        stats = client.scheduler.stats()[PRIMARY]
+        assert (stats["throttled"], stats["retries"]) == (1, 1)
+
+    async def test_exhausted_retries_fall_back(self):
+        provider = FakeProvider()
+        provider.failures[PRIMARY] = [(503, {})] * 3
+        client = _client(provider, max_retries=2)
+
+        result = await client.chat("Book a haircut")
+
+        assert result.content == f"{FALLBACK}: ok"
+        assert provider.calls == [PRIMARY] * 3 + [FALLBACK]
+        assert client.scheduler.stats()[PRIMARY]["fallbacks"] == 1
+
+    async def test_pinned_model_does_not_fall_back(self):
+        provider = FakeProvider()
+        provider.failures[PRIMARY] = [(400, {})]
+        client = _client(provider)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.chat("Book a haircut", model=PRIMARY)
+        assert provider.calls == [PRIMARY]
+
+    def test_retry_after_formats(self):
+        request = httpx.Request("POST", "https://openrouter.test")
+        assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "2"}, request=request)) == 2
+        future = formatdate(time.time() + 30, usegmt=True)
+        parsed = retry_after_seconds(httpx.Response(429, headers={"Retry-After": future}, request=request))
+        assert 25 < parsed <= 30
+        assert retry_after_seconds(httpx.Response(429, request=request)) is None
+
+
+@pytest.mark.asyncio
+class TestHedgingAndSingleFlight:
+    """Test hedged requests and payload dedup"""
+
+    async def test_slow_primary_is_hedged_to_fallback(self):
+        provider = FakeProvider(latency=0.005)
+        client = _client(provider, hedge_min_samples=5)
+        for i in range(5):
+            await client.chat(f"warm up {i}")
+        provider.model_latency[PRIMARY] = 1.0
+
+        start = time.perf_counter()
+        result = await client.chat("Book a haircut")
+
+        assert time.perf_counter() - start < 0.5
+        assert result.content == f"{FALLBACK}: ok"
+        stats = client.scheduler.stats()[PRIMARY]
+        assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+        await asyncio.sleep(0)
+        assert stats["in_flight"] <= 1
+
+    async def test_no_hedge_without_latency_history(self):
+        provider = FakeProvider(latency=0.02)
+        client = _client(provider)
+
+        await client.chat("Book a haircut")
+
+        assert provider.calls == [PRIMARY]
+
+    async def test_identical_payloads_share_one_call(self):
+        provider = FakeProvider(latency=0.02)
+        client = _client(provider)
+
+        results = await asyncio.gather(*(client.chat("Book a haircut") for _ in range(10)))
+
+        assert provider.calls == [PRIMARY]
+        assert {r.content for r in results} == {f"{PRIMARY}: ok"}
+        assert client.scheduler.stats()[PRIMARY]["coalesced"] == 9
+
+    async def test_errors_reach_coalesced_callers(self):
+        provider = FakeProvider(latency=0.02)
+        provider.failures[PRIMARY] = [(400, {})]
+        client = _client(provider)
+
+        results = await asyncio.gather(
+            *(client.chat("Book a haircut", model=PRIMARY) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
+        assert provider.calls == [PRIMARY]
+
+
+    async def test_followers_survive_a_cancelled_leader(self):
+        provider = FakeProvider(latency=0.05)
+        client = _client(provider)
+
+        leader = asyncio.ensure_future(client.chat("Book a haircut"))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.ensure_future(client.chat("Book a haircut")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+
+        assert leader.cancelled()
+        assert {r.content for r in results} == {f"{PRIMARY}: ok"}
+        assert provider.calls == [PRIMARY]
+
+    async def test_call_is_cancelled_when_every_caller_leaves(self):
+        provider = FakeProvider(latency=0.05)
+        client = _client(provider)
+
+        callers = [asyncio.ensure_future(client.chat("Book a haircut")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert client.scheduler._inflight == {}
+        assert client.scheduler.stats()[PRIMARY]["in_flight"] == 0
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestBurstBenchmark:
+    """A WhatsApp-style burst against a provider that allows 8 concurrent calls"""
+
+    async def test_burst_without_and_with_scheduler(self):
+        burst = 100
+        results = {}
+        for name, limits in (
+            ("unbounded", ModelLimits(max_concurrency=1000, requests_per_minute=1_000_000)),
+            ("scheduled", ModelLimits(max_concurrency=8, requests_per_minute=1_000_000)),
+        ):
+            provider = FakeProvider(latency=0.01, max_concurrency=8)
+            client = _client(provider, default_limits=limits, max_retries=0, hedge_percentile=0)
+            start = time.perf_counter()
+            outcomes = await asyncio.gather(
+                *(client.chat(f"message {i}", model=PRIMARY) for i in range(burst)),
+                return_exceptions=True,
+            )
+            elapsed = (time.perf_counter() - start) * 1000
+            failed = sum(isinstance(o, Exception) for o in outcomes)
+            stats = client.scheduler.stats()[PRIMARY]
+            results[name] = failed
+            print(
+                f"\n{name}: {burst} messages in {elapsed:.0f}ms, {provider.throttled} upstream 429s, "
+                f"{failed} failed, peak sockets {provider.peak}, max queue {stats['max_queue_depth']}, "
+                f"p95 wait {stats['wait_ms_p95']}ms"
+            )
+
+        assert results["unbounded"] > burst / 2
+        assert results["scheduled"] == 0
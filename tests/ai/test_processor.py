@@ -248,4 +248,150 @@ class TestMiddlewareChain:
         assert result is not None
 
 
+class FakeRedis:
+    """In-memory stand-in for redis.asyncio get/setex."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+class FakeRegistry:
+    """Plugin registry stand-in returning AgentResponse-shaped dicts."""
+
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    async def execute(self, name, request, context):
+        import asyncio
+        self.calls.append((name, request, context))
+        await asyncio.sleep(self.delay)
+        return {"success": True, "message": f"{name} handled {request['prompt']}", "blocked": False}
+
+
+class TestAgentExecution:
+    """Test the chain ending in real agent execution"""
+
+    def _processor(self, *middlewares):
+        from app.pipeline.processor import RequestProcessor
+
+        processor = RequestProcessor()
+        processor.middlewares = list(middlewares)
+        processor._initialized = True
+        return processor
+
+    @pytest.mark.asyncio
+    async def test_chain_is_built_once(self, mock_settings):
+        from app.pipeline.middleware import LoggingMiddleware
+
+        processor = self._processor(LoggingMiddleware())
+        with patch("app.plugins.get_registry", return_value=FakeRegistry()):
+            await processor.execute_agent("booking", {"prompt": "Book a haircut"})
+            chain = processor._chain
+            await processor.execute_agent("booking", {"prompt": "Book a facial"})
+            assert processor._chain is chain
+
+            processor.remove_middleware("logging")
+            assert processor._chain is None
+
+    @pytest.mark.asyncio
+    async def test_cache_stores_agent_response(self, mock_settings):
+        import json
+        from app.pipeline.middleware import CacheMiddleware
+
+        cache = CacheMiddleware(redis_client=FakeRedis())
+        cache._initialized = True
+        registry = FakeRegistry()
+        processor = self._processor(cache)
+
+        with patch("app.plugins.get_registry", return_value=registry):
+            first = await processor.execute_agent("booking", {"prompt": "Book a haircut"}, {"salon_id": "s1"})
+            second = await processor.execute_agent("booking", {"prompt": "Book a haircut"}, {"salon_id": "s1"})
+
+        assert first.data["message"] == second.data["message"] == "booking handled Book a haircut"
+        assert second.cached is True
+        assert len(registry.calls) == 1
+        assert json.loads(next(iter(cache._redis.data.values())))["message"] == "booking handled Book a haircut"
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_guards_the_agent(self, mock_settings):
+        from app.pipeline.middleware import RateLimitMiddleware
+
+        registry = FakeRegistry()
+        processor = self._processor(RateLimitMiddleware(requests_per_minute=1))
+
+        with patch("app.plugins.get_registry", return_value=registry):
+            await processor.execute_agent("booking", {"prompt": "Book a haircut"}, {"salon_id": "s1"})
+            limited = await processor.execute_agent("booking", {"prompt": "Book a facial"}, {"salon_id": "s1"})
+
+        assert limited.blocked is True
+        assert len(registry.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_agent_receives_context_and_skips_second_guardrail(self, mock_settings):
+        from app.pipeline.middleware import GuardrailMiddleware
+
+        registry = FakeRegistry()
+        processor = self._processor(GuardrailMiddleware())
+
+        with patch("app.plugins.get_registry", return_value=registry):
+            await processor.execute_agent("booking", {"prompt": "Book a haircut"}, {"salon_id": "s1"})
+
+        _, request, context = registry.calls[0]
+        assert request["skip_guardrail"] is True
+        assert request["context"]["salon_id"] == context["salon_id"] == "s1"
+
+
+class TestStageTimings:
+    """Test per-stage traces and pipeline metrics"""
+
+    def test_own_time_excludes_inner_stages(self):
+        from app.pipeline.middleware import MiddlewareContext
+
+        ctx = MiddlewareContext(timings={"logging": 100.0, "cache": 60.0, "agent": 50.0})
+        assert ctx.stage_timings() == {"logging": 40.0, "cache": 10.0, "agent": 50.0}
+
+        ctx = MiddlewareContext(timings={"logging": None, "agent": 50.0})
+        assert ctx.stage_timings() == {"agent": 50.0}
+
+    @pytest.mark.asyncio
+    async def test_trace_shows_where_latency_goes(self, mock_settings, monkeypatch):
+        import asyncio
+        from app.pipeline import metrics as metrics_module
+        from app.pipeline.middleware import BaseMiddleware, LoggingMiddleware
+        from app.pipeline.processor import RequestProcessor
+
+        monkeypatch.setattr(metrics_module, "_pipeline_metrics_instance", None)
+
+        class SlowMiddleware(BaseMiddleware):
+            name = "slow"
+
+            async def process(self, request, context, next_middleware):
+                await asyncio.sleep(0.02)
+                return await next_middleware(request, context)
+
+        processor = RequestProcessor()
+        processor.middlewares = [LoggingMiddleware(), SlowMiddleware()]
+        processor._initialized = True
+
+        with patch("app.plugins.get_registry", return_value=FakeRegistry(delay=0.05)):
+            result = await processor.execute_agent("booking", {"prompt": "Book a haircut"})
+
+        assert list(result.metadata["stages"]) == ["slow", "agent"]
+        assert result.metadata["stages"]["slow"] >= 15
+        assert result.metadata["stages"]["agent"] >= 45
+
+        stats = metrics_module.get_pipeline_metrics().stats()
+        assert stats["requests"] == 1
+        assert set(stats["stages"]) == {"logging", "slow", "agent"}
+        assert stats["stages"]["agent"]["share"] > stats["stages"]["slow"]["share"] > stats["stages"]["logging"]["share"]
+        assert stats["recent"][0]["agent"] == "booking"
+
+
 # Run tests with: pytest tests/ai/test_processor.py -v
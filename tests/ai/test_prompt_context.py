@@ -0,0 +1,249 @@
+"""Tests for compact, token-budgeted prompt context
+
+Covers:
+- Compact tables and summaries of long lists
+- Priority-based truncation within a token budget
+- Static salon context memoized by content hash
+- BaseAgent context rendering, per-agent budgets and prompt token metrics
+- Prompt size for a large salon vs pretty-printed JSON
+"""
+import json
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/ai'))
+
+from app.services import prompt_context as prompt_context_module
+from app.services.agents import AnalyticsAgent, BookingAgent
+from app.services.prompt_context import (
+    MIN_ROWS,
+    PromptMetrics,
+    RenderMemo,
+    estimate_tokens,
+    render_context,
+    render_table,
+    render_value,
+    summarize_rows,
+)
+
+
+def _services(n):
+    categories = ["hair", "skin", "nails", "spa"]
+    return [
+        {"name": f"Service {i}", "category": categories[i % 4], "price": 200 + i * 10, "duration": 30 + i % 4 * 15}
+        for i in range(n)
+    ]
+
+
+def _staff(n):
+    return [{"name": f"Stylist {i}", "role": "stylist", "skills": ["haircut", "color"]} for i in range(n)]
+
+
+def _bookings(n):
+    return [
+        {"id": f"b{i}", "customer": f"Customer {i}", "service": f"Service {i % 20}",
+         "time": f"{9 + i % 10}:00", "status": "confirmed"}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo_and_metrics(monkeypatch):
+    monkeypatch.setattr(prompt_context_module, "_render_memo", RenderMemo())
+    monkeypatch.setattr(prompt_context_module, "_prompt_metrics_instance", None)
+
+
+class TestRendering:
+    """Test compact tables and summaries"""
+
+    def test_records_render_as_table(self):
+        rows = [{"name": "Haircut", "price": 500.0, "tags": ["men", "quick"]}, {"name": "Spa | Deluxe", "price": 1999.5}]
+
+        assert render_table(rows) == "name | price | tags\nHaircut | 500 | men, quick\nSpa / Deluxe | 1999.5 | -"
+
+    def test_long_tables_summarize_the_rest(self):
+        text = render_table(_services(10), limit=4)
+
+        lines = text.splitlines()
+        assert len(lines) == 6
+        assert lines[-1] == "... +6 more (category: hair 2, skin 2, nails 1; price 240-290 avg 265; duration 30-75 avg 47.5)"
+
+    def test_summary_reports_common_values(self):
+        rows = [{"status": "confirmed"}] * 6 + [{"status": "cancelled"}] * 2
+        assert summarize_rows(rows) == "... +8 more (status: confirmed 6, cancelled 2)"
+
+    def test_nested_values(self):
+        value = {"monday": [{"staff": "Priya", "shift": "9-5"}], "notes": "busy", "closed": False}
+
+        assert render_value(value) == "monday:\n  staff | shift\n  Priya | 9-5\nnotes: busy\nclosed: no"
+        assert render_value({"a": 1, "b": "x"}) == "a=1; b=x"
+        assert render_value(["a", "b", "c"], limit=2) == "a, b ... +1 more"
+        assert render_value({f"k{i}": i for i in range(4)}, limit=2) == "k0=0; k1=1 ... +2 more"
+
+
+class TestBudget:
+    """Test priority-based truncation"""
+
+    def test_fits_untouched(self):
+        rendered = render_context({"salon_id": "s1", "services": _services(3)}, budget=1000)
+
+        assert rendered.text.startswith("salon_id: s1\nservices:\nname | category | price | duration\n")
+        assert rendered.truncated == rendered.dropped == []
+        assert rendered.tokens == rendered.full_tokens
+
+    def test_lowest_priority_lists_shrink_first(self):
+        context = {"salon_id": "s1", "services": _services(60), "bookings": _bookings(60)}
+
+        rendered = render_context(context, budget=900, priorities={"bookings": 80})
+
+        assert rendered.tokens <= 900 < rendered.full_tokens
+        assert rendered.truncated[0] == "services"
+        assert "bookings" not in rendered.dropped
+        assert "salon_id: s1" in rendered.text
+
+    def test_sections_are_dropped_after_shrinking(self):
+        context = {"salon_id": "s1", "customer_id": "c9", "services": _services(40), "bookings": _bookings(40)}
+
+        rendered = render_context(context, budget=80, priorities={"services": 10})
+
+        assert rendered.dropped[0] == "services"
+        assert "services: (40 items omitted)" in rendered.text
+        assert "salon_id: s1\ncustomer_id: c9" in rendered.text
+
+    def test_shrinks_no_further_than_min_rows(self):
+        rendered = render_context({"bookings": _bookings(50)}, budget=100, priorities={"bookings": 100})
+
+        lines = rendered.text.splitlines()
+        assert len(lines) == 1 + 1 + MIN_ROWS + 1  # key, header, rows, summary
+
+    def test_empty_values_are_skipped(self):
+        rendered = render_context({"salon_id": "s1", "notes": "", "bookings": [], "prefs": None})
+        assert rendered.text == "salon_id: s1"
+
+
+class TestStaticMemo:
+    """Test content-hash memoization of static salon context"""
+
+    def test_catalog_is_rendered_once_per_content(self):
+        memo = RenderMemo()
+        services = _services(30)
+
+        first = render_context({"salon_id": "s1", "services": services}, memo=memo)
+        second = render_context({"salon_id": "s2", "services": [dict(s) for s in services]}, memo=memo)
+
+        assert (memo.hits, memo.misses) == (1, 1)
+        assert first.text.split("\n", 1)[1] == second.text.split("\n", 1)[1]
+
+        services[0]["price"] = 999
+        render_context({"services": services}, memo=memo)
+        assert memo.misses == 2
+
+    def test_dynamic_keys_are_not_memoized(self):
+        memo = RenderMemo()
+        render_context({"bookings": _bookings(5)}, memo=memo)
+        render_context({"bookings": _bookings(5)}, memo=memo)
+        assert len(memo) == 0
+
+
+@pytest.mark.asyncio
+class TestAgentContext:
+    """Test BaseAgent rendering and metrics"""
+
+    def _client(self):
+        client = MagicMock(default_model="google/gemini-2.5-flash")
+        client.chat = AsyncMock(return_value=MagicMock(content="ok"))
+        return client
+
+    async def test_system_prompt_uses_compact_context(self):
+        agent = BookingAgent(client=self._client())
+
+        prompt = agent._build_system_prompt({"salon_id": "s1", "staff": _staff(2)})
+
+        assert prompt.endswith(
+            "Current Context:\nsalon_id: s1\nstaff:\nname | role | skills\n"
+            "Stylist 0 | stylist | haircut, color\nStylist 1 | stylist | haircut, color"
+        )
+        assert '"name"' not in prompt
+
+    async def test_generate_records_prompt_tokens(self):
+        agent = BookingAgent(client=self._client())
+        context = {"salon_id": "s1", "services": _services(200)}
+        settings = MagicMock(prompt_context_budget=80, agent_context_budgets={}, prompt_list_limit=20)
+
+        with patch("app.services.agents.get_settings", return_value=settings):
+            await agent.generate("Book a haircut", context=context, use_cache=False)
+            await agent.generate("Book a facial", context=context, use_cache=False)
+
+        stats = prompt_context_module.get_prompt_metrics().stats()
+        booking = stats["agents"]["booking_agent"]
+        assert booking["calls"] == 2
+        assert booking["max_prompt_tokens"] <= 80 + estimate_tokens(agent._build_system_prompt()) + 10
+        assert booking["context_tokens_saved"] > 0
+        assert booking["truncated_calls"] == 2
+        assert stats["static_context"]["hits"] >= 1
+
+    async def test_per_agent_budget_override(self):
+        settings = MagicMock(prompt_context_budget=1500, agent_context_budgets={"analytics_agent": 100}, prompt_list_limit=20)
+        with patch("app.services.agents.get_settings", return_value=settings):
+            analytics = AnalyticsAgent(client=self._client())._render_context({"bookings": _bookings(100)})
+            booking = BookingAgent(client=self._client())._render_context({"bookings": _bookings(100)})
+
+        assert analytics.tokens <= 100 < booking.tokens
+
+    async def test_format_lines_caps_long_lists(self):
+        agent = BookingAgent(client=self._client())
+        settings = MagicMock(prompt_list_limit=3)
+        with patch("app.services.agents.get_settings", return_value=settings):
+            text = agent._format_services({f"Service {i}": 100 for i in range(5)})
+
+        assert text.splitlines() == [
+            "- Service 0: Rs.100", "- Service 1: Rs.100", "- Service 2: Rs.100", "- ... and 2 more",
+        ]
+
+
+class TestPromptMetrics:
+    """Test per-agent counters"""
+
+    def test_counts_per_agent(self):
+        metrics = PromptMetrics()
+        rendered = render_context({"bookings": _bookings(50)}, budget=100)
+
+        metrics.record("booking_agent", 400, rendered)
+        metrics.record("booking_agent", 200)
+
+        stats = metrics.stats()["agents"]["booking_agent"]
+        assert (stats["calls"], stats["avg_prompt_tokens"], stats["max_prompt_tokens"]) == (2, 300.0, 400)
+        assert stats["context_tokens_saved"] == rendered.full_tokens - rendered.tokens
+        assert stats["truncated_calls"] == 1
+
+
+@pytest.mark.slow
+class TestPromptSizeBenchmark:
+    """Context tokens for a large salon: pretty-printed JSON vs compact budgeted"""
+
+    def test_large_salon_context(self):
+        context = {
+            "salon_id": "salon_1",
+            "salon_name": "Glow Studio",
+            "services": _services(150),
+            "staff": _staff(25),
+            "bookings": _bookings(120),
+        }
+        legacy = "\n".join(
+            f"{k}: {json.dumps(v, indent=2)}" if isinstance(v, (dict, list)) else f"{k}: {v}"
+            for k, v in context.items()
+        )
+        compact = render_context(context)
+        budgeted = render_context(context, budget=1500)
+
+        legacy_tokens = estimate_tokens(legacy)
+        print(
+            f"\nlarge salon context: json indent=2 {legacy_tokens} tokens, "
+            f"compact {compact.tokens} tokens, budgeted {budgeted.tokens} tokens "
+            f"(truncated {budgeted.truncated}, dropped {budgeted.dropped})"
+        )
+        assert compact.tokens < legacy_tokens * 0.5
+        assert budgeted.tokens <= 1500
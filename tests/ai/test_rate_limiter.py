@@ -0,0 +1,262 @@
+"""Tests for the distributed GCRA rate limiter
+
+Covers:
+- GCRA spacing, retry_after and admissions per window
+- One budget shared by several instances through Redis
+- Local pre-allocation (lease) hits and expiry
+- NOSCRIPT reload, Redis outages and bounded memory
+- RateLimitMiddleware plan limits and tier costs
+- Redis hops per request with and without pre-allocation
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/ai'))
+
+from app.core.rate_limiter import GCRA_SCRIPT, Limit, RateLimiter, gcra
+from app.pipeline.middleware import MiddlewareContext, MiddlewareResult, RateLimitMiddleware
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeScriptRedis:
+    """Runs the GCRA script's Python mirror over a dict, like Redis EVALSHA."""
+
+    def __init__(self, latency=0.0):
+        self.data = {}
+        self.loaded = set()
+        self.calls = 0
+        self.latency = latency
+        self.down = False
+
+    def _run(self, numkeys, args):
+        keys, argv = args[:numkeys], args[numkeys:]
+        now, want, need = argv[0], argv[1], argv[2]
+        intervals = argv[3::2]
+        tolerances = argv[4::2]
+        limits = [
+            Limit(str(i), round(tol / interval), tol / 1000)
+            for i, (interval, tol) in enumerate(zip(intervals, tolerances, strict=True))
+        ]
+        granted, tats, remaining, retry, blocking = gcra(
+            [self.data.get(key) for key in keys], now, limits, want, need
+        )
+        if granted:
+            self.data.update(zip(keys, tats, strict=True))
+        return [granted, remaining, retry, blocking + 1]
+
+    async def evalsha(self, sha, numkeys, *args):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.down:
+            raise ConnectionError("redis down")
+        if sha not in self.loaded:
+            raise Exception("NOSCRIPT No matching script. Please use EVAL.")
+        return self._run(numkeys, args)
+
+    async def eval(self, script, numkeys, *args):
+        import hashlib
+        self.calls += 1
+        self.loaded.add(hashlib.sha1(script.encode()).hexdigest())
+        return self._run(numkeys, args)
+
+
+MINUTE = [Limit("minute", 5, 60)]
+
+
+@pytest.mark.asyncio
+class TestRateLimiter:
+    """Test GCRA decisions"""
+
+    async def test_sliding_window(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock)
+
+        results = [await limiter.acquire("salon_1", MINUTE) for _ in range(6)]
+
+        assert [r.allowed for r in results] == [True] * 5 + [False]
+        assert results[-1].limit == "minute"
+        assert results[-1].retry_after == pytest.approx(12, abs=0.01)
+
+        clock.now += 12
+        assert (await limiter.acquire("salon_1", MINUTE)).allowed
+        assert not (await limiter.acquire("salon_1", MINUTE)).allowed
+
+    @pytest.mark.parametrize("limit, most", [
+        (Limit("minute", 60, 60), 119),
+        (Limit("minute", 60, 60, burst=10), 69),
+        (Limit.window("minute", 60, 60), 60),
+        (Limit.window("login", 5, 900), 5),
+    ])
+    async def test_admissions_in_one_window(self, limit, most):
+        clock = FakeClock()
+        start = clock.now
+        limiter = RateLimiter(clock=clock)
+
+        # 600 evenly spaced attempts per period, for three periods
+        allowed = []
+        for i in range(1800):
+            clock.now = start + i * limit.period / 600
+            if (await limiter.acquire("salon_1", [limit])).allowed:
+                allowed.append(i)
+
+        assert max(sum(first <= i < first + 600 for i in allowed) for first in allowed) == most
+
+    async def test_all_limits_must_allow(self):
+        limiter = RateLimiter(clock=FakeClock())
+        limits = [Limit("minute", 10, 60), Limit("hour", 3, 3600)]
+
+        results = [await limiter.acquire("salon_1", limits) for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert results[-1].limit == "hour"
+
+    async def test_instances_share_one_budget(self):
+        clock = FakeClock()
+        redis = FakeScriptRedis()
+        instances = [RateLimiter(backend=redis, clock=clock) for _ in range(3)]
+
+        allowed = 0
+        for i in range(30):
+            allowed += (await instances[i % 3].acquire("salon_1", [Limit("minute", 10, 60)])).allowed
+
+        assert allowed == 10
+        assert redis.loaded
+
+    async def test_preallocation_skips_redis(self):
+        clock = FakeClock()
+        redis = FakeScriptRedis()
+        limiter = RateLimiter(backend=redis, clock=clock, prealloc_fraction=0.05, max_prealloc=20)
+
+        for _ in range(100):
+            assert (await limiter.acquire("salon_1", [Limit("minute", 1000, 60)])).allowed
+
+        stats = limiter.stats()
+        assert stats["backend_calls"] == 5  # one batch of 20 per reservation
+        assert stats["lease_hits"] == 95
+        assert redis.calls == 6  # plus the NOSCRIPT reload
+
+    async def test_leases_expire(self):
+        clock = FakeClock()
+        redis = FakeScriptRedis()
+        limiter = RateLimiter(backend=redis, clock=clock, lease_ttl=1.0)
+        limits = [Limit("minute", 1000, 60)]
+
+        await limiter.acquire("salon_1", limits)
+        calls = redis.calls
+        clock.now += 1.5
+        await limiter.acquire("salon_1", limits)
+
+        assert redis.calls == calls + 1
+
+    async def test_small_limits_are_exact(self):
+        redis = FakeScriptRedis()
+        limiter = RateLimiter(backend=redis, clock=FakeClock())
+
+        for _ in range(3):
+            await limiter.acquire("login:1.2.3.4", MINUTE)
+
+        assert limiter.stats()["lease_hits"] == 0
+
+    async def test_redis_outage_falls_back_to_local_limits(self):
+        redis = FakeScriptRedis()
+        redis.down = True
+        limiter = RateLimiter(backend=redis, clock=FakeClock())
+
+        results = [await limiter.acquire("salon_1", MINUTE) for _ in range(6)]
+
+        assert [r.allowed for r in results] == [True] * 5 + [False]
+        assert limiter.stats()["backend_errors"] == 6
+
+    async def test_memory_is_bounded(self):
+        limiter = RateLimiter(backend=FakeScriptRedis(), clock=FakeClock(), max_keys=100)
+
+        for i in range(1000):
+            await limiter.acquire(f"salon_{i}", [Limit("minute", 1000, 60)])
+
+        assert limiter.stats()["leases"] == 100
+
+    async def test_keys_share_a_cluster_slot(self):
+        redis = FakeScriptRedis()
+        limiter = RateLimiter(backend=redis, clock=FakeClock(), key_prefix="ai:ratelimit")
+
+        await limiter.acquire("salon_1", [Limit("minute", 5, 60), Limit("hour", 50, 3600)])
+
+        assert sorted(redis.data) == ["ai:ratelimit:{salon_1}:hour", "ai:ratelimit:{salon_1}:minute"]
+
+    async def test_script_mirror_arguments(self):
+        assert "redis.call('GET', key)" in GCRA_SCRIPT
+        granted, tats, remaining, retry, blocking = gcra([None], 0.0, MINUTE, want=3, need=1)
+        assert (granted, remaining, retry, blocking) == (3, 2, 0.0, -1)
+        assert tats == [36000.0]
+
+
+@pytest.mark.asyncio
+class TestRateLimitMiddleware:
+    """Test plan limits and tier costs"""
+
+    async def _next(self, request, context):
+        return MiddlewareResult(success=True, data={"response": "OK"})
+
+    def _context(self, plan=None):
+        return MiddlewareContext(salon_id="salon_1", agent_context={"plan": plan} if plan else {})
+
+    async def test_plan_limits(self):
+        middleware = RateLimitMiddleware(limiter=RateLimiter(clock=FakeClock()))
+
+        results = [await middleware.process({"prompt": "hi"}, self._context("free"), self._next) for _ in range(11)]
+
+        assert [r.blocked for r in results] == [False] * 10 + [True]
+        assert results[-1].message == "Rate limit exceeded: too many requests per minute"
+
+    async def test_unknown_plan_uses_configured_defaults(self):
+        middleware = RateLimitMiddleware(requests_per_minute=2, limiter=RateLimiter(clock=FakeClock()))
+
+        results = [await middleware.process({"prompt": "hi"}, self._context("gold"), self._next) for _ in range(3)]
+
+        assert [r.blocked for r in results] == [False, False, True]
+
+    async def test_premium_tier_costs_more(self):
+        middleware = RateLimitMiddleware(limiter=RateLimiter(clock=FakeClock()))
+        request = {"prompt": "hi", "model_tier": "premium"}
+
+        results = [await middleware.process(request, self._context("free"), self._next) for _ in range(4)]
+
+        assert [r.blocked for r in results] == [False, False, False, True]
+        assert middleware.stats()["limited"] == 1
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestPreallocationBenchmark:
+    """Redis round trips with and without local pre-allocation (1ms Redis)"""
+
+    async def test_round_trips(self):
+        limits = [Limit("minute", 6000, 60), Limit("hour", 100_000, 3600)]
+
+        async def run(fraction):
+            redis = FakeScriptRedis(latency=0.001)
+            limiter = RateLimiter(backend=redis, prealloc_fraction=fraction)
+            started = time.perf_counter()
+            for _ in range(500):
+                await limiter.acquire("salon_1", limits)
+            return redis.calls, time.perf_counter() - started
+
+        exact_calls, exact_s = await run(0.0)
+        leased_calls, leased_s = await run(0.05)
+
+        print(f"\n500 requests: per-request Redis {exact_calls} calls {exact_s * 1000:.0f}ms, "
+              f"pre-allocated {leased_calls} calls {leased_s * 1000:.0f}ms")
+        assert leased_calls < exact_calls / 10
@@ -0,0 +1,258 @@
+"""Tests for the shared agent response cache
+
+Covers:
+- Read-after-write hits in BaseAgent.generate
+- Canonical keys over agent, prompt version, model, prompt, context, history
+- Single-flight coalescing of concurrent identical requests
+- Per-agent TTLs and hit-rate metrics
+"""
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import patch, AsyncMock, MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/ai'))
+
+from app.services import prompt_context as prompt_context_module
+from app.services import response_cache as response_cache_module
+from app.services.agents import BookingAgent, CustomerSupportAgent, VoiceReceptionistAgent
+from app.services.openrouter_client import ChatMessage
+from app.services.response_cache import ResponseCache, get_response_cache
+
+
+class FakeCache:
+    """In-memory stand-in for CacheService.get/set."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl=None, tags=None):
+        self.data[key] = value
+        self.ttls[key] = ttl
+        return True
+
+
+def _client(content="Book the 2 PM slot with Priya.", delay=0.0):
+    client = MagicMock()
+    client.default_model = "google/gemini-2.5-flash"
+
+    async def chat(**kwargs):
+        await asyncio.sleep(delay)
+        response = MagicMock()
+        response.content = content
+        return response
+
+    client.chat = AsyncMock(side_effect=chat)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def fresh_response_cache(monkeypatch):
+    monkeypatch.setattr(response_cache_module, "_response_cache_instance", None)
+
+
+@pytest.fixture
+def fake_cache():
+    return FakeCache()
+
+
+def _agent(agent_class, client, cache):
+    agent = agent_class(client=client)
+    agent._cache = cache
+    return agent
+
+
+class TestCacheKeys:
+    """Test canonical key construction"""
+
+    def test_context_order_does_not_matter(self):
+        key1 = ResponseCache.make_key("booking_agent", "sys", "m", "hi", {"a": 1, "b": 2})
+        key2 = ResponseCache.make_key("booking_agent", "sys", "m", "hi", {"b": 2, "a": 1})
+        assert key1 == key2
+        assert key1.startswith("ai:booking_agent:")
+
+    @pytest.mark.parametrize("change", [
+        {"agent": "support_agent"},
+        {"system_prompt": "sys v2"},
+        {"model": "other-model"},
+        {"prompt": "hello"},
+        {"context": {"salon_id": "s2"}},
+        {"history": [ChatMessage(role="user", content="earlier")]},
+    ])
+    def test_every_input_changes_the_key(self, change):
+        base = {
+            "agent": "booking_agent",
+            "system_prompt": "sys",
+            "model": "m",
+            "prompt": "hi",
+            "context": {"salon_id": "s1"},
+            "history": None,
+        }
+        assert ResponseCache.make_key(**base) != ResponseCache.make_key(**{**base, **change})
+
+    def test_non_json_context_values(self):
+        from datetime import date
+        key = ResponseCache.make_key("booking_agent", "sys", "m", "hi", {"day": date(2024, 2, 20)})
+        assert key.startswith("ai:booking_agent:")
+
+
+@pytest.mark.asyncio
+class TestAgentResponseCache:
+    """Test BaseAgent.generate through the response cache"""
+
+    async def test_second_call_is_served_from_cache(self, fake_cache):
+        client = _client()
+        agent = _agent(BookingAgent, client, fake_cache)
+
+        first = await agent.generate("Any slots tomorrow for a haircut?", context={"salon_id": "s1"})
+        second = await agent.generate("Any slots tomorrow for a haircut?", context={"salon_id": "s1"})
+
+        assert client.chat.await_count == 1
+        assert second.message == first.message
+        assert get_response_cache().stats()["agents"]["booking_agent"]["hits"] == 1
+
+    async def test_history_is_part_of_the_key(self, fake_cache):
+        client = _client()
+        agent = _agent(BookingAgent, client, fake_cache)
+        prompt = "Can I move my haircut appointment?"
+
+        await agent.generate(prompt)
+        await agent.generate(prompt, history=[ChatMessage(role="user", content="I booked Friday")])
+
+        assert client.chat.await_count == 2
+
+    async def test_concurrent_identical_requests_are_coalesced(self, fake_cache):
+        client = _client(delay=0.05)
+        agent = _agent(BookingAgent, client, fake_cache)
+
+        results = await asyncio.gather(*(
+            agent.generate("Book a haircut for Saturday") for _ in range(10)
+        ))
+
+        assert client.chat.await_count == 1
+        assert {r.message for r in results} == {"Book the 2 PM slot with Priya."}
+        stats = get_response_cache().stats()["agents"]["booking_agent"]
+        assert stats["misses"] == 1
+        assert stats["coalesced"] == 9
+        assert stats["hit_rate"] == 0.9
+        assert get_response_cache().stats()["in_flight"] == 0
+
+    async def test_prompt_tokens_recorded_only_on_miss(self, fake_cache, monkeypatch):
+        monkeypatch.setattr(prompt_context_module, "_prompt_metrics_instance", None)
+        client = _client(delay=0.05)
+        agent = _agent(BookingAgent, client, fake_cache)
+
+        await asyncio.gather(*(agent.generate("Book a haircut for Saturday") for _ in range(5)))
+        await agent.generate("Book a haircut for Saturday")
+
+        stats = prompt_context_module.get_prompt_metrics().stats()["agents"]["booking_agent"]
+        assert stats["calls"] == 1
+
+    async def test_failures_are_shared_but_not_cached(self, fake_cache):
+        client = _client()
+
+        async def failing_chat(**kwargs):
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream 503")
+
+        client.chat.side_effect = failing_chat
+        agent = _agent(BookingAgent, client, fake_cache)
+
+        results = await asyncio.gather(*(
+            agent.generate("Book a haircut for Saturday") for _ in range(3)
+        ))
+
+        assert all(not r.success for r in results)
+        assert client.chat.await_count == 1
+        assert fake_cache.data == {}
+
+    async def test_per_agent_ttls(self, fake_cache):
+        await _agent(BookingAgent, _client(), fake_cache).generate("Book a haircut")
+        await _agent(CustomerSupportAgent, _client(), fake_cache).generate("What are your hours?")
+
+        ttls = {key.split(":")[1]: ttl for key, ttl in fake_cache.ttls.items()}
+        assert ttls == {"booking_agent": 300, "support_agent": 86400}
+
+    async def test_zero_ttl_bypasses_cache(self, fake_cache):
+        client = _client()
+        agent = _agent(VoiceReceptionistAgent, client, fake_cache)
+
+        await agent.generate("I want to book a facial")
+        await agent.generate("I want to book a facial")
+
+        assert client.chat.await_count == 2
+        assert fake_cache.data == {}
+
+    async def test_settings_override_agent_ttl(self, fake_cache):
+        settings = MagicMock()
+        settings.agent_cache_ttls = {"booking_agent": 42}
+        with patch("app.services.agents.get_settings", return_value=settings):
+            await _agent(BookingAgent, _client(), fake_cache).generate("Book a haircut")
+
+        assert list(fake_cache.ttls.values()) == [42]
+
+    async def test_use_cache_false_skips_cache(self, fake_cache):
+        client = _client()
+        agent = _agent(BookingAgent, client, fake_cache)
+
+        await agent.generate("Book a haircut", use_cache=False)
+        await agent.generate("Book a haircut", use_cache=False)
+
+        assert client.chat.await_count == 2
+        assert fake_cache.data == {}
+        assert get_response_cache().stats()["agents"] == {}
+
+
+@pytest.mark.asyncio
+class TestResponseCacheCore:
+    """Test ResponseCache.get_or_compute directly"""
+
+    async def test_leader_exception_reaches_followers(self):
+        cache = ResponseCache()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *(cache.get_or_compute("a", "ai:a:1", compute, decode=str) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert cache.stats()["agents"]["a"]["coalesced"] == 2
+
+    async def test_leader_cancellation_cancels_followers(self):
+        cache = ResponseCache()
+
+        async def compute():
+            await asyncio.sleep(1)
+            return "v", "v"
+
+        leader = asyncio.create_task(cache.get_or_compute("a", "ai:a:1", compute, decode=str))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_compute("a", "ai:a:1", compute, decode=str))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        assert cache.stats()["in_flight"] == 0
+
+    async def test_totals(self):
+        cache = ResponseCache()
+        store = FakeCache()
+
+        async def compute():
+            return "v", "v"
+
+        for agent in ("a", "a", "b"):
+            await cache.get_or_compute(agent, f"ai:{agent}:1", compute, decode=str, cache=store)
+
+        total = cache.stats()["total"]
+        assert (total["hits"], total["misses"], total["stores"]) == (1, 2, 2)
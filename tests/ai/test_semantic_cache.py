@@ -0,0 +1,360 @@
+"""Tests for the semantic response cache
+
+Covers:
+- Deterministic local embedder
+- Per-salon cosine index with TTL/LRU eviction and persistence
+- Vertex provider loading its model once, off the event loop
+- CacheMiddleware semantic hits honouring similarity_threshold
+- Cache entries scoped to the agent context
+- Replay of a chat log reporting hit rate and LLM calls saved
+"""
+import sys
+import threading
+import types
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.pipeline.middleware import CacheMiddleware, MiddlewareContext, MiddlewareResult
+from app.pipeline.semantic_cache import (
+    HashingEmbedder,
+    SemanticIndex,
+    VertexEmbeddingProvider,
+    cosine,
+    get_embedding_provider,
+)
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    """Async get/set/setex over a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+def _embed(text):
+    return HashingEmbedder().embed_sync(text)
+
+
+def _context(salon_id="salon_123", agent_name="booking"):
+    return MiddlewareContext(salon_id=salon_id, agent_name=agent_name)
+
+
+# ============================================================================
+# Embedder and index
+# ============================================================================
+
+class TestHashingEmbedder:
+    """Test the local deterministic embedder"""
+
+    def test_unit_length_and_deterministic(self):
+        vector = _embed("Book a haircut tomorrow")
+        assert len(vector) == 256
+        assert abs(cosine(vector, vector) - 1.0) < 1e-9
+        assert vector == _embed("Book a haircut tomorrow")
+
+    def test_case_and_punctuation_are_ignored(self):
+        assert cosine(_embed("Book a haircut tomorrow"), _embed("book a HAIRCUT, tomorrow!!")) > 0.999
+
+    def test_paraphrase_scores_above_unrelated(self):
+        query = _embed("How much is a keratin treatment?")
+        paraphrase = _embed("how much is keratin treatment")
+        unrelated = _embed("Can I reschedule my bridal makeup?")
+        assert cosine(query, paraphrase) > 0.9
+        assert cosine(query, unrelated) < 0.5
+
+    def test_empty_text(self):
+        assert _embed("?!") is None
+
+
+class TestSemanticIndex:
+    """Test search, eviction and persistence"""
+
+    def test_top_k_is_scoped_to_salon_and_agent(self):
+        index = SemanticIndex()
+        index.add("s1", "booking", "haircut price", _embed("haircut price"), {"r": 1})
+        index.add("s1", "booking", "facial price", _embed("facial price"), {"r": 2})
+        index.add("s1", "support", "haircut price", _embed("haircut price"), {"r": 3})
+        index.add("s2", "booking", "haircut price", _embed("haircut price"), {"r": 4})
+
+        matches = index.search("s1", "booking", _embed("haircut price?"), k=2)
+
+        assert [entry.response for _, entry in matches] == [{"r": 1}, {"r": 2}]
+        assert matches[0][0] > matches[1][0]
+        assert index.search("s3", "booking", _embed("haircut price")) == []
+
+    def test_min_score_filters_matches(self):
+        index = SemanticIndex()
+        index.add("s1", "booking", "haircut price", _embed("haircut price"), {"r": 1})
+        assert index.search("s1", "booking", _embed("spa membership"), min_score=0.95) == []
+
+    def test_entries_expire(self):
+        clock = FakeClock()
+        index = SemanticIndex(ttl=60, clock=clock)
+        index.add("s1", "booking", "haircut", _embed("haircut"), {"r": 1})
+        index.add("s1", "booking", "facial", _embed("facial"), {"r": 2}, ttl=600)
+
+        clock.now += 61
+        assert index.search("s1", "booking", _embed("haircut"), min_score=0.99) == []
+        assert len(index) == 1
+        clock.now += 600
+        assert index.evict_expired() == 1
+
+    def test_lru_bound_per_salon(self):
+        index = SemanticIndex(max_entries_per_salon=2)
+        index.add("s1", "booking", "a", _embed("haircut"), {"r": "a"})
+        index.add("s1", "booking", "b", _embed("facial"), {"r": "b"})
+        index.search("s1", "booking", _embed("haircut"))
+        index.add("s1", "booking", "c", _embed("pedicure"), {"r": "c"})
+        index.add("s2", "booking", "d", _embed("waxing"), {"r": "d"})
+
+        assert {e.prompt for _, e in index.search("s1", "booking", _embed("x"), k=5)} == {"a", "c"}
+        assert len(index) == 3
+
+    def test_scores_match_cosine_and_rows_are_reused(self):
+        index = SemanticIndex(max_entries_per_salon=3)
+        prompts = ["haircut price", "facial price", "beard trim", "manicure", "pedicure"]
+        for prompt in prompts:
+            index.add("s1", "booking", prompt, _embed(prompt), {"r": prompt})
+        query = _embed("price of a haircut")
+
+        matches = index.search("s1", "booking", query, k=3)
+
+        assert {entry.prompt for _, entry in matches} == set(prompts[2:])
+        assert [score for score, _ in matches] == sorted((s for s, _ in matches), reverse=True)
+        for score, entry in matches:
+            assert abs(score - cosine(query, entry.vector)) < 1e-5
+        assert len(index._partitions[("s1", "booking")].vectors) <= 3
+
+    def test_disk_round_trip_skips_expired(self, tmp_path):
+        clock = FakeClock()
+        index = SemanticIndex(ttl=60, clock=clock)
+        index.add("s1", "booking", "haircut", _embed("haircut"), {"r": 1})
+        index.add("s1", "booking", "facial", _embed("facial"), {"r": 2}, ttl=10)
+        path = str(tmp_path / "semantic.json")
+        index.save(path)
+
+        clock.now += 30
+        restored = SemanticIndex(ttl=60, clock=clock)
+        assert restored.load(path) == 1
+        assert restored.search("s1", "booking", _embed("haircut"))[0][1].response == {"r": 1}
+        assert SemanticIndex().load(str(tmp_path / "missing.json")) == 0
+
+    @pytest.mark.asyncio
+    async def test_redis_round_trip(self):
+        redis = FakeRedis()
+        index = SemanticIndex()
+        index.add("s1", "booking", "haircut", _embed("haircut"), {"r": 1})
+
+        await index.save_to_redis(redis, "semantic:index")
+        restored = SemanticIndex()
+
+        assert await restored.load_from_redis(redis, "semantic:index") == 1
+        assert await SemanticIndex().load_from_redis(redis, "other") == 0
+
+
+@pytest.mark.asyncio
+class TestEmbeddingProviders:
+    """Test provider selection and the Vertex provider"""
+
+    async def test_vertex_model_loads_once_off_loop(self):
+        loop_thread = threading.get_ident()
+        threads = []
+        model = MagicMock()
+
+        def get_embeddings(texts):
+            threads.append(threading.get_ident())
+            return [MagicMock(values=[3.0, 4.0])]
+
+        model.get_embeddings.side_effect = get_embeddings
+        module = types.ModuleType("vertexai.language_models")
+        module.TextEmbeddingModel = MagicMock()
+        module.TextEmbeddingModel.from_pretrained.side_effect = lambda name: (
+            threads.append(threading.get_ident()) or model
+        )
+
+        provider = VertexEmbeddingProvider()
+        with patch.dict(sys.modules, {"vertexai": types.ModuleType("vertexai"), "vertexai.language_models": module}):
+            vectors = [await provider.embed("haircut") for _ in range(3)]
+
+        assert vectors[0] == pytest.approx([0.6, 0.8])
+        assert module.TextEmbeddingModel.from_pretrained.call_count == 1
+        assert loop_thread not in threads
+
+    async def test_vertex_unavailable_disables_itself(self):
+        provider = VertexEmbeddingProvider()
+        with patch.dict(sys.modules, {"vertexai": None}):
+            assert await provider.embed("haircut") is None
+        assert provider._unavailable is True
+
+    async def test_provider_selection(self, monkeypatch):
+        monkeypatch.setenv("SEMANTIC_CACHE_EMBEDDER", "hashing")
+        assert isinstance(get_embedding_provider(), HashingEmbedder)
+        assert get_embedding_provider("none") is None
+        assert isinstance(get_embedding_provider("vertex"), VertexEmbeddingProvider)
+
+
+# ============================================================================
+# Middleware
+# ============================================================================
+
+def _middleware(**kwargs):
+    return CacheMiddleware(redis_client=FakeRedis(), embedder=HashingEmbedder(), **kwargs)
+
+
+def _next(calls):
+    async def next_func(request, context):
+        calls.append(request["prompt"])
+        return MiddlewareResult(success=True, data={"response": f"answer to {request['prompt']}"})
+    return next_func
+
+
+@pytest.mark.asyncio
+class TestCacheMiddlewareSemantic:
+    """Test semantic hits in CacheMiddleware"""
+
+    async def test_paraphrase_is_served_from_semantic_cache(self):
+        middleware = _middleware()
+        calls = []
+
+        await middleware.process({"prompt": "Book a haircut tomorrow"}, _context(), _next(calls))
+        result = await middleware.process({"prompt": "book a haircut, tomorrow?"}, _context(), _next(calls))
+
+        assert calls == ["Book a haircut tomorrow"]
+        assert result.cached is True
+        assert result.data == {"response": "answer to Book a haircut tomorrow"}
+        assert middleware.stats()["semantic_hits"] == 1
+
+    async def test_threshold_is_honoured(self):
+        calls = []
+        strict = _middleware(similarity_threshold=0.999)
+        loose = _middleware(similarity_threshold=0.8)
+        for middleware in (strict, loose):
+            await middleware.process({"prompt": "How much is a keratin treatment?"}, _context(), _next(calls))
+            await middleware.process({"prompt": "how much is keratin treatment"}, _context(), _next(calls))
+
+        assert strict.stats()["misses"] == 2
+        assert loose.stats()["semantic_hits"] == 1
+
+    async def test_salons_and_agents_do_not_share_entries(self):
+        middleware = _middleware()
+        calls = []
+
+        await middleware.process({"prompt": "Book a haircut"}, _context(), _next(calls))
+        await middleware.process({"prompt": "book a haircut!"}, _context(salon_id="other"), _next(calls))
+        await middleware.process({"prompt": "book a haircut!"}, _context(agent_name="support"), _next(calls))
+
+        assert len(calls) == 3
+
+    async def test_agent_context_scopes_entries(self):
+        middleware = _middleware()
+        calls = []
+        alice = {"salon_id": "salon_123", "user_id": "u1", "customer_name": "Alice"}
+        bob = {"salon_id": "salon_123", "user_id": "u2", "customer_name": "Bob"}
+
+        await middleware.process({"prompt": "When is my next appointment?", "context": alice}, _context(), _next(calls))
+        await middleware.process({"prompt": "When is my next appointment?", "context": bob}, _context(), _next(calls))
+        await middleware.process({"prompt": "when is my next appointment", "context": bob}, _context(), _next(calls))
+        result = await middleware.process(
+            {"prompt": "When is my next appointment?", "context": dict(reversed(alice.items()))},
+            _context(), _next(calls),
+        )
+
+        assert len(calls) == 2
+        assert result.cached is True
+
+    async def test_prompt_is_embedded_once_per_request(self):
+        embedder = HashingEmbedder()
+        middleware = CacheMiddleware(redis_client=FakeRedis(), embedder=embedder)
+
+        with patch.object(embedder, "embed", wraps=embedder.embed) as embed:
+            await middleware.process({"prompt": "Book a facial"}, _context(), _next([]))
+
+        assert embed.await_count == 1
+        assert middleware.stats()["semantic_entries"] == 1
+
+    async def test_index_persists_across_restarts(self, tmp_path):
+        path = str(tmp_path / "semantic.json")
+        first = _middleware(persist_path=path)
+        await first.initialize()
+        await first.process({"prompt": "Book a facial"}, _context(), _next([]))
+        await first.cleanup()
+
+        calls = []
+        second = _middleware(persist_path=path)
+        await second.initialize()
+        await second.process({"prompt": "book a facial."}, _context(), _next(calls))
+
+        assert calls == []
+
+
+# ============================================================================
+# Replay report
+# ============================================================================
+
+CHAT_LOG = [
+    "Book a haircut tomorrow at 5pm",
+    "book a haircut tomorrow at 5 pm",
+    "How much is a keratin treatment?",
+    "how much is keratin treatment",
+    "What time does the salon open on Sunday?",
+    "What time does the salon open on sunday",
+    "Do you have bridal makeup packages?",
+    "Do you have any bridal makeup packages?",
+    "Book a haircut tomorrow at 5pm",
+    "Is Priya available for balayage this weekend?",
+    "is priya available for balayage this weekend",
+    "How many loyalty points do I have?",
+    "how many loyalty points do i have?",
+    "Any offers on facial and spa?",
+    "any offers on facial & spa",
+    "Cancel my appointment for Friday",
+    "Reschedule my pedicure to Saturday morning",
+    "How much is a keratin treatment?",
+    "Do you do beard trims?",
+    "do you do beard trims",
+]
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestSemanticCacheReplay:
+    """Replay a chat log with exact-only and semantic caching"""
+
+    async def test_replay_hit_rate(self):
+        reports = {}
+        for name, embedder in (("exact only", None), ("semantic", HashingEmbedder())):
+            middleware = CacheMiddleware(redis_client=FakeRedis(), embedder=embedder)
+            middleware._initialized = True
+            calls = []
+            for prompt in CHAT_LOG:
+                await middleware.process({"prompt": prompt}, _context(), _next(calls))
+            reports[name] = middleware.stats()
+            assert reports[name]["misses"] == len(calls)
+            print(
+                f"\n{name}: {len(CHAT_LOG)} prompts, {len(calls)} LLM calls, "
+                f"hit rate {reports[name]['hit_rate']:.0%}, "
+                f"{reports[name]['llm_calls_saved']} LLM calls saved"
+            )
+
+        assert reports["exact only"]["llm_calls_saved"] == 2
+        assert reports["semantic"]["llm_calls_saved"] > reports["exact only"]["llm_calls_saved"] * 3
@@ -0,0 +1,331 @@
+"""Tests for the conversation session store
+
+Covers:
+- Compact encoding round trip
+- L1 LRU bound, Redis persistence across restarts and instances
+- Token-budget history truncation
+- Serialized concurrent turns and lock cleanup
+- Voice sessions persisted through the store
+- Memory per 10k active sessions vs the old module-level dict
+"""
+import asyncio
+import os
+import sys
+import tracemalloc
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/ai'))
+
+from app.adapters.voice_adapter import VoiceSession
+from app.services.session_store import (
+    Session,
+    SessionStore,
+    decode_session,
+    encode_session,
+    estimate_tokens,
+)
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeBackend:
+    """CacheService stand-in over a dict."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.fail = False
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl=None, tags=None):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.data[key] = value
+        self.ttls[key] = ttl
+        return True
+
+    async def delete(self, key):
+        return self.data.pop(key, None) is not None
+
+
+def _store(backend=None, **kwargs):
+    return SessionStore(backend=backend, **kwargs)
+
+
+class TestEncoding:
+    """Test the compact session encoding"""
+
+    def test_round_trip(self):
+        session = Session("s1", [("user", "Book a haircut"), ("assistant", "Done ✂️")], {"state": "booking"}, 12.5)
+
+        payload = encode_session(session)
+
+        assert payload == '{"m":[["u","Book a haircut"],["a","Done ✂️"]],"s":{"state":"booking"},"t":12.5}'
+        restored = decode_session("s1", payload)
+        assert (restored.messages, restored.state, restored.updated_at) == (
+            session.messages, session.state, session.updated_at,
+        )
+
+
+@pytest.mark.asyncio
+class TestSessionStore:
+    """Test tiers, truncation and locking"""
+
+    async def test_sessions_persist_across_restarts(self):
+        backend = FakeBackend()
+        store = _store(backend, ttl=3600)
+        async with store.turn("s1") as session:
+            session.append("user", "Book a facial")
+
+        restarted = _store(backend)
+        session = await restarted.get("s1")
+
+        assert session.history() == [{"role": "user", "content": "Book a facial"}]
+        assert backend.ttls == {"ai:session:s1": 3600}
+        assert restarted.stats()["l2_hits"] == 1
+
+    async def test_l1_is_bounded_and_refills_from_redis(self):
+        backend = FakeBackend()
+        store = _store(backend, max_sessions=2)
+        for sid in ("a", "b", "c"):
+            async with store.turn(sid) as session:
+                session.append("user", f"hello from {sid}")
+
+        assert len(store) == 2
+        assert store.stats()["evictions"] == 1
+        assert (await store.get("a")).messages == [("user", "hello from a")]
+
+    async def test_without_backend_sessions_live_in_l1(self):
+        store = _store(max_sessions=1)
+        async with store.turn("a") as session:
+            session.append("user", "hi")
+        async with store.turn("b") as session:
+            session.append("user", "hi")
+
+        assert (await store.get("a")).messages == []
+        assert (await store.get("b")).messages == [("user", "hi")]
+
+    async def test_idle_sessions_expire(self):
+        clock = FakeClock()
+        store = _store(ttl=60, clock=clock)
+        async with store.turn("s1") as session:
+            session.append("user", "hi")
+
+        clock.now += 61
+
+        assert (await store.get("s1")).messages == []
+        assert len(store) == 0
+
+    async def test_stale_l1_copy_is_refreshed_from_redis(self):
+        clock = FakeClock()
+        backend = FakeBackend()
+        first = _store(backend, l1_ttl=5, clock=clock)
+        second = _store(backend, l1_ttl=5, clock=clock)
+        async with first.turn("s1") as session:
+            session.append("user", "Book a haircut")
+        async with second.turn("s1") as session:
+            session.append("user", "Make it 5pm")
+
+        assert len((await first.get("s1")).messages) == 1
+        clock.now += 6
+        assert len((await first.get("s1")).messages) == 2
+
+    async def test_redis_errors_fall_back_to_l1(self):
+        clock = FakeClock()
+        backend = FakeBackend()
+        store = _store(backend, l1_ttl=5, clock=clock)
+        async with store.turn("s1") as session:
+            session.append("user", "hi")
+
+        backend.fail = True
+        clock.now += 6
+        async with store.turn("s1") as session:
+            session.append("user", "still here?")
+
+        assert len(session.messages) == 2
+        assert store.stats()["l2_errors"] == 2
+
+    async def test_delete(self):
+        backend = FakeBackend()
+        store = _store(backend)
+        async with store.turn("s1") as session:
+            session.append("user", "hi")
+
+        await store.delete("s1")
+
+        assert backend.data == {}
+        assert (await store.get("s1")).messages == []
+
+
+class TestTruncation:
+    """Test token-budget history windows"""
+
+    def test_oldest_messages_are_dropped_first(self):
+        store = _store(token_budget=30)
+        session = Session("s1")
+        for i in range(10):
+            session.append("user", f"question {i} " * 3)
+            session.append("assistant", f"answer {i} " * 3)
+
+        removed = store.truncate(session)
+
+        assert removed > 0
+        assert session.tokens <= 30
+        assert session.messages[-1] == ("assistant", "answer 9 " * 3)
+        assert session.messages[0][0] == "user"
+
+    def test_one_long_message_outweighs_many_short_ones(self):
+        store = _store(token_budget=200)
+        session = Session("s1")
+        for _ in range(20):
+            session.append("user", "ok")
+        session.append("user", "x" * 2000)
+
+        store.truncate(session)
+
+        # A count-based window would keep 10 messages; the budget keeps the newest
+        assert session.messages == [("user", "x" * 2000)]
+
+    def test_budget_fits_untouched(self):
+        store = _store(token_budget=2000)
+        session = Session("s1", [("user", "hi"), ("assistant", "hello")])
+        assert store.truncate(session) == 0
+        assert estimate_tokens("abcd" * 10) == 11
+
+
+@pytest.mark.asyncio
+class TestConcurrentTurns:
+    """Test per-session serialization"""
+
+    async def test_turns_on_one_session_are_serialized(self):
+        store = _store()
+        active = []
+        peak = []
+
+        async def turn(text):
+            async with store.turn("s1") as session:
+                active.append(text)
+                peak.append(len(active))
+                await asyncio.sleep(0.01)
+                session.append("user", text)
+                active.remove(text)
+
+        await asyncio.gather(*(turn(f"message {i}") for i in range(5)))
+
+        assert max(peak) == 1
+        assert len((await store.get("s1")).messages) == 5
+        assert store.stats()["locked_sessions"] == 0
+
+    async def test_different_sessions_run_concurrently(self):
+        store = _store()
+        active = []
+        peak = []
+
+        async def turn(sid):
+            async with store.turn(sid):
+                active.append(sid)
+                peak.append(len(active))
+                await asyncio.sleep(0.01)
+                active.remove(sid)
+
+        await asyncio.gather(*(turn(f"s{i}") for i in range(5)))
+
+        assert max(peak) == 5
+
+    async def test_failed_turn_is_not_saved(self):
+        backend = FakeBackend()
+        store = _store(backend)
+
+        with pytest.raises(RuntimeError):
+            async with store.turn("s1") as session:
+                session.append("user", "hi")
+                raise RuntimeError("llm down")
+
+        assert backend.data == {}
+        assert store.stats()["locked_sessions"] == 0
+
+
+@pytest.mark.asyncio
+class TestVoiceSessionPersistence:
+    """Test VoiceSession through the store"""
+
+    async def test_call_resumes_on_another_instance(self):
+        backend = FakeBackend()
+        call = VoiceSession("CA123", "salon_1")
+        call.state = "booking"
+        call.menu_stack.append("services")
+        call.add_interaction("I want a haircut", "Which day suits you?")
+        await call.save(_store(backend))
+
+        resumed = await VoiceSession.load(_store(backend), "CA123", "salon_1")
+
+        assert resumed.state == "booking"
+        assert resumed.menu_stack == ["services"]
+        assert resumed.start_time == call.start_time
+        assert resumed.get_context()["history"] == [
+            {"role": "user", "content": "I want a haircut"},
+            {"role": "assistant", "content": "Which day suits you?"},
+        ]
+        assert "ai:session:voice_CA123" in backend.data
+
+
+def _measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return kept, size
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestSessionMemoryBenchmark:
+    """Memory for 10k active sessions of 10 messages each"""
+
+    async def test_memory_per_10k_sessions(self):
+        count = 10_000
+
+        def turns(i):
+            for t in range(5):
+                yield "user", f"Can I book a haircut with Priya on day {t} at {i % 12}pm?"
+                yield "assistant", f"Yes, Priya is free on day {t} at {i % 12}pm. Shall I confirm it?"
+
+        def legacy():
+            sessions = {}
+            for i in range(count):
+                sessions[f"session-{i}"] = [{"role": r, "content": c} for r, c in turns(i)]
+            return sessions
+
+        def pooled():
+            store = _store(max_sessions=count)
+            for i in range(count):
+                session = Session(f"session-{i}", list(turns(i)))
+                store.truncate(session)
+                store._remember(session)
+            return store
+
+        _, legacy_bytes = _measure(legacy)
+        store, store_bytes = _measure(pooled)
+        payload = encode_session(store._l1["session-0"][1])
+
+        print(
+            f"\n10k sessions: dict of message dicts {legacy_bytes / 1e6:.1f}MB, "
+            f"session store L1 {store_bytes / 1e6:.1f}MB; "
+            f"Redis payload {len(payload.encode())}B/session"
+        )
+        assert store_bytes < legacy_bytes * 0.8
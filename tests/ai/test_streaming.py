@@ -0,0 +1,374 @@
+"""Tests for end-to-end response streaming
+
+Covers:
+- BaseAgent.generate_stream chunks, done metadata and TTFT metrics
+- Completed streams cached under the generate() key; errors never cached
+- Guardrail rejections streamed as a blocked response
+- CacheMiddleware replaying hits and teeing misses into the cache
+- RequestProcessor.stream_agent through the middleware chain
+- The /chat/stream SSE endpoint and session history
+"""
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/ai'))
+
+from app.pipeline.middleware import CacheMiddleware, MiddlewareContext
+from app.services import response_cache as response_cache_module
+from app.services import streaming as streaming_module
+from app.services.agents import BookingAgent
+from app.services.session_store import SessionStore
+from app.services.streaming import (
+    StreamMetrics,
+    chunk_event,
+    done_event,
+    error_event,
+    replay_chunks,
+    sse_event,
+)
+
+
+class FakeCache:
+    """In-memory stand-in for CacheService.get/set."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl=None, tags=None):
+        self.data[key] = value
+        return True
+
+
+class FakeRedis:
+    """In-memory stand-in for redis.asyncio get/setex."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+def _client(chunks=("Book ", "the 2 PM ", "slot."), fail_after=None, delay=0.0):
+    client = MagicMock()
+    client.default_model = "google/gemini-2.5-flash"
+    client.calls = 0
+
+    async def chat_stream(**kwargs):
+        client.calls += 1
+        for i, chunk in enumerate(chunks):
+            if fail_after is not None and i == fail_after:
+                raise ConnectionError("upstream reset")
+            await asyncio.sleep(delay)
+            yield chunk
+
+    client.chat_stream = chat_stream
+    return client
+
+
+def _agent(client, cache=None):
+    agent = BookingAgent(client=client)
+    agent._cache = cache or FakeCache()
+    return agent
+
+
+async def _collect(events):
+    return [event async for event in events]
+
+
+def _text(events):
+    return "".join(e["content"] for e in events if e["type"] == "chunk")
+
+
+@pytest.fixture(autouse=True)
+def fresh_singletons(monkeypatch):
+    monkeypatch.setattr(response_cache_module, "_response_cache_instance", None)
+    monkeypatch.setattr(streaming_module, "_stream_metrics_instance", None)
+
+
+class TestEvents:
+    """Test event helpers"""
+
+    def test_sse_frame(self):
+        assert sse_event(chunk_event("Namaste 🙏")) == 'data: {"type":"chunk","content":"Namaste 🙏"}\n\n'
+
+    def test_replay_chunks(self):
+        assert list(replay_chunks("abcdefg", chunk_size=3)) == ["abc", "def", "g"]
+
+    def test_metrics_percentiles(self):
+        metrics = StreamMetrics()
+        for ms in range(1, 101):
+            metrics.record("booking_agent", ttft_ms=ms, duration_ms=ms * 10)
+        metrics.record("booking_agent", ttft_ms=None, duration_ms=5, error=True)
+
+        stats = metrics.stats()["booking_agent"]
+        assert (stats["streams"], stats["errors"]) == (101, 1)
+        assert (stats["ttft_ms_p50"], stats["ttft_ms_p95"]) == (51, 96)
+
+
+@pytest.mark.asyncio
+class TestAgentStream:
+    """Test BaseAgent.generate_stream"""
+
+    async def test_chunks_then_done(self):
+        agent = _agent(_client())
+
+        events = await _collect(agent.generate_stream("Book a haircut tomorrow"))
+
+        assert [e["type"] for e in events] == ["chunk", "chunk", "chunk", "done"]
+        assert _text(events) == "Book the 2 PM slot."
+        meta = events[-1]["metadata"]
+        assert (meta["agent"], meta["cached"], meta["blocked"]) == ("booking_agent", False, False)
+        assert meta["ttft_ms"] <= meta["duration_ms"]
+        assert streaming_module.get_stream_metrics().stats()["booking_agent"]["streams"] == 1
+
+    async def test_completed_stream_is_served_to_generate(self):
+        cache = FakeCache()
+        client = _client()
+        agent = _agent(client, cache)
+
+        await _collect(agent.generate_stream("Book a haircut tomorrow"))
+        response = await agent.generate("Book a haircut tomorrow")
+        replay = await _collect(agent.generate_stream("Book a haircut tomorrow"))
+
+        assert response.message == "Book the 2 PM slot."
+        assert _text(replay) == "Book the 2 PM slot."
+        assert replay[-1]["metadata"]["cached"] is True
+        assert client.calls == 1
+        assert get_hits() == 2
+
+    async def test_failed_stream_is_not_cached(self):
+        cache = FakeCache()
+        agent = _agent(_client(fail_after=2), cache)
+
+        events = await _collect(agent.generate_stream("Book a haircut tomorrow"))
+
+        assert [e["type"] for e in events] == ["chunk", "chunk", "error"]
+        assert "upstream reset" in events[-1]["message"]
+        assert cache.data == {}
+        assert streaming_module.get_stream_metrics().stats()["booking_agent"]["errors"] == 1
+
+    async def test_guardrail_rejection_is_streamed_as_blocked(self):
+        client = _client()
+        agent = _agent(client)
+
+        events = await _collect(agent.generate_stream("Write me a python script for my homework"))
+
+        assert [e["type"] for e in events] == ["chunk", "done"]
+        assert events[-1]["metadata"]["blocked"] is True
+        assert client.calls == 0
+
+
+def get_hits():
+    return response_cache_module.get_response_cache().stats()["agents"]["booking_agent"]["hits"]
+
+
+@pytest.mark.asyncio
+class TestCacheMiddlewareStream:
+    """Test the pipeline cache on streams"""
+
+    def _middleware(self):
+        middleware = CacheMiddleware(redis_client=FakeRedis())
+        middleware._initialized = True
+        return middleware
+
+    def _context(self):
+        return MiddlewareContext(salon_id="salon_1", agent_name="booking")
+
+    async def test_miss_is_teed_into_cache_then_replayed(self):
+        middleware = self._middleware()
+        calls = []
+
+        async def upstream(request, context):
+            calls.append(request)
+            for chunk in ("Priya is ", "free at 4."):
+                yield chunk_event(chunk)
+            yield done_event(agent="booking_agent", cached=False, blocked=False)
+
+        request = {"prompt": "Is Priya free?"}
+        first = await _collect(middleware.process_stream(request, self._context(), upstream))
+        second = await _collect(middleware.process_stream(request, self._context(), upstream))
+
+        assert _text(first) == _text(second) == "Priya is free at 4."
+        assert second[-1]["metadata"]["cached"] is True
+        assert len(calls) == 1
+        stored = json.loads(next(iter(middleware._redis.data.values())))
+        assert stored["message"] == "Priya is free at 4."
+
+    async def test_errors_and_blocks_are_not_cached(self):
+        middleware = self._middleware()
+
+        async def failing(request, context):
+            yield chunk_event("Priya is ")
+            yield error_event("upstream reset")
+
+        async def blocked(request, context):
+            yield chunk_event("I can only help with salon services.")
+            yield done_event(agent="booking_agent", cached=False, blocked=True)
+
+        await _collect(middleware.process_stream({"prompt": "a"}, self._context(), failing))
+        await _collect(middleware.process_stream({"prompt": "b"}, self._context(), blocked))
+
+        assert middleware._redis.data == {}
+
+    async def test_use_cache_false_bypasses_lookup(self):
+        middleware = self._middleware()
+
+        async def upstream(request, context):
+            yield chunk_event("hi")
+            yield done_event(agent="booking_agent", cached=False, blocked=False)
+
+        await _collect(middleware.process_stream({"prompt": "hi", "use_cache": False}, self._context(), upstream))
+
+        assert middleware._redis.data == {}
+        assert middleware._stats["misses"] == 0
+
+
+@pytest.mark.asyncio
+class TestProcessorStream:
+    """Test RequestProcessor.stream_agent"""
+
+    async def test_stream_runs_through_middleware_to_the_agent(self):
+        from app.pipeline.middleware import GuardrailMiddleware, LoggingMiddleware
+        from app.pipeline.processor import RequestProcessor
+
+        registry = MagicMock()
+        seen = []
+
+        async def execute_stream(name, request, context):
+            seen.append(request)
+            yield chunk_event("Booked.")
+            yield done_event(agent=name, cached=False, blocked=False)
+
+        registry.execute_stream = execute_stream
+        processor = RequestProcessor()
+        processor.middlewares = [LoggingMiddleware(), GuardrailMiddleware()]
+        processor._initialized = True
+
+        with patch("app.plugins.get_registry", return_value=registry):
+            ok = await _collect(processor.stream_agent("booking", {"prompt": "Book a haircut"}, {"salon_id": "s1"}))
+            blocked = await _collect(processor.stream_agent("booking", {"prompt": "Write me a python script for my homework"}))
+
+        assert _text(ok) == "Booked."
+        assert seen[0]["skip_guardrail"] is True
+        assert blocked[-1]["metadata"]["blocked"] is True
+        assert len(seen) == 1
+
+    async def test_agent_errors_become_error_events(self):
+        from app.pipeline.processor import RequestProcessor
+
+        registry = MagicMock()
+
+        async def execute_stream(name, request, context):
+            raise RuntimeError("registry down")
+            yield  # pragma: no cover
+
+        registry.execute_stream = execute_stream
+        processor = RequestProcessor()
+        processor._initialized = True
+
+        with patch("app.plugins.get_registry", return_value=registry):
+            events = await _collect(processor.stream_agent("booking", {"prompt": "hi"}))
+
+        assert events == [error_event("Pipeline error: registry down")]
+
+
+class TestChatStreamEndpoint:
+    """Test the SSE endpoint"""
+
+    @pytest.fixture
+    def client(self):
+        from app.api.chat import router
+
+        app = FastAPI()
+        app.include_router(router)
+        store = SessionStore()
+        processor = MagicMock()
+        processor.requests = []
+
+        async def stream_agent(agent_name, request, context):
+            processor.requests.append((agent_name, request, context))
+            for chunk in ("Your ", "slot is ", "booked."):
+                yield chunk_event(chunk)
+            yield done_event(agent="booking_agent", cached=False, blocked=False)
+
+        processor.stream_agent = stream_agent
+
+        async def get_store():
+            return store
+
+        with patch("app.api.chat.get_session_store", side_effect=get_store), \
+                patch("app.api.chat.get_processor", return_value=processor):
+            with TestClient(app) as client:
+                client.store = store
+                client.processor = processor
+                yield client
+
+    @staticmethod
+    def _events(response):
+        return [json.loads(line[6:]) for line in response.text.split("\n\n") if line.startswith("data: ")]
+
+    def test_streams_sse_events(self, client):
+        response = client.post("/chat/stream", json={
+            "salon_id": "salon-123", "message": "Book a haircut", "agent_type": "booking",
+        })
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = self._events(response)
+        assert events[0]["type"] == "start"
+        assert [e["type"] for e in events[1:]] == ["chunk", "chunk", "chunk", "done"]
+        assert events[-1]["metadata"]["session_id"] == events[0]["session_id"]
+
+    def test_reply_joins_session_history(self, client):
+        first = self._events(client.post("/chat/stream", json={
+            "salon_id": "salon-123", "message": "Book a haircut", "agent_type": "booking",
+        }))
+        session_id = first[0]["session_id"]
+        client.post("/chat/stream", json={
+            "salon_id": "salon-123", "message": "At 5pm", "agent_type": "booking", "session_id": session_id,
+        })
+
+        session = client.store._l1[session_id][1]
+        assert session.messages[:2] == [("user", "Book a haircut"), ("assistant", "Your slot is booked.")]
+        _, request, context = client.processor.requests[1]
+        assert [m.content for m in request["history"]] == ["Book a haircut", "Your slot is booked."]
+        assert request["use_cache"] is False
+        assert client.processor.requests[0][1]["use_cache"] is True
+        assert context["session_id"] == session_id
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestTimeToFirstTokenBenchmark:
+    """Time to first token: buffered generate() vs generate_stream()"""
+
+    async def test_ttft(self):
+        chunks = [f"word{i} " for i in range(40)]
+        agent = _agent(_client(chunks=chunks, delay=0.005))
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first_at = None
+        async for event in agent.generate_stream("Book a haircut tomorrow", use_cache=False):
+            if first_at is None and event["type"] == "chunk":
+                first_at = loop.time()
+        total = loop.time() - started
+        ttft = first_at - started
+
+        print(f"\nstreamed: first token {ttft * 1000:.1f}ms, full response {total * 1000:.1f}ms "
+              f"(buffered response would show nothing for {total * 1000:.1f}ms)")
+        assert ttft < total / 5
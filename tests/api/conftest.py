@@ -0,0 +1,393 @@
+"""
+Shared fixtures for API service tests.
+
+Provides an in-memory Firestore stand-in that understands the subset of the
+async query API used by ``FirestoreBase`` and counts billed document reads,
+and an in-memory Redis stand-in with configurable per-command latency.
+"""
+import asyncio
+import pytest
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional
+
+from google.cloud.firestore_v1.transforms import Increment
+
+
+def _get_field(data: Dict[str, Any], path: str) -> Any:
+    """Resolve a dotted field path against a document dict."""
+    value: Any = data
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _merge(target: Dict[str, Any], data: Dict[str, Any]) -> None:
+    """Deep-merge data into target, applying Increment transforms."""
+    for key, value in data.items():
+        if isinstance(value, Increment):
+            target[key] = target.get(key, 0) + value.value
+        elif isinstance(value, dict):
+            existing = target.get(key)
+            target[key] = existing if isinstance(existing, dict) else {}
+            _merge(target[key], value)
+        else:
+            target[key] = value
+
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: b in (a or []),
+    "array_contains_any": lambda a, b: any(v in (a or []) for v in b),
+}
+
+
+class FakeSnapshot:
+    """Minimal DocumentSnapshot."""
+
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]]):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        return _get_field(self._data or {}, field_path)
+
+
+class FakeDocumentRef:
+    """Minimal async DocumentReference."""
+
+    def __init__(self, db: "FakeFirestore", collection: str, doc_id: str):
+        self._db = db
+        self._collection = collection
+        self.id = doc_id
+
+    async def get(self) -> FakeSnapshot:
+        self._db.reads += 1
+        return FakeSnapshot(self.id, self._db.data[self._collection].get(self.id))
+
+    async def set(self, data: Dict[str, Any], merge: bool = False) -> None:
+        store = self._db.data[self._collection]
+        if not merge or self.id not in store:
+            store[self.id] = {}
+        _merge(store[self.id], data)
+        self._db.writes += 1
+
+    async def update(self, data: Dict[str, Any]) -> None:
+        self._db.data[self._collection][self.id].update(data)
+        self._db.writes += 1
+
+    async def delete(self) -> None:
+        self._db.data[self._collection].pop(self.id, None)
+        self._db.writes += 1
+
+
+class FakeCountResult:
+    def __init__(self, value: int):
+        self.value = value
+
+
+class FakeAggregation:
+    def __init__(self, query: "FakeQuery"):
+        self._query = query
+
+    async def get(self):
+        self._query._db.reads += 1
+        return [[FakeCountResult(len(self._query._matching()))]]
+
+
+class FakeQuery:
+    """Immutable query over one in-memory collection."""
+
+    def __init__(self, db: "FakeFirestore", collection: str):
+        self._db = db
+        self._collection = collection
+        self._filters: List[tuple] = []
+        self._orders: List[tuple] = []
+        self._start_after: Optional[Dict[str, Any]] = None
+        self._offset = 0
+        self._limit: Optional[int] = None
+
+    def _copy(self) -> "FakeQuery":
+        clone = FakeQuery(self._db, self._collection)
+        clone._filters = list(self._filters)
+        clone._orders = list(self._orders)
+        clone._start_after = self._start_after
+        clone._offset = self._offset
+        clone._limit = self._limit
+        return clone
+
+    def document(self, doc_id: Optional[str] = None) -> FakeDocumentRef:
+        if doc_id is None:
+            self._db.auto_id += 1
+            doc_id = f"auto_{self._db.auto_id:06d}"
+        return FakeDocumentRef(self._db, self._collection, doc_id)
+
+    def where(self, field=None, op=None, value=None, filter=None) -> "FakeQuery":
+        clone = self._copy()
+        if filter is not None:
+            field, op, value = filter.field_path, filter.op_string, filter.value
+        clone._filters.append((field, op, value))
+        return clone
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> "FakeQuery":
+        clone = self._copy()
+        clone._orders.append((field, direction))
+        return clone
+
+    def start_after(self, position: Dict[str, Any]) -> "FakeQuery":
+        clone = self._copy()
+        clone._start_after = position
+        return clone
+
+    def offset(self, count: int) -> "FakeQuery":
+        clone = self._copy()
+        clone._offset = count
+        return clone
+
+    def limit(self, count: int) -> "FakeQuery":
+        clone = self._copy()
+        clone._limit = count
+        return clone
+
+    def count(self) -> FakeAggregation:
+        return FakeAggregation(self)
+
+    def _key(self, doc_id: str, data: Dict[str, Any]) -> tuple:
+        return tuple(
+            doc_id if field == "__name__" else _get_field(data, field)
+            for field, _ in self._orders
+        )
+
+    def _matching(self) -> List[tuple]:
+        docs = [
+            (doc_id, data)
+            for doc_id, data in self._db.data[self._collection].items()
+            if all(_OPERATORS[op](_get_field(data, f), v) for f, op, v in self._filters)
+        ]
+        for field, direction in reversed(self._orders):
+            docs.sort(
+                key=lambda item: (
+                    item[0] if field == "__name__" else _get_field(item[1], field)
+                ),
+                reverse=direction == "DESCENDING",
+            )
+        return docs
+
+    def _after_cursor(self, docs: List[tuple]) -> List[tuple]:
+        if self._start_after is None:
+            return docs
+        cursor = tuple(self._start_after.get(field) for field, _ in self._orders)
+        for index, (doc_id, data) in enumerate(docs):
+            if self._key(doc_id, data) == cursor:
+                return docs[index + 1:]
+        return []
+
+    async def stream(self):
+        docs = self._after_cursor(self._matching())
+        # Firestore bills skipped offset documents as reads
+        self._db.reads += min(self._offset, len(docs))
+        docs = docs[self._offset:]
+        if self._limit is not None:
+            docs = docs[: self._limit]
+        for doc_id, data in docs:
+            self._db.reads += 1
+            yield FakeSnapshot(doc_id, data)
+
+    async def get(self) -> List[FakeSnapshot]:
+        return [doc async for doc in self.stream()]
+
+
+class FakeBatch:
+    def __init__(self, db: "FakeFirestore"):
+        self._db = db
+        self._ops: List[tuple] = []
+
+    def set(self, ref: FakeDocumentRef, data: Dict[str, Any], merge: bool = False) -> None:
+        self._ops.append(("set", ref, data, merge))
+
+    def update(self, ref: FakeDocumentRef, data: Dict[str, Any]) -> None:
+        self._ops.append(("update", ref, data, False))
+
+    def delete(self, ref: FakeDocumentRef) -> None:
+        self._ops.append(("delete", ref, None, False))
+
+    async def commit(self) -> None:
+        for op, ref, data, merge in self._ops:
+            if op == "set":
+                await ref.set(data, merge=merge)
+            elif op == "update":
+                await ref.update(data)
+            else:
+                await ref.delete()
+
+
+class FakeFirestore:
+    """In-memory async Firestore client with read/write counters."""
+
+    def __init__(self):
+        self.data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.reads = 0
+        self.writes = 0
+        self.auto_id = 0
+
+    def collection(self, name: str) -> FakeQuery:
+        self.data.setdefault(name, {})
+        return FakeQuery(self, name)
+
+    def batch(self) -> FakeBatch:
+        return FakeBatch(self)
+
+    async def get_all(self, refs):
+        for ref in refs:
+            self.reads += 1
+            yield FakeSnapshot(ref.id, self.data[ref._collection].get(ref.id))
+
+    def seed(self, collection: str, docs: Dict[str, Dict[str, Any]]) -> None:
+        self.collection(collection)
+        self.data[collection].update({k: dict(v) for k, v in docs.items()})
+
+
+@pytest.fixture
+def fake_firestore():
+    """In-memory Firestore client that counts document reads."""
+    return FakeFirestore()
+
+
+class FakePipeline:
+    """Minimal async Redis pipeline (one round trip on execute)."""
+
+    def __init__(self, redis: "FakeRedis"):
+        self._redis = redis
+        self._ops: List[tuple] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._ops.clear()
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> "FakePipeline":
+        self._ops.append((self._redis._set, key, value, nx))
+        return self
+
+    def sadd(self, key: str, *members: str) -> "FakePipeline":
+        self._ops.append((self._redis._sadd, key, *members))
+        return self
+
+    def smembers(self, key: str) -> "FakePipeline":
+        self._ops.append((self._redis._smembers, key))
+        return self
+
+    def expire(self, key: str, seconds: int) -> "FakePipeline":
+        self._ops.append((lambda key: key in self._redis.sets or key in self._redis.data, key))
+        return self
+
+    async def execute(self) -> List[Any]:
+        await self._redis._round_trip()
+        results = [op(*args) for op, *args in self._ops]
+        self._ops.clear()
+        return results
+
+
+class FakeRedis:
+    """In-memory async Redis client counting commands (round trips)."""
+
+    def __init__(self, latency: float = 0.0):
+        self.data: Dict[str, str] = {}
+        self.sets: Dict[str, set] = {}
+        self.latency = latency
+        self.commands = 0
+        self.scanned = 0
+        self.published: List[tuple] = []
+
+    async def _round_trip(self) -> None:
+        self.commands += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _set(self, key: str, value: Any, nx: bool) -> Optional[bool]:
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, str) else str(value)
+        return True
+
+    def _sadd(self, key: str, *members: str) -> int:
+        target = self.sets.setdefault(key, set())
+        added = len(set(members) - target)
+        target.update(members)
+        return added
+
+    def _smembers(self, key: str) -> set:
+        return set(self.sets.get(key, ()))
+
+    async def ping(self) -> bool:
+        await self._round_trip()
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        await self._round_trip()
+        return self.data.get(key)
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        await self._round_trip()
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        await self._round_trip()
+        return self._set(key, value, nx)
+
+    async def delete(self, *keys: str) -> int:
+        await self._round_trip()
+        return sum(
+            1 for key in keys
+            if self.data.pop(key, None) is not None or self.sets.pop(key, None) is not None
+        )
+
+    async def sadd(self, key: str, *members: str) -> int:
+        await self._round_trip()
+        return self._sadd(key, *members)
+
+    async def smembers(self, key: str) -> set:
+        await self._round_trip()
+        return self._smembers(key)
+
+    async def scan_iter(self, match: str = "*"):
+        await self._round_trip()
+        keys = list(self.data) + list(self.sets)
+        self.scanned += len(keys)
+        for key in [k for k in keys if fnmatchcase(k, match)]:
+            yield key
+
+    async def publish(self, channel: str, message: str) -> int:
+        await self._round_trip()
+        self.published.append((channel, message))
+        return 0
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Wire the global ``redis_client`` to an in-memory Redis with a fresh L1."""
+    from app.core.local_cache import LocalCache
+    from app.core.redis import CacheConfig, redis_client
+
+    fake = FakeRedis()
+    monkeypatch.setattr(redis_client, "client", fake)
+    monkeypatch.setattr(redis_client, "_connected", True)
+    monkeypatch.setattr(redis_client, "_is_upstash_rest", False)
+    monkeypatch.setattr(redis_client, "local", LocalCache(CacheConfig.L1_POLICIES))
+    return fake
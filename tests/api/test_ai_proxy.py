@@ -0,0 +1,110 @@
+"""Tests for the AI service proxy.
+
+Covers:
+- One pooled keep-alive client shared across proxy requests
+- Streamed chat relayed chunk by chunk with the AI service's request shape
+- Upstream failures surfaced as an SSE error event
+"""
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import ai_proxy
+from app.api.ai_proxy import close_ai_http_client, get_ai_http_client, router
+from app.api.dependencies import get_current_salon, get_current_user
+
+
+def _sse(*events):
+    return b"".join(f"data: {json.dumps(event)}\n\n".encode() for event in events)
+
+
+class FakeAIService:
+    """httpx transport answering like the AI service."""
+
+    def __init__(self, stream_status=200):
+        self.requests = []
+        self.stream_status = stream_status
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path == "/health":
+            return httpx.Response(200, json={"status": "healthy"})
+        if request.url.path == "/api/v1/chat/stream":
+            if self.stream_status != 200:
+                return httpx.Response(self.stream_status, text="boom")
+            body = _sse(
+                {"type": "start", "session_id": "sess-1"},
+                {"type": "chunk", "content": "Your slot "},
+                {"type": "chunk", "content": "is booked."},
+                {"type": "done", "metadata": {"agent": "booking_agent"}},
+            )
+            return httpx.Response(200, content=body, headers={"content-type": "text/event-stream"})
+        return httpx.Response(404)
+
+
+@pytest.fixture
+def ai_service():
+    return FakeAIService()
+
+
+@pytest.fixture
+def client(ai_service):
+    get_ai_http_client(transport=httpx.MockTransport(ai_service))
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1/ai")
+    app.dependency_overrides[get_current_user] = lambda: {"uid": "user-1", "role": "owner"}
+    app.dependency_overrides[get_current_salon] = lambda: "salon-123"
+    with TestClient(app) as client:
+        yield client
+    ai_proxy._ai_http_client = None
+
+
+def _events(response):
+    return [json.loads(line[6:]) for line in response.text.split("\n\n") if line.startswith("data: ")]
+
+
+class TestPooledClient:
+    """Test the shared AI service client"""
+
+    def test_client_is_reused_across_requests(self, client, ai_service):
+        pooled = ai_proxy._ai_http_client
+
+        client.get("/api/v1/ai/health")
+        client.get("/api/v1/ai/health")
+
+        assert ai_proxy._ai_http_client is pooled
+        assert len(ai_service.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_close_releases_the_pool(self):
+        pooled = get_ai_http_client(transport=httpx.MockTransport(FakeAIService()))
+
+        await close_ai_http_client()
+
+        assert pooled.is_closed
+        assert ai_proxy._ai_http_client is None
+
+
+class TestStreamProxy:
+    """Test streamed chat relay"""
+
+    def test_relays_sse_events(self, client, ai_service):
+        response = client.post("/api/v1/ai/chat/stream", json={"message": "Book a haircut", "agent": "booking"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert [e["type"] for e in _events(response)] == ["start", "chunk", "chunk", "done"]
+        payload = json.loads(ai_service.requests[0].content)
+        assert payload["salon_id"] == "salon-123"
+        assert payload["agent_type"] == "booking"
+        assert payload["context"]["user_id"] == "user-1"
+
+    def test_upstream_error_becomes_error_event(self, client, ai_service):
+        ai_service.stream_status = 502
+
+        response = client.post("/api/v1/ai/chat/stream", json={"message": "Book a haircut"})
+
+        assert _events(response) == [{"type": "error", "message": "AI service returned 502"}]
@@ -0,0 +1,235 @@
+"""Tests for pre-aggregated daily analytics rollups.
+
+Covers:
+- Incremental rollup maintenance on booking/payment/customer writes
+- Status transitions and deletes moving counters
+- Range reads costing one document per day
+- Backfill and consistency checking
+"""
+import pytest
+from datetime import date, timedelta
+
+from app.models import AnalyticsRollupModel, BookingModel, PaymentModel, RollupSource
+from app.schemas.analytics import DailyMetricsRollup
+
+
+DAY = date(2024, 3, 10)
+
+
+def booking_data(index: int, status: str = "pending", day: date = DAY) -> dict:
+    return {
+        "salon_id": "salon_001",
+        "customer_id": f"customer_{index % 7}",
+        "customer_name": "Test Customer",
+        "customer_phone": "9876543210",
+        "service_id": f"service_{index % 3}",
+        "service_name": "Haircut",
+        "service_price": 500.0,
+        "service_duration": 30,
+        "staff_id": f"staff_{index % 2}",
+        "booking_date": day.isoformat(),
+        "start_time": f"{10 + index % 8:02d}:00:00",
+        "end_time": f"{10 + index % 8:02d}:30:00",
+        "status": status,
+    }
+
+
+def payment_data(amount: float, method: str = "upi", status: str = "completed") -> dict:
+    return {
+        "salon_id": "salon_001",
+        "booking_id": "booking_001",
+        "customer_id": "customer_001",
+        "customer_name": "Test Customer",
+        "subtotal": amount,
+        "total_amount": amount,
+        "payment_method": method,
+        "payment_status": status,
+        "payment_date": DAY.isoformat(),
+    }
+
+
+@pytest.fixture
+def db(fake_firestore, monkeypatch):
+    """Route every model (including the rollup model) to the fake client."""
+    monkeypatch.setattr("app.models.base.get_firestore_async", lambda: fake_firestore)
+    return fake_firestore
+
+
+@pytest.fixture
+def rollups(db):
+    return AnalyticsRollupModel()
+
+
+async def rollup_for(rollups, day=DAY) -> DailyMetricsRollup:
+    return (await rollups.get_range("salon_001", day, day))[0]
+
+
+@pytest.mark.asyncio
+class TestIncrementalRollups:
+    """Rollups follow raw document writes."""
+
+    async def test_booking_create_counts(self, rollups):
+        model = BookingModel()
+        for i in range(4):
+            await model.create(booking_data(i))
+
+        day = await rollup_for(rollups)
+        assert day.bookings_total == 4
+        assert day.bookings_by_status == {"pending": 4}
+        assert day.bookings_by_hour["10"] == 1
+        assert day.booked_minutes == 120
+        assert sum(day.service_counts.values()) == 4
+        assert day.staff_bookings == {"staff_0": 2, "staff_1": 2}
+
+    async def test_status_change_moves_counters_and_revenue(self, rollups):
+        model = BookingModel()
+        booking = await model.create(booking_data(0))
+
+        await model.update(booking.id, {"status": "completed"})
+
+        day = await rollup_for(rollups)
+        assert day.bookings_total == 1
+        assert day.bookings_by_status == {"pending": 0, "completed": 1}
+        assert day.staff_revenue == {"staff_0": 500.0}
+        assert day.service_revenue == {"service_0": 500.0}
+
+    async def test_batch_update_moves_counters(self, rollups):
+        model = BookingModel()
+        bookings = [await model.create(booking_data(i)) for i in range(3)]
+
+        await model.update_batch({b.id: {"status": "completed"} for b in bookings[:2]})
+
+        day = await rollup_for(rollups)
+        assert day.bookings_total == 3
+        assert day.bookings_by_status == {"pending": 1, "completed": 2}
+
+    async def test_reschedule_moves_booking_between_days(self, rollups):
+        model = BookingModel()
+        booking = await model.create(booking_data(0))
+        next_day = DAY + timedelta(days=1)
+
+        await model.update(booking.id, {"booking_date": next_day.isoformat()})
+
+        assert (await rollup_for(rollups)).bookings_total == 0
+        assert (await rollup_for(rollups, next_day)).bookings_total == 1
+
+    async def test_delete_removes_contribution(self, rollups):
+        model = BookingModel()
+        booking = await model.create(booking_data(0))
+
+        await model.delete(booking.id)
+
+        assert (await rollup_for(rollups)).bookings_total == 0
+
+    async def test_payments_only_count_when_completed(self, rollups):
+        model = PaymentModel()
+        await model.create(payment_data(300.0, "cash"))
+        await model.create(payment_data(200.0, "upi"))
+        pending = await model.create(payment_data(1000.0, "card", status="pending"))
+
+        day = await rollup_for(rollups)
+        assert day.revenue_total == 500.0
+        assert day.revenue_by_method == {"cash": 300.0, "upi": 200.0}
+
+        await model.update(pending.id, {"payment_status": "completed"})
+        day = await rollup_for(rollups)
+        assert day.revenue_total == 1500.0
+        assert day.payments_completed == 3
+
+    async def test_hook_failure_does_not_fail_write(self, db, monkeypatch):
+        async def boom(*args, **kwargs):
+            raise RuntimeError("rollup store down")
+
+        monkeypatch.setattr(AnalyticsRollupModel, "record_change", boom)
+        booking = await BookingModel().create(booking_data(0))
+        assert booking.id in db.data["bookings"]
+
+
+@pytest.mark.asyncio
+class TestRollupReads:
+    """Range reads and period totals."""
+
+    async def test_range_is_zero_filled_and_ordered(self, rollups):
+        await rollups.record_change(RollupSource.BOOKING, None, booking_data(0))
+
+        days = await rollups.get_range("salon_001", DAY - timedelta(days=2), DAY)
+
+        assert [d.date for d in days] == [
+            (DAY - timedelta(days=2)).isoformat(),
+            (DAY - timedelta(days=1)).isoformat(),
+            DAY.isoformat(),
+        ]
+        assert [d.bookings_total for d in days] == [0, 0, 1]
+
+    async def test_totals_combine_nested_counters(self, rollups):
+        for offset in range(3):
+            day = DAY - timedelta(days=offset)
+            await rollups.record_change(RollupSource.BOOKING, None, booking_data(0, "completed", day))
+
+        totals, days = await rollups.get_totals("salon_001", DAY - timedelta(days=6), DAY)
+
+        assert len(days) == 7
+        assert totals.bookings_total == 3
+        assert totals.staff_services == {"staff_0": {"service_0": 3}}
+        assert totals.staff_revenue == {"staff_0": 1500.0}
+
+
+@pytest.mark.asyncio
+class TestBackfillAndConsistency:
+    """Backfill rebuilds rollups; the checker detects and repairs drift."""
+
+    async def test_backfill_matches_incremental(self, db, rollups):
+        model = BookingModel()
+        for i in range(10):
+            booking = await model.create(booking_data(i))
+            if i % 3 == 0:
+                await model.update(booking.id, {"status": "completed"})
+        incremental = (await rollup_for(rollups)).model_dump()
+
+        written = await rollups.backfill("salon_001", DAY - timedelta(days=1), DAY)
+
+        rebuilt = (await rollup_for(rollups)).model_dump()
+        assert written == 2
+        # Backfill drops zeroed counters that increments leave behind
+        assert rebuilt["bookings_by_status"] == {
+            k: v for k, v in incremental["bookings_by_status"].items() if v
+        }
+        assert rebuilt["staff_revenue"] == incremental["staff_revenue"]
+        assert rebuilt["bookings_total"] == incremental["bookings_total"]
+
+    async def test_consistency_detects_and_repairs_drift(self, db, rollups):
+        model = BookingModel()
+        for i in range(5):
+            await model.create(booking_data(i))
+
+        report = await rollups.check_consistency("salon_001", DAY, DAY)
+        assert report.is_consistent
+
+        # Simulate a lost increment
+        db.data["analytics_daily"][f"salon_001_{DAY.isoformat()}"]["bookings_total"] = 3
+
+        report = await rollups.check_consistency("salon_001", DAY, DAY, repair=True)
+        assert not report.is_consistent
+        assert report.drifted_days[DAY.isoformat()]["bookings_total"] == [3, 5]
+        assert report.repaired
+
+        assert (await rollups.check_consistency("salon_001", DAY, DAY)).is_consistent
+
+
+@pytest.mark.asyncio
+@pytest.mark.slow
+class TestRollupReadBenchmark:
+    """Range reads cost O(days) regardless of history size."""
+
+    @pytest.mark.parametrize("history", [10, 1000])
+    async def test_week_read_cost_independent_of_history(self, db, rollups, history):
+        for i in range(history):
+            day = DAY - timedelta(days=i % 30)
+            await rollups.record_change(RollupSource.BOOKING, None, booking_data(i, day=day))
+
+        before = db.reads
+        totals, days = await rollups.get_totals("salon_001", DAY - timedelta(days=6), DAY)
+
+        assert db.reads - before == 7
+        assert len(days) == 7
+        assert totals.bookings_total > 0
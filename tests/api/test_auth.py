@@ -35,6 +35,7 @@ from app.core.auth import (
     RateLimitType,
     check_rate_limit,
     increment_rate_limit,
+    apply_rate_limit,
     SessionManager,
 )
 from app.schemas.base import StaffRole
@@ -383,6 +384,45 @@ class TestRateLimiting:
         # Should call set when key doesn't exist
         mock_redis.set.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_apply_rate_limit_blocks_after_max_attempts(self):
+        """Test apply_rate_limit raises 429 once the window is used up."""
+        from app.core import rate_limiter
+        from app.core.rate_limiter import RateLimiter
+
+        with patch.object(rate_limiter, "_rate_limiter_instance", RateLimiter()):
+            for _ in range(2):
+                assert await apply_rate_limit("user@example.com", RateLimitType.LOGIN, max_attempts=3)
+
+            with pytest.raises(HTTPException) as exc_info:
+                await apply_rate_limit("user@example.com", RateLimitType.LOGIN, max_attempts=3)
+
+            # Other identifiers keep their own budget
+            assert await apply_rate_limit("other@example.com", RateLimitType.LOGIN, max_attempts=3)
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.detail["code"] == "rate_limit_exceeded"
+        assert 0 < exc_info.value.detail["retry_after"] <= 450
+
+    @pytest.mark.asyncio
+    async def test_apply_rate_limit_caps_attempts_in_any_window(self):
+        """Test no 15 minute window admits more than max_attempts."""
+        from app.core import rate_limiter
+        from app.core.rate_limiter import RateLimiter
+
+        now = [1_700_000_000.0]
+        allowed = []
+        with patch.object(rate_limiter, "_rate_limiter_instance", RateLimiter(clock=lambda: now[0])):
+            for i in range(360):  # one attempt every 10 s for an hour
+                now[0] = 1_700_000_000.0 + i * 10
+                try:
+                    await apply_rate_limit("user@example.com", RateLimitType.LOGIN)
+                    allowed.append(i)
+                except HTTPException:
+                    pass
+
+        assert max(sum(first <= i < first + 90 for i in allowed) for first in allowed) == 5
+
 
 # ============================================================================
 # Session Management Tests
@@ -0,0 +1,499 @@
+"""Tests for the booking availability engine.
+
+Covers:
+- Interval index overlap queries and interval set helpers
+- Slot search across shifts, bookings, skills and resource capacity
+- BookingModel availability methods and invalidation on booking writes
+- Resource occupancy grids and free runs
+- Slot-search latency at 50 staff x 200 bookings per day
+- Grid build cost independent of resources x bookings
+"""
+import asyncio
+import random
+import time as time_module
+from datetime import date, datetime, time
+
+import pytest
+
+from app.models import BookingModel
+from app.services.availability import (
+    AvailabilityEngine,
+    DaySchedule,
+    IntervalIndex,
+    OccupancyGrid,
+    availability_engine,
+    saturated,
+    subtract,
+    to_minutes,
+)
+
+
+DAY = date(2024, 3, 11)  # Monday
+
+
+def hm(value: str) -> int:
+    return to_minutes(value)
+
+
+def staff_doc(*service_ids: str) -> dict:
+    return {
+        "salon_id": "salon_001",
+        "is_active": True,
+        "skills": {"skills": [{"service_id": s} for s in service_ids]},
+    }
+
+
+def shift_doc(staff_id: str, start: str, end: str) -> dict:
+    return {
+        "salon_id": "salon_001",
+        "staff_id": staff_id,
+        "shift_date": DAY.isoformat(),
+        "start_time": start,
+        "end_time": end,
+        "status": "scheduled",
+    }
+
+
+def booking_doc(staff_id, start, end, status="confirmed", resource_id=None) -> dict:
+    return {
+        "salon_id": "salon_001",
+        "customer_id": "customer_001",
+        "customer_name": "Test Customer",
+        "customer_phone": "9876543210",
+        "service_id": "service_cut",
+        "service_name": "Haircut",
+        "service_price": 500.0,
+        "service_duration": hm(end) - hm(start),
+        "staff_id": staff_id,
+        "resource_id": resource_id,
+        "booking_date": DAY.isoformat(),
+        "start_time": start,
+        "end_time": end,
+        "status": status,
+    }
+
+
+def build(staff=None, shifts=(), bookings=(), resources=(), salon=None) -> DaySchedule:
+    return DaySchedule.build(
+        salon_id="salon_001",
+        day=DAY,
+        salon=salon,
+        staff=list((staff or {}).items()),
+        shifts=list(shifts),
+        bookings=[(f"booking_{i}", b) for i, b in enumerate(bookings)],
+        resources=list(resources),
+    )
+
+
+class TestIntervalHelpers:
+    """Test the interval index and set operations."""
+
+    def test_overlapping_finds_long_earlier_interval(self):
+        index = IntervalIndex([(0, 600, "long"), (100, 130, "a"), (400, 430, "b")])
+
+        refs = {ref for _, _, ref in index.overlapping(410, 420)}
+
+        assert refs == {"long", "b"}
+
+    def test_touching_intervals_do_not_overlap(self):
+        index = IntervalIndex([(60, 90, "a")])
+        assert index.overlapping(90, 120) == []
+        assert index.overlapping(30, 60) == []
+
+    def test_exclude_ignores_own_booking(self):
+        index = IntervalIndex([(60, 90, "a")])
+        assert index.overlapping(60, 90, exclude="a") == []
+
+    def test_subtract(self):
+        assert subtract([(0, 100)], [(10, 20), (15, 30), (90, 120)]) == [(0, 10), (30, 90)]
+
+    def test_saturated_respects_capacity(self):
+        spans = [(0, 60), (30, 90), (120, 150)]
+        assert saturated(spans, 1) == [(0, 90), (120, 150)]
+        assert saturated(spans, 2) == [(30, 60)]
+
+
+class TestDaySchedule:
+    """Test slot search and conflict checks on a built schedule."""
+
+    def test_slots_skip_bookings_and_respect_shift(self):
+        schedule = build(
+            staff={"staff_a": staff_doc("service_cut")},
+            shifts=[shift_doc("staff_a", "10:00:00", "12:00:00")],
+            bookings=[booking_doc("staff_a", "10:30:00", "11:00:00")],
+        )
+
+        slots = schedule.find_slots(30, service_id="service_cut", step_minutes=30)
+
+        assert [s.start_time for s in slots] == [time(10, 0), time(11, 0), time(11, 30)]
+
+    def test_cancelled_bookings_free_their_time(self):
+        schedule = build(
+            staff={"staff_a": staff_doc("service_cut")},
+            shifts=[shift_doc("staff_a", "10:00:00", "11:00:00")],
+            bookings=[booking_doc("staff_a", "10:00:00", "11:00:00", status="cancelled")],
+        )
+        assert len(schedule.find_slots(60, service_id="service_cut")) == 1
+
+    def test_only_skilled_staff_are_offered(self):
+        schedule = build(
+            staff={
+                "staff_a": staff_doc("service_cut"),
+                "staff_b": staff_doc("service_color"),
+            },
+            shifts=[
+                shift_doc("staff_a", "10:00:00", "11:00:00"),
+                shift_doc("staff_b", "10:00:00", "11:00:00"),
+            ],
+        )
+
+        slots = schedule.find_slots(60, service_id="service_cut")
+
+        assert [s.staff_ids for s in slots] == [["staff_a"]]
+
+    def test_business_hours_used_without_shifts(self):
+        salon = {
+            "operating_hours": {
+                "monday": {
+                    "open_time": "10:00:00",
+                    "close_time": "14:00:00",
+                    "break_start": "12:00:00",
+                    "break_end": "13:00:00",
+                }
+            }
+        }
+        schedule = build(staff={"staff_a": staff_doc()}, salon=salon)
+
+        slots = schedule.find_slots(60, step_minutes=60)
+
+        assert [s.start_time for s in slots] == [time(10, 0), time(11, 0), time(13, 0)]
+
+    def test_resource_capacity_limits_slots(self):
+        resources = [(
+            "room_1",
+            {"resource_type": "room_spa", "capacity": {"max_concurrent_services": 1}},
+        )]
+        schedule = build(
+            staff={"staff_a": staff_doc(), "staff_b": staff_doc()},
+            shifts=[
+                shift_doc("staff_a", "10:00:00", "12:00:00"),
+                shift_doc("staff_b", "10:00:00", "12:00:00"),
+            ],
+            bookings=[booking_doc("staff_a", "10:00:00", "11:00:00", resource_id="room_1")],
+            resources=resources,
+        )
+
+        spa = schedule.find_slots(60, resource_type="room_spa", step_minutes=60)
+        cut = schedule.find_slots(60, resource_type="chair_mens", step_minutes=60)
+
+        # The only spa room is taken until 11:00; chairs are not modelled
+        assert [(s.start_time, s.staff_ids) for s in spa] == [(time(11, 0), ["staff_a", "staff_b"])]
+        assert [s.start_time for s in cut] == [time(10, 0), time(11, 0)]
+
+    def test_booking_cannot_straddle_two_resources(self):
+        chair = {"resource_type": "chair_mens", "capacity": {"max_concurrent_services": 1}}
+        schedule = build(
+            staff={"staff_a": staff_doc(), "staff_b": staff_doc(), "staff_c": staff_doc()},
+            shifts=[
+                shift_doc("staff_a", "09:00:00", "12:00:00"),
+                shift_doc("staff_b", "09:00:00", "12:00:00"),
+                shift_doc("staff_c", "09:00:00", "12:00:00"),
+            ],
+            bookings=[
+                booking_doc("staff_a", "10:00:00", "11:00:00", resource_id="chair_a"),
+                booking_doc("staff_b", "09:00:00", "10:00:00", resource_id="chair_b"),
+            ],
+            resources=[("chair_a", chair), ("chair_b", chair)],
+        )
+
+        slots = schedule.find_slots(60, resource_type="chair_mens", staff_id="staff_c", step_minutes=15)
+
+        # Each chair is free for an hour only before 10:00 (A) or from 10:00 (B)
+        assert not schedule.is_available(hm("09:30"), hm("10:30"), resource_type="chair_mens")
+        assert schedule.is_available(hm("10:00"), hm("11:00"), resource_type="chair_mens")
+        assert [s.start for s in slots] == [hm("09:00")] + list(range(hm("10:00"), hm("11:01"), 15))
+
+    def test_is_available_any_staff(self):
+        schedule = build(
+            staff={"staff_a": staff_doc(), "staff_b": staff_doc()},
+            shifts=[
+                shift_doc("staff_a", "10:00:00", "12:00:00"),
+                shift_doc("staff_b", "10:00:00", "12:00:00"),
+            ],
+            bookings=[booking_doc("staff_a", "10:00:00", "11:00:00")],
+        )
+
+        assert not schedule.is_available(hm("10:00"), hm("11:00"), staff_id="staff_a")
+        assert schedule.is_available(hm("10:00"), hm("11:00"))
+        assert schedule.is_available(
+            hm("10:00"), hm("11:00"), staff_id="staff_a", exclude_booking_id="booking_0"
+        )
+        assert not schedule.is_available(hm("11:30"), hm("12:30"))
+
+
+class TestOccupancyGrid:
+    """Test per-resource slot bitmaps."""
+
+    def _schedule(self, salon=None):
+        return build(
+            bookings=[
+                booking_doc("staff_a", "10:00:00", "10:45:00", resource_id="chair_1"),
+                booking_doc("staff_b", "10:30:00", "11:00:00", resource_id="chair_2"),
+                booking_doc("staff_c", "10:30:00", "11:00:00", resource_id="chair_2"),
+            ],
+            salon=salon,
+        )
+
+    def test_bookings_mark_overlapping_slots(self):
+        grid = OccupancyGrid.from_schedule(
+            self._schedule(), [("chair_1", 1, False)], slot_minutes=30
+        )
+
+        mask = grid.busy_mask("chair_1")
+
+        # 09:00-21:00 default hours; 10:00-10:45 covers the 10:00 and 10:30 slots
+        assert grid.slot_count == 24
+        assert list(mask[:4]) == [0, 0, 1, 1]
+        assert grid.available_count("chair_1") == 22
+        assert grid.free_runs("chair_1") == [(hm("09:00"), hm("10:00")), (hm("11:00"), hm("21:00"))]
+
+    def test_runs_cover_the_row(self):
+        grid = OccupancyGrid.from_schedule(
+            self._schedule(), [("chair_1", 1, False)], slot_minutes=30
+        )
+
+        runs = grid.runs("chair_1")
+
+        assert runs == [(0, 2, False), (2, 4, True), (4, 24, False)]
+
+    def test_capacity_allows_concurrent_bookings(self):
+        schedule = self._schedule()
+        single = OccupancyGrid.from_schedule(schedule, [("chair_2", 1, False)], 30)
+        double = OccupancyGrid.from_schedule(schedule, [("chair_2", 2, False)], 30)
+        triple = OccupancyGrid.from_schedule(schedule, [("chair_2", 3, False)], 30)
+
+        assert single.available_count("chair_2") == 23
+        assert double.available_count("chair_2") == 23
+        assert triple.available_count("chair_2") == 24
+
+    def test_granularity_and_business_hours(self):
+        salon = {
+            "operating_hours": {
+                "monday": {
+                    "open_time": "10:00:00",
+                    "close_time": "13:00:00",
+                    "break_start": "12:00:00",
+                    "break_end": "12:30:00",
+                }
+            }
+        }
+        grid = OccupancyGrid.from_schedule(
+            self._schedule(salon), [("chair_1", 1, False)], slot_minutes=15
+        )
+
+        assert grid.slot_count == 12
+        assert grid.slot_bounds(0) == (hm("10:00"), hm("10:15"))
+        assert grid.free_runs("chair_1") == [(hm("10:45"), hm("12:00")), (hm("12:30"), hm("13:00"))]
+
+    def test_blocked_resource_has_no_free_slots(self):
+        grid = OccupancyGrid.from_schedule(self._schedule(), [("chair_9", 1, True)], 30)
+        assert grid.available_count("chair_9") == 0
+        assert grid.free_runs("chair_9") == []
+
+    def test_closed_day_has_no_slots(self):
+        salon = {"operating_hours": {"monday": {"is_closed": True}}}
+        grid = OccupancyGrid.from_schedule(self._schedule(salon), [("chair_1", 1, False)], 30)
+        assert grid.slot_count == 0
+
+
+@pytest.mark.asyncio
+class TestBookingModelAvailability:
+    """Test BookingModel availability methods against the fake Firestore."""
+
+    @pytest.fixture
+    def db(self, fake_firestore, monkeypatch):
+        monkeypatch.setattr("app.models.base.get_firestore_async", lambda: fake_firestore)
+        fake_firestore.seed("staff", {"staff_a": staff_doc("service_cut")})
+        fake_firestore.seed("shifts", {"shift_a": shift_doc("staff_a", "10:00:00", "12:00:00")})
+        availability_engine.clear()
+        yield fake_firestore
+        availability_engine.clear()
+
+    async def test_slots_are_cached_until_booking_write(self, db):
+        model = BookingModel()
+
+        first = await model.get_available_slots("salon_001", DAY, 60, service_id="service_cut")
+        reads = db.reads
+        cached = await model.get_available_slots("salon_001", DAY, 60, service_id="service_cut")
+
+        assert db.reads == reads
+        assert [s.start_time for s in first] == [s.start_time for s in cached]
+        assert first[0].staff_ids == ["staff_a"]
+
+        await model.create(booking_doc("staff_a", "10:00:00", "11:00:00"))
+        after = await model.get_available_slots("salon_001", DAY, 60, service_id="service_cut")
+
+        assert db.reads > reads
+        assert [s.start_time for s in after] == [time(11, 0)]
+
+    async def test_check_availability_accepts_datetime(self, db):
+        model = BookingModel()
+        await model.create(booking_doc("staff_a", "10:00:00", "11:00:00"))
+
+        busy = await model.check_availability(
+            "salon_001", "staff_a", datetime.combine(DAY, time(10, 30)), duration_minutes=30
+        )
+        free = await model.check_availability(
+            "salon_001", "staff_a", time(11, 0), booking_date=DAY, end_time=time(12, 0)
+        )
+
+        assert busy is False
+        assert free is True
+
+    async def test_concurrent_loads_share_one_fetch(self, db):
+        engine = AvailabilityEngine()
+
+        schedules = await asyncio.gather(*[engine.get_schedule("salon_001", DAY) for _ in range(5)])
+
+        assert all(s is schedules[0] for s in schedules)
+
+    async def test_cancelled_leader_releases_followers(self, db, monkeypatch):
+        engine = AvailabilityEngine()
+        started = asyncio.Event()
+
+        async def slow_load(salon_id, day):
+            started.set()
+            await asyncio.sleep(60)
+
+        monkeypatch.setattr(engine, "_load", slow_load)
+        leader = asyncio.create_task(engine.get_schedule("salon_001", DAY))
+        await started.wait()
+        follower = asyncio.create_task(engine.get_schedule("salon_001", DAY))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(follower, timeout=1)
+
+
+@pytest.mark.slow
+class TestSlotSearchBenchmark:
+    """Slot search latency at 50 staff x 200 bookings per day."""
+
+    STAFF = 50
+    BOOKINGS = 200
+
+    def _documents(self):
+        rng = random.Random(7)
+        staff = {f"staff_{i:02d}": staff_doc("service_cut") for i in range(self.STAFF)}
+        shifts = [shift_doc(s, "09:00:00", "21:00:00") for s in staff]
+        bookings = []
+        for _ in range(self.BOOKINGS):
+            start = rng.randrange(9 * 4, 20 * 4) * 15
+            end = start + 45
+            bookings.append(booking_doc(
+                rng.choice(list(staff)),
+                f"{start // 60:02d}:{start % 60:02d}:00",
+                f"{end // 60:02d}:{end % 60:02d}:00",
+            ))
+        return staff, shifts, bookings
+
+    @staticmethod
+    def _naive_slots(shifts, bookings, duration: int, step: int) -> dict:
+        """The previous approach: scan every booking for every candidate."""
+        found = {}
+        for shift in shifts:
+            staff_id = shift["staff_id"]
+            for start in range(hm(shift["start_time"]), hm(shift["end_time"]) - duration + 1, step):
+                end = start + duration
+                clash = any(
+                    b["staff_id"] == staff_id
+                    and start < hm(b["end_time"])
+                    and end > hm(b["start_time"])
+                    for b in bookings
+                )
+                if not clash:
+                    found.setdefault(start, []).append(staff_id)
+        return found
+
+    def test_slot_search_latency(self):
+        staff, shifts, bookings = self._documents()
+        runs = 10
+
+        started = time_module.perf_counter()
+        for _ in range(runs):
+            # Includes building the index from raw documents
+            slots = build(staff=staff, shifts=shifts, bookings=bookings).find_slots(
+                60, service_id="service_cut"
+            )
+        engine_ms = (time_module.perf_counter() - started) * 1000 / runs
+
+        started = time_module.perf_counter()
+        naive = self._naive_slots(shifts, bookings, 60, 15)
+        naive_ms = (time_module.perf_counter() - started) * 1000
+
+        print(f"\nslot search {self.STAFF} staff x {self.BOOKINGS} bookings: "
+              f"engine={engine_ms:.2f}ms naive={naive_ms:.2f}ms")
+
+        assert {s.start: sorted(s.staff_ids) for s in slots} == {
+            k: sorted(v) for k, v in naive.items()
+        }
+        assert engine_ms < naive_ms
+        assert engine_ms < 50
+
+
+@pytest.mark.slow
+class TestOccupancyGridBenchmark:
+    """Grid build cost grows with resources + bookings, not their product."""
+
+    @staticmethod
+    def _schedule(resources: int, bookings: int) -> DaySchedule:
+        rng = random.Random(11)
+        docs = []
+        for _ in range(bookings):
+            start = rng.randrange(9 * 4, 20 * 4) * 15
+            end = start + 30
+            docs.append(booking_doc(
+                "staff_a",
+                f"{start // 60:02d}:{start % 60:02d}:00",
+                f"{end // 60:02d}:{end % 60:02d}:00",
+                resource_id=f"resource_{rng.randrange(resources)}",
+            ))
+        return build(bookings=docs)
+
+    @staticmethod
+    def _nested_loop(schedule: DaySchedule, resource_ids) -> int:
+        """The previous approach: every slot against every booking of the resource."""
+        free = 0
+        for resource_id in resource_ids:
+            index = schedule.resource_bookings.get(resource_id)
+            spans = index.spans() if index else []
+            for slot in range(9 * 60, 21 * 60, 30):
+                free += all(not (slot < end and slot + 30 > start) for start, end in spans)
+        return free
+
+    def test_grid_build_scales_linearly(self):
+        timings = {}
+        for resources, bookings in [(10, 100), (100, 1000)]:
+            schedule = self._schedule(resources, bookings)
+            ids = [(f"resource_{i}", 1, False) for i in range(resources)]
+            best = float("inf")
+            for _ in range(5):
+                started = time_module.perf_counter()
+                grid = OccupancyGrid.from_schedule(schedule, ids, 30)
+                free = sum(grid.available_count(r) for r, _, _ in ids)
+                best = min(best, (time_module.perf_counter() - started) * 1000)
+            timings[resources] = best
+            assert free == self._nested_loop(schedule, [r for r, _, _ in ids])
+
+        schedule = self._schedule(100, 1000)
+        started = time_module.perf_counter()
+        self._nested_loop(schedule, [f"resource_{i}" for i in range(100)])
+        nested_ms = (time_module.perf_counter() - started) * 1000
+
+        print(f"\ngrid build: 10x100={timings[10]:.2f}ms 100x1000={timings[100]:.2f}ms "
+              f"nested loop 100x1000={nested_ms:.2f}ms")
+
+        # 10x the resources and bookings is 100x the nested-loop work
+        assert timings[100] < timings[10] * 40
+        assert timings[100] < nested_ms
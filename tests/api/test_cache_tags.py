@@ -0,0 +1,127 @@
+"""Tests for tag-based cache invalidation.
+
+Covers:
+- Keys registered under tags on write
+- invalidate_tags deleting tagged keys without walking the keyspace
+- Salon, service catalog and FirestoreBase invalidation paths
+"""
+import json
+
+import pytest
+
+from app.api.services import catalog_cache_tag, invalidate_service_cache, service_cache_key
+from app.core.redis import redis_client
+from app.models.base import FirestoreBase
+from app.schemas.base import FirestoreModel
+
+
+class Service(FirestoreModel):
+    id: str
+    salon_id: str
+    name: str
+
+
+class ServiceModel(FirestoreBase[Service, Service, Service]):
+    collection_name = "services"
+    model = Service
+
+
+@pytest.mark.asyncio
+class TestTagInvalidation:
+    """Test tag registration and invalidation in RedisClient."""
+
+    async def test_set_registers_key_under_tags(self, fake_redis):
+        await redis_client.set("catalog:s1:1", {"items": []}, tags=["catalog:s1"])
+
+        assert fake_redis.sets["tag:catalog:s1"] == {"catalog:s1:1"}
+
+    async def test_invalidate_tags_deletes_members_and_keys(self, fake_redis):
+        await redis_client.set_multi(
+            {"catalog:s1:1": {"items": []}, "catalog:s1:2": {"items": []}},
+            tags=["catalog:s1"],
+        )
+        await redis_client.set("catalog:s2:1", {"items": []}, tags=["catalog:s2"])
+        await redis_client.set("service:svc1", {"name": "Cut"})
+
+        deleted = await redis_client.invalidate_tags(["catalog:s1"], keys=["service:svc1"])
+
+        assert deleted == 4
+        assert set(fake_redis.data) == {"catalog:s2:1"}
+        assert "tag:catalog:s1" not in fake_redis.sets
+        assert redis_client.local.stats()["catalog"]["size"] == 1
+        payload = json.loads(fake_redis.published[-1][1])
+        assert set(payload["keys"]) == {"service:svc1", "catalog:s1:1", "catalog:s1:2"}
+        assert payload["patterns"] == []
+
+    async def test_invalidate_unknown_tag(self, fake_redis):
+        assert await redis_client.invalidate_tags(["catalog:none"]) == 0
+
+    async def test_invalidate_salon_cache(self, fake_redis):
+        await redis_client.set("salon:s1", {"name": "Glow"}, tags=["salon:s1"])
+        await redis_client.set("salon:s1:layout", {"mens_chairs": 2}, tags=["salon:s1"])
+        await redis_client.set("catalog:s1:categories", [], tags=["catalog:s1"])
+        await redis_client.set("salon:s2", {"name": "Other"}, tags=["salon:s2"])
+
+        await redis_client.invalidate_salon_cache("s1")
+
+        assert set(fake_redis.data) == {"salon:s2"}
+        assert fake_redis.scanned == 0
+
+    async def test_invalidate_service_cache(self, fake_redis):
+        await redis_client.set(service_cache_key("svc1"), {"name": "Cut"}, tags=["service:s1"])
+        await redis_client.set("catalog:s1:1", {"items": []}, tags=[catalog_cache_tag("s1")])
+
+        await invalidate_service_cache("s1", "svc1")
+
+        assert fake_redis.data == {}
+        assert fake_redis.scanned == 0
+
+    async def test_firestore_write_invalidates_list_tag(self, fake_redis, fake_firestore):
+        fake_firestore.seed("services", {"svc1": {"salon_id": "s1", "name": "Cut"}})
+        model = ServiceModel()
+        model._async_client = fake_firestore
+        list_key = model._get_list_cache_key("s1", category="hair")
+        await redis_client.set(list_key, [], tags=[model._get_list_cache_tag("s1")])
+        await model.get("svc1")
+
+        await model.update("svc1", {"name": "Trim"})
+
+        assert list_key not in fake_redis.data
+        assert fake_redis.scanned == 0
+        assert (await model.get("svc1")).name == "Trim"
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestTagInvalidationScaling:
+    """Invalidation cost must not grow with the total keyspace."""
+
+    async def test_cost_independent_of_keyspace(self, fake_redis):
+        results = {}
+        for tenants in (10, 1000):
+            fake_redis.data.clear()
+            fake_redis.sets.clear()
+            for salon in range(tenants):
+                await redis_client.set_multi(
+                    {f"catalog:s{salon}:{page}": {"items": []} for page in range(10)},
+                    tags=[f"catalog:s{salon}"],
+                )
+
+            commands, scanned = fake_redis.commands, fake_redis.scanned
+            await redis_client.invalidate_tags(["catalog:s0"])
+            tag_cost = (fake_redis.commands - commands, fake_redis.scanned - scanned)
+
+            scanned = fake_redis.scanned
+            await redis_client.delete_pattern("catalog:s1:*")
+            pattern_scanned = fake_redis.scanned - scanned
+
+            results[tenants] = (tag_cost, pattern_scanned)
+            print(
+                f"\n{tenants} tenants ({len(fake_redis.data)} keys): tag invalidation "
+                f"{tag_cost[0]} commands / {tag_cost[1]} keys scanned; "
+                f"pattern delete scanned {pattern_scanned} keys"
+            )
+
+        assert results[10][0] == results[1000][0]
+        assert results[1000][0][1] == 0
+        assert results[1000][1] > results[10][1] * 50
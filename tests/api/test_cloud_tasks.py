@@ -0,0 +1,426 @@
+"""Tests for Cloud Tasks enqueueing and periodic agent scheduling.
+
+Covers:
+- Async task creation over the REST API (shape, auth, dedupe, retries)
+- Bounded-concurrency batch enqueue with per-task failures
+- Bulk due-agent query: one batched read for many salons
+- Tasks/sec for 1,000 salons x 5 agents against a local queue stand-in,
+  sequential blocking path vs bulk read + batch enqueue
+"""
+import asyncio
+import base64
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.models.autonomous import AgentStateModel, AgentStatus
+from app.tasks import cloud_tasks as cloud_tasks_module
+from app.tasks.cloud_tasks import CloudTasksClient, TaskSpec
+from app.tasks.scheduler import AgentScheduler
+
+QUEUE_PATH = f"projects/{settings.GCP_PROJECT_ID}/locations/{settings.GCP_REGION}/queues"
+
+
+class FakeQueue:
+    """httpx handler answering like the Cloud Tasks ``tasks.create`` method."""
+
+    def __init__(self, latency=0.0, fail=(), status=()):
+        self.tasks = {}
+        self.requests = []
+        self.latency = latency
+        self.fail = set(fail)  # task ids answered with 400
+        self.status = list(status)  # statuses answered before succeeding
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if self.status:
+            return httpx.Response(self.status.pop(0), json={"error": {"code": 503}})
+        task = json.loads(request.content)["task"]
+        if task["name"].rsplit("/", 1)[1] in self.fail:
+            return httpx.Response(400, json={"error": {"code": 400, "status": "INVALID_ARGUMENT"}})
+        if task["name"] in self.tasks:
+            return httpx.Response(409, json={"error": {"code": 409, "status": "ALREADY_EXISTS"}})
+        self.tasks[task["name"]] = task
+        return httpx.Response(200, json=task)
+
+
+@pytest.fixture
+def fake_queue():
+    yield FakeQueue()
+    cloud_tasks_module._tasks_http_client = None
+
+
+def _client(queue, **kwargs):
+    http = httpx.AsyncClient(base_url="https://cloudtasks.googleapis.com", transport=httpx.MockTransport(queue))
+    return CloudTasksClient(http_client=http, authenticate=False, **kwargs)
+
+
+def _state(salon_id, agent_name, **fields):
+    return {
+        "salon_id": salon_id,
+        "agent_name": agent_name,
+        "status": AgentStatus.ACTIVE.value,
+        "last_execution": None,
+        "circuit_breaker": {"state": "closed", "auto_recovery": True},
+        **fields,
+    }
+
+
+def _ago(minutes):
+    return (datetime.utcnow() - timedelta(minutes=minutes)).isoformat()
+
+
+@pytest.mark.asyncio
+class TestCloudTasksClient:
+    """Test async task creation"""
+
+    async def test_create_task(self, fake_queue):
+        name = await _client(fake_queue).create_task(
+            queue_name="notifications",
+            task_name="notify-o1",
+            handler_path="/internal/tasks/send-notification",
+            payload={"salon_id": "s1", "outreach_id": "o1"},
+            delay_seconds=60,
+        )
+
+        assert name == f"{QUEUE_PATH}/notifications/tasks/notify-o1"
+        request = fake_queue.requests[0]
+        assert request.url.path == f"/v2/{QUEUE_PATH}/notifications/tasks"
+        assert "authorization" not in request.headers
+        task = fake_queue.tasks[name]
+        assert task["httpRequest"]["url"] == f"{settings.API_BASE_URL}/internal/tasks/send-notification"
+        assert task["httpRequest"]["headers"]["X-CloudTasks-Queue"] == "notifications"
+        assert json.loads(base64.b64decode(task["httpRequest"]["body"])) == {"salon_id": "s1", "outreach_id": "o1"}
+        scheduled = datetime.fromisoformat(task["scheduleTime"].rstrip("Z"))
+        assert timedelta(seconds=55) < scheduled - datetime.utcnow() <= timedelta(seconds=60)
+
+    async def test_existing_task_name_is_not_an_error(self, fake_queue):
+        client = _client(fake_queue)
+        first = await client.create_notification_task("s1", "o1", "whatsapp")
+        second = await client.create_notification_task("s1", "o1", "whatsapp")
+
+        assert first == second
+        assert len(fake_queue.tasks) == 1
+
+    async def test_retries_transient_errors(self, fake_queue, monkeypatch):
+        monkeypatch.setattr(cloud_tasks_module.asyncio, "sleep", _no_sleep)
+        fake_queue.status = [503, 429]
+
+        name = await _client(fake_queue).create_notification_task("s1", "o1", "sms")
+
+        assert name.endswith("/tasks/notify-o1")
+        assert len(fake_queue.requests) == 3
+
+    async def test_gives_up_after_max_retries(self, fake_queue, monkeypatch):
+        monkeypatch.setattr(cloud_tasks_module.asyncio, "sleep", _no_sleep)
+        fake_queue.status = [503] * 10
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await _client(fake_queue).create_notification_task("s1", "o1", "sms")
+        assert len(fake_queue.requests) == settings.CLOUD_TASKS_MAX_RETRIES + 1
+
+    async def test_client_errors_are_not_retried(self, fake_queue):
+        fake_queue.fail = {"notify-bad"}
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await _client(fake_queue).create_notification_task("s1", "bad", "sms")
+        assert len(fake_queue.requests) == 1
+
+    async def test_sends_refreshed_token(self, fake_queue):
+        class Credentials:
+            valid = False
+            token = None
+            refreshes = 0
+
+            def refresh(self, request):
+                self.refreshes += 1
+                self.token = "token-1"
+                self.valid = True
+
+        client = _client(fake_queue)
+        client.authenticate = True
+        client._credentials = credentials = Credentials()
+
+        await client.create_notification_task("s1", "o1", "sms")
+        await client.create_notification_task("s1", "o2", "sms")
+
+        assert credentials.refreshes == 1
+        assert fake_queue.requests[1].headers["authorization"] == "Bearer token-1"
+
+    async def test_shared_client_uses_emulator_host(self, fake_queue, monkeypatch):
+        monkeypatch.setattr(settings, "CLOUD_TASKS_EMULATOR_HOST", "localhost:8123")
+        cloud_tasks_module._tasks_http_client = None
+
+        client = CloudTasksClient()
+
+        assert client.authenticate is False
+        assert str(client.http_client.base_url) == "http://localhost:8123"
+        await cloud_tasks_module.close_cloud_tasks_http_client()
+
+
+async def _no_sleep(seconds):
+    pass
+
+
+@pytest.mark.asyncio
+class TestBatchEnqueue:
+    """Test bounded-concurrency batch creation"""
+
+    async def test_concurrency_is_bounded(self, fake_queue):
+        fake_queue.latency = 0.005
+        specs = [TaskSpec("analytics", f"t{i}", "/internal/tasks/analytics", {"i": i}) for i in range(40)]
+
+        names = await _client(fake_queue).create_tasks(specs, concurrency=8)
+
+        assert names == [f"{QUEUE_PATH}/analytics/tasks/t{i}" for i in range(40)]
+        assert 1 < fake_queue.max_in_flight <= 8
+
+    async def test_failures_do_not_stop_the_batch(self, fake_queue):
+        fake_queue.fail = {"t1", "t3"}
+        specs = [TaskSpec("analytics", f"t{i}", "/internal/tasks/analytics", {}) for i in range(5)]
+
+        names = await _client(fake_queue).create_tasks(specs)
+
+        assert [name is not None for name in names] == [True, False, True, False, True]
+        assert len(fake_queue.tasks) == 3
+
+
+@pytest.fixture
+def agent_model(fake_firestore):
+    model = AgentStateModel()
+    model._async_client = fake_firestore
+    return model
+
+
+INTERVALS = {"gap_fill_agent": 5, "retention_agent": 60}
+
+
+@pytest.mark.asyncio
+class TestDueAgents:
+    """Test the bulk due-agent query"""
+
+    async def test_due_rules(self, agent_model, fake_firestore):
+        cooldown = (datetime.utcnow() + timedelta(minutes=5)).isoformat()
+        fake_firestore.seed("agent_state", {
+            "state_s1_gap_fill_agent": _state("s1", "gap_fill_agent", last_execution=_ago(10)),
+            "state_s1_retention_agent": _state("s1", "retention_agent", last_execution=_ago(10)),
+            "state_s2_gap_fill_agent": _state("s2", "gap_fill_agent", status=AgentStatus.PAUSED.value),
+            "state_s2_retention_agent": _state(
+                "s2", "retention_agent",
+                circuit_breaker={"state": "open", "cooldown_until": cooldown, "auto_recovery": True},
+            ),
+        })
+
+        due = await agent_model.get_due_agents(["s1", "s2", "s3"], INTERVALS)
+
+        assert due == [("s1", "gap_fill_agent"), ("s3", "gap_fill_agent"), ("s3", "retention_agent")]
+
+    async def test_one_batched_read(self, agent_model, fake_firestore):
+        fake_firestore.seed("agent_state", {
+            f"state_s{i}_{agent}": _state(f"s{i}", agent) for i in range(30) for agent in INTERVALS
+        })
+        calls = []
+        get_all = fake_firestore.get_all
+
+        def tracked_get_all(refs):
+            calls.append(len(refs))
+            return get_all(refs)
+
+        fake_firestore.get_all = tracked_get_all
+
+        due = await agent_model.get_due_agents([f"s{i}" for i in range(30)], INTERVALS)
+
+        assert len(due) == 60
+        assert calls == [60]
+        assert fake_firestore.reads == 60
+
+    async def test_expired_cooldown_moves_to_half_open(self, agent_model, fake_firestore):
+        expired = (datetime.utcnow() - timedelta(minutes=1)).isoformat()
+        fake_firestore.seed("agent_state", {
+            "state_s1_gap_fill_agent": _state(
+                "s1", "gap_fill_agent",
+                circuit_breaker={"state": "open", "cooldown_until": expired, "auto_recovery": True},
+            ),
+            "state_s1_retention_agent": _state(
+                "s1", "retention_agent",
+                circuit_breaker={"state": "open", "cooldown_until": expired, "auto_recovery": False},
+            ),
+        })
+        updates = []
+
+        async def update_batch(batch):
+            updates.append(batch)
+            return len(batch)
+
+        agent_model.update_batch = update_batch
+
+        due = await agent_model.get_due_agents(["s1"], INTERVALS)
+
+        assert due == [("s1", "gap_fill_agent")]
+        assert updates == [{"state_s1_gap_fill_agent": {"circuit_breaker.state": "half_open"}}]
+
+    async def test_check_circuit_breaker_unchanged(self, agent_model, fake_firestore):
+        cooldown = (datetime.utcnow() + timedelta(minutes=5)).isoformat()
+        fake_firestore.seed("agent_state", {
+            "state_s1_gap_fill_agent": _state(
+                "s1", "gap_fill_agent",
+                circuit_breaker={"state": "open", "cooldown_until": cooldown, "auto_recovery": True},
+            ),
+        })
+
+        result = await agent_model.check_circuit_breaker("s1", "gap_fill_agent")
+        missing = await agent_model.check_circuit_breaker("s1", "retention_agent")
+
+        assert result["can_operate"] is False
+        assert 0 < result["remaining_seconds"] <= 300
+        assert missing == {"can_operate": False, "reason": "state_not_found"}
+
+
+@pytest.mark.asyncio
+class TestPeriodicScheduling:
+    """Test scheduling periodic agents for many salons"""
+
+    async def test_schedules_due_agents(self, fake_queue, fake_firestore):
+        fake_firestore.seed("agent_state", {
+            "state_s1_gap_fill_agent": _state("s1", "gap_fill_agent", last_execution=_ago(1)),
+        })
+        scheduler = AgentScheduler()
+        scheduler.AGENT_INTERVALS = INTERVALS
+        scheduler.tasks_client = _client(fake_queue)
+        scheduler.agent_model._async_client = fake_firestore
+
+        names = await scheduler.schedule_periodic_agents_bulk(["s1", "s2"])
+
+        assert len(names) == 3
+        bodies = [
+            json.loads(base64.b64decode(task["httpRequest"]["body"]))
+            for task in fake_queue.tasks.values()
+        ]
+        assert sorted((b["salon_id"], b["agent_name"]) for b in bodies) == [
+            ("s1", "retention_agent"), ("s2", "gap_fill_agent"), ("s2", "retention_agent"),
+        ]
+        assert {b["action"] for b in bodies} == {"periodic_check"}
+
+    async def test_single_salon(self, fake_queue, fake_firestore):
+        scheduler = AgentScheduler()
+        scheduler.tasks_client = _client(fake_queue)
+        scheduler.agent_model._async_client = fake_firestore
+
+        names = await scheduler.schedule_periodic_agents("s1")
+
+        assert len(names) == len(AgentScheduler.AGENT_INTERVALS)
+        assert all("-s1-" in name for name in names)
+
+
+# ============================================================================
+# Benchmark against a local Cloud Tasks stand-in
+# ============================================================================
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+    latency = 0.02
+    created = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        task = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))["task"]
+        time.sleep(self.latency)
+        with self.lock:
+            type(self).created += 1
+        body = json.dumps({"name": task["name"]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def queue_stand_in(monkeypatch):
+    """Local Cloud Tasks stand-in (20ms per create) wired in as the emulator."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(settings, "CLOUD_TASKS_EMULATOR_HOST", f"127.0.0.1:{server.server_port}")
+    cloud_tasks_module._tasks_http_client = None
+    yield f"http://127.0.0.1:{server.server_port}"
+    cloud_tasks_module._tasks_http_client = None
+    server.shutdown()
+    server.server_close()
+
+
+FIVE_AGENTS = {
+    "gap_fill_agent": 5,
+    "no_show_prevention_agent": 10,
+    "waitlist_agent": 5,
+    "retention_agent": 60,
+    "upsell_agent": 30,
+}
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestSchedulingBenchmark:
+    """Tasks/sec for 1,000 salons x 5 agents (20ms queue): sequential vs bulk"""
+
+    async def test_periodic_scheduling_throughput(self, queue_stand_in, fake_firestore):
+        salons = [f"salon{i:04d}" for i in range(1000)]
+        fake_firestore.seed("agent_state", {
+            f"state_{salon}_{agent}": _state(salon, agent, last_execution=_ago(120))
+            for salon in salons for agent in FIVE_AGENTS
+        })
+        scheduler = AgentScheduler()
+        scheduler.AGENT_INTERVALS = FIVE_AGENTS
+        scheduler.agent_model._async_client = fake_firestore
+        model, client = scheduler.agent_model, scheduler.tasks_client
+
+        # Previous path: per agent, three state reads and a blocking create
+        sample = salons[:20]
+        reads = fake_firestore.reads
+        started = time.perf_counter()
+        with httpx.Client(base_url=queue_stand_in) as blocking:
+            for salon in sample:
+                for agent in FIVE_AGENTS:
+                    await model.get_agent_state(salon, agent)
+                    await model.get_agent_state(salon, agent)
+                    await model.check_circuit_breaker(salon, agent)
+                    spec = client.autonomous_task(salon, agent, "periodic_check", {})
+                    task = client._build_task(spec.queue_name, spec.task_name, spec.handler_path, spec.payload)
+                    blocking.post(
+                        f"/v2/{client._get_queue_path(spec.queue_name)}/tasks", json={"task": task},
+                    ).raise_for_status()
+        before = len(sample) * len(FIVE_AGENTS) / (time.perf_counter() - started)
+        sequential_reads = (fake_firestore.reads - reads) / (len(sample) * len(FIVE_AGENTS))
+
+        reads = fake_firestore.reads
+        _StandInHandler.created = 0
+        started = time.perf_counter()
+        names = await scheduler.schedule_periodic_agents_bulk(salons)
+        elapsed = time.perf_counter() - started
+        after = len(names) / elapsed
+
+        assert len(names) == 5000
+        assert _StandInHandler.created == 5000
+        assert fake_firestore.reads - reads == 5000
+        print(f"\nsequential: {before:.0f} tasks/s, {sequential_reads:.0f} reads per agent; "
+              f"bulk: {after:.0f} tasks/s, 1 read per agent, 5000 tasks in {elapsed:.2f}s")
+        assert after > before * 5
@@ -157,7 +157,7 @@ class TestCustomerList:
 
         with patch('app.api.customers.CustomerModel') as MockModel:
             mock_instance = AsyncMock()
-            mock_instance.search = AsyncMock(return_value=PaginatedResponse(
+            mock_instance.paginate_customers = AsyncMock(return_value=PaginatedResponse(
                 items=[mock_customer_summary],
                 total=1,
                 page=1,
@@ -186,7 +186,7 @@ class TestCustomerList:
 
         with patch('app.api.customers.CustomerModel') as MockModel:
             mock_instance = AsyncMock()
-            mock_instance.search = AsyncMock(return_value=PaginatedResponse(
+            mock_instance.paginate_customers = AsyncMock(return_value=PaginatedResponse(
                 items=[],
                 total=0,
                 page=1,
@@ -431,7 +431,7 @@ class TestCustomerBookings:
         with patch('app.api.customers.verify_customer_access', return_value=mock_customer):
             with patch('app.api.customers.BookingModel') as MockModel:
                 mock_instance = AsyncMock()
-                mock_instance.search = AsyncMock(return_value=PaginatedResponse(
+                mock_instance.search_bookings = AsyncMock(return_value=PaginatedResponse(
                     items=[mock_booking_summary],
                     total=1,
                     page=1,
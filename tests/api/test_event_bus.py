@@ -0,0 +1,465 @@
+"""Tests for the event bus.
+
+Covers:
+- Typed schemas: wire round trip, schema ids, attributes, size
+- publish() returning before Pub/Sub answers, flushes on size and on time
+- Coalescing rapid updates to one entity within a flush window
+- In-process subscribers and the in-memory transport
+- Durable fallback on failures and when memory is full, replay after restart
+- Publish throughput and p99 against a fake Pub/Sub, blocking vs queued
+"""
+import concurrent.futures
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+import orjson
+import pytest
+
+from app.schemas.events import (
+    AutonomousDecision,
+    BookingCancelled,
+    BookingCreated,
+    BookingUpdated,
+    DocumentChanged,
+    Event,
+    OutreachEvent,
+    register,
+)
+from app.services import event_bus as bus_module
+from app.services.availability import availability_engine
+from app.services.event_bus import (
+    EventBus,
+    EventEnvelope,
+    FileOutbox,
+    InMemoryTransport,
+    PubSubTransport,
+    decode,
+    encode,
+    get_event_bus,
+)
+
+TOPIC = "projects/test/topics/salon-events"
+
+
+class FakePubSub:
+    """PublisherClient stand-in resolving futures on its own thread, like the real client."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.down = False
+        self.messages = []
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def publish(self, topic, data, timeout=None, **attrs):
+        future = concurrent.futures.Future()
+        self._queue.put((time.monotonic() + self.latency, future, topic, data, attrs))
+        return future
+
+    def _run(self):
+        while True:
+            due, future, topic, data, attrs = self._queue.get()
+            time.sleep(max(0.0, due - time.monotonic()))
+            if self.down:
+                future.set_exception(RuntimeError("503 Service Unavailable"))
+            else:
+                self.messages.append((topic, data, attrs))
+                future.set_result(str(len(self.messages)))
+
+    def events(self):
+        return [decode(data).event for _, data, _ in self.messages]
+
+    def event_ids(self):
+        return [decode(data).event_id for _, data, _ in self.messages]
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return FileOutbox(str(tmp_path / "outbox.jsonl"))
+
+
+def _bus(client, outbox, **kwargs):
+    kwargs.setdefault("flush_interval", 0.01)
+    return EventBus(transport=PubSubTransport(client=client, topic_path=TOPIC), outbox=outbox, **kwargs)
+
+
+def _created(i=0):
+    return BookingCreated(booking_id=f"b{i}", customer_id="c1", service_id="s1", start_time="2024-01-15T10:00:00")
+
+
+class TestSchemas:
+    """Test typed schemas and the wire format"""
+
+    def test_round_trip(self):
+        envelope = EventEnvelope(_created(), salon_id="salon_1", correlation_id="req-1", metadata={"source": "api"})
+
+        decoded = decode(encode(envelope))
+
+        assert decoded.event == envelope.event
+        assert isinstance(decoded.event, BookingCreated)
+        assert (decoded.event_id, decoded.salon_id, decoded.correlation_id) == (envelope.event_id, "salon_1", "req-1")
+        assert decoded.metadata == {"source": "api"}
+        assert abs((decoded.timestamp - envelope.timestamp).total_seconds()) < 0.001
+
+    def test_frame_starts_with_schema_id_and_version(self):
+        frame = orjson.loads(encode(EventEnvelope(_created(), salon_id="salon_1")))
+
+        assert frame[:2] == [BookingCreated.schema_id, 1]
+        assert "booking_id" in frame[-1]
+        assert "staff_id" not in frame[-1]  # unset optionals are not sent
+
+    def test_family_event_names_and_attributes(self):
+        outreach = EventEnvelope(OutreachEvent(event="sent", outreach_id="o1", customer_id="c1", channel="whatsapp"), "salon_1")
+        decision = EventEnvelope(
+            AutonomousDecision(decision_id="d1", agent_name="gap_fill_agent", decision_type="gap_fill",
+                               action="outreach_initiated", outcome="pending"),
+            "salon_1",
+        )
+
+        assert outreach.attributes()["event_type"] == "OUTREACH_SENT"
+        assert decode(encode(outreach)).name == "OUTREACH_SENT"
+        assert decision.attributes() == {
+            "event_type": "AUTONOMOUS_DECISION",
+            "salon_id": "salon_1",
+            "schema_id": "20",
+            "agent_name": "gap_fill_agent",
+            "decision_type": "gap_fill",
+        }
+
+    def test_unknown_schema_id(self):
+        frame = orjson.dumps([999, 1, "e1", 0, "salon_1", None, None, {}])
+        with pytest.raises(KeyError):
+            decode(frame)
+
+    def test_schema_ids_are_unique(self):
+        with pytest.raises(ValueError):
+            @register
+            class Duplicate(Event):
+                event_type = "duplicate"
+                schema_id = BookingCreated.schema_id
+
+    def test_smaller_than_json_envelope(self):
+        envelope = EventEnvelope(_created(), salon_id="salon_1")
+        previous = json.dumps({
+            "event_type": "booking.created",
+            "event_id": f"booking.created-{datetime.utcnow().timestamp()}",
+            "timestamp": datetime.utcnow().isoformat(),
+            "salon_id": "salon_1",
+            "correlation_id": None,
+            "data": envelope.event.model_dump(),
+            "metadata": {},
+        }).encode()
+
+        assert len(encode(envelope)) < len(previous) * 0.8
+
+
+@pytest.mark.asyncio
+class TestEventBus:
+    """Test queued publishing, coalescing and subscribers"""
+
+    async def test_publish_does_not_wait_for_pubsub(self, outbox):
+        pubsub = FakePubSub(latency=0.5)
+        bus = _bus(pubsub, outbox)
+
+        started = time.perf_counter()
+        for i in range(20):
+            assert await bus.publish(_created(i), salon_id="salon_1")
+        assert time.perf_counter() - started < 0.1
+
+        wait_for(lambda: bus.stats()["published"] == 20)
+        topic, data, attrs = pubsub.messages[0]
+        assert topic == TOPIC
+        assert decode(data).event.booking_id == "b0"
+        assert attrs == {"event_type": "booking.created", "salon_id": "salon_1", "schema_id": "1"}
+        bus.close()
+
+    async def test_flushes_on_size(self, outbox):
+        pubsub = FakePubSub()
+        bus = _bus(pubsub, outbox, flush_size=5, flush_interval=60)
+        bus.start()
+
+        for i in range(4):
+            await bus.publish(_created(i), salon_id="salon_1")
+        time.sleep(0.05)
+        assert pubsub.messages == []
+
+        await bus.publish(_created(4), salon_id="salon_1")
+        wait_for(lambda: len(pubsub.messages) == 5)
+        bus.close()
+
+    async def test_flushes_on_time(self, outbox):
+        pubsub = FakePubSub()
+        bus = _bus(pubsub, outbox, flush_size=1000, flush_interval=0.02)
+
+        await bus.publish(_created(), salon_id="salon_1")
+
+        wait_for(lambda: len(pubsub.messages) == 1, timeout=0.5)
+        bus.close()
+
+    async def test_rapid_updates_coalesce(self, outbox):
+        pubsub = FakePubSub()
+        bus = _bus(pubsub, outbox, flush_interval=60)
+        bus.start()
+
+        await bus.publish(BookingUpdated(booking_id="b1", status="checked_in", checked_in_by="u1"), salon_id="salon_1")
+        await bus.publish(BookingUpdated(booking_id="b2", status="checked_in"), salon_id="salon_1")
+        await bus.publish(BookingUpdated(booking_id="b1", status="in_progress", started_by="u2"), salon_id="salon_1")
+        await bus.publish(BookingUpdated(booking_id="b1", upsell_service_id="s9"), salon_id="salon_1")
+        bus.flush()
+
+        wait_for(lambda: len(pubsub.messages) == 2)
+        first, second = pubsub.events()
+        assert first == BookingUpdated(
+            booking_id="b1", status="in_progress", checked_in_by="u1", started_by="u2", upsell_service_id="s9",
+        )
+        assert second.booking_id == "b2"
+        assert bus.stats()["coalesced"] == 2
+        bus.close()
+
+    async def test_coalescing_keeps_order_around_other_events(self, outbox):
+        pubsub = FakePubSub()
+        bus = _bus(pubsub, outbox, flush_interval=60)
+        bus.start()
+
+        await bus.publish(BookingUpdated(booking_id="b1", status="confirmed"), salon_id="salon_1")
+        await bus.publish(BookingCancelled(booking_id="b1", reason="sick"), salon_id="salon_1")
+        await bus.publish(BookingUpdated(booking_id="b1", status="cancelled"), salon_id="salon_1")
+        await bus.publish(BookingUpdated(booking_id="b1", status="cancelled"), salon_id="salon_2")
+        bus.flush()
+
+        wait_for(lambda: len(pubsub.messages) == 4)
+        assert [e.name for e in pubsub.events()] == [
+            "booking.updated", "booking.cancelled", "booking.updated", "booking.updated",
+        ]
+        assert bus.stats()["coalesced"] == 0
+        bus.close()
+
+    async def test_subscribers_run_before_publish_returns(self, outbox):
+        bus = _bus(FakePubSub(), outbox)
+        seen = []
+
+        async def rollups(envelope):
+            seen.append(("rollups", envelope.event.document_id))
+
+        bus.subscribe(DocumentChanged, lambda envelope: seen.append(("cache", envelope.salon_id)))
+        bus.subscribe(DocumentChanged, rollups)
+        await bus.publish(DocumentChanged(collection="bookings", document_id="b1", after={}), salon_id="salon_1")
+
+        assert seen == [("cache", "salon_1"), ("rollups", "b1")]
+        assert bus.stats()["accepted"] == 0  # local only, never sent
+        bus.close()
+
+    async def test_subscriber_failure_does_not_fail_publish(self, outbox):
+        pubsub = FakePubSub()
+        bus = _bus(pubsub, outbox)
+
+        def boom(envelope):
+            raise RuntimeError("cache down")
+
+        bus.subscribe(BookingCreated, boom)
+
+        assert await bus.publish(_created(), salon_id="salon_1")
+        wait_for(lambda: len(pubsub.messages) == 1)
+        assert bus.stats()["subscriber_errors"] == 1
+        bus.close()
+
+    async def test_in_memory_transport(self, outbox):
+        transport = InMemoryTransport()
+        received = []
+        transport.subscribe(received.append)
+        bus = EventBus(transport=transport, outbox=outbox, flush_interval=0.01)
+
+        await bus.publish(_created(), salon_id="salon_1")
+
+        wait_for(lambda: len(received) == 1)
+        assert received[0].event == _created()
+        assert list(transport.envelopes) == received
+        assert list(transport.attributes) == [received[0].attributes()]
+        assert bus.stats()["published"] == 1
+        bus.close()
+
+    async def test_completion_callbacks_record_latency(self, outbox):
+        bus = _bus(FakePubSub(latency=0.01), outbox)
+
+        for i in range(10):
+            await bus.publish(_created(i), salon_id="salon_1")
+        wait_for(lambda: bus.stats()["published"] == 10)
+
+        stats = bus.stats()
+        assert stats["in_flight"] == 0
+        assert stats["ack_p99_ms"] >= 10
+        bus.close()
+
+    async def test_writes_invalidate_availability(self, monkeypatch):
+        invalidated = []
+        monkeypatch.setattr(availability_engine, "invalidate_document", lambda *docs: invalidated.append(docs))
+        shift = {"salon_id": "salon_1", "shift_date": "2024-01-15"}
+
+        await get_event_bus().publish(DocumentChanged(collection="shifts", document_id="sh1", after=shift), salon_id="salon_1")
+        await get_event_bus().publish(DocumentChanged(collection="customers", document_id="c1", after={}), salon_id="salon_1")
+
+        assert invalidated == [(None, shift)]
+
+
+@pytest.mark.asyncio
+class TestDurableOutbox:
+    """Test the fallback outbox across outages and restarts"""
+
+    async def test_failed_publishes_are_spilled_and_replayed(self, outbox):
+        pubsub = FakePubSub()
+        pubsub.down = True
+        bus = _bus(pubsub, outbox, replay_interval=60)
+
+        for i in range(3):
+            await bus.publish(_created(i), salon_id="salon_1")
+        wait_for(lambda: bus.stats()["spilled"] == 3)
+        spilled = [decode(frame).event_id for frame in outbox.take()]
+        assert len(spilled) == 3
+
+        pubsub.down = False
+        assert bus.replay() == 3
+        wait_for(lambda: len(outbox) == 0)
+        assert pubsub.event_ids() == spilled
+        bus.close()
+
+    async def test_full_memory_outbox_spills_to_disk(self, outbox):
+        bus = _bus(FakePubSub(latency=1.0), outbox, max_outbox=5)
+
+        results = [await bus.publish(_created(i), salon_id="salon_1") for i in range(8)]
+
+        assert all(results)
+        assert bus.stats()["spilled"] == 3
+        assert len(outbox) == 3
+        bus.close(timeout=0)
+
+    async def test_events_survive_restart(self, outbox):
+        down = FakePubSub()
+        down.down = True
+        first = _bus(down, outbox)
+        await first.publish(BookingCancelled(booking_id="b1"), salon_id="salon_1")
+        wait_for(lambda: first.stats()["spilled"] == 1)
+        first.close()
+
+        pubsub = FakePubSub()
+        second = _bus(pubsub, FileOutbox(outbox.path))
+        second.start()
+
+        wait_for(lambda: len(pubsub.messages) == 1)
+        assert pubsub.events() == [BookingCancelled(booking_id="b1")]
+        wait_for(lambda: len(outbox) == 0)
+        second.close()
+
+    async def test_interrupted_replay_is_replayed_again(self, outbox):
+        outbox.append([b"e1", b"e2"])
+
+        assert outbox.take() == [b"e1", b"e2"]
+        # Crash before commit: the next take returns the same events
+        outbox.append([b"e3"])
+        assert outbox.take() == [b"e1", b"e2"]
+        outbox.commit()
+        assert outbox.take() == [b"e3"]
+
+    async def test_undecodable_lines_are_dropped_on_replay(self, outbox):
+        pubsub = FakePubSub()
+        outbox.append([b"not json", encode(EventEnvelope(_created(), salon_id="salon_1"))])
+        bus = _bus(pubsub, outbox)
+        bus.start()
+
+        wait_for(lambda: len(pubsub.messages) == 1)
+        wait_for(lambda: len(outbox) == 0)
+        bus.close()
+
+    async def test_close_spills_unacknowledged_events(self, outbox):
+        bus = _bus(FakePubSub(latency=5.0), outbox)
+
+        await bus.publish(_created(), salon_id="salon_1")
+        bus.close(timeout=0.05)
+
+        assert len(outbox) == 1
+
+    async def test_missing_client_spills(self, outbox, monkeypatch):
+        def unavailable(*args, **kwargs):
+            raise RuntimeError("default credentials not found")
+
+        monkeypatch.setattr(bus_module.pubsub_v1, "PublisherClient", unavailable)
+        bus = EventBus(transport=PubSubTransport(), outbox=outbox, flush_interval=0.01)
+
+        await bus.publish(_created(), salon_id="salon_1")
+
+        wait_for(lambda: len(outbox) == 1)
+        bus.close()
+
+
+# ============================================================================
+# Publish throughput against a fake Pub/Sub
+# ============================================================================
+
+def _p99(samples):
+    samples = sorted(samples)
+    return samples[int(len(samples) * 0.99)] * 1000
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestPublishBenchmark:
+    """Caller-side publish latency: waiting on each future vs queued (5ms Pub/Sub)"""
+
+    async def test_publish_throughput(self, outbox):
+        pubsub = FakePubSub(latency=0.005)
+
+        # Previous path: publish, then block on the future for the message id
+        blocking = []
+        started = time.perf_counter()
+        for i in range(200):
+            t0 = time.perf_counter()
+            data = json.dumps({"event_type": "booking.created", "data": _created(i).model_dump()}).encode()
+            pubsub.publish(TOPIC, data).result(timeout=5)
+            blocking.append(time.perf_counter() - t0)
+        before = len(blocking) / (time.perf_counter() - started)
+
+        bus = _bus(FakePubSub(latency=0.005), outbox)
+        queued = []
+        started = time.perf_counter()
+        for i in range(5000):
+            t0 = time.perf_counter()
+            await bus.publish(_created(i), salon_id="salon_1")
+            queued.append(time.perf_counter() - t0)
+        after = len(queued) / (time.perf_counter() - started)
+        wait_for(lambda: bus.stats()["published"] == 5000, timeout=30)
+        acked = 5000 / (time.perf_counter() - started)
+        stats = bus.stats()
+        bus.close()
+
+        print(f"\nblocking: {before:.0f} events/s, p99 {_p99(blocking):.2f}ms; "
+              f"queued: {after:.0f} events/s, p99 {_p99(queued):.3f}ms, "
+              f"{acked:.0f} acked/s, ack p99 {stats['ack_p99_ms']}ms")
+        assert stats["spilled"] == 0
+        assert after > before * 20
+        assert _p99(queued) < 1.0
+
+    async def test_coalescing_reduces_messages(self, outbox):
+        transport = InMemoryTransport()
+        bus = EventBus(transport=transport, outbox=outbox, flush_size=100_000, flush_interval=60)
+        bus.start()
+
+        # 200 bookings, each checked in, started and upsold within one window
+        for step in ("checked_in", "in_progress", "upsell"):
+            for i in range(200):
+                await bus.publish(BookingUpdated(booking_id=f"b{i}", status=step), salon_id="salon_1")
+        bus.flush()
+        wait_for(lambda: transport.sent == 200)
+
+        print(f"\n600 updates -> {transport.sent} messages, {transport.bytes / transport.sent:.0f} bytes each")
+        assert bus.stats()["coalesced"] == 400
+        bus.close()
@@ -0,0 +1,157 @@
+"""Tests for FirestoreBase.get_multi batching.
+
+Covers:
+- Results in requested order across identity map, Redis and Firestore
+- One pipelined Redis write for the cache fill
+- Negative caching of missing ids
+- Chunked get_all with bounded concurrency
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.core.redis import redis_client
+from app.core.request_context import request_scope
+from app.models.base import MISSING_DOCUMENT, FirestoreBase
+from app.schemas.base import FirestoreModel
+
+
+class Service(FirestoreModel):
+    id: str
+    salon_id: str
+    name: str
+
+
+class ServiceModel(FirestoreBase[Service, Service, Service]):
+    collection_name = "services"
+    model = Service
+
+
+def _seed(fake_firestore, count):
+    fake_firestore.seed("services", {
+        f"svc{i:03d}": {"salon_id": "s1", "name": f"Service {i}"}
+        for i in range(count)
+    })
+
+
+@pytest.fixture
+def service_model(fake_firestore):
+    model = ServiceModel()
+    model._async_client = fake_firestore
+    return model
+
+
+@pytest.mark.asyncio
+class TestGetMulti:
+    """Test get_multi ordering, cache fill and negative caching."""
+
+    async def test_preserves_requested_order(self, service_model, fake_firestore, fake_redis):
+        _seed(fake_firestore, 6)
+        await service_model.get("svc004")
+        ids = ["svc005", "svc004", "nope", "svc000", "svc004"]
+
+        with request_scope():
+            await service_model.get("svc000")
+            services = await service_model.get_multi(ids)
+
+        assert [s.id for s in services] == ["svc005", "svc004", "svc000", "svc004"]
+
+    async def test_fill_is_one_pipelined_write(self, service_model, fake_firestore, fake_redis):
+        _seed(fake_firestore, 100)
+        ids = [f"svc{i:03d}" for i in range(100)]
+
+        services = await service_model.get_multi(ids)
+
+        assert len(services) == 100
+        # One MGET plus one pipeline
+        assert fake_redis.commands == 2
+        assert all(f"services:{doc_id}" in fake_redis.data for doc_id in ids)
+
+        reads = fake_firestore.reads
+        redis_client.local.clear()
+        assert [s.id for s in await service_model.get_multi(ids)] == ids
+        assert fake_firestore.reads == reads
+
+    async def test_missing_ids_are_negatively_cached(self, service_model, fake_firestore, fake_redis):
+        _seed(fake_firestore, 2)
+
+        await service_model.get_multi(["svc000", "ghost"])
+        reads = fake_firestore.reads
+        services = await service_model.get_multi(["svc000", "ghost"])
+
+        assert [s.id for s in services] == ["svc000"]
+        assert fake_firestore.reads == reads
+        assert await service_model.get("ghost") is None
+        assert fake_firestore.reads == reads
+
+    async def test_create_clears_negative_entry(self, service_model, fake_firestore, fake_redis):
+        assert await service_model.get("svc_new") is None
+        assert redis_client.local.get("services:svc_new") == MISSING_DOCUMENT
+
+        await service_model.create({"salon_id": "s1", "name": "New"}, document_id="svc_new")
+
+        assert [s.id for s in await service_model.get_multi(["svc_new"])] == ["svc_new"]
+
+    async def test_create_batch_clears_negative_entries(self, service_model, fake_firestore, fake_redis):
+        next_id = f"auto_{fake_firestore.auto_id + 1:06d}"
+        assert await service_model.get(next_id) is None
+
+        created = await service_model.create_batch([{"salon_id": "s1", "name": "New"}])
+
+        assert created[0].id == next_id
+        assert redis_client.local.get(f"services:{next_id}") is not MISSING_DOCUMENT
+        assert (await service_model.get(next_id)).name == "New"
+
+    async def test_negative_caching_can_be_disabled(self, service_model, fake_firestore, fake_redis):
+        service_model.negative_cache_ttl = 0
+
+        await service_model.get_multi(["ghost"])
+        await service_model.get_multi(["ghost"])
+
+        assert fake_firestore.reads == 2
+        assert fake_redis.data == {}
+
+    async def test_get_all_is_chunked_with_bounded_concurrency(self, service_model, fake_firestore):
+        _seed(fake_firestore, 45)
+        service_model.get_all_chunk_size = 10
+        service_model.get_all_concurrency = 2
+        calls = []
+        in_flight = {"now": 0, "max": 0}
+        get_all = fake_firestore.get_all
+
+        async def tracked_get_all(refs):
+            calls.append(len(refs))
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            async for doc in get_all(refs):
+                yield doc
+            in_flight["now"] -= 1
+
+        fake_firestore.get_all = tracked_get_all
+        ids = [f"svc{i:03d}" for i in reversed(range(45))]
+
+        services = await service_model.get_multi(ids, use_cache=False)
+
+        assert [s.id for s in services] == ids
+        assert sorted(calls) == [5, 10, 10, 10, 10]
+        assert in_flight["max"] == 2
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestGetMultiBenchmark:
+    """Cache fill cost against a 1ms Redis."""
+
+    async def test_fill_round_trips(self, service_model, fake_firestore, fake_redis):
+        fake_redis.latency = 0.001
+        _seed(fake_firestore, 500)
+        ids = [f"svc{i:03d}" for i in range(500)]
+
+        start = time.perf_counter()
+        await service_model.get_multi(ids)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        print(f"\nget_multi 500 uncached docs: {elapsed_ms:.1f}ms, {fake_redis.commands} Redis round trips")
+        assert fake_redis.commands == 2
@@ -0,0 +1,343 @@
+"""Tests for the in-process (L1) cache in front of Redis.
+
+Covers:
+- LRU and TTL bounds per key prefix
+- Per-prefix hit/miss/eviction counters
+- RedisClient read-through, write-through and invalidation fan-out
+- Benchmark of /tenants/{id} and /services with L1 on and off
+"""
+import json
+import statistics
+import time
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.api.dependencies import AuthContext, get_current_user, get_salon_id
+from app.api.services import router as services_router
+from app.api.tenants import router as tenants_router
+from app.core.local_cache import MISS, LocalCache
+from app.core.redis import CacheConfig, redis_client
+from app.schemas import PaginatedResponse, Salon, SalonLayout, ServiceSummary
+from app.schemas.base import (
+    ResourceType,
+    ServiceCategory,
+    StaffRole,
+    SubscriptionPlan,
+    SubscriptionStatus,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# ============================================================================
+# LocalCache
+# ============================================================================
+
+class TestLocalCache:
+    """Test LRU/TTL bounds and counters."""
+
+    def test_only_configured_prefixes_are_cached(self):
+        cache = LocalCache({"salon": (60, 10)})
+
+        cache.set("salon:1", {"name": "Glow"})
+        cache.set("booking:1", {"status": "confirmed"})
+
+        assert cache.get("salon:1") == {"name": "Glow"}
+        assert cache.get("booking:1") is MISS
+        assert "booking" not in cache.stats()
+
+    def test_entries_expire_after_prefix_ttl(self):
+        clock = FakeClock()
+        cache = LocalCache({"salon": (60, 10)}, clock=clock)
+        cache.set("salon:1", "v")
+
+        clock.now = 59
+        assert cache.get("salon:1") == "v"
+        clock.now = 60
+        assert cache.get("salon:1") is MISS
+
+        stats = cache.stats()["salon"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["expirations"] == 1
+        assert stats["size"] == 0
+
+    def test_ttl_and_cap_only_shorten_lifetime(self):
+        clock = FakeClock()
+        cache = LocalCache({"salon": (60, 10)}, clock=clock)
+        cache.set("salon:1", "short", ttl=10)
+        cache.set("salon:2", "long", ttl=3600)
+        cache.ttl_cap = 5
+        cache.set("salon:3", "capped")
+
+        clock.now = 20
+        assert cache.get("salon:1") is MISS
+        assert cache.get("salon:2") == "long"
+        assert cache.get("salon:3") is MISS
+
+    def test_lru_eviction_per_prefix(self):
+        cache = LocalCache({"salon": (60, 2), "service": (60, 2)})
+        cache.set("salon:1", 1)
+        cache.set("salon:2", 2)
+        cache.get("salon:1")
+        cache.set("salon:3", 3)
+        cache.set("service:1", 1)
+
+        assert cache.get("salon:2") is MISS
+        assert cache.get("salon:1") == 1
+        assert cache.get("salon:3") == 3
+        assert cache.get("service:1") == 1
+        assert cache.stats()["salon"]["evictions"] == 1
+        assert cache.stats()["service"]["evictions"] == 0
+
+    def test_delete_pattern(self):
+        cache = LocalCache({"catalog": (60, 10)})
+        cache.set("catalog:salon_1:1", "a")
+        cache.set("catalog:salon_1:2", "b")
+        cache.set("catalog:salon_2:1", "c")
+
+        assert cache.delete_pattern("catalog:salon_1:*") == 2
+        assert cache.get("catalog:salon_2:1") == "c"
+        assert cache.stats()["catalog"]["invalidations"] == 2
+
+    def test_stale_generation_is_not_stored(self):
+        cache = LocalCache({"salon": (60, 10)})
+        generation = cache.generation
+
+        cache.delete(["salon:1"])
+        cache.set("salon:1", "stale", generation=generation)
+
+        assert cache.get("salon:1") is MISS
+
+    def test_disabled_cache_is_bypassed(self):
+        cache = LocalCache({"salon": (60, 10)}, enabled=False)
+        cache.set("salon:1", "v")
+        assert cache.get("salon:1") is MISS
+
+
+# ============================================================================
+# RedisClient integration
+# ============================================================================
+
+@pytest.mark.asyncio
+class TestRedisClientL1:
+    """Test L1 read-through and invalidation in RedisClient."""
+
+    async def test_repeat_get_skips_redis(self, fake_redis):
+        fake_redis.data["salon:s1"] = json.dumps({"name": "Glow"})
+
+        first = await redis_client.get("salon:s1")
+        second = await redis_client.get("salon:s1")
+
+        assert first == second == {"name": "Glow"}
+        assert fake_redis.commands == 1
+        assert redis_client.cache_stats()["prefixes"]["salon"]["hits"] == 1
+
+    async def test_uncovered_prefix_always_hits_redis(self, fake_redis):
+        fake_redis.data["booking:b1"] = json.dumps({"status": "confirmed"})
+
+        await redis_client.get("booking:b1")
+        await redis_client.get("booking:b1")
+
+        assert fake_redis.commands == 2
+
+    async def test_set_populates_l1(self, fake_redis):
+        await redis_client.set("salon:s1", {"gst_rate": Decimal("5.0")})
+        commands = fake_redis.commands
+
+        assert await redis_client.get("salon:s1") == {"gst_rate": Decimal("5.0")}
+        assert fake_redis.commands == commands
+        assert json.loads(fake_redis.data["salon:s1"]) == {"gst_rate": "5.0"}
+
+    async def test_get_multi_mixes_l1_and_redis(self, fake_redis):
+        await redis_client.set("services:a", {"name": "A"})
+        fake_redis.data["services:b"] = json.dumps({"name": "B"})
+        commands = fake_redis.commands
+
+        result = await redis_client.get_multi(["services:a", "services:b", "services:c"])
+
+        assert result == {"services:a": {"name": "A"}, "services:b": {"name": "B"}}
+        assert fake_redis.commands == commands + 1
+        assert await redis_client.get("services:b") == {"name": "B"}
+        assert fake_redis.commands == commands + 1
+
+    async def test_delete_publishes_invalidation(self, fake_redis):
+        await redis_client.set("salon:s1", {"name": "Glow"})
+
+        await redis_client.delete("salon:s1")
+
+        assert await redis_client.get("salon:s1") is None
+        channel, message = fake_redis.published[-1]
+        assert channel == CacheConfig.L1_INVALIDATION_CHANNEL
+        assert json.loads(message)["keys"] == ["salon:s1"]
+
+    async def test_uncovered_delete_is_not_published(self, fake_redis):
+        await redis_client.delete("booking:b1")
+        assert fake_redis.published == []
+
+    async def test_invalidate_salon_cache_evicts_everywhere(self, fake_redis):
+        await redis_client.set("salon:s1", {"name": "Glow"})
+        await redis_client.set("salon:s1:layout", {"mens_chairs": 2}, tags=["salon:s1"])
+        await redis_client.set("catalog:s1:1", {"items": []}, tags=["catalog:s1"])
+
+        await redis_client.invalidate_salon_cache("s1")
+
+        assert fake_redis.data == {}
+        assert redis_client.local.stats()["salon"]["size"] == 0
+        assert redis_client.local.stats()["catalog"]["size"] == 0
+        payload = json.loads(fake_redis.published[-1][1])
+        assert set(payload["keys"]) == {"salon:s1", "salon:s1:layout", "catalog:s1:1"}
+
+    async def test_remote_invalidation_is_applied(self, fake_redis):
+        await redis_client.set("salon:s1", {"name": "Glow"})
+        await redis_client.set("catalog:s1:1", {"items": []})
+        message = json.dumps({
+            "origin": "other-instance",
+            "keys": ["salon:s1"],
+            "patterns": ["catalog:s1:*"],
+        })
+
+        assert redis_client.apply_invalidation(message) == 2
+        assert redis_client.local.get("salon:s1") is MISS
+        assert redis_client.local.get("catalog:s1:1") is MISS
+
+    async def test_own_invalidation_is_ignored(self, fake_redis):
+        await redis_client.set("salon:s1", {"name": "Glow"})
+        message = json.dumps({"origin": redis_client.instance_id, "keys": ["salon:s1"]})
+
+        assert redis_client.apply_invalidation(message) == 0
+        assert redis_client.apply_invalidation("not json") == 0
+        assert redis_client.local.get("salon:s1") == {"name": "Glow"}
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def _salon() -> Salon:
+    return Salon(
+        id="salon-123",
+        owner_id="user-owner-123",
+        name="Jawed Habib Kurnool",
+        slug="jawed-habib-kurnool",
+        phone="+919876543210",
+        email="contact@jawedhabibkurnool.com",
+        address_line1="Main Road",
+        city="Kurnool",
+        state="Andhra Pradesh",
+        pincode="518001",
+        layout=SalonLayout(mens_chairs=6, womens_chairs=4, service_rooms=4),
+        subscription_plan=SubscriptionPlan.PROFESSIONAL,
+        subscription_status=SubscriptionStatus.ACTIVE,
+        gst_rate=Decimal("5.0"),
+        loyalty_rate=Decimal("0.1"),
+        loyalty_expiry_months=12,
+        membership_renewal_days=15,
+        late_arrival_grace_minutes=15,
+    )
+
+
+def _catalog() -> PaginatedResponse:
+    items = [
+        ServiceSummary(
+            service_id=f"service_{i:03d}",
+            salon_id="salon-123",
+            name=f"Service {i}",
+            category=ServiceCategory.HAIRCUT,
+            base_price=Decimal("500.00"),
+            duration_minutes=45,
+            resource_type=ResourceType.CHAIR_MENS,
+            is_active=True,
+            is_popular=False,
+            image_url=None,
+            average_rating=Decimal("4.5"),
+        )
+        for i in range(20)
+    ]
+    return PaginatedResponse(items=items, total=20, page=1, page_size=20)
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    return (
+        statistics.median(ordered) * 1000,
+        ordered[int(len(ordered) * 0.99) - 1] * 1000,
+    )
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestL1Benchmark:
+    """Compare route latency with L1 on and off against a 1ms Redis."""
+
+    async def test_tenant_and_service_latency(self, fake_redis):
+        fake_redis.latency = 0.001
+        owner = AuthContext(
+            uid="user-owner-123",
+            email="owner@example.com",
+            phone="+919876543210",
+            role=StaffRole.OWNER,
+            salon_id="salon-123",
+            is_owner=True,
+        )
+        app = FastAPI(redirect_slashes=False)
+        app.include_router(tenants_router, prefix="/api/v1/tenants")
+        app.include_router(services_router, prefix="/api/v1/services")
+        app.dependency_overrides[get_current_user] = lambda: owner
+        app.dependency_overrides[get_salon_id] = lambda: "salon-123"
+
+        salon_model = MagicMock()
+        salon_model.get = AsyncMock(return_value=_salon())
+        service_model = MagicMock()
+        service_model.search = AsyncMock(return_value=_catalog())
+
+        routes = {"/tenants/{id}": "/api/v1/tenants/salon-123", "/services": "/api/v1/services/"}
+        requests = 300
+        results = {}
+        with patch("app.api.tenants.SalonModel", return_value=salon_model), \
+                patch("app.api.services.ServiceModel", return_value=service_model):
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                for enabled in (False, True):
+                    redis_client.local.enabled = enabled
+                    redis_client.local.clear()
+                    for name, url in routes.items():
+                        assert (await client.get(url)).status_code == 200
+                        commands = fake_redis.commands
+                        samples = []
+                        for _ in range(requests):
+                            start = time.perf_counter()
+                            response = await client.get(url)
+                            samples.append(time.perf_counter() - start)
+                            assert response.status_code == 200
+                        results[(name, enabled)] = (
+                            *_percentiles(samples),
+                            fake_redis.commands - commands,
+                        )
+
+        for name in routes:
+            off_p50, off_p99, off_commands = results[(name, False)]
+            on_p50, on_p99, on_commands = results[(name, True)]
+            print(
+                f"\n{name}: L1 off p50={off_p50:.2f}ms p99={off_p99:.2f}ms "
+                f"({off_commands} Redis commands) | L1 on p50={on_p50:.2f}ms "
+                f"p99={on_p99:.2f}ms ({on_commands} Redis commands)"
+            )
+            assert off_commands == requests
+            assert on_commands == 0
+            assert on_p50 < off_p50
+
+        assert salon_model.get.await_count == 1
+        assert service_model.search.await_count == 1
@@ -0,0 +1,202 @@
+"""Tests for cursor pagination in FirestoreBase.
+
+Covers:
+- Continuation cursor encoding/decoding
+- Offset pushed down to Firestore
+- Cursor pages are complete, ordered and non-overlapping
+- Read counts per page stay flat as the page number grows
+"""
+import base64
+import pytest
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.models.base import (
+    FirestoreBase,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+)
+from app.schemas.base import FirestoreModel
+
+
+class Item(FirestoreModel):
+    id: str
+    salon_id: str
+    rank: int
+    created_at: Optional[datetime] = None
+
+
+class ItemModel(FirestoreBase[Item, Item, Item]):
+    collection_name = "items"
+    model = Item
+
+
+TOTAL_ITEMS = 500
+PAGE_SIZE = 20
+
+
+@pytest.fixture
+def item_model(fake_firestore):
+    start = datetime(2024, 1, 1)
+    fake_firestore.seed("items", {
+        f"item_{i:04d}": {
+            "salon_id": "salon_001",
+            # Duplicate ranks exercise the document-id tie-breaker
+            "rank": i // 3,
+            "created_at": start + timedelta(minutes=i // 2),
+        }
+        for i in range(TOTAL_ITEMS)
+    })
+    fake_firestore.seed("items", {"other_salon": {"salon_id": "salon_002", "rank": 0}})
+    model = ItemModel()
+    model._async_client = fake_firestore
+    return model
+
+
+class TestCursorEncoding:
+    """Test continuation token round-trips."""
+
+    def test_round_trip_scalar(self):
+        token = encode_cursor(42, "doc_1")
+        assert decode_cursor(token) == (42, "doc_1")
+
+    def test_round_trip_datetime(self):
+        moment = datetime(2024, 5, 1, 10, 30)
+        value, doc_id = decode_cursor(encode_cursor(moment, "doc_2"))
+        assert value == moment
+        assert doc_id == "doc_2"
+
+    def test_token_is_url_safe(self):
+        token = encode_cursor("a/b+c", "x" * 40)
+        assert "=" not in token and "+" not in token and "/" not in token
+
+    @pytest.mark.parametrize("token", ["", "not-base64!", encode_cursor(1, "a")[:-4]])
+    def test_invalid_token(self, token):
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(token)
+
+    def test_invalid_timestamp(self):
+        payload = base64.urlsafe_b64encode(b'{"v":{"$dt":"not-a-date"},"id":"a"}')
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(payload.decode("ascii").rstrip("="))
+
+
+@pytest.mark.asyncio
+class TestListPage:
+    """Test FirestoreBase.list_page and paginate."""
+
+    async def test_cursor_walk_visits_every_document_once(self, item_model):
+        seen = []
+        cursor = None
+        while True:
+            items, cursor = await item_model.list_page(
+                salon_id="salon_001",
+                order_by="rank",
+                page_size=PAGE_SIZE,
+                cursor=cursor,
+            )
+            seen.extend(item.id for item in items)
+            if cursor is None:
+                break
+
+        assert len(seen) == TOTAL_ITEMS
+        assert len(set(seen)) == TOTAL_ITEMS
+
+    async def test_descending_datetime_order(self, item_model):
+        first, cursor = await item_model.list_page(
+            salon_id="salon_001",
+            order_by="created_at",
+            order_direction="DESCENDING",
+            page_size=PAGE_SIZE,
+        )
+        second, _ = await item_model.list_page(
+            salon_id="salon_001",
+            order_by="created_at",
+            order_direction="DESCENDING",
+            page_size=PAGE_SIZE,
+            cursor=cursor,
+        )
+        timestamps = [item.created_at for item in first + second]
+        assert timestamps == sorted(timestamps, reverse=True)
+        assert not {i.id for i in first} & {i.id for i in second}
+
+    async def test_last_page_has_no_cursor(self, item_model):
+        items, cursor = await item_model.list_page(
+            salon_id="salon_001",
+            filters=[("rank", ">=", 160)],
+            order_by="rank",
+            page_size=PAGE_SIZE + 1,
+        )
+        assert len(items) == 20
+        assert cursor is None
+
+    async def test_list_offset_pushed_to_query(self, item_model):
+        items = await item_model.list(
+            salon_id="salon_001",
+            order_by="rank",
+            limit=PAGE_SIZE,
+            offset=PAGE_SIZE,
+        )
+        # Previously the offset was sliced from the already-limited page
+        assert len(items) == PAGE_SIZE
+
+    async def test_paginate_page_number_and_cursor_agree(self, item_model):
+        first = await item_model.paginate(
+            page=1, page_size=PAGE_SIZE, salon_id="salon_001", order_by="rank"
+        )
+        by_offset = await item_model.paginate(
+            page=2, page_size=PAGE_SIZE, salon_id="salon_001", order_by="rank"
+        )
+        by_cursor = await item_model.paginate(
+            page=2,
+            page_size=PAGE_SIZE,
+            salon_id="salon_001",
+            order_by="rank",
+            cursor=first.next_cursor,
+        )
+
+        assert first.total == TOTAL_ITEMS
+        assert [i.id for i in by_offset.items] == [i.id for i in by_cursor.items]
+        assert by_cursor.has_next
+        assert by_cursor.next_cursor is not None
+
+    async def test_invalid_cursor_raises(self, item_model):
+        with pytest.raises(InvalidCursorError):
+            await item_model.list_page(salon_id="salon_001", cursor="garbage")
+
+
+@pytest.mark.asyncio
+@pytest.mark.slow
+class TestPaginationReadBenchmark:
+    """Document reads per page must not grow with page depth."""
+
+    async def test_reads_per_page_stay_flat(self, item_model, fake_firestore):
+        cursor_reads = []
+        offset_reads = []
+        cursor = None
+
+        for page in range(1, TOTAL_ITEMS // PAGE_SIZE + 1):
+            before = fake_firestore.reads
+            _, cursor = await item_model.list_page(
+                salon_id="salon_001",
+                order_by="rank",
+                page_size=PAGE_SIZE,
+                cursor=cursor,
+            )
+            cursor_reads.append(fake_firestore.reads - before)
+
+            before = fake_firestore.reads
+            await item_model.list_page(
+                salon_id="salon_001",
+                order_by="rank",
+                page_size=PAGE_SIZE,
+                offset=(page - 1) * PAGE_SIZE,
+            )
+            offset_reads.append(fake_firestore.reads - before)
+
+        print(f"\nreads/page cursor: first={cursor_reads[0]} last={cursor_reads[-1]}")
+        print(f"reads/page offset: first={offset_reads[0]} last={offset_reads[-1]}")
+
+        assert set(cursor_reads) == {PAGE_SIZE}
+        assert offset_reads[-1] == TOTAL_ITEMS
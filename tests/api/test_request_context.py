@@ -0,0 +1,152 @@
+"""Tests for the request-scoped identity map.
+
+Covers:
+- Repeated reads within a scope hit the identity map
+- Writes update the map through
+- Per-request counters exposed by PerformanceHeadersMiddleware
+"""
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.core.middleware import PerformanceHeadersMiddleware
+from app.core.request_context import current_scope, request_scope
+from app.models.base import FirestoreBase
+from app.schemas.base import FirestoreModel
+
+
+class Service(FirestoreModel):
+    id: str
+    salon_id: str
+    name: str
+
+
+class ServiceModel(FirestoreBase[Service, Service, Service]):
+    collection_name = "services"
+    model = Service
+
+
+SERVICE = {"salon_id": "salon_001", "name": "Haircut"}
+
+
+@pytest.fixture
+def service_model(fake_firestore):
+    fake_firestore.seed("services", {"service_001": SERVICE, "service_002": SERVICE})
+    model = ServiceModel()
+    model._async_client = fake_firestore
+    return model
+
+
+@pytest.mark.asyncio
+class TestIdentityMap:
+    """Test FirestoreBase reads and writes inside a request scope."""
+
+    async def test_repeated_get_reads_once(self, service_model, fake_firestore):
+        with request_scope() as scope:
+            first = await service_model.get("service_001")
+            second = await service_model.get("service_001")
+
+        assert first is second
+        assert fake_firestore.reads == 1
+        assert scope.stats.firestore_reads == 1
+        assert scope.stats.validations == 1
+        assert scope.stats.identity_hits == 1
+
+    async def test_no_scope_no_identity_map(self, service_model, fake_firestore):
+        assert current_scope() is None
+
+        await service_model.get("service_001")
+        await service_model.get("service_001")
+
+        assert fake_firestore.reads == 2
+
+    async def test_scopes_are_isolated(self, service_model, fake_firestore):
+        with request_scope():
+            await service_model.get("service_001")
+        with request_scope():
+            await service_model.get("service_001")
+
+        assert fake_firestore.reads == 2
+
+    async def test_missing_document_is_remembered(self, service_model, fake_firestore):
+        with request_scope():
+            assert await service_model.get("nope") is None
+            assert await service_model.get("nope") is None
+
+        assert fake_firestore.reads == 1
+
+    async def test_update_writes_through(self, service_model, fake_firestore):
+        with request_scope():
+            await service_model.get("service_001")
+            await service_model.update("service_001", {"name": "Beard Trim"})
+            reads = fake_firestore.reads
+
+            service = await service_model.get("service_001")
+
+        assert service.name == "Beard Trim"
+        assert fake_firestore.reads == reads
+
+    async def test_delete_writes_through(self, service_model, fake_firestore):
+        with request_scope():
+            await service_model.get("service_001")
+            await service_model.delete("service_001")
+            reads = fake_firestore.reads
+
+            assert await service_model.get("service_001") is None
+
+        assert fake_firestore.reads == reads
+
+    async def test_create_is_visible_without_read(self, service_model, fake_firestore):
+        with request_scope():
+            created = await service_model.create(dict(SERVICE))
+            fetched = await service_model.get(created.id)
+
+        assert fetched is created
+        assert fake_firestore.reads == 0
+
+    async def test_use_cache_false_refreshes(self, service_model, fake_firestore):
+        with request_scope():
+            await service_model.get("service_001")
+            fake_firestore.data["services"]["service_001"]["name"] = "Changed"
+
+            fresh = await service_model.get("service_001", use_cache=False)
+            again = await service_model.get("service_001")
+
+        assert fresh.name == "Changed"
+        assert again is fresh
+
+    async def test_list_results_populate_map(self, service_model, fake_firestore):
+        with request_scope():
+            listed = await service_model.list(salon_id="salon_001")
+            reads = fake_firestore.reads
+            fetched = await service_model.get(listed[0].id)
+
+        assert fetched is listed[0]
+        assert fake_firestore.reads == reads
+
+
+@pytest.mark.asyncio
+class TestPerformanceHeaders:
+    """Test counters exposed as response headers."""
+
+    async def test_headers_report_request_counters(self, service_model):
+        app = FastAPI()
+        app.add_middleware(PerformanceHeadersMiddleware)
+
+        @app.get("/probe")
+        async def probe():
+            # Access check, handler and response each load the service
+            for _ in range(3):
+                await service_model.get("service_001")
+            return {"ok": True}
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.get("/probe")
+            second = await client.get("/probe")
+
+        for response in (first, second):
+            assert response.headers["x-firestore-reads"] == "1"
+            assert response.headers["x-identity-hits"] == "2"
+            assert response.headers["x-model-validations"] == "1"
+            assert response.headers["x-cache-hits"] == "0"
@@ -435,5 +435,73 @@ class TestResourceMultiTenant:
         app.dependency_overrides.clear()
 
 
+
+# ============================================================================
+# Resource Availability Tests
+# ============================================================================
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestResourceAvailability:
+    """Test the resource availability grid endpoint."""
+    
+    async def test_availability_uses_one_schedule_for_all_resources(self, app, mock_auth_context, mock_resource):
+        """Test that bookings for every resource come from one day schedule."""
+        from app.api.dependencies import get_current_user, get_salon_id
+        from app.services.availability import DaySchedule
+        
+        app.dependency_overrides[get_current_user] = lambda: mock_auth_context
+        app.dependency_overrides[get_salon_id] = lambda: "salon_001"
+        
+        second = mock_resource.model_copy(update={"id": "resource_002", "name": "Chair 2"})
+        schedule = DaySchedule.build(
+            salon_id="salon_001",
+            day=date(2024, 3, 11),
+            salon=None,
+            staff=[],
+            shifts=[],
+            bookings=[("booking_001", {
+                "resource_id": "resource_001",
+                "start_time": "10:00:00",
+                "end_time": "11:00:00",
+                "status": "confirmed",
+            })],
+            resources=[],
+        )
+        
+        with patch('app.api.resources.ResourceModel') as MockModel, \
+                patch('app.api.resources.availability_engine') as mock_engine:
+            mock_instance = AsyncMock()
+            mock_instance.list = AsyncMock(return_value=[mock_resource, second])
+            MockModel.return_value = mock_instance
+            mock_engine.get_schedule = AsyncMock(return_value=schedule)
+            
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get(
+                    "/api/v1/resources/availability?date=2024-03-11&slot_minutes=60"
+                )
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        mock_engine.get_schedule.assert_awaited_once()
+        
+        booked, free = data
+        assert booked["total_slots"] == 12
+        assert booked["available_slots"] == 11
+        assert booked["slots"][1] == {
+            "start_time": "10:00:00",
+            "end_time": "11:00:00",
+            "available": False,
+            "booking_id": "booking_001",
+        }
+        assert booked["free_windows"] == [
+            {"start_time": "09:00:00", "end_time": "10:00:00"},
+            {"start_time": "11:00:00", "end_time": "21:00:00"},
+        ]
+        assert free["available_slots"] == 12
+        
+        app.dependency_overrides.clear()
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,279 @@
+"""Tests for the async Upstash REST client.
+
+Covers:
+- Command encoding and REST responses
+- /pipeline batching (one request per pipeline)
+- RedisClient running on the Upstash backend
+- Load test of event-loop lag: blocking REST calls vs AsyncUpstashRedis
+"""
+import asyncio
+import json
+import threading
+import time
+from fnmatch import fnmatchcase
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.core.local_cache import LocalCache
+from app.core.redis import CacheConfig, RedisClient
+from app.core.upstash import AsyncUpstashRedis, UpstashError
+
+
+class FakeUpstashStore:
+    """Executes the REST command subset used by RedisClient."""
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def execute(self, command):
+        name, *args = command
+        name = name.upper()
+        if name == "PING":
+            return "PONG"
+        if name == "GET":
+            return self.data.get(args[0])
+        if name == "MGET":
+            return [self.data.get(key) for key in args]
+        if name == "SET":
+            key, value, *options = args
+            options = [str(option).upper() for option in options]
+            if "NX" in options and key in self.data:
+                return None
+            self.data[key] = str(value)
+            return "OK"
+        if name == "DEL":
+            return sum(
+                1 for key in args
+                if self.data.pop(key, None) is not None or self.sets.pop(key, None) is not None
+            )
+        if name == "EXISTS":
+            return sum(1 for key in args if key in self.data or key in self.sets)
+        if name == "EXPIRE":
+            return int(args[0] in self.data or args[0] in self.sets)
+        if name == "INCR":
+            self.data[args[0]] = str(int(self.data.get(args[0], 0)) + 1)
+            return int(self.data[args[0]])
+        if name == "SCAN":
+            cursor = int(args[0])
+            match = args[args.index("MATCH") + 1] if "MATCH" in args else "*"
+            keys = sorted(self.data)
+            page = keys[cursor:cursor + 2]
+            following = cursor + 2 if cursor + 2 < len(keys) else 0
+            return [str(following), [k for k in page if fnmatchcase(k, match)]]
+        if name == "SADD":
+            members = self.sets.setdefault(args[0], set())
+            added = len(set(args[1:]) - members)
+            members.update(args[1:])
+            return added
+        if name == "SMEMBERS":
+            return sorted(self.sets.get(args[0], ()))
+        if name == "PUBLISH":
+            return 0
+        return {"error": f"ERR unknown command '{name}'"}
+
+    def respond(self, path, body):
+        with self.lock:
+            self.requests.append(path)
+            commands = body if path in ("/pipeline", "/multi-exec") else [body]
+            results = []
+            for command in commands:
+                result = self.execute(command)
+                results.append(result if isinstance(result, dict) else {"result": result})
+        return results if path in ("/pipeline", "/multi-exec") else results[0]
+
+
+@pytest.fixture
+def store():
+    return FakeUpstashStore()
+
+
+@pytest.fixture
+def upstash(store):
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"] == "Bearer token"
+        return httpx.Response(200, json=store.respond(request.url.path, json.loads(request.content)))
+
+    return AsyncUpstashRedis("https://upstash.test", "token", transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+class TestAsyncUpstashRedis:
+    """Test the REST protocol implementation."""
+
+    async def test_basic_commands(self, upstash, store):
+        assert await upstash.ping() == "PONG"
+        assert await upstash.set("a", "1", ex=60) == "OK"
+        assert await upstash.set("a", "2", nx=True) is None
+        assert await upstash.get("a") == "1"
+        assert await upstash.mget(["a", "b"]) == ["1", None]
+        assert await upstash.exists("a") == 1
+        assert await upstash.incr("n") == 1
+        assert await upstash.delete("a", "n") == 2
+
+    async def test_pipeline_is_one_request(self, upstash, store):
+        async with upstash.pipeline(transaction=False) as pipe:
+            pipe.set("a", "1", ex=60).sadd("tag:x", "a").smembers("tag:x")
+            results = await pipe.execute()
+
+        assert results == ["OK", 1, ["a"]]
+        assert store.requests == ["/pipeline"]
+
+    async def test_transaction_uses_multi_exec(self, upstash, store):
+        async with upstash.pipeline() as pipe:
+            pipe.get("a")
+            await pipe.execute()
+
+        assert store.requests == ["/multi-exec"]
+
+    async def test_errors_raise(self, upstash):
+        with pytest.raises(UpstashError):
+            await upstash._command("BOGUS")
+
+        async with upstash.pipeline(transaction=False) as pipe:
+            pipe.get("a")._command("BOGUS")
+            with pytest.raises(UpstashError):
+                await pipe.execute()
+
+    async def test_scan_iter_follows_cursor(self, upstash, store):
+        store.data.update({f"catalog:s1:{i}": "x" for i in range(5)})
+        store.data["salon:s1"] = "x"
+
+        keys = [key async for key in upstash.scan_iter(match="catalog:*")]
+
+        assert sorted(keys) == [f"catalog:s1:{i}" for i in range(5)]
+        assert store.requests.count("/") > 1
+
+
+@pytest.mark.asyncio
+class TestRedisClientOnUpstash:
+    """RedisClient uses the same code path on the REST backend."""
+
+    @pytest.fixture
+    def client(self, upstash):
+        client = RedisClient()
+        client.client = upstash
+        client._connected = True
+        client._is_upstash_rest = True
+        client.local = LocalCache(CacheConfig.L1_POLICIES, enabled=False)
+        return client
+
+    async def test_round_trip(self, client):
+        assert await client.set("booking:b1", {"status": "confirmed"}, expire=60)
+        assert await client.get("booking:b1") == {"status": "confirmed"}
+        assert await client.delete("booking:b1")
+        assert await client.get("booking:b1") is None
+
+    async def test_batch_operations_are_pipelined(self, client, store):
+        await client.set_multi({f"booking:{i}": {"n": i} for i in range(20)}, expire=60, tags=["t"])
+
+        assert store.requests == ["/pipeline", "/pipeline"]
+        assert (await client.get_multi(["booking:3", "booking:99"])) == {"booking:3": {"n": 3}}
+
+        store.requests.clear()
+        assert await client.invalidate_tags(["t"]) == 21
+        assert store.requests == ["/pipeline", "/"]
+
+
+# ============================================================================
+# Load test
+# ============================================================================
+
+class _UpstashServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _UpstashHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    store: FakeUpstashStore = None
+    latency = 0.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.latency)
+        payload = json.dumps(self.store.respond(self.path, body)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+async def _measure_lag(workload):
+    """Run workload while a 1ms ticker records how late it wakes up."""
+    lags = []
+    running = True
+
+    async def ticker():
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await workload()
+    elapsed = time.perf_counter() - start
+    running = False
+    await task
+    return max(lags) * 1000, elapsed * 1000
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestEventLoopLag:
+    """Blocking REST calls stall every coroutine; the async client does not."""
+
+    async def test_lag_under_concurrent_requests(self, store):
+        store.data.update({f"salon:{i}": json.dumps({"id": i}) for i in range(50)})
+        handler = type("Handler", (_UpstashHandler,), {"store": store, "latency": 0.005})
+        server = _UpstashServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_port}"
+        headers = {"Authorization": "Bearer token"}
+        concurrency = 50
+
+        try:
+            blocking = httpx.Client(base_url=url, headers=headers)
+            blocking.post("/", json=["PING"])
+
+            async def blocking_get(key):
+                # What the synchronous upstash_redis client does inside async code
+                return blocking.post("/", json=["GET", key]).json()["result"]
+
+            async def blocking_workload():
+                await asyncio.gather(*(blocking_get(f"salon:{i}") for i in range(concurrency)))
+
+            client = AsyncUpstashRedis(url, "token")
+            await client.ping()
+
+            async def async_workload():
+                await asyncio.gather(*(client.get(f"salon:{i}") for i in range(concurrency)))
+
+            before_lag, before_ms = await _measure_lag(blocking_workload)
+            after_lag, after_ms = await _measure_lag(async_workload)
+            blocking.close()
+            await client.aclose()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        print(
+            f"\n{concurrency} concurrent cache reads, 5ms REST latency: "
+            f"blocking max loop lag={before_lag:.1f}ms total={before_ms:.1f}ms | "
+            f"async max loop lag={after_lag:.1f}ms total={after_ms:.1f}ms"
+        )
+        assert before_lag > concurrency * 5 * 0.8
+        assert after_lag < before_lag / 5
+        assert after_ms < before_ms
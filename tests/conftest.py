@@ -14,6 +14,7 @@ os.environ["FIRESTORE_EMULATOR_HOST"] = "localhost:8080"
 os.environ["FIREBASE_AUTH_EMULATOR_HOST"] = "localhost:9099"
 os.environ["REDIS_URL"] = "redis://localhost:6379"
 os.environ["OPENROUTER_API_KEY"] = "test-api-key"
+os.environ["EVENT_TRANSPORT"] = "memory"
 
 
 @pytest.fixture(scope="session")
@@ -37,11 +38,22 @@ def is_ai_test():
     return False
 
 
+def is_notification_test():
+    """Check if we're running notification service tests"""
+    for path in sys.path:
+        if 'services/notification' in path:
+            return True
+    for arg in sys.argv:
+        if 'tests/notification' in arg:
+            return True
+    return False
+
+
 @pytest.fixture(scope="session", autouse=True)
 def mock_firebase():
     """Mock Firebase at the application level."""
-    # Skip Firebase mock for AI service tests
-    if is_ai_test():
+    # Skip Firebase mock for AI and notification service tests
+    if is_ai_test() or is_notification_test():
         yield None
         return
         
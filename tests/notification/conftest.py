@@ -0,0 +1,6 @@
+"""Pytest configuration for notification service tests"""
+import sys
+import os
+
+# Add notification service to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/notification'))
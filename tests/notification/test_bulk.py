@@ -0,0 +1,580 @@
+"""Tests for bulk notification fan-out.
+
+Covers:
+- Template rendering and the bulk endpoints (dedup, idempotency, access)
+- Dispatcher: sends, jittered retries, permanent failures, redelivery
+- Per-salon shaping without starving other salons, shared through Redis
+- Redis stream queue: consumer group reads, retries, reclaiming a crashed
+  consumer's jobs, idempotency keys released when enqueueing fails
+- Messages/minute for a 10k-recipient batch
+"""
+import asyncio
+import bisect
+import math
+import time
+from collections import OrderedDict, defaultdict
+from itertools import count
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import bulk
+from app.bulk import (
+    SHAPE_SCRIPT,
+    BulkDispatcher,
+    LocalSendQueue,
+    RedisSendQueue,
+    SendJob,
+    _Shaper,
+    render_template,
+)
+from app.core.auth import AuthContext, get_current_user
+from app.core.upstash import UpstashError, _Commands
+from app.router import router
+from app.twilio_client import MessageResult
+
+
+# ============================================================================
+# Fakes
+# ============================================================================
+
+class FakeTwilioClient:
+    """Records sends; ``outcome(to, calls)`` decides each result."""
+
+    def __init__(self, outcome=None, latency=0.0, whatsapp_number="+15550001"):
+        self.outcome = outcome
+        self.latency = latency
+        self.whatsapp_number = whatsapp_number
+        self.sms_number = "+15550002"
+        self.calls = defaultdict(int)
+        self.sent = []
+
+    async def _send(self, to, message):
+        self.calls[to] += 1
+        await asyncio.sleep(self.latency)
+        if self.outcome is not None:
+            result = self.outcome(to, self.calls[to])
+            if result is not None:
+                return result
+        self.sent.append((to, message))
+        return MessageResult(success=True, message_sid=f"SM{len(self.sent)}", to=to, status="queued")
+
+    async def send_whatsapp(self, to, message, media_url=None):
+        return await self._send(to, message)
+
+    async def send_sms(self, to, message):
+        return await self._send(to, message)
+
+
+class FakeResolver:
+    def __init__(self, client=None, latency=0.0):
+        self.client = client
+        self.latency = latency
+        self.clients = {}
+
+    async def resolve_twilio_client(self, salon_id=None):
+        if self.client is not None:
+            return self.client
+        # One sending number per salon
+        if salon_id not in self.clients:
+            number = f"+1555{len(self.clients):07d}"
+            self.clients[salon_id] = FakeTwilioClient(latency=self.latency, whatsapp_number=number)
+        return self.clients[salon_id]
+
+
+class FakeUpstash(_Commands):
+    """Dict-backed subset of Redis (strings, hashes, sorted sets, streams)."""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.kv = {}
+        self.hashes = defaultdict(dict)
+        self.zsets = defaultdict(dict)
+        self.streams = defaultdict(OrderedDict)
+        self.groups = {}
+        self.ids = count(1)
+
+    async def _command(self, *args):
+        return self.run(list(args))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def aclose(self):
+        pass
+
+    def run(self, args):
+        cmd, a = args[0].upper(), args[1:]
+        if cmd == "SET":
+            if "NX" in a and a[0] in self.kv:
+                return None
+            self.kv[a[0]] = str(a[1])
+            return "OK"
+        if cmd == "GET":
+            return self.kv.get(a[0])
+        if cmd == "DEL":
+            return sum(
+                (self.kv.pop(key, None) or self.hashes.pop(key, None)) is not None for key in a
+            )
+        if cmd == "EXISTS":
+            return sum(key in self.kv or key in self.hashes for key in a)
+        if cmd == "EXPIRE":
+            return 1
+        if cmd == "HSET":
+            self.hashes[a[0]].update({a[i]: str(a[i + 1]) for i in range(1, len(a), 2)})
+            return (len(a) - 1) // 2
+        if cmd == "HINCRBY":
+            value = int(self.hashes[a[0]].get(a[1], 0)) + int(a[2])
+            self.hashes[a[0]][a[1]] = str(value)
+            return value
+        if cmd == "HGETALL":
+            return [item for pair in self.hashes.get(a[0], {}).items() for item in pair]
+        if cmd == "ZADD":
+            self.zsets[a[0]].update({a[i + 1]: float(a[i]) for i in range(1, len(a), 2)})
+            return 1
+        if cmd == "EVAL" and a[0] == SHAPE_SCRIPT:
+            key, now, interval, tolerance, at = a[2], float(a[3]), float(a[4]), float(a[5]), float(a[6])
+            tat = max(float(self.kv.get(key, at)), at)
+            self.kv[key] = str(tat + interval)
+            return max(0, math.ceil(max(tat - tolerance, at) - now))
+        if cmd == "EVAL":
+            # PROMOTE_SCRIPT
+            delayed, stream, now, limit = a[2], a[3], float(a[4]), int(a[5])
+            due = sorted((s, m) for m, s in self.zsets[delayed].items() if s <= now)[:limit]
+            for _, member in due:
+                del self.zsets[delayed][member]
+                self.run(["XADD", stream, "*", "job", member])
+            return len(due)
+        if cmd == "XADD":
+            entry_id = f"{next(self.ids)}-0"
+            self.streams[a[0]][entry_id] = list(a[2:])
+            return entry_id
+        if cmd == "XGROUP":
+            key = (a[1], a[2])
+            if key in self.groups:
+                raise UpstashError("BUSYGROUP Consumer Group name already exists")
+            self.groups[key] = {"delivered": set(), "pending": {}}
+            return "OK"
+        if cmd == "XREADGROUP":
+            group_name, consumer, n, stream = a[1], a[2], int(a[4]), a[6]
+            group = self.groups[(stream, group_name)]
+            entries = []
+            for entry_id, fields in self.streams[stream].items():
+                if len(entries) == n:
+                    break
+                if entry_id not in group["delivered"]:
+                    group["delivered"].add(entry_id)
+                    group["pending"][entry_id] = (consumer, self.clock())
+                    entries.append([entry_id, fields])
+            return [[stream, entries]] if entries else None
+        if cmd == "XAUTOCLAIM":
+            stream, group_name, consumer, min_idle, n = a[0], a[1], a[2], int(a[3]), int(a[6])
+            group = self.groups[(stream, group_name)]
+            claimed = []
+            for entry_id, (_, delivered_at) in list(group["pending"].items()):
+                if len(claimed) < n and (self.clock() - delivered_at) * 1000 >= min_idle:
+                    group["pending"][entry_id] = (consumer, self.clock())
+                    claimed.append([entry_id, self.streams[stream].get(entry_id)])
+            return ["0-0", claimed, []]
+        if cmd == "XACK":
+            group = self.groups[(a[0], a[1])]
+            return sum(group["pending"].pop(entry_id, None) is not None for entry_id in a[2:])
+        if cmd == "XDEL":
+            return sum(self.streams[a[0]].pop(entry_id, None) is not None for entry_id in a[1:])
+        raise UpstashError(f"ERR unknown command '{cmd}'")
+
+
+class FakePipeline(_Commands):
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.commands.clear()
+
+    def _command(self, *args):
+        self.commands.append(list(args))
+        return self
+
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        return [self.redis.run(command) for command in commands]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _jobs(batch_id, n, salon_id="salon_1", channel="whatsapp"):
+    return [
+        SendJob(job_id=f"{batch_id}:{i}", batch_id=batch_id, salon_id=salon_id, channel=channel,
+                to=f"+9198765{i:05d}", body=f"Hi {i}", batch_total=n)
+        for i in range(n)
+    ]
+
+
+async def _wait_done(queue, batch_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        batch = await queue.get_batch(batch_id)
+        if batch["done"] >= batch["total"]:
+            return batch
+        assert time.monotonic() < deadline, batch
+        await asyncio.sleep(0.01)
+
+
+def _dispatcher(queue, client, **kwargs):
+    options = dict(concurrency=16, salon_rate=10_000, number_rate=10_000, burst=100,
+                   max_attempts=3, retry_base=0, poll_interval=0.01)
+    options.update(kwargs)
+    return BulkDispatcher(queue, FakeResolver(client), **options)
+
+
+# ============================================================================
+# Tests
+# ============================================================================
+
+class TestRenderTemplate:
+    """Test placeholder filling"""
+
+    def test_fills_known_placeholders(self):
+        assert render_template("Hi {name}, 20% off {service}!", {"name": "Asha", "service": "facials"}) == \
+            "Hi Asha, 20% off facials!"
+
+    def test_leaves_unknown_placeholders(self):
+        assert render_template("Hi {name} {name.__class__}", {}) == "Hi {name} {name.__class__}"
+
+
+@pytest.mark.asyncio
+class TestDispatcher:
+    """Test draining the queue"""
+
+    async def test_sends_every_job(self):
+        queue, client = LocalSendQueue(), FakeTwilioClient()
+        await queue.create_batch("b1", _jobs("b1", 50), {"salon_id": "salon_1"})
+        dispatcher = _dispatcher(queue, client)
+
+        await dispatcher.start()
+        batch = await _wait_done(queue, "b1")
+        await dispatcher.stop()
+
+        assert batch["sent"] == 50 and batch["failed"] == 0
+        assert len(client.sent) == 50
+        assert dispatcher.stats()["sent"] == 50
+
+    async def test_retries_transient_failures(self):
+        def throttled_twice(to, calls):
+            if calls <= 2:
+                return MessageResult(success=False, error="Twilio error: Too Many Requests", to=to, retryable=True)
+
+        queue, client = LocalSendQueue(), FakeTwilioClient(throttled_twice)
+        await queue.create_batch("b1", _jobs("b1", 5), {})
+        dispatcher = _dispatcher(queue, client)
+
+        await dispatcher.start()
+        batch = await _wait_done(queue, "b1")
+        await dispatcher.stop()
+
+        assert batch["sent"] == 5
+        assert batch["retried"] == 10
+
+    async def test_gives_up_after_max_attempts(self):
+        def down(to, calls):
+            return MessageResult(success=False, error="boom", to=to, retryable=True)
+
+        queue, client = LocalSendQueue(), FakeTwilioClient(down)
+        await queue.create_batch("b1", _jobs("b1", 2), {})
+        dispatcher = _dispatcher(queue, client, max_attempts=3)
+
+        await dispatcher.start()
+        batch = await _wait_done(queue, "b1")
+        await dispatcher.stop()
+
+        assert batch["failed"] == 2
+        assert dict(client.calls) == {"+919876500000": 3, "+919876500001": 3}
+
+    async def test_permanent_failures_are_not_retried(self):
+        def invalid(to, calls):
+            return MessageResult(success=False, error="Twilio error: Invalid 'To' Phone Number", to=to)
+
+        queue, client = LocalSendQueue(), FakeTwilioClient(invalid)
+        await queue.create_batch("b1", _jobs("b1", 3), {})
+        dispatcher = _dispatcher(queue, client)
+
+        await dispatcher.start()
+        batch = await _wait_done(queue, "b1")
+        await dispatcher.stop()
+
+        assert batch["failed"] == 3 and batch["retried"] == 0
+
+    async def test_redelivered_job_is_not_sent_twice(self):
+        queue, client = LocalSendQueue(), FakeTwilioClient()
+        jobs = _jobs("b1", 3)
+        await queue.create_batch("b1", jobs + [jobs[0]], {})
+        dispatcher = _dispatcher(queue, client, concurrency=1)
+
+        await dispatcher.start()
+        batch = await _wait_done(queue, "b1")
+        await dispatcher.stop()
+
+        assert batch["duplicate"] == 1
+        assert len(client.sent) == 3
+
+    async def test_salon_sends_are_spaced(self):
+        queue, client = LocalSendQueue(), FakeTwilioClient()
+        await queue.create_batch("b1", _jobs("b1", 10), {})
+        dispatcher = _dispatcher(queue, client, salon_rate=50, burst=1)
+
+        started = time.monotonic()
+        await dispatcher.start()
+        await _wait_done(queue, "b1")
+        await dispatcher.stop()
+
+        assert time.monotonic() - started >= 9 * 0.02 * 0.9
+
+    async def test_large_campaign_does_not_starve_other_salons(self):
+        queue, resolver = LocalSendQueue(), FakeResolver()
+        await queue.create_batch("big", _jobs("big", 300, salon_id="salon_1"), {})
+        await queue.create_batch("small", _jobs("small", 5, salon_id="salon_2"), {})
+        dispatcher = BulkDispatcher(queue, resolver, concurrency=8, salon_rate=50, number_rate=50,
+                                    burst=1, poll_interval=0.01)
+
+        started = time.monotonic()
+        await dispatcher.start()
+        await _wait_done(queue, "small", timeout=2)
+        elapsed = time.monotonic() - started
+        await dispatcher.stop()
+
+        assert elapsed < 1.0  # salon_1 alone needs 6s
+        assert dispatcher.stats()["deferred"] > 0
+
+    async def test_shaper_reserves_slots_in_order(self):
+        clock = FakeClock()
+        shaper = _Shaper(rate=10, burst=2, clock=clock)
+
+        delays = [await shaper.reserve("salon_1") for _ in range(4)]
+
+        assert delays == pytest.approx([0, 0, 0.1, 0.2])
+        assert await shaper.reserve("salon_2") == 0
+
+    async def test_shaper_state_is_shared_through_redis(self):
+        clock, redis = FakeClock(), FakeUpstash()
+        instances = [_Shaper(rate=10, burst=2, clock=clock, redis=redis) for _ in range(2)]
+
+        delays = [await instances[i % 2].reserve("+15550001") for i in range(4)]
+
+        assert delays == pytest.approx([0, 0, 0.1, 0.2])
+
+
+    async def test_shaper_slot_is_not_before_after(self):
+        clock = FakeClock()
+        shaper = _Shaper(rate=10, burst=2, clock=clock)
+
+        delays = [await shaper.reserve("+15550001", after=0.5) for _ in range(3)]
+
+        assert delays == pytest.approx([0.5, 0.5, 0.6])
+
+    async def test_number_rate_holds_across_salons(self):
+        clock = FakeClock()
+        queue, client = LocalSendQueue(), FakeTwilioClient()  # one number for every salon
+        dispatcher = _dispatcher(queue, client, max_wait=0)
+        dispatcher._salons = _Shaper(rate=10, burst=1, clock=clock)
+        dispatcher._numbers = _Shaper(rate=80, burst=1, clock=clock)
+        sends = []
+
+        async def defer(entry_id, job, delay):
+            sends.append(delay)
+
+        queue.defer = defer
+        # One campaign per salon, queued one after the other
+        jobs = [job for i in range(10) for job in _jobs(f"b{i}", 100, salon_id=f"salon_{i}")]
+        for i, job in enumerate(jobs):
+            await dispatcher._dispatch(str(i), job)
+        sends = sorted([0.0, *sends])  # the first job went out immediately
+
+        assert len(sends) == 1000
+        assert max(bisect.bisect_left(sends, t + 1 - 1e-9) - i for i, t in enumerate(sends)) <= 80
+
+@pytest.mark.asyncio
+class TestRedisSendQueue:
+    """Test the Redis stream queue"""
+
+    async def test_drains_through_consumer_group(self):
+        redis, client = FakeUpstash(), FakeTwilioClient()
+        queue = RedisSendQueue(redis, consumer="a", enqueue_chunk=7)
+        await queue.create_batch("b1", _jobs("b1", 20), {"salon_id": "salon_1", "channel": "whatsapp"})
+        dispatcher = _dispatcher(queue, client)
+
+        await dispatcher.start()
+        batch = await _wait_done(queue, "b1")
+        await dispatcher.stop()
+
+        assert batch["sent"] == 20 and batch["salon_id"] == "salon_1"
+        assert not redis.streams["notify:send"]  # acked and deleted
+        assert redis.kv["notify:job:b1:0"] == "sent"
+
+    async def test_retries_go_through_delay_set(self):
+        def flaky(to, calls):
+            if calls == 1:
+                return MessageResult(success=False, error="HTTP 503", to=to, retryable=True)
+
+        redis, client = FakeUpstash(), FakeTwilioClient(flaky)
+        queue = RedisSendQueue(redis, consumer="a")
+        await queue.create_batch("b1", _jobs("b1", 4), {})
+        dispatcher = _dispatcher(queue, client)
+
+        await dispatcher.start()
+        batch = await _wait_done(queue, "b1")
+        await dispatcher.stop()
+
+        assert (batch["sent"], batch["retried"]) == (4, 4)
+        assert not redis.zsets["notify:send:delayed"]
+
+    async def test_crashed_consumer_jobs_are_reclaimed(self):
+        clock = FakeClock()
+        redis, client = FakeUpstash(clock), FakeTwilioClient()
+        crashed = RedisSendQueue(redis, consumer="a", clock=clock)
+        await crashed.create_batch("b1", _jobs("b1", 5), {})
+        assert len(await crashed.read(10)) == 5  # read, then never acked
+
+        survivor = RedisSendQueue(redis, consumer="b", claim_idle=60, clock=clock)
+        assert await survivor.read(10) == []
+        clock.now += 61
+        survivor._next_reclaim = 0
+        dispatcher = _dispatcher(survivor, client)
+
+        await dispatcher.start()
+        batch = await _wait_done(survivor, "b1")
+        await dispatcher.stop()
+
+        assert batch["sent"] == 5
+
+    async def test_idempotency_key_returns_original_batch(self):
+        queue = RedisSendQueue(FakeUpstash(), consumer="a")
+
+        first = await queue.create_batch("b1", _jobs("b1", 3), {"salon_id": "s1"}, idempotency_key="campaign-9")
+        second = await queue.create_batch("b2", _jobs("b2", 3), {"salon_id": "s1"}, idempotency_key="campaign-9")
+
+        assert first == ("b1", True)
+        assert second == ("b1", False)
+        assert len(queue.redis.streams["notify:send"]) == 3
+        assert "notify:batch:b2" not in queue.redis.hashes
+
+    async def test_failed_enqueue_releases_idempotency_key(self):
+        redis = FakeUpstash()
+        queue = RedisSendQueue(redis, consumer="a")
+        run = redis.run
+
+        def xadd_down(args):
+            if args[0] == "XADD":
+                raise UpstashError("ERR connection reset")
+            return run(args)
+
+        redis.run = xadd_down
+        with pytest.raises(UpstashError):
+            await queue.create_batch("b1", _jobs("b1", 3), {"salon_id": "s1"}, idempotency_key="campaign-9")
+        redis.run = run
+        retried = await queue.create_batch("b2", _jobs("b2", 3), {"salon_id": "s1"}, idempotency_key="campaign-9")
+
+        assert retried == ("b2", True)
+        assert len(redis.streams["notify:send"]) == 3
+
+    async def test_key_without_batch_is_taken_over(self):
+        redis = FakeUpstash()
+        queue = RedisSendQueue(redis, consumer="a")
+        redis.kv["notify:bulk-key:s1:campaign-9"] = "lost"
+
+        result = await queue.create_batch("b1", _jobs("b1", 2), {"salon_id": "s1"}, idempotency_key="campaign-9")
+
+        assert result == ("b1", True)
+        assert redis.kv["notify:bulk-key:s1:campaign-9"] == "b1"
+
+
+@pytest.fixture
+def api(monkeypatch):
+    queue = LocalSendQueue()
+    monkeypatch.setattr(bulk, "_send_queue", queue)
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = lambda: AuthContext(uid="user-1", role="owner", salon_id="salon_1")
+    with TestClient(app) as client:
+        yield client, queue
+
+
+class TestBulkEndpoints:
+    """Test the bulk send API"""
+
+    def test_queues_rendered_messages(self, api):
+        client, queue = api
+        response = client.post("/api/v1/bulk/send", json={
+            "template": "Hi {name}, your reminder",
+            "recipients": [
+                {"to": "+919876500001", "variables": {"name": "Asha"}},
+                {"to": "+919876500002", "variables": {"name": "Ravi"}},
+                {"to": "+919876500001", "variables": {"name": "Asha"}},
+            ],
+        })
+
+        assert response.status_code == 202
+        data = response.json()
+        assert (data["queued"], data["duplicates"]) == (2, 1)
+        assert [job.body for _, job in queue._ready] == ["Hi Asha, your reminder", "Hi Ravi, your reminder"]
+        assert all(job.salon_id == "salon_1" for _, job in queue._ready)
+
+        progress = client.get(f"/api/v1/bulk/{data['batch_id']}").json()
+        assert (progress["total"], progress["done"], progress["complete"]) == (2, 0, False)
+
+    def test_resubmission_with_idempotency_key(self, api):
+        client, queue = api
+        body = {"template": "Hi", "recipients": [{"to": "+919876500001"}], "idempotency_key": "reminders-0612"}
+
+        first = client.post("/api/v1/bulk/send", json=body).json()
+        second = client.post("/api/v1/bulk/send", json=body).json()
+
+        assert second["batch_id"] == first["batch_id"]
+        assert second["created"] is False
+        assert len(queue._ready) == 1
+
+    def test_other_salon_is_forbidden(self, api):
+        client, _ = api
+        response = client.post("/api/v1/bulk/send", json={
+            "template": "Hi", "recipients": [{"to": "+919876500001"}], "salon_id": "salon_2",
+        })
+
+        assert response.status_code == 403
+
+    def test_unknown_batch(self, api):
+        client, _ = api
+        assert client.get("/api/v1/bulk/missing").status_code == 404
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestBulkThroughput:
+    """Messages/minute for 10k recipients over 20 salons (20ms Twilio, 64 in flight, default shaping)"""
+
+    async def test_ten_thousand_per_minute(self):
+        queue, resolver = LocalSendQueue(), FakeResolver(latency=0.02)
+        for s in range(20):
+            await queue.create_batch(f"b{s}", _jobs(f"b{s}", 500, salon_id=f"salon_{s}"), {})
+        dispatcher = BulkDispatcher(queue, resolver, concurrency=64, poll_interval=0.01)
+
+        started = time.perf_counter()
+        await dispatcher.start()
+        for s in range(20):
+            await _wait_done(queue, f"b{s}", timeout=60)
+        elapsed = time.perf_counter() - started
+        await dispatcher.stop()
+
+        per_minute = 10_000 / elapsed * 60
+        print(f"\n10k messages in {elapsed:.1f}s: {per_minute:,.0f} messages/minute")
+        assert sum(len(c.sent) for c in resolver.clients.values()) == 10_000
+        assert per_minute > 10_000
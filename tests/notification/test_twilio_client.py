@@ -0,0 +1,318 @@
+"""Tests for Twilio dispatch and per-salon credential resolution.
+
+Covers:
+- Async sends over the pooled REST client (form, auth, errors)
+- Concurrent sends overlapping instead of blocking the event loop
+- Per-salon client cache: hits, shared misses, TTL, LRU, invalidation
+- Sends/sec against a local Twilio stand-in, SDK vs pooled async
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app import router as router_module
+from app import twilio_client as twilio_module
+from app.router import CredentialResolver, IntegrationLookupError, SalonIntegrationConfig
+from app.twilio_client import TwilioClient, close_twilio_http_client, get_twilio_http_client
+
+
+class FakeTwilio:
+    """httpx handler answering like the Messages endpoint."""
+
+    def __init__(self, latency=0.0):
+        self.requests = []
+        self.latency = latency
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        await asyncio.sleep(self.latency)
+        form = parse_qs(request.content.decode())
+        if form["To"][0].endswith("+000"):
+            return httpx.Response(400, json={"code": 21211, "message": "Invalid 'To' Phone Number", "status": 400})
+        return httpx.Response(201, json={"sid": f"SM{len(self.requests):032d}", "status": "queued"})
+
+
+@pytest.fixture
+def twilio():
+    fake = FakeTwilio()
+    yield fake
+    twilio_module._twilio_http_client = None
+
+
+def _client(fake, **kwargs):
+    http = httpx.AsyncClient(base_url="https://api.twilio.com", transport=httpx.MockTransport(fake))
+    return TwilioClient("AC123", "secret", whatsapp_number="+15550001", sms_number="+15550002", http_client=http, **kwargs)
+
+
+@pytest.mark.asyncio
+class TestTwilioClient:
+    """Test async REST sends"""
+
+    async def test_send_whatsapp(self, twilio):
+        result = await _client(twilio).send_whatsapp("919876543210", "Your booking is confirmed")
+
+        assert result.success
+        assert result.status == "queued"
+        request = twilio.requests[0]
+        assert request.url.path == "/2010-04-01/Accounts/AC123/Messages.json"
+        assert request.headers["authorization"].startswith("Basic ")
+        form = parse_qs(request.content.decode())
+        assert form == {
+            "From": ["whatsapp:+15550001"],
+            "Body": ["Your booking is confirmed"],
+            "To": ["whatsapp:+919876543210"],
+        }
+
+    async def test_send_sms(self, twilio):
+        result = await _client(twilio).send_sms("+919876543210", "See you at 3pm")
+
+        assert result.success
+        assert parse_qs(twilio.requests[0].content.decode())["From"] == ["+15550002"]
+
+    async def test_twilio_error(self, twilio):
+        result = await _client(twilio).send_sms("+000", "Hi")
+
+        assert not result.success
+        assert result.error == "Twilio error: Invalid 'To' Phone Number"
+
+    async def test_sends_overlap(self):
+        fake = FakeTwilio(latency=0.05)
+        client = _client(fake)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client.send_sms(f"+9198765{i:05d}", "Hi") for i in range(20)))
+
+        assert all(r.success for r in results)
+        assert time.perf_counter() - started < 0.5
+
+    async def test_clients_share_one_pool(self, twilio):
+        pooled = get_twilio_http_client(transport=httpx.MockTransport(twilio))
+        a = TwilioClient("AC1", "t1", sms_number="+1")
+        b = TwilioClient("AC2", "t2", sms_number="+2")
+
+        await a.send_sms("+919876543210", "Hi")
+        await b.send_sms("+919876543210", "Hi")
+
+        assert a.http_client is b.http_client is pooled
+        assert [r.url.path.split("/")[3] for r in twilio.requests] == ["AC1", "AC2"]
+        await close_twilio_http_client()
+        assert pooled.is_closed
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingResolver(CredentialResolver):
+    """Resolver whose Firestore lookup is a counted in-memory read."""
+
+    def __init__(self, integrations=None, latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.integrations = integrations or {}
+        self.reads = 0
+        self.latency = latency
+
+    async def get_salon_integration(self, salon_id):
+        self.reads += 1
+        await asyncio.sleep(self.latency)
+        return self.integrations.get(salon_id)
+
+
+def _byok(salon_id, sid="ACsalon"):
+    return SalonIntegrationConfig(
+        salon_id=salon_id, twilio_account_sid=sid, twilio_auth_token="token",
+        twilio_whatsapp_number="+15550009", mode="byok", status="active",
+    )
+
+
+@pytest.fixture
+def platform(monkeypatch):
+    monkeypatch.setattr(router_module.settings, "twilio_account_sid", "ACplatform")
+    monkeypatch.setattr(router_module.settings, "twilio_auth_token", "platform-token")
+
+
+@pytest.mark.asyncio
+class TestCredentialCache:
+    """Test the per-salon resolved client cache"""
+
+    async def test_resolves_once_per_salon(self, platform):
+        resolver = CountingResolver({"salon_1": _byok("salon_1")})
+
+        clients = [await resolver.resolve_twilio_client("salon_1") for _ in range(10)]
+
+        assert resolver.reads == 1
+        assert clients[0].account_sid == "ACsalon"
+        assert all(c is clients[0] for c in clients)
+        assert resolver.stats()["hit_rate"] == 0.9
+
+    async def test_platform_salons_are_cached(self, platform):
+        resolver = CountingResolver()
+
+        for _ in range(3):
+            client = await resolver.resolve_twilio_client("salon_2")
+
+        assert client.account_sid == "ACplatform"
+        assert resolver.reads == 1
+
+    async def test_concurrent_misses_share_one_lookup(self, platform):
+        resolver = CountingResolver({"salon_1": _byok("salon_1")}, latency=0.01)
+
+        clients = await asyncio.gather(*(resolver.resolve_twilio_client("salon_1") for _ in range(50)))
+
+        assert resolver.reads == 1
+        assert len({id(c) for c in clients}) == 1
+
+    async def test_ttl_expiry(self, platform):
+        clock = FakeClock()
+        resolver = CountingResolver({"salon_1": _byok("salon_1")}, ttl=300, clock=clock)
+
+        await resolver.resolve_twilio_client("salon_1")
+        clock.now += 301
+        await resolver.resolve_twilio_client("salon_1")
+
+        assert resolver.reads == 2
+
+    async def test_integration_change_evicts(self, platform):
+        resolver = CountingResolver({"salon_1": _byok("salon_1")})
+        await resolver.resolve_twilio_client("salon_1")
+
+        resolver.integrations["salon_1"] = _byok("salon_1", sid="ACrotated")
+        change = SimpleNamespace(document=SimpleNamespace(id="salon_1"))
+        resolver._loop = asyncio.get_running_loop()
+        # The listener fires on the watch thread; eviction lands on the loop
+        await asyncio.to_thread(resolver._on_integrations_snapshot, [], [change], None)
+        await asyncio.sleep(0)
+        client = await resolver.resolve_twilio_client("salon_1")
+
+        assert client.account_sid == "ACrotated"
+        assert resolver.stats()["invalidations"] == 1
+
+    async def test_lookup_failure_falls_back_without_caching(self, platform):
+        resolver = CountingResolver({"salon_1": _byok("salon_1")})
+        lookup = resolver.get_salon_integration
+
+        async def failing(salon_id):
+            resolver.reads += 1
+            raise IntegrationLookupError("firestore unavailable")
+
+        resolver.get_salon_integration = failing
+        fallback = await resolver.resolve_twilio_client("salon_1")
+        resolver.get_salon_integration = lookup
+        client = await resolver.resolve_twilio_client("salon_1")
+
+        assert fallback.account_sid == "ACplatform"
+        assert client.account_sid == "ACsalon"
+        assert resolver.reads == 2
+
+    async def test_invalidation_during_lookup_is_not_cached(self, platform):
+        resolver = CountingResolver({"salon_1": _byok("salon_1")}, latency=0.01)
+
+        pending = asyncio.ensure_future(resolver.resolve_twilio_client("salon_1"))
+        await asyncio.sleep(0)
+        resolver.invalidate("salon_1")
+        await pending
+        await resolver.resolve_twilio_client("salon_1")
+
+        assert resolver.reads == 2
+
+    async def test_cache_is_bounded(self, platform):
+        resolver = CountingResolver(max_size=10)
+
+        for i in range(100):
+            await resolver.resolve_twilio_client(f"salon_{i}")
+
+        assert resolver.stats()["size"] == 10
+
+    async def test_missing_platform_credentials_not_cached(self, monkeypatch):
+        monkeypatch.setattr(router_module.settings, "twilio_account_sid", None)
+        resolver = CountingResolver()
+
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                await resolver.resolve_twilio_client("salon_1")
+
+        assert resolver.reads == 2
+
+
+# ============================================================================
+# Throughput against a local Twilio stand-in
+# ============================================================================
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    latency = 0.02
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        body = json.dumps({"sid": "SM" + "0" * 32, "status": "queued"}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def twilio_stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+class TestDispatchBenchmark:
+    """Sends/sec per instance: blocking SDK call vs pooled async client (20ms Twilio)"""
+
+    async def test_sends_per_second(self, twilio_stand_in):
+        from twilio.http.http_client import TwilioHttpClient
+        from twilio.rest import Client
+
+        class StandInHttpClient(TwilioHttpClient):
+            def request(self, method, url, *args, **kwargs):
+                url = url.replace("https://api.twilio.com", twilio_stand_in)
+                return super().request(method, url, *args, **kwargs)
+
+        sends = 100
+        sdk = Client("AC123", "secret", http_client=StandInHttpClient())
+
+        async def sdk_send(i):
+            # Previous send path: blocking SDK call inside the coroutine
+            return sdk.messages.create(from_="+15550002", body="Hi", to=f"+9198765{i:05d}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(sdk_send(i) for i in range(sends)))
+        before = sends / (time.perf_counter() - started)
+
+        http = httpx.AsyncClient(base_url=twilio_stand_in, limits=httpx.Limits(max_connections=100))
+        client = TwilioClient("AC123", "secret", sms_number="+15550002", http_client=http)
+        await client.send_sms("+919876500000", "warm up")
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client.send_sms(f"+9198765{i:05d}", "Hi") for i in range(sends)))
+        after = sends / (time.perf_counter() - started)
+        await http.aclose()
+
+        print(f"\n{sends} sends: blocking SDK {before:.0f}/s, pooled async {after:.0f}/s")
+        assert all(r.success for r in results)
+        assert after > before * 3